@@ -10,7 +10,12 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import pbr.version
 
+def __getattr__(name):
+    # pbr pulls in pkg_resources, which is slow to import, so only look the
+    # version up when it is asked for
+    if name == "__version__":
+        import pbr.version
 
-__version__ = pbr.version.VersionInfo("python-esiclient").version_string()
+        return pbr.version.VersionInfo("python-esiclient").version_string()
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
@@ -0,0 +1,357 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+"""Pace the API calls esi commands make, so bulk operations do not
+overwhelm the services they call
+
+Every client a command uses sends its requests through one keystoneauth
+session, so governing that session covers every call:
+
+- a token bucket per service type limits the rate calls are started at,
+  if ESI_RATE_LIMITS sets one, e.g. ``network=20,baremetal=10`` calls per
+  second, or a bare number for every service
+- at most ESI_MAX_IN_FLIGHT calls to each endpoint are made at once
+- a 429 or 503 response, which means the service refused the call, pauses
+  calls to that service and halves its rate and in-flight limit; the call
+  is then made again, up to MAX_RETRIES times, unless it was refused with
+  503 and its method is not idempotent. Successful calls raise the limits
+  back up gradually.
+
+The time each call waits is logged at debug level.
+"""
+
+import functools
+import logging
+import os
+import random
+import threading
+import time
+import urllib.parse
+
+from esiclient import metrics
+
+LOG = logging.getLogger(__name__)
+
+RATE_LIMITS_ENV = "ESI_RATE_LIMITS"
+MAX_IN_FLIGHT_ENV = "ESI_MAX_IN_FLIGHT"
+
+# the key of the rate limit for services without their own
+ALL_SERVICES = "*"
+
+DEFAULT_MAX_IN_FLIGHT = 32
+
+# status codes of calls a service refused because it is overloaded
+THROTTLED = (429, 503)
+# a 503 may come from a proxy after the service made the change, so only
+# calls that can safely be made twice are retried on it
+IDEMPOTENT_METHODS = ("GET", "HEAD", "PUT", "DELETE")
+MAX_RETRIES = 3
+BASE_BACKOFF = 0.5
+MAX_BACKOFF = 60
+
+# waits shorter than this are not worth logging
+LOG_THRESHOLD = 0.001
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Return how long to wait before making a refused call again
+
+    :param attempt: The number of attempts already made, from 1
+    :param retry_after: The value of the response's Retry-After header
+    :returns: The seconds to wait: Retry-After if given in seconds,
+        otherwise an exponential backoff with jitter
+    """
+    try:
+        return min(MAX_BACKOFF, max(0.0, float(retry_after)))
+    except (TypeError, ValueError):
+        pass
+    return min(MAX_BACKOFF, BASE_BACKOFF * 2 ** (attempt - 1)) * random.uniform(0.5, 1)
+
+
+class TokenBucket(object):
+    """Limit the rate calls are started at, allowing short bursts
+
+    Without a rate the bucket only applies pauses.
+
+    :param rate: The maximum calls per second, or None for no limit
+    :param burst: The number of calls that can be started at once after
+        a quiet period, by default a second's worth
+    """
+
+    # the rate is never lowered below this, in calls per second
+    MIN_RATE = 0.1
+
+    def __init__(self, rate=None, burst=None):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst or max(1.0, rate or 1.0)
+        self.tokens = self.burst
+        self.lock = threading.Lock()
+        self.updated = time.monotonic()
+        self.paused_until = self.updated
+
+    def reserve(self):
+        """Take a token, returning the seconds to wait before using it"""
+        with self.lock:
+            now = time.monotonic()
+            delay = max(0.0, self.paused_until - now)
+            if self.rate is None:
+                return delay
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens < 0:
+                delay = max(delay, -self.tokens / self.rate)
+            return delay
+
+    def acquire(self):
+        """Wait for a token, returning the seconds waited"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def pause(self, seconds):
+        """Halve the rate, and start no calls for a number of seconds"""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            if self.rate is not None:
+                self.rate = max(self.MIN_RATE, self.rate / 2)
+
+    def recover(self):
+        """Raise a lowered rate by about one call per second per second"""
+        with self.lock:
+            if self.rate is not None and self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + 1.0 / self.rate)
+
+
+class InFlightLimit(object):
+    """Limit the calls made at once, halving the limit on overload
+
+    :param limit: The maximum number of calls made at once
+    """
+
+    def __init__(self, limit):
+        self.max_limit = limit
+        self.limit = float(limit)
+        self.in_flight = 0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        """Wait for a free slot, returning the seconds waited"""
+        start = time.monotonic()
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+        return time.monotonic() - start
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify()
+
+    def decrease(self):
+        with self.condition:
+            self.limit = max(1.0, self.limit / 2)
+
+    def increase(self):
+        """Raise a lowered limit by one for about every limit calls"""
+        with self.condition:
+            if self.limit < self.max_limit:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+                self.condition.notify_all()
+
+
+class Governor(object):
+    """Pace calls by service and endpoint, backing off when refused
+
+    :param rates: A dict mapping service types, or ALL_SERVICES, to the
+        maximum calls per second started to them
+    :param max_in_flight: The maximum calls made to an endpoint at once
+    :param retries: How many times a refused call is made again
+    """
+
+    def __init__(
+        self, rates=None, max_in_flight=DEFAULT_MAX_IN_FLIGHT, retries=MAX_RETRIES
+    ):
+        self.rates = dict(rates or {})
+        self.max_in_flight = max_in_flight
+        self.retries = retries
+        self.buckets = {}
+        self.limits = {}
+        self.lock = threading.Lock()
+        # totals, for debugging
+        self.queued = 0.0
+        self.throttled = 0
+
+    @classmethod
+    def from_env(cls):
+        """Return a Governor configured by ESI_RATE_LIMITS and
+        ESI_MAX_IN_FLIGHT
+
+        :raises: ValueError if either is malformed
+        """
+        max_in_flight = int(os.environ.get(MAX_IN_FLIGHT_ENV) or DEFAULT_MAX_IN_FLIGHT)
+        if max_in_flight < 1:
+            raise ValueError("%s must be at least 1" % MAX_IN_FLIGHT_ENV)
+        return cls(parse_rates(os.environ.get(RATE_LIMITS_ENV)), max_in_flight)
+
+    def bucket(self, service):
+        with self.lock:
+            if service not in self.buckets:
+                self.buckets[service] = TokenBucket(
+                    self.rates.get(service, self.rates.get(ALL_SERVICES))
+                )
+            return self.buckets[service]
+
+    def in_flight_limit(self, endpoint):
+        with self.lock:
+            if endpoint not in self.limits:
+                self.limits[endpoint] = InFlightLimit(self.max_in_flight)
+            return self.limits[endpoint]
+
+    def call(self, send, service=None, endpoint=None, method=None, description=None):
+        """Make a call once the service's rate and endpoint's limit allow
+
+        A call refused with 429 is made again. One refused with 503 is made
+        again only if its method is idempotent.
+
+        :param send: A callable making the call and returning its response
+        :param service: The service type called
+        :param endpoint: The endpoint called, by default the service
+        :param method: The HTTP method of the call
+        :param description: What is called, for logging
+        :returns: The call's response
+        :raises: Whatever send raises, once retries are exhausted for a
+            refused call
+        """
+        bucket = self.bucket(service)
+        limit = self.in_flight_limit(endpoint or service)
+        attempt = 0
+        while True:
+            attempt += 1
+            waited = bucket.acquire()
+            waited += limit.acquire()
+            with self.lock:
+                self.queued += waited
+            if waited > LOG_THRESHOLD:
+                LOG.debug(
+                    "%s waited %.3fs to be sent (%d in flight, limit %d)",
+                    description or service,
+                    waited,
+                    limit.in_flight,
+                    int(limit.limit),
+                )
+            try:
+                response = send()
+            except Exception as e:
+                status = getattr(e, "http_status", None)
+                response = getattr(e, "response", None)
+                if not retryable(status, method) or attempt > self.retries:
+                    raise
+            else:
+                status = getattr(response, "status_code", None)
+                if not retryable(status, method) or attempt > self.retries:
+                    bucket.recover()
+                    limit.increase()
+                    return response
+            finally:
+                limit.release()
+
+            headers = getattr(response, "headers", None) or {}
+            delay = backoff_delay(attempt, headers.get("Retry-After"))
+            with self.lock:
+                self.throttled += 1
+            metrics.count_retry(metrics.THROTTLED, service=service or "unknown")
+            bucket.pause(delay)
+            limit.decrease()
+            LOG.debug(
+                "%s returned %s, backing off %.2fs (attempt %d of %d)",
+                description or service,
+                status,
+                delay,
+                attempt,
+                self.retries + 1,
+            )
+
+
+def retryable(status, method):
+    """Return whether a call refused with a status can be made again"""
+    return status == 429 or (
+        status in THROTTLED and (method or "").upper() in IDEMPOTENT_METHODS
+    )
+
+
+def parse_rates(value):
+    """Parse rate limits such as "network=20,baremetal=10" or "15"
+
+    :returns: A dict mapping service types, or ALL_SERVICES for a bare
+        number, to calls per second
+    :raises: ValueError if a rate is not a positive number
+    """
+    rates = {}
+    for item in (value or "").split(","):
+        if not item.strip():
+            continue
+        service, sep, rate = item.rpartition("=")
+        rate = float(rate)
+        if rate <= 0:
+            raise ValueError("rate limit %s must be greater than 0" % item)
+        rates[service.strip() if sep else ALL_SERVICES] = rate
+    return rates
+
+
+def govern(session, governor=None):
+    """Send every request made through a keystoneauth session through a
+    governor
+
+    Governing a session again returns its governor unchanged. Sessions
+    other than keystoneauth's, such as test doubles, are left alone.
+
+    :param session: A keystoneauth1.session.Session
+    :param governor: The Governor to use, by default one configured from
+        the environment
+    :returns: The session's Governor, or None if it was left alone
+    """
+    from keystoneauth1 import session as ksa_session
+
+    if not isinstance(session, ksa_session.Session):
+        return None
+    if "request" in vars(session):
+        return getattr(session.request, "governor", None)
+    governor = governor or Governor.from_env()
+
+    @functools.wraps(type(session).request)
+    def request(url, method, *args, **kwargs):
+        endpoint_filter = kwargs.get("endpoint_filter") or {}
+        service = endpoint_filter.get("service_type") or kwargs.get("service_type")
+        endpoint = (
+            urllib.parse.urlsplit(url).netloc
+            or urllib.parse.urlsplit(kwargs.get("endpoint_override") or "").netloc
+            or service
+        )
+        # look the method up on each call, so that profiling started
+        # later still sees the request
+        return governor.call(
+            lambda: type(session).request(session, url, method, *args, **kwargs),
+            service,
+            endpoint,
+            method,
+            "%s %s" % (method, url),
+        )
+
+    request.governor = governor
+    session.request = request
+    return governor
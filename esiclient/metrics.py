@@ -0,0 +1,353 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+"""Metrics for long running commands, such as cluster orchestration
+
+Commands record timings, counters and gauges on a Metrics object, which
+hands each one to an exporter chosen by url:
+
+- ``file:///path/to/metrics.jsonl``, or a plain path: one JSON object per
+  line
+- ``statsd://host:8125``: statsd over UDP, with DogStatsD style tags
+- ``otlp://host:4318``, or an ``http(s)://`` OTLP/HTTP metrics url: OTLP
+  JSON posted to an OpenTelemetry collector when the command finishes
+
+Without an exporter, recording a metric does nothing.
+
+API calls made again, because the service throttled them or their
+resource was busy, are counted on every Metrics exporting at the time as
+``esi.retries``, tagged with the reason.
+"""
+
+import collections
+import contextlib
+import json
+import logging
+import threading
+import time
+import urllib.parse
+import weakref
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_STATSD_PORT = 8125
+DEFAULT_OTLP_PORT = 4318
+OTLP_PATH = "/v1/metrics"
+OTLP_TIMEOUT = 10
+
+TIMING = "timing"
+COUNTER = "counter"
+GAUGE = "gauge"
+
+# the counter of API calls made again
+RETRIES = "retries"
+THROTTLED = "throttled"
+CONFLICT = "conflict"
+
+Metric = collections.namedtuple(
+    "Metric", ["name", "type", "value", "tags", "timestamp"]
+)
+
+# Metrics with an exporter, which retries are counted on
+_exporting = weakref.WeakSet()
+_exporting_lock = threading.Lock()
+
+
+def count_retry(reason, **tags):
+    """Count an API call made again on every Metrics exporting
+
+    Retries happen deep inside the clients a command uses, so rather than
+    being passed a Metrics they are counted on all of them.
+
+    :param reason: Why the call was made again, THROTTLED or CONFLICT
+    """
+    with _exporting_lock:
+        exporting = list(_exporting)
+    for metrics in exporting:
+        metrics.increment(RETRIES, reason=reason, **tags)
+
+
+class FileExporter(object):
+    """Append metrics to a file as JSON lines"""
+
+    def __init__(self, path):
+        self.file = open(path, "a")
+
+    def export(self, metric):
+        self.file.write(json.dumps(metric._asdict(), sort_keys=True) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class StatsdExporter(object):
+    """Send metrics to a statsd daemon over UDP
+
+    Timings are sent in milliseconds. Tags use the DogStatsD extension,
+    which statsd servers without it ignore.
+    """
+
+    TYPES = {TIMING: "ms", COUNTER: "c", GAUGE: "g"}
+
+    def __init__(self, host, port=DEFAULT_STATSD_PORT):
+        import socket
+
+        self.address = (host, port)
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def format(self, metric):
+        value = metric.value * 1000 if metric.type == TIMING else metric.value
+        line = "%s:%g|%s" % (metric.name, value, self.TYPES[metric.type])
+        if metric.tags:
+            line += "|#" + ",".join(
+                "%s:%s" % (key, value) for key, value in sorted(metric.tags.items())
+            )
+        return line
+
+    def export(self, metric):
+        try:
+            self.socket.sendto(self.format(metric).encode(), self.address)
+        except OSError as e:
+            # metrics must never break the command they describe
+            LOG.debug("failed to send metric %s: %s", metric.name, e)
+
+    def close(self):
+        self.socket.close()
+
+
+class OTLPExporter(object):
+    """Post metrics to an OpenTelemetry collector as OTLP/HTTP JSON
+
+    Metrics are aggregated in memory and sent once, when the exporter is
+    closed: timings as histograms, counters as cumulative sums and gauges
+    as their last value.
+    """
+
+    def __init__(self, url, service_name="esiclient"):
+        self.url = url
+        self.service_name = service_name
+        self.start = time.time()
+        self.metrics = []
+
+    def export(self, metric):
+        self.metrics.append(metric)
+
+    def payload(self):
+        series = collections.OrderedDict()
+        for metric in self.metrics:
+            key = (metric.name, metric.type, tuple(sorted(metric.tags.items())))
+            series.setdefault(key, []).append(metric)
+
+        start = str(int(self.start * 1e9))
+        metrics = []
+        for (name, metric_type, tags), points in series.items():
+            attributes = [
+                {"key": key, "value": {"stringValue": str(value)}}
+                for key, value in tags
+            ]
+            point = {
+                "attributes": attributes,
+                "startTimeUnixNano": start,
+                "timeUnixNano": str(int(points[-1].timestamp * 1e9)),
+            }
+            values = [p.value for p in points]
+            if metric_type == TIMING:
+                point.update(
+                    count=str(len(values)),
+                    sum=sum(values),
+                    min=min(values),
+                    max=max(values),
+                    bucketCounts=[str(len(values))],
+                    explicitBounds=[],
+                )
+                data = {"histogram": {"aggregationTemporality": 2}}
+                data["histogram"]["dataPoints"] = [point]
+                unit = "s"
+            elif metric_type == COUNTER:
+                point["asDouble"] = sum(values)
+                data = {
+                    "sum": {
+                        "aggregationTemporality": 2,
+                        "isMonotonic": True,
+                        "dataPoints": [point],
+                    }
+                }
+                unit = "1"
+            else:
+                point["asDouble"] = values[-1]
+                data = {"gauge": {"dataPoints": [point]}}
+                unit = "1"
+            metrics.append(dict(name=name, unit=unit, **data))
+
+        return {
+            "resourceMetrics": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": {"stringValue": self.service_name},
+                            }
+                        ]
+                    },
+                    "scopeMetrics": [
+                        {"scope": {"name": "esiclient"}, "metrics": metrics}
+                    ],
+                }
+            ]
+        }
+
+    def close(self):
+        if not self.metrics:
+            return
+        import urllib.request
+
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(self.payload()).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            urllib.request.urlopen(request, timeout=OTLP_TIMEOUT).close()
+        except OSError as e:
+            LOG.warning("failed to send metrics to %s: %s", self.url, e)
+
+
+def exporter_from_url(url):
+    """Return the exporter for a metrics url
+
+    :raises: ValueError for urls of unknown schemes
+    """
+    parsed = urllib.parse.urlsplit(url)
+    if parsed.scheme in ("", "file"):
+        return FileExporter(parsed.path)
+    if parsed.scheme == "statsd":
+        return StatsdExporter(
+            parsed.hostname or "localhost", parsed.port or DEFAULT_STATSD_PORT
+        )
+    if parsed.scheme == "otlp":
+        return OTLPExporter(
+            "http://%s:%d%s"
+            % (
+                parsed.hostname or "localhost",
+                parsed.port or DEFAULT_OTLP_PORT,
+                parsed.path or OTLP_PATH,
+            )
+        )
+    if parsed.scheme in ("http", "https"):
+        return OTLPExporter(url)
+    raise ValueError("unsupported metrics url %s" % url)
+
+
+class Phases(object):
+    """Time the consecutive phases of a command
+
+    Beginning a phase ends the one before it, so that commands with a
+    sequence of steps only mark where each one starts.
+    """
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.phase = None
+        self.started = None
+
+    def begin(self, phase):
+        self.end()
+        self.phase = phase
+        self.started = time.monotonic()
+
+    def end(self, error=None):
+        """End the current phase, as failed if an exception is given"""
+        if self.phase is None:
+            return
+        elapsed = time.monotonic() - self.started
+        if error is None:
+            self.metrics.timing(self.name, elapsed, outcome="ok", phase=self.phase)
+        else:
+            self.metrics.timing(self.name, elapsed, outcome="error", phase=self.phase)
+            self.metrics.increment(
+                self.name + ".errors", error=type(error).__name__, phase=self.phase
+            )
+        self.phase = None
+
+
+class Metrics(object):
+    """Record metrics, handing them to an exporter
+
+    :param exporter: An exporter, or None to record nothing
+    :param prefix: Prefix for every metric name
+    :param tags: Tags added to every metric
+    """
+
+    def __init__(self, exporter=None, prefix="esi", tags=None):
+        self.exporter = exporter
+        self.prefix = prefix
+        self.tags = tags or {}
+        self.lock = threading.Lock()
+        if exporter is not None:
+            with _exporting_lock:
+                _exporting.add(self)
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        """Return Metrics exporting to a url, or recording nothing if None"""
+        return cls(exporter_from_url(url) if url else None, **kwargs)
+
+    def record(self, name, metric_type, value, tags):
+        if self.exporter is None:
+            return
+        metric = Metric(
+            "%s.%s" % (self.prefix, name) if self.prefix else name,
+            metric_type,
+            value,
+            dict(self.tags, **tags),
+            time.time(),
+        )
+        with self.lock:
+            self.exporter.export(metric)
+
+    def timing(self, name, seconds, **tags):
+        self.record(name, TIMING, seconds, tags)
+
+    def increment(self, name, value=1, **tags):
+        self.record(name, COUNTER, value, tags)
+
+    def gauge(self, name, value, **tags):
+        self.record(name, GAUGE, value, tags)
+
+    @contextlib.contextmanager
+    def timer(self, name, **tags):
+        """Time a block, tagging it with its outcome, ok or error
+
+        An error also increments the <name>.errors counter.
+        """
+        start = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            self.timing(name, time.monotonic() - start, outcome="error", **tags)
+            self.increment(name + ".errors", error=type(e).__name__, **tags)
+            raise
+        self.timing(name, time.monotonic() - start, outcome="ok", **tags)
+
+    def phases(self, name):
+        return Phases(self, name)
+
+    def close(self):
+        if self.exporter is not None:
+            with _exporting_lock:
+                _exporting.discard(self)
+            with self.lock:
+                self.exporter.close()
@@ -11,6 +11,7 @@
 #   under the License.
 #
 
+import argparse
 import logging
 import os
 
@@ -57,9 +58,50 @@ def build_option_parser(parser):
         + DEFAULT_ESICLIENT_API_VERSION
         + " (Env: OS_ESICLIENT_API_VERSION)",
     )
+    parser.add_argument(
+        "--profile",
+        action=ProfileAction,
+        nargs=0,
+        help="Print a summary of the API calls made when the command exits"
+        " (Env: ESI_PROFILE)",
+    )
+    parser.add_argument(
+        "--profile-trace",
+        metavar="<trace-file>",
+        action=ProfileAction,
+        help="Profile API calls and write them to a Chrome trace file"
+        " (Env: ESI_PROFILE_TRACE)",
+    )
+
+    trace_path = utils.env("ESI_PROFILE_TRACE")
+    enabled = utils.env("ESI_PROFILE")
+    if enabled:
+        from oslo_utils import strutils
+
+        enabled = strutils.bool_from_string(enabled)
+    if enabled or trace_path:
+        from esiclient import profile
+
+        profile.enable(trace_path=trace_path)
+
     return parser
 
 
+class ProfileAction(argparse.Action):
+    """Start profiling as soon as --profile or --profile-trace is parsed
+
+    Profiling has to start before the command creates its clients, which
+    happens long before the plugin's client is made, if it ever is.
+    """
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        from esiclient import profile
+
+        trace_path = values or None
+        setattr(namespace, self.dest, trace_path or True)
+        profile.enable(trace_path=trace_path)
+
+
 class ClientWrapper(object):
     def __init__(self, instance):
         self._instance = instance
@@ -0,0 +1,321 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+"""Opt-in profiling of the API calls esi commands make
+
+Every request the openstack SDK and cinderclient make goes through a
+keystoneauth session, so profiling wraps Session.request to record each
+call's endpoint, latency, response size and the esiclient code that made
+it. A summary is printed when the command exits, and the calls can also be
+written as a Chrome trace (chrome://tracing, or https://ui.perfetto.dev).
+"""
+
+import atexit
+import collections
+import functools
+import json
+import os
+import re
+import sys
+import threading
+import time
+import urllib.parse
+
+# calls to the same endpoint from the same line of code at least this many
+# times are reported as a likely N+1 pattern
+N_PLUS_ONE_THRESHOLD = 5
+
+TOP_ENDPOINTS = 10
+
+Call = collections.namedtuple(
+    "Call",
+    [
+        "service",
+        "method",
+        "url",
+        "endpoint",
+        "status",
+        "start",
+        "elapsed",
+        "size",
+        "caller",
+        "thread",
+    ],
+)
+
+_ID = re.compile(
+    r"^([0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}"
+    r"|[0-9]+|([0-9a-f]{2}:){5}[0-9a-f]{2}|[0-9.]+)$",
+    re.IGNORECASE,
+)
+
+_THIS_FILE = os.path.abspath(__file__)
+_PACKAGE_DIR = os.path.dirname(_THIS_FILE)
+
+# esiclient code every call passes through, which says nothing about what
+# made the call: whole modules, and the generic wrappers in esiclient.utils
+INFRASTRUCTURE_MODULES = ("esiclient.governor", "esiclient.metrics")
+INFRASTRUCTURE_FUNCTIONS = (
+    "esiclient.utils:timed_call",
+    "esiclient.utils:timed_list",
+    "esiclient.utils:run_concurrently",
+    "esiclient.utils:fetch_concurrently",
+    "esiclient.utils:retry_conflicts",
+    "esiclient.utils:_get_or_fetch",
+)
+
+_profiler = None
+
+
+def endpoint_template(url):
+    """Return the path of a url with resource ids replaced by {id}
+
+    e.g. https://neutron:9696/v2.0/ports/<uuid>?fields=id becomes
+    /v2.0/ports/{id}, so calls to the same endpoint group together.
+    """
+    path = urllib.parse.urlsplit(url).path
+    return "/".join("{id}" if _ID.match(part) else part for part in path.split("/"))
+
+
+@functools.lru_cache(maxsize=None)
+def _esiclient_module(filename):
+    """Return the esiclient module name of a source file, or None"""
+    filename = os.path.abspath(filename)
+    if not filename.startswith(_PACKAGE_DIR + os.sep) or filename == _THIS_FILE:
+        return None
+    module = os.path.relpath(filename, os.path.dirname(_PACKAGE_DIR))
+    return os.path.splitext(module)[0].replace(os.sep, ".")
+
+
+def find_caller():
+    """Return the innermost esiclient function on the stack that is not
+    infrastructure every call goes through, such as the governor
+
+    :returns: A "module:function:line" string; the outermost infrastructure
+        function, such as the esiclient.utils wrapper that started the
+        call, if no other esiclient code is on the stack, as when a client
+        method is called directly from a worker thread; or None if no
+        esiclient code is on the stack
+    """
+    fallback = None
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = _esiclient_module(frame.f_code.co_filename)
+        if module:
+            function = "%s:%s" % (module, frame.f_code.co_name)
+            caller = "%s:%d" % (function, frame.f_lineno)
+            if (
+                module not in INFRASTRUCTURE_MODULES
+                and function not in INFRASTRUCTURE_FUNCTIONS
+            ):
+                return caller
+            fallback = caller
+        frame = frame.f_back
+    return fallback
+
+
+class Profiler(object):
+    """Collect API calls and summarize them"""
+
+    def __init__(self, trace_path=None):
+        self.calls = []
+        self.lock = threading.Lock()
+        self.start = time.monotonic()
+        self.trace_path = trace_path
+
+    def record(self, call):
+        with self.lock:
+            self.calls.append(call)
+
+    def endpoints(self):
+        """Return calls grouped by service, method and endpoint
+
+        :returns: A list of ((service, method, endpoint), [Call]) tuples,
+            slowest in total first
+        """
+        groups = collections.defaultdict(list)
+        for call in self.calls:
+            groups[(call.service, call.method, call.endpoint)].append(call)
+        return sorted(groups.items(), key=lambda item: -sum(c.elapsed for c in item[1]))
+
+    def n_plus_one(self, threshold=N_PLUS_ONE_THRESHOLD):
+        """Return repeated calls to a single resource from one line of code
+
+        :returns: A list of (count, service, method, endpoint, caller)
+            tuples, most repeated first
+        """
+        counts = collections.Counter(
+            (call.service, call.method, call.endpoint, call.caller)
+            for call in self.calls
+            if call.endpoint.endswith("{id}")
+        )
+        return sorted(
+            (
+                (count,) + key
+                for key, count in counts.items()
+                if count >= threshold and key[3]
+            ),
+            reverse=True,
+        )
+
+    def summary(self, top=TOP_ENDPOINTS):
+        """Return a human readable summary of the calls made"""
+        elapsed = time.monotonic() - self.start
+        lines = [
+            "%d API calls, %.3fs in calls, %.3fs total, %d bytes received"
+            % (
+                len(self.calls),
+                sum(call.elapsed for call in self.calls),
+                elapsed,
+                sum(call.size for call in self.calls),
+            )
+        ]
+        if not self.calls:
+            return "\n".join(lines)
+
+        lines.append("")
+        lines.append(
+            "%6s %9s %9s %10s  %s" % ("Calls", "Total(s)", "Mean(ms)", "Bytes", "Call")
+        )
+        for (service, method, endpoint), calls in self.endpoints()[:top]:
+            total = sum(call.elapsed for call in calls)
+            lines.append(
+                "%6d %9.3f %9.1f %10d  %s %s %s"
+                % (
+                    len(calls),
+                    total,
+                    1000 * total / len(calls),
+                    sum(call.size for call in calls),
+                    method,
+                    service or "-",
+                    endpoint,
+                )
+            )
+
+        repeated = self.n_plus_one()
+        if repeated:
+            lines.append("")
+            lines.append("Possible N+1 patterns:")
+            for count, service, method, endpoint, caller in repeated:
+                lines.append(
+                    "%6d x %s %s %s from %s"
+                    % (count, method, service or "-", endpoint, caller)
+                )
+        return "\n".join(lines)
+
+    def chrome_trace(self):
+        """Return the calls in the Chrome trace event format"""
+        events = [
+            {
+                "name": "%s %s" % (call.method, call.endpoint),
+                "cat": call.service or "api",
+                "ph": "X",
+                "ts": int((call.start - self.start) * 1e6),
+                "dur": int(call.elapsed * 1e6),
+                "pid": os.getpid(),
+                "tid": call.thread,
+                "args": {
+                    "url": call.url,
+                    "status": call.status,
+                    "bytes": call.size,
+                    "caller": call.caller,
+                },
+            }
+            for call in self.calls
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_trace(self, path):
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+
+def instrument(session_class, profiler):
+    """Record every request made through a keystoneauth session class
+
+    :param session_class: keystoneauth1.session.Session, or a stand-in
+    :param profiler: The Profiler to record calls in
+    :returns: A function that removes the instrumentation
+    """
+    original = session_class.request
+
+    @functools.wraps(original)
+    def request(session, url, method, *args, **kwargs):
+        caller = find_caller()
+        endpoint_filter = kwargs.get("endpoint_filter") or {}
+        service = endpoint_filter.get("service_type") or kwargs.get("service_type")
+        start = time.monotonic()
+        response = None
+        status = None
+        try:
+            response = original(session, url, method, *args, **kwargs)
+            status = response.status_code
+            return response
+        except Exception as e:
+            status = getattr(e, "http_status", None)
+            raise
+        finally:
+            elapsed = time.monotonic() - start
+            size = 0
+            if response is not None and not kwargs.get("stream"):
+                size = len(response.content or b"")
+            full_url = getattr(response, "url", None) or url
+            profiler.record(
+                Call(
+                    service,
+                    method,
+                    full_url,
+                    endpoint_template(full_url),
+                    status,
+                    start,
+                    elapsed,
+                    size,
+                    caller,
+                    threading.get_ident(),
+                )
+            )
+
+    session_class.request = request
+
+    def uninstrument():
+        session_class.request = original
+
+    return uninstrument
+
+
+def enable(trace_path=None, stream=None):
+    """Start profiling API calls, reporting them when the process exits
+
+    Calling this again only updates the trace path.
+
+    :param trace_path: Optional file to write a Chrome trace to
+    :param stream: Where to write the summary, stderr by default
+    :returns: The Profiler
+    """
+    global _profiler
+    if _profiler is None:
+        from keystoneauth1 import session
+
+        _profiler = Profiler()
+        instrument(session.Session, _profiler)
+        atexit.register(report, _profiler, stream)
+    if trace_path:
+        _profiler.trace_path = trace_path
+    return _profiler
+
+
+def report(profiler, stream=None):
+    stream = stream or sys.stderr
+    stream.write("\n%s\n" % profiler.summary())
+    if profiler.trace_path:
+        profiler.write_trace(profiler.trace_path)
+        stream.write("Chrome trace written to %s\n" % profiler.trace_path)
@@ -0,0 +1,249 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+"""Benchmark esi commands against a fake cloud
+
+Seeds a FakeCloud with a synthetic topology and reports the API calls and
+wall time each command takes, e.g.:
+
+    python -m esiclient.tests.benchmark --scale 2 --latency 0.02
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from esiclient.tests import fake_cloud
+from esiclient.v1.cluster import cluster
+from esiclient.v1 import node_network
+from esiclient.v1 import node_volume
+from esiclient.v1 import port_forwarding
+from esiclient.v1 import switch
+from esiclient.v1 import topology
+from esiclient.v1 import trunk
+
+
+def manifest(build):
+    """Return a benchmark argument naming a manifest built from the cloud
+
+    :param build: A callable taking the seeded FakeCloud and returning the
+        manifest's entries
+    """
+
+    def write(cloud, directory):
+        path = os.path.join(directory, "manifest.json")
+        with open(path, "w") as f:
+            json.dump(build(cloud), f)
+        return path
+
+    return write
+
+
+def forward_entries(cloud):
+    """Forward a new port from each floating ip to an attached port"""
+    ports = [port for port in cloud.ports.values() if port.status == "ACTIVE"]
+    return [
+        {
+            "internal": port.fixed_ips[0]["ip_address"],
+            "external": fip.floating_ip_address,
+            "ports": ["8080:80"],
+        }
+        for port, fip in zip(ports, cloud.floating_ips.values())
+    ]
+
+
+def forwarded_address(cloud, directory):
+    """Return the internal address of the first port forward"""
+    fip = next(fip for fip in cloud.floating_ips.values() if fip.port_forwardings)
+    return fip.port_forwardings[0]["internal_ip_address"]
+
+
+def forwarding_floating_ip(cloud, directory):
+    """Return the address of the first floating ip with port forwards"""
+    fip = next(fip for fip in cloud.floating_ips.values() if fip.port_forwardings)
+    return fip.floating_ip_address
+
+
+def attach_entries(cloud):
+    """Attach each available node to a tenant network, round robin"""
+    networks = [
+        network.name
+        for network in cloud.networks.values()
+        if network.provider_segmentation_id
+    ]
+    available = [
+        node for node in cloud.nodes.values() if node.provision_state == "available"
+    ]
+    return [
+        {"node": node.name, "network": networks[i % len(networks)]}
+        for i, node in enumerate(available)
+    ]
+
+
+def detach_entries(cloud):
+    """Detach every port from each attached node"""
+    return [
+        {"node": node.name, "all": True}
+        for node in cloud.nodes.values()
+        if any(
+            port.internal_info.get("tenant_vif_port_id")
+            for port in cloud.ports_of(node)
+        )
+    ]
+
+
+# name: (command class, arguments); an argument may be a callable taking
+# the seeded cloud and a temporary directory, and returning the argument
+BENCHMARKS = {
+    "node network list": (node_network.List, []),
+    "node network list --long": (node_network.List, ["--long"]),
+    "node network list --network": (node_network.List, ["--network", "network-0"]),
+    "cluster list": (cluster.List, []),
+    "switch list": (switch.List, []),
+    "switch port list": (switch.ListSwitchPort, ["switch-0"]),
+    "switch port list --long": (switch.ListSwitchPort, ["switch-0", "--long"]),
+    "switch vlan list": (switch.ListVLAN, ["switch-0"]),
+    "topology dump": (topology.Dump, []),
+    "trunk list": (trunk.List, []),
+    "port forwarding list": (port_forwarding.List, []),
+    "port forwarding batch create": (
+        port_forwarding.BatchCreate,
+        [manifest(forward_entries)],
+    ),
+    "port forwarding create": (
+        port_forwarding.Create,
+        ["-p", "20000-20099", forwarded_address, forwarding_floating_ip],
+    ),
+    "port forwarding delete": (
+        port_forwarding.Delete,
+        ["-p", "1024:22", forwarded_address, forwarding_floating_ip],
+    ),
+    "port forwarding purge": (port_forwarding.Purge, ["--all"]),
+    "node volume batch attach": (
+        node_volume.BatchAttach,
+        [
+            "--resource-class",
+            "baremetal",
+            "--volume-pattern",
+            "volume-*",
+            "--network",
+            "network-0",
+        ],
+    ),
+    "node network batch attach": (
+        node_network.BatchAttach,
+        [manifest(attach_entries)],
+    ),
+    "node network batch detach": (
+        node_network.BatchDetach,
+        [manifest(detach_entries)],
+    ),
+}
+
+
+# FakeCloud.seed arguments for the inventory at scale 1
+INVENTORY = {
+    "nodes": 1000,
+    "ports_per_node": 2,
+    "networks": 25,
+    "attached": 0.8,
+    "trunks": 50,
+    "floating_ips": 100,
+    "forwards_per_ip": 5,
+    "volumes": 100,
+    "switches": 4,
+    "available": 0.1,
+}
+
+# inventory counts that grow with scale; the rest describe its shape
+SCALED = ("nodes", "networks", "trunks", "floating_ips", "volumes")
+
+
+def inventory(scale=1.0):
+    """Return FakeCloud.seed arguments for the inventory at a scale"""
+    return {
+        key: int(value * scale) if key in SCALED else value
+        for key, value in INVENTORY.items()
+    }
+
+
+def run(name, scale=1.0, latency=0.0):
+    """Run a benchmark against a freshly seeded fake cloud
+
+    :param name: The benchmark's name, a key of BENCHMARKS
+    :param scale: The inventory scale
+    :param latency: Seconds each API call takes
+    :returns: A fake_cloud.Run
+    """
+    command_class, argv = BENCHMARKS[name]
+    cloud = fake_cloud.FakeCloud(latency=latency).seed(**inventory(scale))
+    with tempfile.TemporaryDirectory() as directory:
+        return cloud.run(
+            command_class,
+            [
+                argument(cloud, directory) if callable(argument) else argument
+                for argument in argv
+            ],
+        )
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("benchmarks", nargs="*", metavar="<benchmark>")
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=2.0,
+        help="inventory scale; 1 is %d nodes" % INVENTORY["nodes"],
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds per API call"
+    )
+    parser.add_argument(
+        "--calls", action="store_true", help="show the calls made per endpoint"
+    )
+    return parser
+
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        sys.exit("unknown benchmarks: %s" % ", ".join(sorted(unknown)))
+
+    print(
+        "%-32s %8s %8s %12s %10s" % ("Benchmark", "Rows", "Calls", "Bytes", "Seconds")
+    )
+    for name in args.benchmarks or BENCHMARKS:
+        result = run(name, args.scale, args.latency)
+        # commands other than listers, such as topology dump, write their
+        # output rather than returning rows
+        _columns, rows = result.result or (None, [])
+        print(
+            "%-32s %8d %8d %12d %10.3f"
+            % (
+                name,
+                len(rows),
+                sum(result.calls.values()),
+                sum(result.bytes.values()),
+                result.elapsed,
+            )
+        )
+        if args.calls:
+            for endpoint, count in sorted(result.calls.items()):
+                print("    %-50s %8d %12d" % (endpoint, count, result.bytes[endpoint]))
+
+
+if __name__ == "__main__":
+    main()
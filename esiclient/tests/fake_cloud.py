@@ -0,0 +1,1062 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+"""An in-process fake of the OpenStack services used by esiclient
+
+FakeCloud stands in for the clients a command finds on its app's
+client_manager: the openstacksdk network proxy, cinderclient for volumes,
+and an openstacksdk connection with baremetal, network and image proxies.
+Resources live in memory, and every HTTP request the real clients would
+make is counted per endpoint and can be slowed down to model API latency,
+so any command can be run and measured at realistic scale without a cloud.
+
+A call is counted as the requests it costs: listings are fetched a page at
+a time where the service paginates by default, and finding a resource by
+name first fails to get it by id, as the SDK does.
+"""
+
+import collections
+import functools
+import io
+import ipaddress
+import itertools
+import json
+import threading
+import time
+import types
+import uuid
+
+from openstack import exceptions as sdk_exceptions
+from osc_lib.command import command
+from osc_lib import exceptions as osc_exceptions
+
+# query parameters that shape a listing rather than filter it
+LIST_OPTIONS = {
+    "details",
+    "detail",
+    "fields",
+    "limit",
+    "marker",
+    "sort_key",
+    "sort_dir",
+}
+
+# the openstacksdk attribute each ironic field is also read as
+FIELD_ALIASES = {
+    "uuid": "id",
+    "node_uuid": "node_id",
+    "instance_uuid": "instance_id",
+    "maintenance": "is_maintenance",
+}
+
+# the project every resource belongs to
+PROJECT_ID = "project"
+
+# the most items a listing returns per page, by service, as ironic's
+# max_limit, cinder's osapi_max_limit and glance's limit_param_default
+# default to; neutron listings are not paginated by default
+PAGE_SIZES = {"baremetal": 1000, "volume": 1000, "image": 25}
+
+_MISSING = object()
+
+Run = collections.namedtuple("Run", ["result", "calls", "bytes", "elapsed"])
+
+
+class Resource(object):
+    """A fake API resource, readable as attributes or as items"""
+
+    def __init__(self, **attrs):
+        self.__dict__.update(attrs)
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+    def __repr__(self):
+        return "Resource(%s)" % ", ".join(
+            "%s=%r" % (key, self.__dict__[key])
+            for key in ("id", "name")
+            if key in self.__dict__
+        )
+
+
+def matches(resource, filters):
+    """Return whether a resource matches API query filters
+
+    A list value matches any of its items. fixed_ips takes neutron's
+    "key=value" strings, all of which must match one fixed ip.
+    """
+    for key, value in filters.items():
+        if key in LIST_OPTIONS or value is None:
+            continue
+        if key == "fixed_ips":
+            wanted = dict(
+                item.split("=", 1)
+                for item in ([value] if isinstance(value, str) else value)
+            )
+            if not any(
+                all(ip.get(k) == v for k, v in wanted.items())
+                for ip in resource.fixed_ips
+            ):
+                return False
+            continue
+        actual = getattr(resource, key, _MISSING)
+        if isinstance(value, (list, tuple, set)):
+            if actual not in value:
+                return False
+        elif actual != value:
+            return False
+    return True
+
+
+def project(resource, fields):
+    """Return a resource with only the ironic fields requested, if any
+
+    Fields are ironic's names, as the SDK sends them, and are also set
+    under the SDK's name for them.
+    """
+    if not fields:
+        return resource
+    attrs = {}
+    for field in fields:
+        value = getattr(resource, field, None)
+        attrs[field] = value
+        if field in FIELD_ALIASES:
+            attrs[FIELD_ALIASES[field]] = value
+    return Resource(**attrs)
+
+
+def response_size(response):
+    """Return the size of a response as neutron or ironic would encode it"""
+    return len(json.dumps(response, default=_encode))
+
+
+def _encode(value):
+    if isinstance(value, Resource):
+        return {k: v for k, v in value.__dict__.items() if not k.startswith("_")}
+    return str(value)
+
+
+def endpoint(name, lazy=False, paginated=None):
+    """Count calls to a fake API endpoint and apply its latency
+
+    :param name: The endpoint's name, as counted in FakeCloud.calls
+    :param lazy: Return the listing as an iterator, as the SDK does
+    :param paginated: Whether the endpoint is a listing fetched a page at a
+        time; by default, lazy endpoints are
+    """
+    if paginated is None:
+        paginated = lazy
+
+    def decorator(func):
+        @functools.wraps(func)
+        def call(self, *args, **kwargs):
+            try:
+                response = func(self, *args, **kwargs)
+            except Exception:
+                self.cloud.request(name)
+                raise
+            if paginated:
+                self.cloud.request_pages(name, response)
+            else:
+                self.cloud.request(name, response)
+            return iter(response) if lazy else response
+
+        return call
+
+    return decorator
+
+
+class Service(object):
+    def __init__(self, cloud):
+        self.cloud = cloud
+
+
+def _id(value):
+    return value if isinstance(value, str) else value.id
+
+
+class NetworkProxy(Service):
+    """Fake of the openstacksdk network proxy"""
+
+    def _find(self, collection, name_or_id, ignore_missing, **query):
+        resources = self.cloud.collection(collection)
+        if name_or_id in resources:
+            return resources[name_or_id]
+        # the SDK gets a resource by id before listing it by name
+        self.cloud.request("network.get_%s" % collection[:-1])
+        found = [
+            resource
+            for resource in resources.values()
+            if getattr(resource, "name", None) == name_or_id
+            and matches(resource, query)
+        ]
+        if len(found) > 1:
+            raise sdk_exceptions.DuplicateResource(
+                "More than one %s exists with the name '%s'." % (collection, name_or_id)
+            )
+        if found:
+            return found[0]
+        if ignore_missing:
+            return None
+        raise sdk_exceptions.ResourceNotFound(
+            "No %s found for %s" % (collection, name_or_id)
+        )
+
+    def _get(self, collection, resource):
+        resources = self.cloud.collection(collection)
+        try:
+            return resources[_id(resource)]
+        except KeyError:
+            raise sdk_exceptions.ResourceNotFound(
+                "No %s found for %s" % (collection, _id(resource))
+            )
+
+    def _list(self, collection, **query):
+        return [
+            r for r in self.cloud.collection(collection).values() if matches(r, query)
+        ]
+
+    @endpoint("network.networks", lazy=True)
+    def networks(self, **query):
+        return self._list("networks", **query)
+
+    @endpoint("network.get_network")
+    def get_network(self, network):
+        return self._get("networks", network)
+
+    @endpoint("network.find_network")
+    def find_network(self, name_or_id, ignore_missing=True, **query):
+        return self._find("networks", name_or_id, ignore_missing, **query)
+
+    @endpoint("network.subnets", lazy=True)
+    def subnets(self, **query):
+        return self._list("subnets", **query)
+
+    @endpoint("network.get_subnet")
+    def get_subnet(self, subnet):
+        return self._get("subnets", subnet)
+
+    @endpoint("network.find_subnet")
+    def find_subnet(self, name_or_id, ignore_missing=True, **query):
+        return self._find("subnets", name_or_id, ignore_missing, **query)
+
+    @endpoint("network.ports", lazy=True)
+    def ports(self, **query):
+        return self._list("ports", **query)
+
+    @endpoint("network.get_port")
+    def get_port(self, port):
+        return self._get("ports", port)
+
+    @endpoint("network.find_port")
+    def find_port(self, name_or_id, ignore_missing=True, **query):
+        return self._find("ports", name_or_id, ignore_missing, **query)
+
+    @endpoint("network.create_port")
+    def create_port(self, **attrs):
+        return self.cloud.add_port(**attrs)
+
+    @endpoint("network.update_port")
+    def update_port(self, port, **attrs):
+        port = self._get("ports", port)
+        port.__dict__.update(attrs)
+        return port
+
+    @endpoint("network.delete_port")
+    def delete_port(self, port, ignore_missing=True):
+        if self.cloud.ports.pop(_id(port), None) is None and not ignore_missing:
+            raise sdk_exceptions.ResourceNotFound("No port found for %s" % _id(port))
+
+    @endpoint("network.ips", lazy=True)
+    def ips(self, **query):
+        return self._list("floating_ips", **query)
+
+    @endpoint("network.get_ip")
+    def get_ip(self, floating_ip):
+        return self._get("floating_ips", floating_ip)
+
+    @endpoint("network.find_ip")
+    def find_ip(self, name_or_id, ignore_missing=True, **query):
+        if name_or_id in self.cloud.floating_ips:
+            return self.cloud.floating_ips[name_or_id]
+        self.cloud.request("network.get_ip")
+        for fip in self.cloud.floating_ips.values():
+            if name_or_id == fip.floating_ip_address:
+                return fip
+        if ignore_missing:
+            return None
+        raise sdk_exceptions.ResourceNotFound("No ip found for %s" % name_or_id)
+
+    @endpoint("network.create_ip")
+    def create_ip(self, **attrs):
+        return self.cloud.add_floating_ip(**attrs)
+
+    @endpoint("network.update_ip")
+    def update_ip(self, floating_ip, **attrs):
+        fip = self._get("floating_ips", floating_ip)
+        fip.__dict__.update(attrs)
+        return fip
+
+    @endpoint("network.delete_ip")
+    def delete_ip(self, floating_ip, ignore_missing=True):
+        fip_id = _id(floating_ip)
+        if self.cloud.floating_ips.pop(fip_id, None) is None and not ignore_missing:
+            raise sdk_exceptions.ResourceNotFound("No ip found for %s" % fip_id)
+        self.cloud.port_forwardings.pop(fip_id, None)
+
+    @endpoint("network.floating_ip_port_forwardings", lazy=True)
+    def floating_ip_port_forwardings(self, floating_ip, **query):
+        forwards = self.cloud.port_forwardings.get(_id(floating_ip), {})
+        return [pf for pf in forwards.values() if matches(pf, query)]
+
+    @endpoint("network.port_forwardings", lazy=True)
+    def port_forwardings(self, floating_ip, **query):
+        forwards = self.cloud.port_forwardings.get(_id(floating_ip), {})
+        return [pf for pf in forwards.values() if matches(pf, query)]
+
+    @endpoint("network.create_floating_ip_port_forwarding")
+    def create_floating_ip_port_forwarding(self, floating_ip, **attrs):
+        return self.cloud.add_port_forwarding(_id(floating_ip), **attrs)
+
+    @endpoint("network.delete_floating_ip_port_forwarding")
+    def delete_floating_ip_port_forwarding(
+        self, floating_ip, port_forwarding, ignore_missing=True
+    ):
+        self.cloud.remove_port_forwarding(
+            _id(floating_ip), _id(port_forwarding), ignore_missing
+        )
+
+    @endpoint("network.trunks", lazy=True)
+    def trunks(self, **query):
+        return self._list("trunks", **query)
+
+    @endpoint("network.get_trunk")
+    def get_trunk(self, trunk):
+        return self._get("trunks", trunk)
+
+    @endpoint("network.find_trunk")
+    def find_trunk(self, name_or_id, ignore_missing=True, **query):
+        return self._find("trunks", name_or_id, ignore_missing, **query)
+
+    @endpoint("network.create_trunk")
+    def create_trunk(self, **attrs):
+        return self.cloud.add_trunk(**attrs)
+
+    @endpoint("network.delete_trunk")
+    def delete_trunk(self, trunk, ignore_missing=True):
+        trunk = self.cloud.trunks.pop(_id(trunk), None)
+        if trunk is not None:
+            self.cloud.ports[trunk.port_id].trunk_details = None
+
+    @endpoint("network.add_trunk_subports")
+    def add_trunk_subports(self, trunk, subports):
+        trunk = self._get("trunks", trunk)
+        trunk.sub_ports.extend(subports)
+        return trunk
+
+    @endpoint("network.delete_trunk_subports")
+    def delete_trunk_subports(self, trunk, subports):
+        trunk = self._get("trunks", trunk)
+        removed = {subport["port_id"] for subport in subports}
+        trunk.sub_ports[:] = [s for s in trunk.sub_ports if s["port_id"] not in removed]
+        return trunk
+
+
+class BaremetalProxy(Service):
+    """Fake of the openstacksdk baremetal proxy"""
+
+    def _node(self, node):
+        return self.cloud.get_node(_id(node), sdk_exceptions.ResourceNotFound)
+
+    def _list(self, collection, fields=None, node=None, **query):
+        if node is not None:
+            query["node_id"] = self._node(node).id
+        return [
+            project(r, fields)
+            for r in self.cloud.collection(collection).values()
+            if matches(r, query)
+        ]
+
+    @endpoint("baremetal.nodes", lazy=True)
+    def nodes(self, details=False, fields=None, **query):
+        return [
+            project(n, fields) for n in self.cloud.nodes.values() if matches(n, query)
+        ]
+
+    @endpoint("baremetal.get_node")
+    def get_node(self, node, fields=None):
+        return project(self._node(node), fields)
+
+    @endpoint("baremetal.find_node")
+    def find_node(self, name_or_id, ignore_missing=True, details=True):
+        try:
+            return self._node(name_or_id)
+        except sdk_exceptions.ResourceNotFound:
+            if ignore_missing:
+                return None
+            raise
+
+    @endpoint("baremetal.patch_node")
+    def patch_node(self, node, patch, retry_on_conflict=True, **kwargs):
+        node = self._node(node)
+        for change in patch:
+            path = change["path"].strip("/").split("/")
+            target = node.__dict__
+            for key in path[:-1]:
+                target = target.setdefault(key, {})
+            if change["op"] == "remove":
+                target.pop(path[-1], None)
+            else:
+                target[path[-1]] = change["value"]
+        return node
+
+    @endpoint("baremetal.set_node_provision_state")
+    def set_node_provision_state(self, node, target, **kwargs):
+        node = self._node(node)
+        node.provision_state = {
+            "active": "active",
+            "deleted": "available",
+            "provide": "available",
+            "manage": "manageable",
+        }.get(target, target)
+        return node
+
+    @endpoint("baremetal.set_node_boot_device")
+    def set_node_boot_device(self, node, boot_device, persistent=False):
+        self._node(node)
+
+    @endpoint("baremetal.get_node_console")
+    def get_node_console(self, node):
+        node = self._node(node)
+        return {
+            "console_enabled": node.console_enabled,
+            "console_info": {"type": "socat", "url": "tcp://127.0.0.1:8024"}
+            if node.console_enabled
+            else None,
+        }
+
+    @endpoint("baremetal.enable_node_console")
+    def enable_node_console(self, node):
+        self._node(node).console_enabled = True
+
+    @endpoint("baremetal.list_node_vifs")
+    def list_node_vifs(self, node):
+        return [
+            port.internal_info["tenant_vif_port_id"]
+            for port in self.cloud.ports_of(self._node(node))
+            if port.internal_info.get("tenant_vif_port_id")
+        ]
+
+    @endpoint("baremetal.attach_vif_to_node")
+    def attach_vif_to_node(self, node, vif_id, retry_on_conflict=True, **kwargs):
+        self.cloud.attach_vif(self._node(node), vif_id)
+
+    @endpoint("baremetal.detach_vif_from_node")
+    def detach_vif_from_node(self, node, vif_id, ignore_missing=True):
+        try:
+            self.cloud.detach_vif(self._node(node), vif_id)
+        except sdk_exceptions.BadRequestException:
+            if ignore_missing:
+                return False
+            raise
+        return True
+
+    @endpoint("baremetal.ports", lazy=True)
+    def ports(self, details=False, **query):
+        return self._list("baremetal_ports", **query)
+
+    @endpoint("baremetal.volume_connectors", lazy=True)
+    def volume_connectors(self, details=False, **query):
+        return self._list("volume_connectors", **query)
+
+    @endpoint("baremetal.create_volume_connector")
+    def create_volume_connector(self, **attrs):
+        return self.cloud.add_node_resource("volume_connectors", **attrs)
+
+    @endpoint("baremetal.delete_volume_connector")
+    def delete_volume_connector(self, volume_connector, ignore_missing=True):
+        resource_id = _id(volume_connector)
+        if self.cloud.volume_connectors.pop(resource_id, None) is None:
+            if not ignore_missing:
+                raise sdk_exceptions.ResourceNotFound(
+                    "No VolumeConnector found for %s" % resource_id
+                )
+
+    @endpoint("baremetal.volume_targets", lazy=True)
+    def volume_targets(self, details=False, **query):
+        return self._list("volume_targets", **query)
+
+    @endpoint("baremetal.create_volume_target")
+    def create_volume_target(self, **attrs):
+        return self.cloud.add_node_resource("volume_targets", **attrs)
+
+
+class ImageProxy(Service):
+    """Fake of the openstacksdk image proxy"""
+
+    @endpoint("image.images", lazy=True)
+    def images(self, **query):
+        return [i for i in self.cloud.images.values() if matches(i, query)]
+
+    @endpoint("image.find_image")
+    def find_image(self, name_or_id, ignore_missing=True):
+        if name_or_id in self.cloud.images:
+            return self.cloud.images[name_or_id]
+        self.cloud.request("image.get_image")
+        for image in self.cloud.images.values():
+            if name_or_id == image.name:
+                return image
+        if ignore_missing:
+            return None
+        raise sdk_exceptions.ResourceNotFound("No image found for %s" % name_or_id)
+
+
+class Session(Service):
+    """Fake of the keystoneauth session, for the raw requests esi.lib makes"""
+
+    # the session finds endpoints in the service catalog it already has,
+    # so this makes no call
+    def get_endpoint(self, service_type=None, **kwargs):
+        return "http://%s.example.com" % service_type
+
+    @endpoint("session.post")
+    def post(self, url, json=None, **kwargs):
+        # the only raw request made is ironic's vif attach:
+        # /v1/nodes/<node>/vifs
+        node_id = url.rstrip("/").split("/")[-2]
+        node = self.cloud.get_node(node_id, sdk_exceptions.ResourceNotFound)
+        self.cloud.attach_vif(node, json["id"])
+        return Resource(status_code=204, ok=True)
+
+
+class VolumeManager(Service):
+    """Fake of cinderclient's volume manager
+
+    cinderclient is only installed with the openstack client, so its errors
+    are stood in for by osc_lib's.
+    """
+
+    @endpoint("volume.volumes.list", paginated=True)
+    def list(self, detailed=True, search_opts=None):
+        return [v for v in self.cloud.volumes.values() if matches(v, search_opts or {})]
+
+    @endpoint("volume.volumes.get")
+    def get(self, volume_id):
+        try:
+            return self.cloud.volumes[_id(volume_id)]
+        except KeyError:
+            raise osc_exceptions.NotFound(404)
+
+    @endpoint("volume.volumes.find")
+    def find(self, **kwargs):
+        found = [v for v in self.cloud.volumes.values() if matches(v, kwargs)]
+        if not found:
+            raise osc_exceptions.NotFound(404)
+        if len(found) > 1:
+            raise osc_exceptions.CommandError("Multiple volumes match %s" % kwargs)
+        return found[0]
+
+
+class FakeCloud(object):
+    """An in-memory OpenStack cloud
+
+    :param latency: Seconds each API request takes, by default
+    :param latencies: Optional dict mapping endpoint names, as counted in
+        calls, to the seconds requests to that endpoint take
+    :param page_sizes: Optional dict mapping services to the most items a
+        page of their listings holds, by default PAGE_SIZES
+    """
+
+    COLLECTIONS = (
+        "nodes",
+        "baremetal_ports",
+        "volume_connectors",
+        "volume_targets",
+        "networks",
+        "subnets",
+        "ports",
+        "floating_ips",
+        "trunks",
+        "volumes",
+        "images",
+    )
+
+    def __init__(self, latency=0.0, latencies=None, page_sizes=None):
+        self.latency = latency
+        self.latencies = latencies or {}
+        self.page_sizes = PAGE_SIZES if page_sizes is None else page_sizes
+        # {endpoint: number of requests} and {endpoint: response bytes}
+        self.calls = collections.Counter()
+        self.bytes = collections.Counter()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._macs = itertools.count(1)
+        for name in self.COLLECTIONS:
+            setattr(self, name, {})
+        # {floating ip id: {port forwarding id: port forwarding}}
+        self.port_forwardings = {}
+
+        network = NetworkProxy(self)
+        self.client_manager = types.SimpleNamespace(
+            # no keystoneauth session, so calls are neither governed nor
+            # pooled
+            session=None,
+            network=network,
+            volume=types.SimpleNamespace(volumes=VolumeManager(self)),
+            image=ImageProxy(self),
+            sdk_connection=types.SimpleNamespace(
+                baremetal=BaremetalProxy(self),
+                network=network,
+                image=ImageProxy(self),
+                session=Session(self),
+                current_project_id=PROJECT_ID,
+            ),
+        )
+
+    def request(self, name, response=None):
+        """Count a request to an endpoint and wait out its latency
+
+        :param name: The endpoint's name
+        :param response: The response body, to count the bytes transferred
+        """
+        size = response_size(response) if response is not None else 0
+        with self._lock:
+            self.calls[name] += 1
+            self.bytes[name] += size
+        delay = self.latencies.get(name, self.latency)
+        if delay:
+            time.sleep(delay)
+
+    def request_pages(self, name, response):
+        """Count the requests that fetch a listing a page at a time
+
+        A full page links to the next one, so the client fetches pages
+        until one is short, which may be empty.
+
+        :param name: The endpoint's name, prefixed by its service's
+        :param response: The whole listing
+        """
+        size = self.page_sizes.get(name.split(".", 1)[0])
+        if not size:
+            self.request(name, response)
+            return
+        for start in range(0, len(response) + 1, size):
+            self.request(name, response[start : start + size])
+
+    def reset_calls(self):
+        with self._lock:
+            self.calls.clear()
+            self.bytes.clear()
+
+    def collection(self, name):
+        return getattr(self, name)
+
+    def new_id(self):
+        return str(uuid.UUID(int=next(self._ids)))
+
+    def new_mac(self):
+        value = "%012x" % (0x525400000000 + next(self._macs))
+        return ":".join(value[i : i + 2] for i in range(0, 12, 2))
+
+    # Resources
+
+    def add_node(self, name, **attrs):
+        node_id = self.new_id()
+        node = Resource(
+            id=node_id,
+            uuid=node_id,
+            name=name,
+            provision_state="active",
+            power_state="power on",
+            maintenance=False,
+            is_maintenance=False,
+            instance_uuid=None,
+            instance_id=None,
+            resource_class="baremetal",
+            console_enabled=False,
+            last_error=None,
+            properties={},
+            instance_info={},
+            driver_info={},
+            extra={},
+            lessee=None,
+            owner=None,
+        )
+        node.__dict__.update(attrs)
+        self.nodes[node_id] = node
+        return node
+
+    def get_node(self, name_or_id, not_found):
+        node = self.nodes.get(name_or_id)
+        if node is None:
+            node = next((n for n in self.nodes.values() if n.name == name_or_id), None)
+        if node is None:
+            raise not_found("Node %s could not be found." % name_or_id)
+        return node
+
+    def ports_of(self, node):
+        return [p for p in self.baremetal_ports.values() if p.node_uuid == node.uuid]
+
+    def add_baremetal_port(self, node, switch="switch-0", switchport="Ethernet0"):
+        port_id = self.new_id()
+        port = Resource(
+            id=port_id,
+            uuid=port_id,
+            address=self.new_mac(),
+            node_id=node.id,
+            node_uuid=node.uuid,
+            internal_info={},
+            local_link_connection={
+                "switch_info": switch,
+                "switch_id": "00:00:5e:00:53:%02x" % (sum(switch.encode()) % 256),
+                "port_id": switchport,
+            },
+            physical_network=None,
+            pxe_enabled=True,
+        )
+        self.baremetal_ports[port_id] = port
+        return port
+
+    def add_node_resource(self, collection, node_id, **attrs):
+        """Add a volume connector or target to a node"""
+        resource_id = self.new_id()
+        resource = Resource(
+            id=resource_id,
+            uuid=resource_id,
+            node_id=node_id,
+            node_uuid=node_id,
+            **attrs,
+        )
+        self.collection(collection)[resource_id] = resource
+        return resource
+
+    def attach_vif(self, node, vif_id):
+        for port in self.ports_of(node):
+            if not port.internal_info.get("tenant_vif_port_id"):
+                port.internal_info["tenant_vif_port_id"] = vif_id
+                network_port = self.ports.get(vif_id)
+                if network_port is not None:
+                    network_port.status = "ACTIVE"
+                    network_port.device_owner = "baremetal:none"
+                    network_port.device_id = node.uuid
+                    network_port.binding_host_id = node.uuid
+                return
+        raise sdk_exceptions.BadRequestException(
+            "Node %s has no free ports" % node.uuid
+        )
+
+    def detach_vif(self, node, vif_id):
+        for port in self.ports_of(node):
+            if port.internal_info.get("tenant_vif_port_id") == vif_id:
+                del port.internal_info["tenant_vif_port_id"]
+                network_port = self.ports.get(vif_id)
+                if network_port is not None:
+                    network_port.status = "DOWN"
+                    network_port.device_owner = ""
+                    network_port.device_id = ""
+                return
+        raise sdk_exceptions.BadRequestException(
+            "Unable to detach VIF %s from node %s" % (vif_id, node.uuid)
+        )
+
+    def add_network(self, name, cidr, segmentation_id=None, external=False):
+        network_id = self.new_id()
+        network = Resource(
+            id=network_id,
+            name=name,
+            provider_network_type="vlan" if segmentation_id else "flat",
+            provider_segmentation_id=segmentation_id,
+            provider_physical_network="physnet1",
+            is_router_external=external,
+            subnet_ids=[],
+            status="ACTIVE",
+        )
+        self.networks[network_id] = network
+        self.add_subnet(network, "%s-subnet" % name, cidr)
+        return network
+
+    def add_subnet(self, network, name, cidr):
+        subnet_id = self.new_id()
+        subnet = Resource(
+            id=subnet_id,
+            name=name,
+            network_id=network.id,
+            cidr=str(cidr),
+            ip_version=4,
+            _hosts=ipaddress.ip_network(cidr).hosts(),
+        )
+        next(subnet._hosts)  # the gateway
+        self.subnets[subnet_id] = subnet
+        network.subnet_ids.append(subnet_id)
+        return subnet
+
+    def add_port(self, network_id, name="", fixed_ips=None, **attrs):
+        network = self.networks[network_id]
+        if not fixed_ips:
+            fixed_ips = [{"subnet_id": network.subnet_ids[0]}]
+        fixed_ips = [dict(ip) for ip in fixed_ips]
+        for ip in fixed_ips:
+            subnet = self.subnets[ip["subnet_id"]]
+            ip.setdefault("ip_address", str(next(subnet._hosts)))
+        port_id = self.new_id()
+        port = Resource(
+            id=port_id,
+            name=name,
+            network_id=network_id,
+            fixed_ips=fixed_ips,
+            mac_address=self.new_mac(),
+            status="DOWN",
+            device_owner="",
+            device_id="",
+            binding_host_id=None,
+            trunk_details=None,
+        )
+        port.__dict__.update(attrs)
+        self.ports[port_id] = port
+        return port
+
+    def add_trunk(self, name, port_id, sub_ports=None, **attrs):
+        trunk_id = self.new_id()
+        trunk = Resource(
+            id=trunk_id, name=name, port_id=port_id, sub_ports=list(sub_ports or [])
+        )
+        trunk.__dict__.update(attrs)
+        self.trunks[trunk_id] = trunk
+        # the port shares the trunk's list of sub ports, as neutron reports
+        # them in the port's trunk_details
+        self.ports[port_id].trunk_details = {
+            "trunk_id": trunk_id,
+            "sub_ports": trunk.sub_ports,
+        }
+        return trunk
+
+    def add_floating_ip(self, floating_network_id, port_id=None, **attrs):
+        network = self.networks[floating_network_id]
+        subnet = self.subnets[network.subnet_ids[0]]
+        fip_id = self.new_id()
+        fip = Resource(
+            id=fip_id,
+            floating_ip_address=str(next(subnet._hosts)),
+            floating_network_id=floating_network_id,
+            port_id=port_id,
+            fixed_ip_address=(
+                self.ports[port_id].fixed_ips[0]["ip_address"] if port_id else None
+            ),
+            project_id=PROJECT_ID,
+            status="ACTIVE" if port_id else "DOWN",
+            port_forwardings=[],
+            description="",
+        )
+        fip.__dict__.update(attrs)
+        self.floating_ips[fip_id] = fip
+        self.port_forwardings[fip_id] = {}
+        return fip
+
+    def add_port_forwarding(self, floating_ip_id, **attrs):
+        fip = self.floating_ips[floating_ip_id]
+        forwards = self.port_forwardings[floating_ip_id]
+        for existing in forwards.values():
+            if existing.external_port == attrs.get(
+                "external_port"
+            ) and existing.protocol == attrs.get("protocol"):
+                raise sdk_exceptions.ConflictException(
+                    "A duplicate port forwarding entry exists"
+                )
+        pf = Resource(id=self.new_id(), floatingip_id=floating_ip_id, **attrs)
+        pf.__dict__.setdefault("description", "")
+        forwards[pf.id] = pf
+        fip.port_forwardings.append(
+            {
+                key: getattr(pf, key)
+                for key in (
+                    "id",
+                    "internal_ip_address",
+                    "internal_port",
+                    "internal_port_id",
+                    "external_port",
+                    "protocol",
+                    "description",
+                )
+                if hasattr(pf, key)
+            }
+        )
+        return pf
+
+    def remove_port_forwarding(self, floating_ip_id, pf_id, ignore_missing=True):
+        forwards = self.port_forwardings.get(floating_ip_id, {})
+        if forwards.pop(pf_id, None) is None:
+            if ignore_missing:
+                return
+            raise sdk_exceptions.ResourceNotFound(
+                "No port forwarding found for %s" % pf_id
+            )
+        fip = self.floating_ips[floating_ip_id]
+        fip.port_forwardings[:] = [
+            pf for pf in fip.port_forwardings if pf["id"] != pf_id
+        ]
+
+    def add_volume(self, name, status="available", size=10):
+        volume = Resource(id=self.new_id(), name=name, status=status, size=size)
+        self.volumes[volume.id] = volume
+        return volume
+
+    def add_image(self, name):
+        image = Resource(id=self.new_id(), name=name, status="active")
+        self.images[image.id] = image
+        return image
+
+    # Topologies
+
+    def seed(
+        self,
+        nodes=0,
+        ports_per_node=1,
+        networks=1,
+        attached=1.0,
+        trunks=0,
+        floating_ips=0,
+        forwards_per_ip=0,
+        volumes=0,
+        switches=1,
+        available=0.0,
+    ):
+        """Populate the cloud with a synthetic ESI topology
+
+        :param nodes: Number of baremetal nodes
+        :param ports_per_node: Number of baremetal ports on each node
+        :param networks: Number of tenant VLAN networks, each with a subnet
+        :param attached: Fraction of nodes with their first port attached to
+            a tenant network, assigned round robin
+        :param trunks: Number of attached ports made into trunks, with a
+            sub port on the next network
+        :param floating_ips: Number of floating ips; without forwards, each
+            is associated with an attached port
+        :param forwards_per_ip: Number of port forwards on each floating ip,
+            to attached ports
+        :param volumes: Number of available volumes
+        :param switches: Number of switches the baremetal ports are cabled to
+        :param available: Fraction of nodes, taken from the last, that are
+            available rather than active; these are never attached
+        :returns: The cloud, so calls can be chained
+        """
+        subnets = ipaddress.ip_network("10.0.0.0/8").subnets(new_prefix=20)
+        external = self.add_network("external", "172.16.0.0/12", external=True)
+        tenant_networks = [
+            self.add_network("network-%d" % i, next(subnets), segmentation_id=100 + i)
+            for i in range(networks)
+        ]
+
+        attached_ports = []
+        for i in range(nodes):
+            node = self.add_node(
+                "node-%05d" % i,
+                provision_state=(
+                    "available" if i >= nodes * (1 - available) else "active"
+                ),
+            )
+            bm_ports = [
+                self.add_baremetal_port(
+                    node, "switch-%d" % (i % switches), "Ethernet%d/%d" % (i, j)
+                )
+                for j in range(ports_per_node)
+            ]
+            if (
+                i < nodes * attached
+                and node.provision_state == "active"
+                and tenant_networks
+            ):
+                network = tenant_networks[i % len(tenant_networks)]
+                port = self.add_port(
+                    network.id, name="esi-%s-%s" % (node.name, network.name)
+                )
+                self.attach_vif(node, port.id)
+                attached_ports.append((bm_ports[0], port, i))
+
+        for _bm_port, port, i in attached_ports[:trunks]:
+            network = tenant_networks[(i + 1) % len(tenant_networks)]
+            sub_port = self.add_port(network.id, name="%s-sub-port" % port.name)
+            self.add_trunk(
+                "trunk-%s" % port.name,
+                port.id,
+                [
+                    {
+                        "port_id": sub_port.id,
+                        "segmentation_id": network.provider_segmentation_id,
+                        "segmentation_type": "vlan",
+                    }
+                ],
+            )
+
+        ports = itertools.cycle([port for _bm, port, _i in attached_ports] or [None])
+        for i in range(floating_ips):
+            if forwards_per_ip:
+                fip = self.add_floating_ip(external.id)
+                for j in range(forwards_per_ip):
+                    port = next(ports)
+                    self.add_port_forwarding(
+                        fip.id,
+                        internal_ip_address=port.fixed_ips[0]["ip_address"],
+                        internal_port_id=port.id,
+                        internal_port=22,
+                        external_port=1024 + j,
+                        protocol="tcp",
+                    )
+            else:
+                self.add_floating_ip(external.id, port_id=next(ports).id)
+
+        for i in range(volumes):
+            self.add_volume("volume-%05d" % i)
+
+        return self
+
+    # Running commands
+
+    def run(self, command_class, argv):
+        """Run a command against the cloud, fully consuming its output
+
+        :param command_class: An osc_lib command class
+        :param argv: The command's arguments
+        :returns: A Run of the command's take_action result, Counters of
+            the API calls it made and the response bytes it received by
+            endpoint, and the wall time it took in seconds
+        """
+        app = types.SimpleNamespace(
+            client_manager=self.client_manager,
+            stdout=io.StringIO(),
+            stderr=io.StringIO(),
+            stdin=io.StringIO(),
+            options=types.SimpleNamespace(debug=False),
+        )
+        cmd = command_class(app, None)
+        parsed_args = cmd.get_parser(command_class.__name__).parse_args(argv)
+
+        self.reset_calls()
+        start = time.monotonic()
+        result = cmd.take_action(parsed_args)
+        if isinstance(cmd, command.Lister):
+            columns, data = result
+            result = (columns, [list(row) for row in data])
+        elapsed = time.monotonic() - start
+
+        with self._lock:
+            return Run(
+                result,
+                collections.Counter(self.calls),
+                collections.Counter(self.bytes),
+                elapsed,
+            )
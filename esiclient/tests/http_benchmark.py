@@ -0,0 +1,140 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+"""Benchmark connection reuse by the HTTP session esi commands share
+
+Makes rounds of concurrent calls through a keystoneauth session to a local
+keep-alive HTTP server, like a command that lists resources concurrently and
+then acts on them concurrently. This is done with the session's default
+connection pool and with the pool sized by utils.size_http_pool, reporting
+the connections each opened. Against a real cloud each new connection also
+costs a TLS handshake, e.g.:
+
+    python -m esiclient.tests.http_benchmark --workers 32 --rounds 10
+"""
+
+import argparse
+import http.server
+import socketserver
+import threading
+import time
+import types
+
+from keystoneauth1 import session as ksa_session
+
+from esiclient import utils
+
+# seconds the server takes to answer, so that calls overlap
+DEFAULT_SERVER_LATENCY = 0.01
+
+CALLS_PER_WORKER = 3
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """A keep-alive HTTP server counting the connections it accepts"""
+
+    daemon_threads = True
+
+    def __init__(self, latency=DEFAULT_SERVER_LATENCY):
+        super(Server, self).__init__(("127.0.0.1", 0), Handler)
+        self.latency = latency
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        with self.lock:
+            self.connections += 1
+        super(Server, self).process_request(request, client_address)
+
+    @property
+    def url(self):
+        return "http://%s:%d/v2.0/ports" % self.server_address
+
+
+def run(workers, rounds, sized, latency=DEFAULT_SERVER_LATENCY):
+    """Make rounds of calls from workers threads through one session
+
+    Each round makes a few calls per worker, and ends when all are done.
+
+    :param workers: The number of threads making calls at once
+    :param rounds: The number of rounds of calls
+    :param sized: Whether to size the connection pool to the workers
+    :returns: The number of connections the server accepted
+    """
+    server = Server(latency)
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,))
+    thread.daemon = True
+    thread.start()
+    try:
+        client_manager = types.SimpleNamespace(session=ksa_session.Session())
+        if sized:
+            utils.size_http_pool(client_manager, workers)
+        for _ in range(rounds):
+            results = utils.run_concurrently(
+                lambda _: client_manager.session.get(server.url, authenticated=False),
+                range(CALLS_PER_WORKER * workers),
+                workers,
+            )
+            errors = [result.error for result in results if result.error]
+            if errors:
+                raise errors[0]
+        client_manager.session.session.close()
+        return server.connections
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--workers", type=int, default=32, help="threads making calls at once"
+    )
+    parser.add_argument(
+        "--rounds", type=int, default=10, help="rounds of concurrent calls"
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=DEFAULT_SERVER_LATENCY,
+        help="seconds the server takes to answer",
+    )
+    return parser
+
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+    print("%-10s %12s %10s" % ("Pool", "Connections", "Seconds"))
+    for name, sized in (("default", False), ("sized", True)):
+        start = time.monotonic()
+        connections = run(args.workers, args.rounds, sized, args.latency)
+        print("%-10s %12d %10.3f" % (name, connections, time.monotonic() - start))
+
+
+if __name__ == "__main__":
+    main()
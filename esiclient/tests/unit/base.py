@@ -29,7 +29,8 @@ class TestCommand(TestCase):
         super(TestCommand, self).setUp()
         self.app = mock.Mock()
         self.app.client_manager = mock.Mock()
-        self.app.client_manager.baremetal = mock.Mock()
+        self.app.client_manager.sdk_connection.baremetal = mock.Mock()
+        self.baremetal_client = self.app.client_manager.sdk_connection.baremetal
         self.app.client_manager.network = mock.Mock()
 
     def check_parser(self, cmd, args, verify_args):
@@ -0,0 +1,86 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+from esiclient.tests import benchmark
+from esiclient.tests.unit import base
+
+# inventory scale the budgets are recorded at, 100 nodes
+SCALE = 0.1
+
+# benchmark: (API calls, response bytes) at SCALE; a command making more
+# calls or transferring more than this fails. Lower a budget when a change
+# improves on it, and raise one only with a reason in the commit message.
+BUDGETS = {
+    "node network list": (5, 154070),
+    "node network list --long": (5, 154070),
+    "node network list --network": (8, 135579),
+    "cluster list": (1, 13100),
+    "switch list": (1, 23380),
+    "switch port list": (3, 72809),
+    "switch port list --long": (4, 105409),
+    "switch vlan list": (3, 72529),
+    "topology dump": (6, 148880),
+    "trunk list": (3, 41739),
+    "port forwarding list": (11, 28220),
+    "port forwarding batch create": (12, 56453),
+    "port forwarding create": (103, 30428),
+    "port forwarding delete": (5, 3440),
+    "port forwarding purge": (61, 28220),
+    "node volume batch attach": (77, 69573),
+    "node network batch attach": (80, 24330),
+    "node network batch detach": (240, 106860),
+}
+
+# slack on recorded bytes, so that small changes to the fake's resources
+# do not fail every budget
+BYTES_TOLERANCE = 1.1
+
+# doubling the inventory may at most double calls and bytes, with slack
+# for the fixed cost of a command
+SCALING_TOLERANCE = 2.2
+
+
+class TestAPIBudget(base.TestCase):
+    def test_budgets_cover_benchmarks(self):
+        self.assertEqual(sorted(benchmark.BENCHMARKS), sorted(BUDGETS))
+
+    def test_budgets(self):
+        failures = []
+        for name, (max_calls, max_bytes) in sorted(BUDGETS.items()):
+            run = benchmark.run(name, SCALE)
+            calls, size = sum(run.calls.values()), sum(run.bytes.values())
+            if calls > max_calls:
+                failures.append(
+                    "%s made %d API calls, over its budget of %d: %s"
+                    % (name, calls, max_calls, dict(run.calls))
+                )
+            if size > max_bytes * BYTES_TOLERANCE:
+                failures.append(
+                    "%s transferred %d bytes, over its budget of %d"
+                    % (name, size, max_bytes)
+                )
+        self.assertEqual([], failures)
+
+    def test_scaling(self):
+        failures = []
+        for name in sorted(benchmark.BENCHMARKS):
+            small = benchmark.run(name, SCALE)
+            large = benchmark.run(name, 2 * SCALE)
+            for measure in ("calls", "bytes"):
+                before = sum(getattr(small, measure).values())
+                after = sum(getattr(large, measure).values())
+                if after > before * SCALING_TOLERANCE:
+                    failures.append(
+                        "%s %s grew from %d to %d when the inventory doubled"
+                        % (name, measure, before, after)
+                    )
+        self.assertEqual([], failures)
@@ -0,0 +1,160 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+import mock
+from openstack import exceptions as sdk_exceptions
+
+from esiclient.tests import fake_cloud
+from esiclient.tests.unit import base
+from esiclient.v1 import node_network
+
+
+class TestFakeCloud(base.TestCase):
+    def setUp(self):
+        super(TestFakeCloud, self).setUp()
+        self.cloud = fake_cloud.FakeCloud().seed(
+            nodes=10,
+            ports_per_node=2,
+            networks=2,
+            attached=0.5,
+            trunks=1,
+            floating_ips=2,
+            forwards_per_ip=3,
+            switches=2,
+        )
+        self.network = self.cloud.client_manager.network
+        self.baremetal = self.cloud.client_manager.sdk_connection.baremetal
+
+    def test_seed(self):
+        self.assertEqual(10, len(self.cloud.nodes))
+        self.assertEqual(20, len(self.cloud.baremetal_ports))
+        # external network and two tenant networks
+        self.assertEqual(3, len(self.cloud.networks))
+        # five attached ports and a trunk sub port
+        self.assertEqual(6, len(self.cloud.ports))
+        self.assertEqual(1, len(self.cloud.trunks))
+        self.assertEqual(
+            6,
+            sum(len(fip.port_forwardings) for fip in self.cloud.floating_ips.values()),
+        )
+
+        vifs = [
+            bm_port.internal_info["tenant_vif_port_id"]
+            for bm_port in self.cloud.baremetal_ports.values()
+            if "tenant_vif_port_id" in bm_port.internal_info
+        ]
+        self.assertEqual(5, len(vifs))
+        self.assertTrue(all(self.cloud.ports[vif].status == "ACTIVE" for vif in vifs))
+
+    def test_filters(self):
+        network = self.network.find_network("network-0")
+        ports = list(self.network.ports(network_id=network.id))
+        self.assertEqual(3, len(ports))
+
+        address = ports[0].fixed_ips[0]["ip_address"]
+        self.assertEqual(
+            [ports[0]], list(self.network.ports(fixed_ips="ip_address=%s" % address))
+        )
+        self.assertEqual(20, len(list(self.baremetal.ports(details=True))))
+        self.assertEqual(2, len(list(self.baremetal.ports(node="node-00001"))))
+
+    def test_fields(self):
+        node = self.baremetal.get_node("node-00001")
+
+        ports = list(self.baremetal.ports(node=node.id, fields=["uuid", "node_uuid"]))
+
+        self.assertEqual(2, len(ports))
+        self.assertEqual(node.id, ports[0].node_id)
+        self.assertEqual(ports[0].id, ports[0].uuid)
+        self.assertFalse(hasattr(ports[0], "local_link_connection"))
+
+    def test_find_missing(self):
+        self.assertIsNone(self.network.find_network("missing"))
+        self.assertRaises(
+            sdk_exceptions.ResourceNotFound,
+            self.network.find_network,
+            "missing",
+            ignore_missing=False,
+        )
+
+    def test_counts_calls(self):
+        list(self.network.ports())
+        list(self.network.ports())
+        self.baremetal.get_node("node-00001")
+
+        self.assertEqual(
+            {"network.ports": 2, "baremetal.get_node": 1}, dict(self.cloud.calls)
+        )
+        self.assertEqual(
+            2 * fake_cloud.response_size(list(self.cloud.ports.values())),
+            self.cloud.bytes["network.ports"],
+        )
+
+    def test_counts_find_requests(self):
+        network = self.network.find_network("network-0")
+        self.network.find_network(network.id)
+
+        # a name is looked up as an id first
+        self.assertEqual(
+            {"network.get_network": 1, "network.find_network": 2},
+            dict(self.cloud.calls),
+        )
+
+    def test_counts_pages(self):
+        cloud = fake_cloud.FakeCloud(page_sizes={"baremetal": 5}).seed(nodes=10)
+        baremetal = cloud.client_manager.sdk_connection.baremetal
+        nodes = list(cloud.nodes.values())
+
+        self.assertEqual(nodes, list(baremetal.nodes()))
+        self.assertEqual(nodes[:1], list(baremetal.nodes(name="node-00000")))
+
+        # two full pages and an empty one, then a short one
+        self.assertEqual({"baremetal.nodes": 4}, dict(cloud.calls))
+        self.assertEqual(
+            sum(
+                fake_cloud.response_size(page)
+                for page in (nodes[:5], nodes[5:], [], nodes[:1])
+            ),
+            cloud.bytes["baremetal.nodes"],
+        )
+
+    @mock.patch("esiclient.tests.fake_cloud.time.sleep", autospec=True)
+    def test_latency(self, mock_sleep):
+        cloud = fake_cloud.FakeCloud(latency=0.1, latencies={"network.ports": 0.5})
+
+        list(cloud.client_manager.network.networks())
+        list(cloud.client_manager.network.ports())
+
+        self.assertEqual([mock.call(0.1), mock.call(0.5)], mock_sleep.call_args_list)
+
+    def test_vif_attach_detach(self):
+        network = self.network.find_network("network-1")
+        port = self.network.create_port(network_id=network.id, name="new-port")
+
+        self.baremetal.attach_vif_to_node("node-00009", port.id)
+        self.assertEqual("ACTIVE", port.status)
+        self.assertEqual([port.id], self.baremetal.list_node_vifs("node-00009"))
+
+        self.assertTrue(self.baremetal.detach_vif_from_node("node-00009", port.id))
+        self.assertEqual("DOWN", port.status)
+        self.assertEqual([], self.baremetal.list_node_vifs("node-00009"))
+        self.assertFalse(self.baremetal.detach_vif_from_node("node-00009", port.id))
+
+    def test_run(self):
+        run = self.cloud.run(node_network.List, [])
+
+        columns, rows = run.result
+        self.assertIn("Node", columns)
+        self.assertEqual(20, len(rows))
+        self.assertEqual(5, sum(run.calls.values()))
+        self.assertEqual(set(run.calls), set(run.bytes))
+        self.assertGreaterEqual(run.elapsed, 0)
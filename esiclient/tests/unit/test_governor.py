@@ -0,0 +1,237 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+import threading
+
+import fixtures
+from keystoneauth1 import exceptions as ksa_exceptions
+from keystoneauth1 import session as ksa_session
+import mock
+from requests_mock.contrib import fixture as rm_fixture
+
+from esiclient import governor
+from esiclient.tests.unit import base
+
+URL = "http://neutron.example.com/v2.0/ports"
+
+
+class TestTokenBucket(base.TestCase):
+    @mock.patch("time.sleep")
+    @mock.patch("time.monotonic")
+    def test_burst(self, mock_monotonic, mock_sleep):
+        mock_monotonic.return_value = 100
+        bucket = governor.TokenBucket(2)
+
+        waits = [bucket.acquire() for _ in range(4)]
+
+        self.assertEqual([0, 0, 0.5, 1.0], waits)
+        mock_sleep.assert_has_calls([mock.call(0.5), mock.call(1.0)])
+
+    @mock.patch("time.sleep")
+    @mock.patch("time.monotonic")
+    def test_refill(self, mock_monotonic, mock_sleep):
+        mock_monotonic.return_value = 100
+        bucket = governor.TokenBucket(2)
+        bucket.acquire()
+        bucket.acquire()
+
+        mock_monotonic.return_value = 101
+
+        self.assertEqual(0, bucket.acquire())
+        mock_sleep.assert_not_called()
+
+    @mock.patch("time.sleep")
+    @mock.patch("time.monotonic")
+    def test_pause(self, mock_monotonic, mock_sleep):
+        mock_monotonic.return_value = 100
+        bucket = governor.TokenBucket(8)
+
+        bucket.pause(3)
+
+        self.assertEqual(4, bucket.rate)
+        self.assertEqual(3, bucket.acquire())
+        bucket.recover()
+        self.assertEqual(4.25, bucket.rate)
+
+    @mock.patch("time.sleep")
+    def test_unlimited(self, mock_sleep):
+        bucket = governor.TokenBucket()
+
+        for _ in range(100):
+            bucket.acquire()
+
+        mock_sleep.assert_not_called()
+
+
+class TestInFlightLimit(base.TestCase):
+    def test_limit(self):
+        limit = governor.InFlightLimit(2)
+        limit.acquire()
+        limit.acquire()
+        acquired = threading.Event()
+
+        def acquire():
+            limit.acquire()
+            acquired.set()
+
+        thread = threading.Thread(target=acquire)
+        thread.start()
+        self.assertFalse(acquired.wait(0.05))
+
+        limit.release()
+        thread.join(5)
+        self.assertTrue(acquired.is_set())
+
+    def test_decrease_increase(self):
+        limit = governor.InFlightLimit(4)
+
+        limit.decrease()
+        limit.decrease()
+        limit.decrease()
+        self.assertEqual(1, limit.limit)
+
+        for _ in range(20):
+            limit.increase()
+        self.assertEqual(4, limit.limit)
+
+
+class TestGovernor(base.TestCase):
+    def setUp(self):
+        super(TestGovernor, self).setUp()
+        self.mock_sleep = self.useFixture(fixtures.MockPatch("time.sleep")).mock
+        self.governor = governor.Governor(retries=2)
+
+    def test_backoff_delay(self):
+        self.assertEqual(7, governor.backoff_delay(1, "7"))
+        self.assertEqual(governor.MAX_BACKOFF, governor.backoff_delay(1, "3600"))
+        for attempt, delay in ((1, 0.5), (3, 2), (10, governor.MAX_BACKOFF)):
+            self.assertTrue(delay / 2 <= governor.backoff_delay(attempt) <= delay)
+
+    def test_call_throttled(self):
+        throttled = mock.Mock(status_code=429, headers={"Retry-After": "2"})
+        ok = mock.Mock(status_code=200)
+        send = mock.Mock(side_effect=[throttled, ok])
+
+        self.assertIs(ok, self.governor.call(send, "network", "neutron"))
+
+        self.assertEqual(2, send.call_count)
+        self.assertEqual(1, self.governor.throttled)
+        self.mock_sleep.assert_called_once_with(mock.ANY)
+        self.assertAlmostEqual(2, self.mock_sleep.call_args[0][0], places=1)
+        # halved by the refusal, then raised a little by the success
+        self.assertEqual(16.0625, self.governor.limits["neutron"].limit)
+
+    def test_call_throttled_exception(self):
+        error = ksa_exceptions.ServiceUnavailable(http_status=503)
+        send = mock.Mock(side_effect=[error, error, error])
+
+        self.assertRaises(
+            ksa_exceptions.ServiceUnavailable,
+            self.governor.call,
+            send,
+            "baremetal",
+            method="GET",
+        )
+        self.assertEqual(3, send.call_count)
+        self.assertEqual(2, self.governor.throttled)
+
+    def test_call_post_not_retried_on_503(self):
+        unavailable = mock.Mock(status_code=503, headers={})
+        send = mock.Mock(return_value=unavailable)
+
+        self.assertIs(unavailable, self.governor.call(send, "network", method="POST"))
+        self.assertEqual(1, send.call_count)
+        self.assertEqual(0, self.governor.throttled)
+        self.mock_sleep.assert_not_called()
+
+    def test_call_post_retried_on_429(self):
+        throttled = mock.Mock(status_code=429, headers={})
+        ok = mock.Mock(status_code=201)
+        send = mock.Mock(side_effect=[throttled, ok])
+
+        self.assertIs(ok, self.governor.call(send, "network", method="POST"))
+        self.assertEqual(2, send.call_count)
+
+    def test_call_error_not_retried(self):
+        send = mock.Mock(side_effect=ksa_exceptions.NotFound(http_status=404))
+
+        self.assertRaises(ksa_exceptions.NotFound, self.governor.call, send)
+        self.assertEqual(1, send.call_count)
+        self.assertEqual(0, self.governor.limits[None].in_flight)
+
+    def test_from_env(self):
+        self.useFixture(
+            fixtures.EnvironmentVariable(
+                governor.RATE_LIMITS_ENV, "network=20, baremetal=2.5"
+            )
+        )
+        self.useFixture(fixtures.EnvironmentVariable(governor.MAX_IN_FLIGHT_ENV, "8"))
+
+        configured = governor.Governor.from_env()
+
+        self.assertEqual({"network": 20, "baremetal": 2.5}, configured.rates)
+        self.assertEqual(8, configured.max_in_flight)
+        self.assertEqual(2.5, configured.bucket("baremetal").rate)
+        self.assertIsNone(configured.bucket("volume").rate)
+
+    def test_parse_rates(self):
+        self.assertEqual({}, governor.parse_rates(None))
+        self.assertEqual({governor.ALL_SERVICES: 15}, governor.parse_rates("15"))
+        self.assertRaises(ValueError, governor.parse_rates, "network=fast")
+        self.assertRaises(ValueError, governor.parse_rates, "network=0")
+
+
+class TestGovern(base.TestCase):
+    def setUp(self):
+        super(TestGovern, self).setUp()
+        self.mock_sleep = self.useFixture(fixtures.MockPatch("time.sleep")).mock
+        self.requests_mock = self.useFixture(rm_fixture.Fixture())
+        self.session = ksa_session.Session()
+
+    def test_govern(self):
+        self.requests_mock.get(
+            URL,
+            [
+                {"status_code": 429, "headers": {"Retry-After": "1"}},
+                {"status_code": 200, "json": {"ports": []}},
+            ],
+        )
+        session_governor = governor.govern(self.session, governor.Governor())
+
+        response = self.session.get(URL, authenticated=False)
+
+        self.assertEqual({"ports": []}, response.json())
+        self.assertEqual(2, self.requests_mock.call_count)
+        self.assertEqual(1, session_governor.throttled)
+        self.assertIn("neutron.example.com", session_governor.limits)
+        self.mock_sleep.assert_any_call(mock.ANY)
+
+    def test_govern_post_not_retried_on_503(self):
+        self.requests_mock.post(URL, status_code=503)
+        governor.govern(self.session, governor.Governor())
+
+        self.assertRaises(
+            ksa_exceptions.ServiceUnavailable,
+            self.session.post,
+            URL,
+            json={"port": {}},
+            authenticated=False,
+        )
+        self.assertEqual(1, self.requests_mock.call_count)
+
+    def test_govern_once(self):
+        session_governor = governor.govern(self.session)
+
+        self.assertIs(session_governor, governor.govern(self.session))
+
+    def test_govern_other_sessions(self):
+        self.assertIsNone(governor.govern(mock.Mock()))
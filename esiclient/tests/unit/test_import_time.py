@@ -0,0 +1,89 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+#
+
+import configparser
+import os
+import subprocess
+import sys
+from unittest import TestCase
+
+import esiclient
+
+# modules the openstack client has already imported by the time it loads
+# the esiclient plugin and its commands
+BASELINE = (
+    "import osc_lib.command.command, osc_lib.exceptions, osc_lib.i18n, osc_lib.utils"
+)
+
+# generous ceiling on the time spent importing esiclient modules themselves,
+# to catch gross regressions without being sensitive to a noisy machine
+MAX_IMPORT_TIME_US = 500000
+
+
+def _import_times(code):
+    """Run code in a fresh interpreter and return its -X importtime report
+
+    :param code: Python source to run
+    :returns: A dict mapping module names to (self, cumulative) microseconds
+    """
+    root = os.path.dirname(os.path.dirname(esiclient.__file__))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=root,
+    )
+    if proc.returncode:
+        raise AssertionError(proc.stderr)
+
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative))
+    return times
+
+
+def _command_modules():
+    setup_cfg = os.path.join(
+        os.path.dirname(os.path.dirname(esiclient.__file__)), "setup.cfg"
+    )
+    config = configparser.ConfigParser()
+    config.read(setup_cfg)
+    entry_points = config["entry_points"]["openstack.esiclient.v1"]
+    modules = {"esiclient.plugin"}
+    for line in entry_points.strip().splitlines():
+        modules.add(line.split("=")[1].split(":")[0].strip())
+    return sorted(modules)
+
+
+class TestImportTime(TestCase):
+    def test_import_time(self):
+        modules = _command_modules()
+        baseline = _import_times(BASELINE)
+        times = _import_times(
+            "; ".join([BASELINE] + ["import %s" % m for m in modules])
+        )
+
+        added = {name: t for name, t in times.items() if name not in baseline}
+        foreign = sorted(name for name in added if name.split(".")[0] != "esiclient")
+        total = sum(self_us for self_us, _ in added.values())
+
+        self.assertEqual(
+            [],
+            foreign,
+            "esiclient commands import modules the openstack client has not "
+            "already loaded (%d us); defer them to take_action" % total,
+        )
+        self.assertLess(total, MAX_IMPORT_TIME_US)
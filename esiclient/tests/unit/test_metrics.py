@@ -0,0 +1,298 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+import json
+import os
+import socket
+
+import fixtures
+import mock
+from openstack import exceptions as sdk_exceptions
+
+from esiclient import governor
+from esiclient import metrics
+from esiclient.tests.unit import base
+from esiclient import utils
+
+
+class ListExporter(object):
+    def __init__(self):
+        self.metrics = []
+        self.closed = False
+
+    def export(self, metric):
+        self.metrics.append(metric)
+
+    def close(self):
+        self.closed = True
+
+
+class TestMetrics(base.TestCase):
+    def setUp(self):
+        super(TestMetrics, self).setUp()
+        self.exporter = ListExporter()
+        self.metrics = metrics.Metrics(self.exporter, tags={"orchestration": "test"})
+
+    def test_record(self):
+        self.metrics.increment("errors", phase="install")
+        self.metrics.gauge("nodes", 3)
+        self.metrics.timing("phase", 1.5)
+
+        self.assertEqual(
+            [
+                (
+                    "esi.errors",
+                    "counter",
+                    1,
+                    {"orchestration": "test", "phase": "install"},
+                ),
+                ("esi.nodes", "gauge", 3, {"orchestration": "test"}),
+                ("esi.phase", "timing", 1.5, {"orchestration": "test"}),
+            ],
+            [(m.name, m.type, m.value, m.tags) for m in self.exporter.metrics],
+        )
+
+    def test_timer(self):
+        with self.metrics.timer("node", node="node1"):
+            pass
+
+        [metric] = self.exporter.metrics
+        self.assertEqual("esi.node", metric.name)
+        self.assertEqual("ok", metric.tags["outcome"])
+        self.assertEqual("node1", metric.tags["node"])
+
+    def test_timer_error(self):
+        def fail():
+            with self.metrics.timer("node", node="node1"):
+                raise ValueError("boom")
+
+        self.assertRaises(ValueError, fail)
+
+        timing, error = self.exporter.metrics
+        self.assertEqual("error", timing.tags["outcome"])
+        self.assertEqual("esi.node.errors", error.name)
+        self.assertEqual(
+            {"orchestration": "test", "node": "node1", "error": "ValueError"},
+            error.tags,
+        )
+
+    def test_phases(self):
+        phases = self.metrics.phases("phase")
+        phases.begin("create")
+        phases.begin("install")
+        phases.end(RuntimeError())
+        phases.end()
+
+        self.assertEqual(
+            [
+                ("esi.phase", "create", "ok"),
+                ("esi.phase", "install", "error"),
+                ("esi.phase.errors", "install", None),
+            ],
+            [
+                (m.name, m.tags["phase"], m.tags.get("outcome"))
+                for m in self.exporter.metrics
+            ],
+        )
+
+    def test_disabled(self):
+        disabled = metrics.Metrics.from_url(None)
+
+        with disabled.timer("node"):
+            disabled.increment("errors")
+        disabled.close()
+
+        self.assertIsNone(disabled.exporter)
+
+    def test_close(self):
+        self.metrics.close()
+
+        self.assertTrue(self.exporter.closed)
+
+    def test_count_retry(self):
+        disabled = metrics.Metrics()
+        closed = metrics.Metrics(ListExporter())
+        closed.close()
+
+        metrics.count_retry(metrics.CONFLICT, stage="attach vif")
+
+        [metric] = self.exporter.metrics
+        self.assertEqual(
+            (
+                "esi.retries",
+                "counter",
+                1,
+                {
+                    "orchestration": "test",
+                    "reason": "conflict",
+                    "stage": "attach vif",
+                },
+            ),
+            (metric.name, metric.type, metric.value, metric.tags),
+        )
+        self.assertEqual([], closed.exporter.metrics)
+        self.assertIsNone(disabled.exporter)
+
+
+class TestExporters(base.TestCase):
+    def setUp(self):
+        super(TestExporters, self).setUp()
+        self.metric = metrics.Metric(
+            "esi.orchestrate.phase",
+            metrics.TIMING,
+            0.25,
+            {"phase": "install"},
+            1700000000.0,
+        )
+
+    def test_exporter_from_url(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path, "m.jsonl")
+        file_exporter = metrics.exporter_from_url(path)
+        self.addCleanup(file_exporter.close)
+        statsd = metrics.exporter_from_url("statsd://127.0.0.1:9125")
+        self.addCleanup(statsd.close)
+
+        self.assertIsInstance(file_exporter, metrics.FileExporter)
+        self.assertEqual(("127.0.0.1", 9125), statsd.address)
+        self.assertEqual(
+            "http://localhost:4318/v1/metrics",
+            metrics.exporter_from_url("otlp://").url,
+        )
+        self.assertEqual(
+            "https://collector/v1/metrics",
+            metrics.exporter_from_url("https://collector/v1/metrics").url,
+        )
+        self.assertRaises(ValueError, metrics.exporter_from_url, "ftp://host")
+
+    def test_file(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path, "m.jsonl")
+        exporter = metrics.FileExporter(path)
+        exporter.export(self.metric)
+        exporter.export(self.metric)
+        exporter.close()
+
+        with open(path) as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(2, len(lines))
+        self.assertEqual(
+            {
+                "name": "esi.orchestrate.phase",
+                "type": "timing",
+                "value": 0.25,
+                "tags": {"phase": "install"},
+                "timestamp": 1700000000.0,
+            },
+            lines[0],
+        )
+
+    def test_statsd(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.addCleanup(server.close)
+        server.bind(("127.0.0.1", 0))
+        server.settimeout(5)
+        exporter = metrics.StatsdExporter(*server.getsockname())
+        self.addCleanup(exporter.close)
+
+        exporter.export(self.metric)
+        exporter.export(
+            metrics.Metric("esi.orchestrate.polls", metrics.COUNTER, 2, {}, 0)
+        )
+
+        self.assertEqual(
+            b"esi.orchestrate.phase:250|ms|#phase:install", server.recv(1024)
+        )
+        self.assertEqual(b"esi.orchestrate.polls:2|c", server.recv(1024))
+
+    def test_otlp_payload(self):
+        exporter = metrics.OTLPExporter("http://localhost:4318/v1/metrics")
+        exporter.export(self.metric)
+        exporter.export(self.metric._replace(value=0.75))
+        exporter.export(metrics.Metric("esi.polls", metrics.COUNTER, 2, {}, 0))
+        exporter.export(metrics.Metric("esi.polls", metrics.COUNTER, 3, {}, 0))
+        exporter.export(metrics.Metric("esi.nodes", metrics.GAUGE, 3, {}, 0))
+
+        [resource] = exporter.payload()["resourceMetrics"]
+        [scope] = resource["scopeMetrics"]
+        phase, polls, nodes = scope["metrics"]
+
+        [point] = phase["histogram"]["dataPoints"]
+        self.assertEqual("esi.orchestrate.phase", phase["name"])
+        self.assertEqual("2", point["count"])
+        self.assertEqual(1.0, point["sum"])
+        self.assertEqual(0.75, point["max"])
+        self.assertEqual(
+            [{"key": "phase", "value": {"stringValue": "install"}}],
+            point["attributes"],
+        )
+        self.assertTrue(polls["sum"]["isMonotonic"])
+        self.assertEqual(5, polls["sum"]["dataPoints"][0]["asDouble"])
+        self.assertEqual(3, nodes["gauge"]["dataPoints"][0]["asDouble"])
+
+    @mock.patch("urllib.request.urlopen", autospec=True)
+    @mock.patch("time.sleep")
+    def test_otlp_retries(self, mock_sleep, mock_urlopen):
+        exporter = metrics.OTLPExporter("http://localhost:4318/v1/metrics")
+        recording = metrics.Metrics(exporter)
+        self.addCleanup(recording.close)
+        throttled = mock.Mock(status_code=429, headers={})
+        conflict = sdk_exceptions.ConflictException(
+            "Node node1 is locked by host conductor1, please retry after the "
+            "current operation is completed.",
+            http_status=409,
+        )
+
+        governor.Governor().call(
+            mock.Mock(side_effect=[throttled, throttled, mock.Mock(status_code=200)]),
+            "network",
+        )
+        utils.retry_conflicts("update node", mock.Mock(side_effect=[conflict, "ok"]))
+
+        [resource] = exporter.payload()["resourceMetrics"]
+        [scope] = resource["scopeMetrics"]
+        self.assertEqual(
+            [
+                ("esi.retries", 2, {"reason": "throttled", "service": "network"}),
+                ("esi.retries", 1, {"reason": "conflict", "stage": "update node"}),
+            ],
+            [
+                (
+                    metric["name"],
+                    metric["sum"]["dataPoints"][0]["asDouble"],
+                    {
+                        a["key"]: a["value"]["stringValue"]
+                        for a in metric["sum"]["dataPoints"][0]["attributes"]
+                    },
+                )
+                for metric in scope["metrics"]
+            ],
+        )
+
+    @mock.patch("urllib.request.urlopen", autospec=True)
+    def test_otlp_close(self, mock_urlopen):
+        exporter = metrics.OTLPExporter("http://localhost:4318/v1/metrics")
+        exporter.export(self.metric)
+
+        exporter.close()
+
+        [request] = mock_urlopen.call_args[0]
+        self.assertEqual("http://localhost:4318/v1/metrics", request.full_url)
+        self.assertEqual("POST", request.get_method())
+        self.assertEqual(exporter.payload(), json.loads(request.data))
+
+    @mock.patch("urllib.request.urlopen", autospec=True)
+    def test_otlp_collector_unavailable(self, mock_urlopen):
+        mock_urlopen.side_effect = OSError("connection refused")
+        exporter = metrics.OTLPExporter("http://localhost:4318/v1/metrics")
+        exporter.export(self.metric)
+
+        # a missing collector must not fail the orchestration
+        exporter.close()
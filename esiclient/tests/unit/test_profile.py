@@ -0,0 +1,245 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+import argparse
+import functools
+import io
+import json
+import os
+
+import fixtures
+from keystoneauth1 import session as ksa_session
+import mock
+from requests_mock.contrib import fixture as rm_fixture
+
+from esiclient import governor
+from esiclient import plugin
+from esiclient import profile
+from esiclient.tests.unit import base
+from esiclient import utils
+
+PORT_ID = "7e2a47b1-1c13-4bbd-9a3a-3c1b4d6b2b1f"
+
+
+class FakeSession(object):
+    def request(self, url, method, **kwargs):
+        if url.endswith("/missing"):
+            error = Exception("not found")
+            error.http_status = 404
+            raise error
+        return mock.Mock(status_code=200, content=b'{"port": {}}', url=url)
+
+
+def get_port(session, port_id):
+    return session.request(
+        "https://neutron:9696/v2.0/ports/%s?fields=id" % port_id,
+        "GET",
+        endpoint_filter={"service_type": "network"},
+    )
+
+
+class TestProfile(base.TestCase):
+    def setUp(self):
+        super(TestProfile, self).setUp()
+        self.profiler = profile.Profiler()
+        self.addCleanup(profile.instrument(FakeSession, self.profiler))
+        self.session = FakeSession()
+
+    def test_endpoint_template(self):
+        self.assertEqual(
+            "/v2.0/ports/{id}",
+            profile.endpoint_template(
+                "https://neutron:9696/v2.0/ports/%s?fields=id" % PORT_ID
+            ),
+        )
+        self.assertEqual(
+            "/v1/nodes/{id}/vifs",
+            profile.endpoint_template("https://ironic/v1/nodes/%s/vifs" % PORT_ID),
+        )
+        self.assertEqual(
+            "/v2.0/floatingips/{id}",
+            profile.endpoint_template("https://neutron/v2.0/floatingips/10.0.0.1"),
+        )
+        self.assertEqual(
+            "/v1/nodes/node-1",
+            profile.endpoint_template("https://ironic/v1/nodes/node-1"),
+        )
+
+    def test_records_calls(self):
+        get_port(self.session, PORT_ID)
+
+        [call] = self.profiler.calls
+        self.assertEqual("network", call.service)
+        self.assertEqual("GET", call.method)
+        self.assertEqual("/v2.0/ports/{id}", call.endpoint)
+        self.assertEqual(200, call.status)
+        self.assertEqual(12, call.size)
+        self.assertTrue(
+            call.caller.startswith("esiclient.tests.unit.test_profile:get_port:")
+        )
+
+    def test_records_failed_calls(self):
+        self.assertRaises(
+            Exception, self.session.request, "https://neutron/v2.0/missing", "GET"
+        )
+
+        [call] = self.profiler.calls
+        self.assertEqual(404, call.status)
+        self.assertEqual(0, call.size)
+
+    def test_summary(self):
+        for _ in range(profile.N_PLUS_ONE_THRESHOLD):
+            get_port(self.session, PORT_ID)
+        self.session.request("https://neutron/v2.0/networks", "GET")
+
+        summary = self.profiler.summary()
+
+        self.assertIn("6 API calls", summary)
+        self.assertIn("GET network /v2.0/ports/{id}", summary)
+        self.assertIn("GET - /v2.0/networks", summary)
+        self.assertIn("Possible N+1 patterns:", summary)
+        self.assertIn(
+            "5 x GET network /v2.0/ports/{id} from "
+            "esiclient.tests.unit.test_profile:get_port:",
+            summary,
+        )
+
+    def test_no_n_plus_one_below_threshold(self):
+        for _ in range(profile.N_PLUS_ONE_THRESHOLD - 1):
+            get_port(self.session, PORT_ID)
+
+        self.assertEqual([], self.profiler.n_plus_one())
+        self.assertNotIn("N+1", self.profiler.summary())
+
+    def test_chrome_trace(self):
+        get_port(self.session, PORT_ID)
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path, "trace.json")
+
+        self.profiler.write_trace(path)
+
+        with open(path) as f:
+            trace = json.load(f)
+        [event] = trace["traceEvents"]
+        self.assertEqual("GET /v2.0/ports/{id}", event["name"])
+        self.assertEqual("network", event["cat"])
+        self.assertEqual("X", event["ph"])
+        self.assertEqual(12, event["args"]["bytes"])
+
+    def test_report(self):
+        get_port(self.session, PORT_ID)
+        self.profiler.trace_path = os.path.join(
+            self.useFixture(fixtures.TempDir()).path, "trace.json"
+        )
+        stream = io.StringIO()
+
+        profile.report(self.profiler, stream)
+
+        self.assertIn("1 API calls", stream.getvalue())
+        self.assertIn("Chrome trace written to", stream.getvalue())
+        self.assertTrue(os.path.exists(self.profiler.trace_path))
+
+    def test_uninstrument(self):
+        original = FakeSession.__dict__["request"]
+        uninstrument = profile.instrument(FakeSession, self.profiler)
+        uninstrument()
+        get_port(self.session, PORT_ID)
+
+        # only the instrumentation from setUp is left in place
+        self.assertIs(original, FakeSession.__dict__["request"])
+        self.assertEqual(1, len(self.profiler.calls))
+
+
+def list_ports(session):
+    return session.get("http://neutron.example.com/v2.0/ports", authenticated=False)
+
+
+class TestProfileGoverned(base.TestCase):
+    def setUp(self):
+        super(TestProfileGoverned, self).setUp()
+        self.useFixture(fixtures.MockPatch("time.sleep"))
+        self.requests_mock = self.useFixture(rm_fixture.Fixture())
+        self.requests_mock.get(
+            "http://neutron.example.com/v2.0/ports",
+            [{"status_code": 429}, {"status_code": 200, "json": {"ports": []}}],
+        )
+        self.profiler = profile.Profiler()
+        self.addCleanup(profile.instrument(ksa_session.Session, self.profiler))
+        self.session = ksa_session.Session()
+        governor.govern(self.session, governor.Governor())
+
+    def test_caller_is_command_code(self):
+        utils.run_concurrently(lambda _: list_ports(self.session), [1])
+
+        self.assertEqual(2, len(self.profiler.calls))
+        for call in self.profiler.calls:
+            self.assertTrue(
+                call.caller.startswith("esiclient.tests.unit.test_profile:list_ports:"),
+                call.caller,
+            )
+
+    def test_caller_falls_back_to_infrastructure(self):
+        utils.fetch_concurrently(
+            {
+                "ports": functools.partial(
+                    self.session.get,
+                    authenticated=False,
+                    url="http://neutron.example.com/v2.0/ports",
+                )
+            }
+        )
+
+        self.assertTrue(
+            self.profiler.calls[0].caller.startswith("esiclient.utils:timed_call:")
+        )
+
+
+@mock.patch.object(profile, "enable", autospec=True)
+class TestProfileOptions(base.TestCase):
+    def setUp(self):
+        super(TestProfileOptions, self).setUp()
+        self.useFixture(fixtures.EnvironmentVariable("ESI_PROFILE"))
+        self.useFixture(fixtures.EnvironmentVariable("ESI_PROFILE_TRACE"))
+
+    def test_disabled(self, mock_enable):
+        parser = plugin.build_option_parser(argparse.ArgumentParser())
+        parser.parse_args([])
+
+        mock_enable.assert_not_called()
+
+    def test_profile(self, mock_enable):
+        parser = plugin.build_option_parser(argparse.ArgumentParser())
+        args = parser.parse_args(["--profile"])
+
+        self.assertTrue(args.profile)
+        mock_enable.assert_called_once_with(trace_path=None)
+
+    def test_profile_trace(self, mock_enable):
+        parser = plugin.build_option_parser(argparse.ArgumentParser())
+        args = parser.parse_args(["--profile-trace", "trace.json"])
+
+        self.assertEqual("trace.json", args.profile_trace)
+        mock_enable.assert_called_once_with(trace_path="trace.json")
+
+    def test_environment(self, mock_enable):
+        self.useFixture(fixtures.EnvironmentVariable("ESI_PROFILE", "1"))
+
+        plugin.build_option_parser(argparse.ArgumentParser())
+
+        mock_enable.assert_called_once_with(trace_path=None)
+
+    def test_environment_disabled(self, mock_enable):
+        for value in ("0", "false", "no"):
+            self.useFixture(fixtures.EnvironmentVariable("ESI_PROFILE", value))
+
+            plugin.build_option_parser(argparse.ArgumentParser())
+
+        mock_enable.assert_not_called()
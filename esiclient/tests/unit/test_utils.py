@@ -12,8 +12,16 @@
 #
 
 import mock
+import os
+import types
 from unittest import TestCase
 
+from keystoneauth1 import exceptions as ksa_exceptions
+from keystoneauth1 import session as ksa_session
+from openstack import exceptions as sdk_exceptions
+from osc_lib import exceptions as osc_exceptions
+
+from esiclient.tests import http_benchmark
 from esiclient.tests.unit import utils as test_utils
 from esiclient import utils
 
@@ -176,6 +184,38 @@ class TestGetFullNetworkInfoFromPort(TestCase):
             results,
         )
 
+    def test_get_full_network_info_from_port_ports_dict(self):
+        port = test_utils.create_mock_object(
+            {
+                "id": "port_uuid",
+                "name": "test_port",
+                "network_id": "network_uuid_1",
+                "fixed_ips": [{"ip_address": "77.77.77.77"}],
+                "trunk_details": {
+                    "trunk_id": "trunk_uuid",
+                    "sub_ports": [
+                        {"segmentation_id": "777", "port_id": "subport_uuid_1"},
+                    ],
+                },
+            }
+        )
+
+        results = utils.get_full_network_info_from_port(
+            port,
+            self.neutron_client,
+            self.networks_dict,
+            {"subport_uuid_1": self.subport1},
+        )
+        self.assertEqual(
+            (
+                ["test_network (777)", "test_network (777)"],
+                ["test_port", "test_subport_1"],
+                ["77.77.77.77", "11.22.33.44"],
+            ),
+            results,
+        )
+        self.neutron_client.get_port.assert_not_called()
+
     def test_get_full_network_info_from_port_no_trunk(self):
         port = test_utils.create_mock_object(
             {
@@ -423,10 +463,7 @@ class TestBootNodeFromURL(TestCase):
         self.url = "http://test.test/test"
         self.port_uuid = "port_uuid"
 
-        self.ironic_client = mock.Mock()
-        self.ironic_client.node.update.return_value = None
-        self.ironic_client.node.vif_attach.return_value = None
-        self.ironic_client.node.set_provision_state.return_value = None
+        self.baremetal_client = mock.Mock()
 
     def test_boot_node_from_url(self):
         node_update = [
@@ -439,20 +476,159 @@ class TestBootNodeFromURL(TestCase):
         ]
 
         utils.boot_node_from_url(
-            self.node_uuid, self.url, self.port_uuid, self.ironic_client
+            self.node_uuid, self.url, self.port_uuid, self.baremetal_client
         )
 
-        self.ironic_client.node.update.assert_called_once_with(
-            self.node_uuid, node_update
+        self.baremetal_client.patch_node.assert_called_once_with(
+            self.node_uuid, node_update, retry_on_conflict=False
         )
-        self.ironic_client.node.vif_attach.assert_called_once_with(
-            self.node_uuid, self.port_uuid
+        self.baremetal_client.attach_vif_to_node.assert_called_once_with(
+            self.node_uuid, self.port_uuid, retry_on_conflict=False
         )
-        self.ironic_client.node.set_provision_state.assert_called_once_with(
+        self.baremetal_client.set_node_provision_state.assert_called_once_with(
             self.node_uuid, "active"
         )
 
 
+class TestRetryConflicts(TestCase):
+    def setUp(self):
+        super(TestRetryConflicts, self).setUp()
+        patcher = mock.patch("time.sleep")
+        self.mock_sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.conflict = sdk_exceptions.ConflictException(
+            "Node node1 is locked by host conductor1, please retry after the "
+            "current operation is completed.",
+            http_status=409,
+        )
+        self.baremetal_client = mock.Mock()
+
+    def test_retry_conflicts(self):
+        func = mock.Mock(side_effect=[self.conflict, self.conflict, "ok"])
+
+        self.assertEqual("ok", utils.retry_conflicts("stage", func, 1, a=2))
+
+        self.assertEqual(3, func.call_count)
+        func.assert_called_with(1, a=2)
+        self.assertEqual(2, self.mock_sleep.call_count)
+
+    def test_retry_conflicts_gives_up(self):
+        func = mock.Mock(side_effect=self.conflict)
+
+        self.assertRaises(
+            sdk_exceptions.ConflictException, utils.retry_conflicts, "stage", func
+        )
+        self.assertEqual(utils.CONFLICT_ATTEMPTS, func.call_count)
+
+    def test_retry_conflicts_not_retryable(self):
+        func = mock.Mock(
+            side_effect=sdk_exceptions.BadRequestException("bad", http_status=400)
+        )
+
+        self.assertRaises(
+            sdk_exceptions.BadRequestException, utils.retry_conflicts, "stage", func
+        )
+        self.assertEqual(1, func.call_count)
+        self.mock_sleep.assert_not_called()
+
+    def test_retry_conflicts_permanent_conflict(self):
+        func = mock.Mock(
+            side_effect=sdk_exceptions.ConflictException(
+                "Unable to complete operation on port port1, port is already bound",
+                http_status=409,
+            )
+        )
+
+        self.assertRaises(
+            sdk_exceptions.ConflictException, utils.retry_conflicts, "stage", func
+        )
+        self.assertEqual(1, func.call_count)
+        self.mock_sleep.assert_not_called()
+
+    def test_retry_conflicts_connection_error(self):
+        func = mock.Mock(side_effect=[ksa_exceptions.ConnectFailure("reset"), "ok"])
+
+        self.assertEqual("ok", utils.retry_conflicts("stage", func))
+        self.assertEqual(2, func.call_count)
+
+    def test_update_node_remove_already_applied(self):
+        patch = [
+            {"path": "/extra/esi_cluster_uuid", "op": "remove"},
+            {
+                "path": "/instance_info/storage_interface",
+                "value": "cinder",
+                "op": "add",
+            },
+        ]
+        self.baremetal_client.patch_node.side_effect = ksa_exceptions.ConnectFailure(
+            "reset"
+        )
+        node = mock.Mock(extra={}, instance_info={"storage_interface": "cinder"})
+        self.baremetal_client.get_node.return_value = node
+
+        self.assertIs(node, utils.update_node(self.baremetal_client, "node", patch))
+
+        self.baremetal_client.patch_node.assert_called_once_with(
+            "node", patch, retry_on_conflict=False
+        )
+        self.baremetal_client.get_node.assert_called_once_with(
+            "node", fields=["extra", "instance_info"]
+        )
+
+    def test_update_node_not_yet_applied(self):
+        patch = [{"path": "/extra/esi_cluster_uuid", "op": "remove"}]
+        self.baremetal_client.patch_node.side_effect = [self.conflict, "patched"]
+        self.baremetal_client.get_node.return_value = mock.Mock(
+            extra={"esi_cluster_uuid": "cluster"}
+        )
+
+        self.assertEqual(
+            "patched", utils.update_node(self.baremetal_client, "node", patch)
+        )
+        self.assertEqual(2, self.baremetal_client.patch_node.call_count)
+
+    def test_attach_vif_already_attached(self):
+        self.baremetal_client.attach_vif_to_node.side_effect = self.conflict
+        self.baremetal_client.list_node_vifs.return_value = ["port_uuid"]
+
+        self.assertTrue(utils.attach_vif(self.baremetal_client, "node", "port_uuid"))
+
+        self.baremetal_client.attach_vif_to_node.assert_called_once_with(
+            "node", "port_uuid", retry_on_conflict=False
+        )
+
+    def test_set_provision_state_changed(self):
+        self.baremetal_client.set_node_provision_state.side_effect = (
+            ksa_exceptions.ConnectFailure()
+        )
+        node = test_utils.create_mock_object(
+            {"provision_state": "deploying", "target_provision_state": "active"}
+        )
+        self.baremetal_client.get_node.return_value = node
+
+        self.assertIs(
+            node,
+            utils.set_provision_state(self.baremetal_client, "node", "active"),
+        )
+        self.baremetal_client.set_node_provision_state.assert_called_once_with(
+            "node", "active"
+        )
+
+    def test_set_provision_state_retried(self):
+        self.baremetal_client.set_node_provision_state.side_effect = [
+            self.conflict,
+            "node",
+        ]
+        self.baremetal_client.get_node.return_value = test_utils.create_mock_object(
+            {"provision_state": "available", "target_provision_state": None}
+        )
+
+        self.assertEqual(
+            "node", utils.set_provision_state(self.baremetal_client, "node", "active")
+        )
+        self.assertEqual(2, self.baremetal_client.set_node_provision_state.call_count)
+
+
 class TestCreateTrunk(TestCase):
     def setUp(self):
         super(TestCreateTrunk, self).setUp()
@@ -635,3 +811,424 @@ class TestDeleteTrunk(TestCase):
                 mock.call("port_uuid_1"),
             ]
         )
+
+
+class TestNodeNetworkList(TestCase):
+    def setUp(self):
+        super(TestNodeNetworkList, self).setUp()
+
+        self.node1 = test_utils.create_mock_object(
+            {"id": "node_uuid_1", "name": "node1"}
+        )
+        self.node2 = test_utils.create_mock_object(
+            {"id": "node_uuid_2", "name": "node2"}
+        )
+        self.bm_port1 = test_utils.create_mock_object(
+            {
+                "id": "bm_port_uuid_1",
+                "node_id": "node_uuid_1",
+                "internal_info": {"tenant_vif_port_id": "port_uuid_1"},
+            }
+        )
+        self.bm_port2 = test_utils.create_mock_object(
+            {"id": "bm_port_uuid_2", "node_id": "node_uuid_2", "internal_info": {}}
+        )
+        self.bm_port3 = test_utils.create_mock_object(
+            {
+                "id": "bm_port_uuid_3",
+                "node_id": "node_uuid_2",
+                "internal_info": {"tenant_vif_port_id": "port_uuid_2"},
+            }
+        )
+        self.network1 = test_utils.create_mock_object(
+            {"id": "network_uuid_1", "name": "network1"}
+        )
+        self.network2 = test_utils.create_mock_object(
+            {"id": "network_uuid_2", "name": "network2"}
+        )
+        self.floating_network = test_utils.create_mock_object(
+            {"id": "floating_network_uuid", "name": "floating"}
+        )
+        self.port1 = test_utils.create_mock_object(
+            {
+                "id": "port_uuid_1",
+                "network_id": "network_uuid_1",
+                "fixed_ips": [{"ip_address": "10.0.0.1"}],
+                "trunk_details": None,
+            }
+        )
+        self.port2 = test_utils.create_mock_object(
+            {
+                "id": "port_uuid_2",
+                "network_id": "network_uuid_1",
+                "fixed_ips": [{"ip_address": "10.0.0.2"}],
+                "trunk_details": {
+                    "trunk_id": "trunk_uuid",
+                    "sub_ports": [{"port_id": "subport_uuid"}],
+                },
+            }
+        )
+        self.subport = test_utils.create_mock_object(
+            {
+                "id": "subport_uuid",
+                "network_id": "network_uuid_2",
+                "fixed_ips": [{"ip_address": "10.0.1.2"}],
+                "trunk_details": None,
+            }
+        )
+        self.fip = test_utils.create_mock_object(
+            {
+                "id": "fip_uuid_1",
+                "port_id": "port_uuid_1",
+                "floating_network_id": "floating_network_uuid",
+            }
+        )
+        self.fip_pfwd = test_utils.create_mock_object(
+            {
+                "id": "fip_uuid_2",
+                "port_id": None,
+                "floating_network_id": "floating_network_uuid",
+                "port_forwardings": [
+                    {
+                        "internal_ip_address": "10.0.0.2",
+                        "internal_port": 22,
+                        "external_port": 2222,
+                        "protocol": "tcp",
+                    }
+                ],
+            }
+        )
+
+        self.connection = mock.Mock()
+        self.connection.baremetal.nodes.return_value = [self.node1, self.node2]
+        self.connection.baremetal.ports.return_value = [
+            self.bm_port1,
+            self.bm_port2,
+            self.bm_port3,
+        ]
+        self.connection.network.ports.return_value = [
+            self.port1,
+            self.port2,
+            self.subport,
+        ]
+        self.connection.network.networks.return_value = [
+            self.network1,
+            self.network2,
+            self.floating_network,
+        ]
+        self.connection.network.ips.return_value = [self.fip, self.fip_pfwd]
+
+    def test_node_network_list(self):
+        results = list(utils.node_network_list(self.connection))
+
+        self.assertEqual(2, len(results))
+        self.assertEqual(self.node1, results[0]["node"])
+        self.assertEqual(
+            [
+                {
+                    "baremetal_port": self.bm_port1,
+                    "network_ports": [self.port1],
+                    "networks": {
+                        "parent": self.network1,
+                        "trunk": [],
+                        "floating": self.floating_network,
+                    },
+                    "floating_ip": self.fip,
+                    "port_forwardings": [],
+                }
+            ],
+            results[0]["network_info"],
+        )
+
+        self.assertEqual(self.node2, results[1]["node"])
+        network_info = results[1]["network_info"]
+        self.assertEqual(2, len(network_info))
+        self.assertEqual([], network_info[0]["network_ports"])
+        self.assertEqual([self.port2, self.subport], network_info[1]["network_ports"])
+        self.assertEqual([self.network2], network_info[1]["networks"]["trunk"])
+        self.assertEqual(self.fip_pfwd, network_info[1]["floating_ip"])
+        pfwds = network_info[1]["port_forwardings"]
+        self.assertEqual(1, len(pfwds))
+        self.assertEqual((22, 2222), (pfwds[0].internal_port, pfwds[0].external_port))
+
+        # everything is resolved from the bulk listings
+        self.connection.baremetal.nodes.assert_called_once_with(
+            fields=utils.NODE_FIELDS
+        )
+        self.connection.baremetal.ports.assert_called_once_with(details=True)
+        self.connection.network.get_port.assert_not_called()
+        self.connection.network.get_network.assert_not_called()
+        self.connection.network.port_forwardings.assert_not_called()
+
+    def test_node_network_list_filter_network(self):
+        self.connection.network.find_network.return_value = self.network2
+        self.subport.trunk_details = None
+        self.bm_port2.internal_info = {"tenant_vif_port_id": "subport_uuid"}
+
+        results = list(
+            utils.node_network_list(self.connection, filter_network="network2")
+        )
+
+        self.assertEqual(1, len(results))
+        self.assertEqual(self.node2, results[0]["node"])
+        self.assertEqual(
+            [self.bm_port2],
+            [info["baremetal_port"] for info in results[0]["network_info"]],
+        )
+        self.connection.network.ports.assert_called_once_with(
+            network_id="network_uuid_2"
+        )
+
+    def test_node_network_list_filter_network_trunk(self):
+        self.connection.network.find_network.return_value = self.network1
+
+        def ports(**query):
+            if "network_id" in query:
+                return [self.port1, self.port2]
+            return [self.subport]
+
+        self.connection.network.ports.side_effect = ports
+
+        results = list(
+            utils.node_network_list(self.connection, filter_network="network1")
+        )
+
+        network_info = results[1]["network_info"]
+        self.assertEqual(1, len(network_info))
+        # the sub port on another network is still shown
+        self.assertEqual([self.port2, self.subport], network_info[0]["network_ports"])
+        self.assertEqual([self.network2], network_info[0]["networks"]["trunk"])
+        self.connection.network.ports.assert_has_calls(
+            [
+                mock.call(network_id="network_uuid_1"),
+                mock.call(id=["subport_uuid"]),
+            ]
+        )
+        self.connection.network.get_port.assert_not_called()
+
+    def test_node_network_list_stale_vif(self):
+        self.connection.network.ports.return_value = [self.port2]
+
+        results = list(utils.node_network_list(self.connection))
+
+        self.assertEqual(2, len(results))
+        self.assertEqual([], results[0]["network_info"][0]["network_ports"])
+        # the trunk's missing subport is left out
+        self.assertEqual([self.port2], results[1]["network_info"][1]["network_ports"])
+        self.connection.network.get_port.assert_not_called()
+
+    def test_node_network_list_filter_node(self):
+        self.connection.baremetal.find_node.return_value = self.node1
+        self.connection.baremetal.ports.return_value = [self.bm_port1]
+
+        results = list(utils.node_network_list(self.connection, filter_node="node1"))
+
+        self.assertEqual([self.node1], [result["node"] for result in results])
+        self.connection.baremetal.nodes.assert_not_called()
+        self.connection.baremetal.ports.assert_called_once_with(
+            details=True, node_id="node_uuid_1"
+        )
+
+    def test_node_network_list_port_forwardings_not_embedded(self):
+        del self.fip_pfwd.port_forwardings
+        pfwd = test_utils.create_mock_object(
+            {
+                "internal_port": 22,
+                "external_port": 22,
+                "internal_port_id": "port_uuid_2",
+            }
+        )
+        self.connection.network.port_forwardings.return_value = [pfwd]
+
+        results = list(utils.node_network_list(self.connection))
+
+        network_info = results[1]["network_info"][1]
+        self.assertEqual(self.fip_pfwd, network_info["floating_ip"])
+        self.assertEqual([pfwd], network_info["port_forwardings"])
+        self.connection.network.port_forwardings.assert_called_once_with(
+            floating_ip=self.fip_pfwd
+        )
+
+
+class TestRunConcurrently(TestCase):
+    def test_run_concurrently(self):
+        def square(item):
+            if item == 3:
+                raise ValueError("bad item")
+            return item * item
+
+        results = utils.run_concurrently(square, [1, 2, 3, 4], max_workers=2)
+
+        self.assertEqual([1, 2, 3, 4], [result.item for result in results])
+        self.assertEqual([1, 4, None, 16], [result.result for result in results])
+        self.assertEqual(
+            [None, None, "bad item", None],
+            [str(result.error) if result.error else None for result in results],
+        )
+        for result in results:
+            self.assertGreaterEqual(result.elapsed, 0)
+
+    def test_run_concurrently_progress(self):
+        progress = mock.Mock()
+
+        def fail_odd(item):
+            if item % 2:
+                raise ValueError("odd")
+
+        utils.run_concurrently(fail_odd, range(4), max_workers=2, progress=progress)
+
+        self.assertEqual(4, progress.call_count)
+        self.assertEqual(mock.call(4, 2), progress.call_args)
+
+
+class TestProgressReporter(TestCase):
+    @mock.patch("time.monotonic")
+    def test_progress_reporter(self, mock_monotonic):
+        stream = mock.Mock()
+        mock_monotonic.return_value = 100
+        reporter = utils.ProgressReporter(stream, "deleting", 3, interval=5)
+
+        mock_monotonic.return_value = 101
+        reporter(1, 0)
+        stream.write.assert_not_called()
+
+        mock_monotonic.return_value = 106
+        reporter(2, 1)
+        mock_monotonic.return_value = 107
+        reporter(3, 1)
+
+        stream.write.assert_has_calls(
+            [
+                mock.call("deleting: 2/3 done, 1 failed\n"),
+                mock.call("deleting: 3/3 done, 1 failed\n"),
+            ]
+        )
+
+    @mock.patch("time.monotonic")
+    def test_progress_reporter_quick(self, mock_monotonic):
+        stream = mock.Mock()
+        mock_monotonic.return_value = 100
+        reporter = utils.ProgressReporter(stream, "deleting", 1, interval=5)
+        reporter(1, 0)
+        stream.write.assert_not_called()
+
+
+class TestSummarizeFailures(TestCase):
+    def test_summarize_failures(self):
+        results = [
+            utils.BatchResult(1, None, ValueError("conflict"), 0),
+            utils.BatchResult(2, "ok", None, 0),
+            utils.BatchResult(3, None, ValueError("conflict"), 0),
+            utils.BatchResult(4, None, ValueError("not found"), 0),
+        ]
+        self.assertEqual(
+            "3 of 4 failed while deleting: conflict (x2); not found",
+            utils.summarize_failures(results, "deleting"),
+        )
+
+    def test_summarize_failures_none(self):
+        results = [utils.BatchResult(1, "ok", None, 0)]
+        self.assertIsNone(utils.summarize_failures(results, "deleting"))
+
+
+class TestRateLimiter(TestCase):
+    @mock.patch("time.sleep")
+    @mock.patch("time.monotonic")
+    def test_rate_limiter(self, mock_monotonic, mock_sleep):
+        mock_monotonic.return_value = 100
+        limiter = utils.RateLimiter(4)
+        func = limiter(mock.Mock(return_value="ok", __name__="func"))
+
+        self.assertEqual("ok", func())
+        self.assertEqual("ok", func())
+        self.assertEqual("ok", func())
+
+        mock_sleep.assert_has_calls([mock.call(0.25), mock.call(0.5)])
+        self.assertEqual(3, func.__wrapped__.call_count)
+
+
+class TestFetchConcurrently(TestCase):
+    def test_fetch_concurrently(self):
+        results = utils.fetch_concurrently(
+            {"first": lambda: 1, "second": lambda: 2}, max_workers=2
+        )
+        self.assertEqual({"first": 1, "second": 2}, results)
+
+    def test_fetch_concurrently_error(self):
+        second = mock.Mock(return_value=2)
+
+        def first():
+            raise ValueError("bad")
+
+        self.assertRaises(
+            ValueError,
+            utils.fetch_concurrently,
+            {"first": first, "second": second},
+        )
+        second.assert_called_once_with()
+
+    @mock.patch.object(utils.LOG, "debug")
+    def test_timed_call(self, mock_debug):
+        self.assertEqual(3, utils.timed_call("add", lambda a, b: a + b, 1, b=2))
+        self.assertEqual("add", mock_debug.call_args[0][1])
+
+
+@mock.patch.dict(os.environ, {utils.HTTP_POOL_SIZE_ENV: ""})
+class TestSizeHTTPPool(TestCase):
+    def setUp(self):
+        self.client_manager = types.SimpleNamespace(session=ksa_session.Session())
+        self.adapters = self.client_manager.session.session.adapters
+
+    def test_size_http_pool(self):
+        self.assertEqual(32, utils.size_http_pool(self.client_manager, 32))
+
+        for prefix in ("http://", "https://"):
+            adapter = self.adapters[prefix]
+            self.assertIsInstance(adapter, ksa_session.TCPKeepAliveAdapter)
+            self.assertEqual(32, adapter._pool_maxsize)
+
+    def test_size_http_pool_never_shrinks(self):
+        utils.size_http_pool(self.client_manager, 32)
+        adapter = self.adapters["https://"]
+
+        utils.size_http_pool(self.client_manager, 4)
+
+        self.assertIs(adapter, self.adapters["https://"])
+
+    def test_size_http_pool_keeps_tls_options(self):
+        self.client_manager.session.session.mount(
+            "https://", ksa_session.TCPKeepAliveAdapter(tls_ciphers="HIGH")
+        )
+
+        utils.size_http_pool(self.client_manager, 32)
+
+        self.assertEqual("HIGH", self.adapters["https://"].tls_ciphers)
+
+    def test_size_http_pool_environment(self):
+        with mock.patch.dict(os.environ, {utils.HTTP_POOL_SIZE_ENV: "64"}):
+            self.assertEqual(64, utils.size_http_pool(self.client_manager, 32))
+
+        self.assertEqual(64, self.adapters["https://"]._pool_maxsize)
+
+    def test_size_http_pool_malformed_environment(self):
+        for value in ("many", "-1", "1.5"):
+            with mock.patch.dict(os.environ, {utils.HTTP_POOL_SIZE_ENV: value}):
+                self.assertRaisesRegex(
+                    osc_exceptions.CommandError,
+                    "ERROR: ESI_HTTP_POOL_SIZE must be a non-negative integer",
+                    utils.size_http_pool,
+                    self.client_manager,
+                    32,
+                )
+
+        self.assertEqual(10, self.adapters["https://"]._pool_maxsize)
+
+    def test_size_http_pool_other_session(self):
+        self.assertEqual(32, utils.size_http_pool(mock.Mock(), 32))
+
+    def test_size_http_pool_reuses_connections(self):
+        default = http_benchmark.run(16, 3, sized=False)
+        sized = http_benchmark.run(16, 3, sized=True)
+
+        self.assertLessEqual(sized, 16)
+        self.assertLess(sized, default)
@@ -12,6 +12,7 @@
 #
 
 import mock
+import types
 from mock import call
 from mock import patch
 
@@ -28,7 +29,7 @@ class TestList(base.TestCommand):
 
         self.node1 = utils.create_mock_object(
             {
-                "uuid": "node_uuid_1",
+                "id": "node_uuid_1",
                 "name": "node1",
                 "extra": {
                     "esi_cluster_uuid": "cluster-uuid-1",
@@ -39,7 +40,7 @@ class TestList(base.TestCommand):
         )
         self.node2 = utils.create_mock_object(
             {
-                "uuid": "node_uuid_2",
+                "id": "node_uuid_2",
                 "name": "node2",
                 "extra": {
                     "esi_cluster_uuid": "cluster-uuid-1",
@@ -49,7 +50,7 @@ class TestList(base.TestCommand):
         )
         self.node3 = utils.create_mock_object(
             {
-                "uuid": "node_uuid_3",
+                "id": "node_uuid_3",
                 "name": "node3",
                 "extra": {
                     "esi_cluster_uuid": "cluster-uuid-1",
@@ -59,7 +60,7 @@ class TestList(base.TestCommand):
         )
         self.node4 = utils.create_mock_object(
             {
-                "uuid": "node_uuid_4",
+                "id": "node_uuid_4",
                 "name": "node4",
                 "extra": {
                     "esi_cluster_uuid": "cluster-uuid-2",
@@ -69,7 +70,7 @@ class TestList(base.TestCommand):
             }
         )
         self.node5 = utils.create_mock_object(
-            {"uuid": "node_uuid_5", "name": "node5", "extra": {}}
+            {"id": "node_uuid_5", "name": "node5", "extra": {}}
         )
         self.trunk = utils.create_mock_object(
             {
@@ -78,7 +79,7 @@ class TestList(base.TestCommand):
             }
         )
 
-        self.app.client_manager.baremetal.node.list.return_value = [
+        self.baremetal_client.nodes.return_value = [
             self.node1,
             self.node2,
             self.node3,
@@ -91,7 +92,9 @@ class TestList(base.TestCommand):
 
         parsed_args = self.check_parser(self.cmd, arglist, verifylist)
 
-        results = self.cmd.take_action(parsed_args)
+        columns, rows = self.cmd.take_action(parsed_args)
+        self.assertIsInstance(rows, types.GeneratorType)
+        results = (columns, list(rows))
         expected = (
             ["Cluster", "Node", "Associated"],
             [
@@ -111,7 +114,7 @@ class TestList(base.TestCommand):
             ],
         )
         self.assertEqual(expected, results)
-        self.app.client_manager.baremetal.node.list.assert_called_once_with(
+        self.baremetal_client.nodes.assert_called_once_with(
             fields=["uuid", "name", "extra"],
         )
 
@@ -123,7 +126,7 @@ class TestOrchestrate(base.TestCommand):
 
         self.node1 = utils.create_mock_object(
             {
-                "uuid": "node_uuid_1",
+                "id": "node_uuid_1",
                 "name": "node1",
                 "provision_state": "available",
                 "resource_class": "baremetal",
@@ -131,7 +134,7 @@ class TestOrchestrate(base.TestCommand):
         )
         self.node2 = utils.create_mock_object(
             {
-                "uuid": "node_uuid_2",
+                "id": "node_uuid_2",
                 "name": "node2",
                 "provision_state": "available",
                 "resource_class": "baremetal",
@@ -139,7 +142,7 @@ class TestOrchestrate(base.TestCommand):
         )
         self.node3 = utils.create_mock_object(
             {
-                "uuid": "node_uuid_3",
+                "id": "node_uuid_3",
                 "name": "node3",
                 "provision_state": "available",
                 "resource_class": "baremetal",
@@ -198,7 +201,7 @@ class TestOrchestrate(base.TestCommand):
             return None
 
         self.app.client_manager.network.find_network.side_effect = mock_find_network
-        self.app.client_manager.baremetal.node.list.return_value = [
+        self.baremetal_client.nodes.return_value = [
             self.node1,
             self.node2,
             self.node3,
@@ -271,7 +274,7 @@ class TestOrchestrate(base.TestCommand):
         with patch("builtins.open"):
             self.cmd.take_action(parsed_args)
 
-        self.app.client_manager.baremetal.node.list.assert_called_once_with(
+        self.baremetal_client.nodes.assert_called_once_with(
             fields=["uuid", "name", "resource_class"], provision_state="available"
         )
         mock_uuid.assert_called_once
@@ -300,7 +303,7 @@ class TestOrchestrate(base.TestCommand):
             ]
         )
         mock_pnwi.assert_called_once_with(
-            self.node1.uuid,
+            self.node1.id,
             "baremetal",
             self.port1.id,
             self.image.id,
@@ -309,16 +312,16 @@ class TestOrchestrate(base.TestCommand):
         mock_bnfu.assert_has_calls(
             [
                 call(
-                    self.node2.uuid,
+                    self.node2.id,
                     "https://image.url",
                     self.port2.id,
-                    self.app.client_manager.baremetal,
+                    self.baremetal_client,
                 ),
                 call(
-                    self.node3.uuid,
+                    self.node3.id,
                     "https://image.url",
                     self.port3.id,
-                    self.app.client_manager.baremetal,
+                    self.baremetal_client,
                 ),
             ]
         )
@@ -330,7 +333,7 @@ class TestOrchestrate(base.TestCommand):
         mock_snci.assert_has_calls(
             [
                 call(
-                    self.app.client_manager.baremetal,
+                    self.baremetal_client,
                     "node_uuid_1",
                     {
                         cluster_utils.ESI_CLUSTER_UUID: "cluster-uuid",
@@ -339,7 +342,7 @@ class TestOrchestrate(base.TestCommand):
                     },
                 ),
                 call(
-                    self.app.client_manager.baremetal,
+                    self.baremetal_client,
                     "node_uuid_2",
                     {
                         cluster_utils.ESI_CLUSTER_UUID: "cluster-uuid",
@@ -347,7 +350,7 @@ class TestOrchestrate(base.TestCommand):
                     },
                 ),
                 call(
-                    self.app.client_manager.baremetal,
+                    self.baremetal_client,
                     "node_uuid_3",
                     {
                         cluster_utils.ESI_CLUSTER_UUID: "cluster-uuid",
@@ -398,10 +401,54 @@ class TestOrchestrate(base.TestCommand):
                 parsed_args,
             )
 
-        self.app.client_manager.baremetal.node.list.assert_called_once_with(
+        self.baremetal_client.nodes.assert_called_once_with(
             fields=["uuid", "name", "resource_class"], provision_state="available"
         )
 
+    @mock.patch("esiclient.metrics.exporter_from_url", autospec=True)
+    @mock.patch("json.load", autospec=True)
+    def test_take_action_metrics(self, mock_load, mock_efu):
+        mock_load.return_value = {
+            "node_configs": [
+                {
+                    "nodes": {"num_nodes": "4", "resource_class": "baremetal"},
+                    "network": {"network_uuid": "private_network_1"},
+                    "provisioning": {
+                        "provisioning_type": "image_url",
+                        "url": "https://image.url",
+                    },
+                },
+            ]
+        }
+
+        arglist = ["config.json", "--metrics", "metrics.jsonl"]
+        verifylist = [("metrics", "metrics.jsonl")]
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+
+        with patch("builtins.open"):
+            self.assertRaises(
+                cluster_utils.ESIOrchestrationException,
+                self.cmd.take_action,
+                parsed_args,
+            )
+
+        mock_efu.assert_called_once_with("metrics.jsonl")
+        exporter = mock_efu.return_value
+        metrics = [c[0][0] for c in exporter.export.call_args_list]
+        self.assertEqual(
+            [
+                ("esi.orchestrate.phase", "error"),
+                ("esi.orchestrate.phase.errors", "ESIOrchestrationException"),
+                ("esi.orchestrate", "error"),
+                ("esi.orchestrate.errors", "ESIOrchestrationException"),
+            ],
+            [(m.name, m.tags.get("outcome", m.tags.get("error"))) for m in metrics],
+        )
+        self.assertEqual("assign_nodes", metrics[0].tags["phase"])
+        self.assertEqual("cluster", metrics[0].tags["orchestration"])
+        exporter.close.assert_called_once_with()
+
     @mock.patch("json.load", autospec=True)
     def test_take_action_unavailable_node(self, mock_load):
         mock_load.return_value = {
@@ -443,7 +490,7 @@ class TestOrchestrate(base.TestCommand):
                 parsed_args,
             )
 
-        self.app.client_manager.baremetal.node.list.assert_called_once_with(
+        self.baremetal_client.nodes.assert_called_once_with(
             fields=["uuid", "name", "resource_class"], provision_state="available"
         )
 
@@ -488,7 +535,7 @@ class TestOrchestrate(base.TestCommand):
                 parsed_args,
             )
 
-        self.app.client_manager.baremetal.node.list.assert_called_once_with(
+        self.baremetal_client.nodes.assert_called_once_with(
             fields=["uuid", "name", "resource_class"], provision_state="available"
         )
 
@@ -533,7 +580,7 @@ class TestOrchestrate(base.TestCommand):
                 parsed_args,
             )
 
-        self.app.client_manager.baremetal.node.list.assert_called_once_with(
+        self.baremetal_client.nodes.assert_called_once_with(
             fields=["uuid", "name", "resource_class"], provision_state="available"
         )
 
@@ -545,7 +592,7 @@ class TestUndeploy(base.TestCommand):
 
         self.node1 = utils.create_mock_object(
             {
-                "uuid": "node_uuid_1",
+                "id": "node_uuid_1",
                 "name": "node1",
                 "extra": {
                     "esi_cluster_uuid": "cluster-uuid-1",
@@ -556,7 +603,7 @@ class TestUndeploy(base.TestCommand):
         )
         self.node2 = utils.create_mock_object(
             {
-                "uuid": "node_uuid_2",
+                "id": "node_uuid_2",
                 "name": "node2",
                 "extra": {
                     "esi_cluster_uuid": "cluster-uuid-1",
@@ -566,7 +613,7 @@ class TestUndeploy(base.TestCommand):
         )
         self.node3 = utils.create_mock_object(
             {
-                "uuid": "node_uuid_3",
+                "id": "node_uuid_3",
                 "name": "node3",
                 "extra": {
                     "esi_cluster_uuid": "cluster-uuid-1",
@@ -576,7 +623,7 @@ class TestUndeploy(base.TestCommand):
         )
         self.node4 = utils.create_mock_object(
             {
-                "uuid": "node_uuid_4",
+                "id": "node_uuid_4",
                 "name": "node4",
                 "extra": {
                     "esi_cluster_uuid": "cluster-uuid-2",
@@ -586,10 +633,10 @@ class TestUndeploy(base.TestCommand):
             }
         )
         self.node5 = utils.create_mock_object(
-            {"uuid": "node_uuid_5", "name": "node5", "extra": {}}
+            {"id": "node_uuid_5", "name": "node5", "extra": {}}
         )
 
-        self.app.client_manager.baremetal.node.list.return_value = [
+        self.baremetal_client.nodes.return_value = [
             self.node1,
             self.node2,
             self.node3,
@@ -605,23 +652,23 @@ class TestUndeploy(base.TestCommand):
 
         self.cmd.take_action(parsed_args)
 
-        self.app.client_manager.baremetal.node.list.assert_called_once_with(
+        self.baremetal_client.nodes.assert_called_once_with(
             fields=["uuid", "name", "extra"],
         )
         mock_ccn.assert_has_calls(
             [
                 call(
-                    self.app.client_manager.baremetal,
+                    self.baremetal_client,
                     self.app.client_manager.network,
                     self.node1,
                 ),
                 call(
-                    self.app.client_manager.baremetal,
+                    self.baremetal_client,
                     self.app.client_manager.network,
                     self.node2,
                 ),
                 call(
-                    self.app.client_manager.baremetal,
+                    self.baremetal_client,
                     self.app.client_manager.network,
                     self.node3,
                 ),
@@ -127,8 +127,9 @@ class TestWaitForNodes(TestCase):
             MockResponse(fifth_response),
         ]
 
-        openshift.wait_for_nodes("infra-env-id", {}, 3, "known")
+        polls = openshift.wait_for_nodes("infra-env-id", {}, 3, "known")
 
+        assert polls == 5
         assert mock_caia.call_count == 5
         assert mock_sleep.call_count == 4
 
@@ -142,13 +143,13 @@ class TestOrchestrate(base.TestCommand):
         self.infra_env_id = "infra-env-id"
 
         self.node1 = utils.create_mock_object(
-            {"uuid": "node_uuid_1", "name": "node1", "provision_state": "available"}
+            {"id": "node_uuid_1", "name": "node1", "provision_state": "available"}
         )
         self.node2 = utils.create_mock_object(
-            {"uuid": "node_uuid_2", "name": "node2", "provision_state": "available"}
+            {"id": "node_uuid_2", "name": "node2", "provision_state": "available"}
         )
         self.node3 = utils.create_mock_object(
-            {"uuid": "node_uuid_3", "name": "node3", "provision_state": "active"}
+            {"id": "node_uuid_3", "name": "node3", "provision_state": "active"}
         )
 
         def mock_get_node(name):
@@ -160,7 +161,7 @@ class TestOrchestrate(base.TestCommand):
                 return self.node3
             return None
 
-        self.app.client_manager.baremetal.node.get.side_effect = mock_get_node
+        self.baremetal_client.get_node.side_effect = mock_get_node
 
         self.private_network = utils.create_mock_object(
             {
@@ -205,30 +206,30 @@ class TestOrchestrate(base.TestCommand):
 
         self.bm_port1 = utils.create_mock_object(
             {
-                "uuid": "bm_port_uuid_1",
-                "node_uuid": "node_uuid_1",
+                "id": "bm_port_uuid_1",
+                "node_id": "node_uuid_1",
                 "address": "aa:aa:aa:aa:aa:aa",
                 "internal_info": {"tenant_vif_port_id": "port_uuid_1"},
             }
         )
         self.bm_port2 = utils.create_mock_object(
             {
-                "uuid": "bm_port_uuid_2",
-                "node_uuid": "node_uuid_2",
+                "id": "bm_port_uuid_2",
+                "node_id": "node_uuid_2",
                 "address": "bb:bb:bb:bb:bb:bb",
                 "internal_info": {"tenant_vif_port_id": "port_uuid_2"},
             }
         )
         self.bm_port3 = utils.create_mock_object(
             {
-                "uuid": "bm_port_uuid_3",
-                "node_uuid": "node_uuid_3",
+                "id": "bm_port_uuid_3",
+                "node_id": "node_uuid_3",
                 "address": "cc:cc:cc:cc:cc:cc",
                 "internal_info": {"tenant_vif_port_id": "port_uuid_3"},
             }
         )
 
-        def mock_list_ports(node, detail=True):
+        def mock_list_ports(node, fields=None):
             if node == "node1":
                 return [self.bm_port1]
             if node == "node2":
@@ -237,7 +238,7 @@ class TestOrchestrate(base.TestCommand):
                 return [self.bm_port3]
             return None
 
-        self.app.client_manager.baremetal.port.list.side_effect = mock_list_ports
+        self.baremetal_client.ports.side_effect = mock_list_ports
 
         self.port1 = utils.create_mock_object(
             {
@@ -269,9 +270,9 @@ class TestOrchestrate(base.TestCommand):
 
         self.app.client_manager.network.find_port.side_effect = mock_find_port
 
-        self.app.client_manager.baremetal.node.vif_detach.return_value = None
-        self.app.client_manager.baremetal.node.vif_attach.return_value = None
-        self.app.client_manager.baremetal.node.vif_set_boot_device.return_value = None
+        self.baremetal_client.detach_vif_from_node.return_value = None
+        self.baremetal_client.attach_vif_to_node.return_value = None
+        self.baremetal_client.set_node_boot_device.return_value = None
 
         self.provisioning_port1 = {
             "id": "provisioning_port_uuid_1",
@@ -474,13 +475,13 @@ class TestOrchestrate(base.TestCommand):
                     "node1",
                     "this-is-a-url",
                     "provisioning_port_uuid_1",
-                    self.app.client_manager.baremetal,
+                    self.baremetal_client,
                 ),
                 call(
                     "node2",
                     "this-is-a-url",
                     "provisioning_port_uuid_2",
-                    self.app.client_manager.baremetal,
+                    self.baremetal_client,
                 ),
             ]
         )
@@ -552,7 +553,7 @@ class TestOrchestrate(base.TestCommand):
         mock_snci.assert_has_calls(
             [
                 call(
-                    self.app.client_manager.baremetal,
+                    self.baremetal_client,
                     "node1",
                     {
                         cluster_utils.ESI_CLUSTER_UUID: "cluster-id",
@@ -560,7 +561,7 @@ class TestOrchestrate(base.TestCommand):
                     },
                 ),
                 call(
-                    self.app.client_manager.baremetal,
+                    self.baremetal_client,
                     "node2",
                     {
                         cluster_utils.ESI_CLUSTER_UUID: "cluster-id",
@@ -568,7 +569,7 @@ class TestOrchestrate(base.TestCommand):
                     },
                 ),
                 call(
-                    self.app.client_manager.baremetal,
+                    self.baremetal_client,
                     "node3",
                     {
                         cluster_utils.ESI_CLUSTER_UUID: "cluster-id",
@@ -639,6 +640,77 @@ class TestOrchestrate(base.TestCommand):
                 parsed_args,
             )
 
+    @mock.patch("esiclient.metrics.exporter_from_url", autospec=True)
+    @mock.patch(
+        "esiclient.v1.cluster.openshift.call_assisted_installer_api", autospec=True
+    )
+    @mock.patch("json.loads", autospec=True)
+    @mock.patch("json.load", autospec=True)
+    @mock.patch.dict(
+        os.environ, {"PULL_SECRET": "pull_secret_file", "API_TOKEN": "api-token"}
+    )
+    def test_take_action_metrics(self, mock_load, mock_loads, mock_caia, mock_efu):
+        mock_load.return_value = {
+            "cluster_name": "test_cluster",
+            "api_vip": "1.1.1.1",
+            "ingress_vip": "2.2.2.2",
+            "openshift_version": "1",
+            "base_dns_domain": "foo.bar",
+            "ssh_public_key": "ssh-public-key",
+            "external_network_name": "external_network",
+            "private_network_name": "private_network",
+            "private_subnet_name": "private_subnet",
+            "nodes": ["node1", "node2", "node3"],
+        }
+        mock_caia.side_effect = [
+            MockResponse({"id": self.cluster_id}),
+            openshift.OSAIException("token expired"),
+        ]
+
+        arglist = ["config.json", "--metrics", "statsd://localhost"]
+        verifylist = [("metrics", "statsd://localhost")]
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+
+        with patch("builtins.open"):
+            self.assertRaises(
+                cluster_utils.ESIOrchestrationException,
+                self.cmd.take_action,
+                parsed_args,
+            )
+
+        mock_efu.assert_called_once_with("statsd://localhost")
+        exporter = mock_efu.return_value
+        metrics = [c[0][0] for c in exporter.export.call_args_list]
+        self.assertEqual(
+            [
+                ("esi.orchestrate.nodes", 3, {}),
+                ("esi.orchestrate.phase", "ok", {"phase": "create_cluster"}),
+                ("esi.orchestrate.phase", "error", {"phase": "create_infra_env"}),
+                (
+                    "esi.orchestrate.phase.errors",
+                    1,
+                    {"phase": "create_infra_env", "error": "OSAIException"},
+                ),
+                ("esi.orchestrate", "error", {}),
+                (
+                    "esi.orchestrate.errors",
+                    1,
+                    {"error": "ESIOrchestrationException"},
+                ),
+            ],
+            [
+                (
+                    m.name,
+                    m.tags.pop("outcome", m.value),
+                    {k: v for k, v in m.tags.items() if k != "orchestration"},
+                )
+                for m in metrics
+            ],
+        )
+        self.assertTrue(all(m.tags["orchestration"] == "openshift" for m in metrics))
+        exporter.close.assert_called_once_with()
+
 
 class TestUndeploy(base.TestCommand):
     def setUp(self):
@@ -687,19 +759,19 @@ class TestUndeploy(base.TestCommand):
 
         self.node1 = utils.create_mock_object(
             {
-                "uuid": "node_uuid_1",
+                "id": "node_uuid_1",
                 "name": "node1",
             }
         )
         self.node2 = utils.create_mock_object(
             {
-                "uuid": "node_uuid_2",
+                "id": "node_uuid_2",
                 "name": "node2",
             }
         )
         self.node3 = utils.create_mock_object(
             {
-                "uuid": "node_uuid_3",
+                "id": "node_uuid_3",
                 "name": "node3",
             }
         )
@@ -713,7 +785,7 @@ class TestUndeploy(base.TestCommand):
                 return self.node3
             return None
 
-        self.app.client_manager.baremetal.node.get.side_effect = mock_get_node
+        self.baremetal_client.get_node.side_effect = mock_get_node
 
     @mock.patch("esiclient.v1.cluster.utils.clean_cluster_node", autospec=True)
     @mock.patch("json.loads", autospec=True)
@@ -760,23 +832,23 @@ class TestUndeploy(base.TestCommand):
                 call("apps_port_uuid_1"),
             ]
         )
-        self.app.client_manager.baremetal.node.get.assert_has_calls(
+        self.baremetal_client.get_node.assert_has_calls(
             [call("node1"), call("node2"), call("node3")]
         )
         mock_ccn.assert_has_calls(
             [
                 call(
-                    self.app.client_manager.baremetal,
+                    self.baremetal_client,
                     self.app.client_manager.network,
                     self.node1,
                 ),
                 call(
-                    self.app.client_manager.baremetal,
+                    self.baremetal_client,
                     self.app.client_manager.network,
                     self.node2,
                 ),
                 call(
-                    self.app.client_manager.baremetal,
+                    self.baremetal_client,
                     self.app.client_manager.network,
                     self.node3,
                 ),
@@ -21,8 +21,8 @@ from esiclient.v1.cluster import utils as cluster_utils
 class TestSetNodeClusterInfo(TestCase):
     def setUp(self):
         super(TestSetNodeClusterInfo, self).setUp()
-        self.ironic_client = mock.Mock()
-        self.ironic_client.node.update.return_value = None
+        self.baremetal_client = mock.Mock()
+        self.baremetal_client.patch_node.return_value = None
 
     def test_set_node_cluster_info(self):
         cluster_dict = {
@@ -31,9 +31,9 @@ class TestSetNodeClusterInfo(TestCase):
             cluster_utils.ESI_FIP_UUID: "fip-uuid",
         }
         cluster_utils.set_node_cluster_info(
-            self.ironic_client, "node_uuid", cluster_dict
+            self.baremetal_client, "node_uuid", cluster_dict
         )
-        self.ironic_client.node.update.assert_called_once_with(
+        self.baremetal_client.patch_node.assert_called_once_with(
             "node_uuid",
             [
                 {
@@ -44,6 +44,7 @@ class TestSetNodeClusterInfo(TestCase):
                 {"path": "/extra/esi_port_uuid", "value": "port-uuid", "op": "add"},
                 {"path": "/extra/esi_fip_uuid", "value": "fip-uuid", "op": "add"},
             ],
+            retry_on_conflict=False,
         )
 
 
@@ -53,7 +54,7 @@ class TestCleanClusterNode(TestCase):
 
         self.node1 = utils.create_mock_object(
             {
-                "uuid": "node_uuid_1",
+                "id": "node_uuid_1",
                 "name": "node1",
                 "extra": {
                     "esi_cluster_uuid": "cluster-uuid-1",
@@ -64,7 +65,7 @@ class TestCleanClusterNode(TestCase):
         )
         self.node2 = utils.create_mock_object(
             {
-                "uuid": "node_uuid_2",
+                "id": "node_uuid_2",
                 "name": "node2",
                 "extra": {
                     "esi_cluster_uuid": "cluster-uuid-1",
@@ -79,42 +80,44 @@ class TestCleanClusterNode(TestCase):
             }
         )
 
-        self.ironic_client = mock.Mock()
+        self.baremetal_client = mock.Mock()
         self.neutron_client = mock.Mock()
         self.neutron_client.find_trunk.return_value = self.trunk
 
     def test_clean_cluster_node(self):
         cluster_utils.clean_cluster_node(
-            self.ironic_client, self.neutron_client, self.node2
+            self.baremetal_client, self.neutron_client, self.node2
         )
-        self.ironic_client.node.set_provision_state.assert_called_once_with(
+        self.baremetal_client.set_node_provision_state.assert_called_once_with(
             "node_uuid_2", "deleted"
         )
         self.neutron_client.delete_port.assert_called_once_with("port-uuid-2")
-        self.ironic_client.node.update.assert_called_once_with(
+        self.baremetal_client.patch_node.assert_called_once_with(
             "node_uuid_2",
             [
                 {"path": "/extra/esi_cluster_uuid", "op": "remove"},
                 {"path": "/extra/esi_port_uuid", "op": "remove"},
             ],
+            retry_on_conflict=False,
         )
 
     @mock.patch("esiclient.utils.delete_trunk", autospec=True)
     def test_clean_cluster_node_trunk(self, mock_dt):
         cluster_utils.clean_cluster_node(
-            self.ironic_client, self.neutron_client, self.node1
+            self.baremetal_client, self.neutron_client, self.node1
         )
-        self.ironic_client.node.set_provision_state.assert_called_once_with(
+        self.baremetal_client.set_node_provision_state.assert_called_once_with(
             "node_uuid_1", "deleted"
         )
         self.neutron_client.find_trunk.assert_called_once_with("trunk-uuid-1")
         mock_dt.assert_called_once_with(self.neutron_client, self.trunk)
         self.neutron_client.delete_ip.assert_called_once_with("fip-uuid-1")
-        self.ironic_client.node.update.assert_called_once_with(
+        self.baremetal_client.patch_node.assert_called_once_with(
             "node_uuid_1",
             [
                 {"path": "/extra/esi_cluster_uuid", "op": "remove"},
                 {"path": "/extra/esi_trunk_uuid", "op": "remove"},
                 {"path": "/extra/esi_fip_uuid", "op": "remove"},
             ],
+            retry_on_conflict=False,
         )
@@ -148,5 +148,5 @@ class TestMDCBaremetalNodeList(base.TestCommand):
             ],
         )
         self.assertEqual(expected, results)
-        mock_get_cloud_names.assert_called_once()
+        mock_get_cloud_names.assert_not_called()
         assert self.connection.list_machines.call_count == 1
@@ -9,6 +9,13 @@
 #   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #   License for the specific language governing permissions and limitations
 #   under the License.
+import asyncio
+import io
+import os
+import socketserver
+import threading
+
+import fixtures
 import mock
 
 from osc_lib import exceptions
@@ -17,37 +24,236 @@ from esiclient.tests.unit import base
 from esiclient.v1 import node_console
 
 
+class EchoHandler(socketserver.BaseRequestHandler):
+    """Send a banner, echo the first thing received, then hang up"""
+
+    def handle(self):
+        self.request.sendall(self.server.banner)
+        if self.server.echo:
+            self.server.received = self.request.recv(1024)
+            self.request.sendall(self.server.received)
+
+
+class EchoServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+
+    def __init__(self, banner=b"", echo=True):
+        super(EchoServer, self).__init__(("127.0.0.1", 0), EchoHandler)
+        self.banner = banner
+        self.echo = echo
+        self.received = None
+        threading.Thread(target=self.serve_forever, args=(0.01,), daemon=True).start()
+
+    @property
+    def url(self):
+        return "tcp://%s:%s" % self.server_address
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def read_all(fd):
+    chunks = []
+    while chunk := os.read(fd, 1024):
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+class TestConsoleUrl(base.TestCase):
+    def test_parse_console_url(self):
+        self.assertEqual(
+            ("192.168.1.2", 8024),
+            node_console.parse_console_url("tcp://192.168.1.2:8024"),
+        )
+
+    def test_parse_console_url_unsupported(self):
+        for url in ("http://192.168.1.2:8024", "tcp://192.168.1.2", "tcp://:8024"):
+            self.assertRaisesRegex(
+                exceptions.CommandError,
+                "ERROR: Unsupported console url",
+                node_console.parse_console_url,
+                url,
+            )
+
+
+class TestConsoleRelay(base.TestCase):
+    def setUp(self):
+        super(TestConsoleRelay, self).setUp()
+        self.server = EchoServer(banner=b"login: ")
+        self.addCleanup(self.server.stop)
+
+    def test_interactive_session(self):
+        input_r, input_w = os.pipe()
+        output_r, output_w = os.pipe()
+        os.write(input_w, b"root\r")
+        sock = node_console.connect(self.server.server_address)
+        log_file = io.BytesIO()
+
+        asyncio.run(node_console.interactive_session(sock, input_r, output_w, log_file))
+        sock.close()
+        for fd in (input_r, input_w, output_w):
+            os.close(fd)
+
+        self.assertEqual(b"root\r", self.server.received)
+        self.assertEqual(b"login: root\r", read_all(output_r))
+        self.assertEqual(b"login: root\r", log_file.getvalue())
+        os.close(output_r)
+
+    def test_interactive_session_escape(self):
+        input_r, input_w = os.pipe()
+        output_r, output_w = os.pipe()
+        os.write(input_w, b"ro" + node_console.ESCAPE + b"ot\r")
+        sock = node_console.connect(self.server.server_address)
+
+        # the server waits for input before hanging up, so only the escape
+        # can end the session before anything is echoed
+        asyncio.run(node_console.interactive_session(sock, input_r, output_w))
+        sock.close()
+        for fd in (input_r, input_w, output_w):
+            os.close(fd)
+
+        self.assertNotIn(b"ot", read_all(output_r))
+        os.close(output_r)
+
+
+class TestLineSplitter(base.TestCase):
+    def test_splits_lines(self):
+        lines = []
+        splitter = node_console.LineSplitter(lines.append)
+
+        splitter(memoryview(b"boot\r\nlo"))
+        splitter(memoryview(b"gin: "))
+        self.assertEqual(["boot"], lines)
+
+        splitter.flush()
+        self.assertEqual(["boot", "login: "], lines)
+
+    def test_bounds_partial_line(self):
+        lines = []
+        splitter = node_console.LineSplitter(lines.append)
+
+        splitter(b"x" * (node_console.BUFFER_SIZE + 10))
+
+        self.assertEqual(["x" * node_console.BUFFER_SIZE], lines)
+        self.assertEqual(b"x" * 10, splitter.partial)
+
+
+class TestEnableConsole(base.TestCase):
+    def setUp(self):
+        super(TestEnableConsole, self).setUp()
+        self.baremetal_client = mock.Mock()
+        self.disabled = {"console_enabled": False, "console_info": None}
+        self.enabling = {"console_enabled": True, "console_info": None}
+        self.enabled = {
+            "console_enabled": True,
+            "console_info": {"type": "socat", "url": "tcp://192.168.1.2:8024"},
+        }
+
+    def test_enable_console_already_enabled(self):
+        self.baremetal_client.get_node_console.return_value = self.enabled
+
+        address = node_console.enable_console(self.baremetal_client, "node1")
+
+        self.assertEqual(("192.168.1.2", 8024), address)
+        self.baremetal_client.enable_node_console.assert_not_called()
+
+    @mock.patch("esiclient.v1.node_console.time.sleep", autospec=True)
+    def test_enable_console(self, mock_sleep):
+        self.baremetal_client.get_node_console.side_effect = [
+            self.disabled,
+            self.enabling,
+            self.enabled,
+        ]
+
+        address = node_console.enable_console(self.baremetal_client, "node1")
+
+        self.assertEqual(("192.168.1.2", 8024), address)
+        self.baremetal_client.enable_node_console.assert_called_once_with("node1")
+        self.assertEqual(2, mock_sleep.call_count)
+
+    @mock.patch("esiclient.v1.node_console.time.sleep", autospec=True)
+    def test_enable_console_timeout(self, mock_sleep):
+        self.baremetal_client.get_node_console.return_value = self.disabled
+
+        self.assertRaisesRegex(
+            exceptions.CommandError,
+            "ERROR: Timed out enabling console for node1",
+            node_console.enable_console,
+            self.baremetal_client,
+            "node1",
+            timeout=-1,
+        )
+
+
 class TestNodeConsoleConnect(base.TestCommand):
     def setUp(self):
         super(TestNodeConsoleConnect, self).setUp()
         self.cmd = node_console.NodeConsoleConnect(self.app, None)
 
+        self.server_1 = EchoServer(banner=b"node1 boot\r\nlogin: ", echo=False)
+        self.server_2 = EchoServer(banner=b"node2 boot\r\n", echo=False)
+        self.addCleanup(self.server_1.stop)
+        self.addCleanup(self.server_2.stop)
+
         self.node_console_1 = {
             "console_enabled": True,
-            "console_info": {"type": "socat", "url": "tcp://192.168.1.2:8024"},
+            "console_info": {"type": "socat", "url": self.server_1.url},
         }
         self.node_console_2 = {"console_enabled": False, "console_info": None}
+        self.node_console_3 = {
+            "console_enabled": True,
+            "console_info": {"type": "socat", "url": self.server_2.url},
+        }
+        self.app.stdout = io.StringIO()
 
-    @mock.patch("esiclient.v1.node_console.os.system", return_value=0, autospec=True)
-    def test_take_action(self, mock_system):
-        self.app.client_manager.baremetal.node.get_console.return_value = (
-            self.node_console_1
-        )
+    @mock.patch("esiclient.v1.node_console.sys", autospec=True)
+    def test_take_action(self, mock_sys):
+        self.baremetal_client.get_node_console.return_value = self.node_console_1
+        input_r, input_w = os.pipe()
+        output_r, output_w = os.pipe()
+        mock_sys.stdin.fileno.return_value = input_r
+        mock_sys.stdout.fileno.return_value = output_w
 
-        arglist = ["node_console_1"]
-        verifylist = []
+        log_path = os.path.join(self.useFixture(fixtures.TempDir()).path, "console.log")
+        arglist = ["node_console_1", "--log-file", log_path]
+        verifylist = [("node", ["node_console_1"]), ("log_file", log_path)]
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+
+        result = self.cmd.take_action(parsed_args)
+
+        self.assertEqual(0, result)
+        self.baremetal_client.get_node_console.assert_called_once_with("node_console_1")
+        for fd in (input_r, input_w, output_w):
+            os.close(fd)
+        self.assertEqual(b"node1 boot\r\nlogin: ", read_all(output_r))
+        os.close(output_r)
+        with open(log_path, "rb") as f:
+            self.assertEqual(b"node1 boot\r\nlogin: ", f.read())
+
+    def test_take_action_multiple_nodes(self):
+        self.baremetal_client.get_node_console.side_effect = [
+            self.node_console_1,
+            self.node_console_3,
+        ]
+
+        log_path = os.path.join(self.useFixture(fixtures.TempDir()).path, "console.log")
+        arglist = ["node1", "node2", "--log-file", log_path]
+        verifylist = [("node", ["node1", "node2"])]
 
         parsed_args = self.check_parser(self.cmd, arglist, verifylist)
 
         result = self.cmd.take_action(parsed_args)
 
         self.assertEqual(0, result)
-        mock_system.assert_called_once
+        expected = ["[node1] login: ", "[node1] node1 boot", "[node2] node2 boot"]
+        self.assertEqual(expected, sorted(self.app.stdout.getvalue().splitlines()))
+        with open(log_path) as f:
+            self.assertEqual(expected, sorted(f.read().splitlines()))
 
     def test_take_action_no_console_info(self):
-        self.app.client_manager.baremetal.node.get_console.return_value = (
-            self.node_console_2
-        )
+        self.baremetal_client.get_node_console.return_value = self.node_console_2
 
         arglist = ["node_console_2"]
         verifylist = []
@@ -61,3 +267,117 @@ class TestNodeConsoleConnect(base.TestCommand):
             self.cmd.take_action,
             parsed_args,
         )
+
+
+class TestNodeConsoleCapture(base.TestCommand):
+    def setUp(self):
+        super(TestNodeConsoleCapture, self).setUp()
+        self.cmd = node_console.NodeConsoleCapture(self.app, None)
+        self.log_dir = self.useFixture(fixtures.TempDir()).path
+
+        self.server_1 = EchoServer(banner=b"PXE-E51: No DHCP\r\n", echo=True)
+        self.server_2 = EchoServer(banner=b"Booting\r\nlogin: ", echo=False)
+        self.addCleanup(self.server_1.stop)
+        self.addCleanup(self.server_2.stop)
+
+        consoles = {
+            "node1": {
+                "console_enabled": True,
+                "console_info": {"type": "socat", "url": self.server_1.url},
+            },
+            "node2": {
+                "console_enabled": True,
+                "console_info": {"type": "socat", "url": self.server_2.url},
+            },
+        }
+
+        def get_console(node):
+            if node not in consoles:
+                raise exceptions.CommandError("ERROR: node %s not found" % node)
+            return consoles[node]
+
+        self.baremetal_client.get_node_console.side_effect = get_console
+
+    def test_take_action(self):
+        arglist = [
+            "node1",
+            "node2",
+            "node3",
+            "--log-dir",
+            self.log_dir,
+            "--pattern",
+            "PXE-E\\d+",
+            "--timeout",
+            "1",
+        ]
+        verifylist = [
+            ("node", ["node1", "node2", "node3"]),
+            ("log_dir", self.log_dir),
+            ("timeout", 1),
+        ]
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+
+        columns, data = self.cmd.take_action(parsed_args)
+
+        self.assertEqual(["Node", "Log File", "Lines", "Match", "Error"], columns)
+        self.assertEqual(
+            [
+                [
+                    "node1",
+                    os.path.join(self.log_dir, "node1.log"),
+                    1,
+                    "PXE-E51: No DHCP",
+                    None,
+                ],
+                [
+                    "node2",
+                    os.path.join(self.log_dir, "node2.log"),
+                    2,
+                    None,
+                    None,
+                ],
+                ["node3", None, None, None, "ERROR: node node3 not found"],
+            ],
+            data,
+        )
+        self.assertEqual(1, self.cmd.failed)
+        with open(os.path.join(self.log_dir, "node2.log")) as f:
+            self.assertEqual("Booting\nlogin: \n", f.read())
+
+    def test_take_action_stops_when_all_matched(self):
+        arglist = [
+            "node1",
+            "--log-dir",
+            self.log_dir,
+            "--pattern",
+            "PXE",
+        ]
+        parsed_args = self.check_parser(self.cmd, arglist, [])
+
+        # node1's console stays open waiting for input, so only a match
+        # can end the capture before the default timeout
+        columns, data = self.cmd.take_action(parsed_args)
+
+        self.assertEqual("PXE-E51: No DHCP", data[0][3])
+        self.assertEqual(0, self.cmd.failed)
+
+    def test_take_action_rotates_logs(self):
+        arglist = [
+            "node2",
+            "--log-dir",
+            self.log_dir,
+            "--max-bytes",
+            "10",
+            "--backup-count",
+            "1",
+            "--timeout",
+            "1",
+        ]
+        parsed_args = self.check_parser(self.cmd, arglist, [])
+
+        self.cmd.take_action(parsed_args)
+
+        with open(os.path.join(self.log_dir, "node2.log")) as f:
+            self.assertEqual("login: \n", f.read())
+        with open(os.path.join(self.log_dir, "node2.log.1")) as f:
+            self.assertEqual("Booting\n", f.read())
@@ -11,10 +11,17 @@
 #   under the License.
 #
 
+import io
+import json
 import mock
+import tempfile
+import tracemalloc
+import types
 
 from openstack import exceptions
+from osc_lib import exceptions as osc_exceptions
 
+from esiclient.tests import fake_cloud
 from esiclient.tests.unit import base
 from esiclient.tests.unit import utils
 from esiclient.v1 import node_network
@@ -185,7 +192,7 @@ class TestList(base.TestCommand):
         self.cmd = node_network.List(self.app, None)
 
     @mock.patch("esiclient.utils.get_network_display_name")
-    @mock.patch("esi.lib.nodes.network_list")
+    @mock.patch("esiclient.utils.node_network_list")
     def test_take_action_no_network(
         self, mock_network_list, mock_get_network_display_name
     ):
@@ -214,7 +221,9 @@ class TestList(base.TestCommand):
         verifylist = []
         parsed_args = self.check_parser(self.cmd, arglist, verifylist)
 
-        results = self.cmd.take_action(parsed_args)
+        columns, rows = self.cmd.take_action(parsed_args)
+        self.assertIsInstance(rows, types.GeneratorType)
+        results = (columns, list(rows))
 
         data = [
             [
@@ -245,7 +254,7 @@ class TestList(base.TestCommand):
         mock_get_network_display_name.assert_not_called()
 
     @mock.patch("esiclient.utils.get_network_display_name")
-    @mock.patch("esi.lib.nodes.network_list")
+    @mock.patch("esiclient.utils.node_network_list")
     def test_take_action_multiple_nodes(
         self, mock_network_list, mock_get_network_display_name
     ):
@@ -290,7 +299,9 @@ class TestList(base.TestCommand):
         verifylist = []
         parsed_args = self.check_parser(self.cmd, arglist, verifylist)
 
-        results = self.cmd.take_action(parsed_args)
+        columns, rows = self.cmd.take_action(parsed_args)
+        self.assertIsInstance(rows, types.GeneratorType)
+        results = (columns, list(rows))
 
         data = [
             [
@@ -335,7 +346,7 @@ class TestList(base.TestCommand):
         )
 
     @mock.patch("esiclient.utils.get_network_display_name")
-    @mock.patch("esi.lib.nodes.network_list")
+    @mock.patch("esiclient.utils.node_network_list")
     def test_take_action_multiple_ports(
         self, mock_network_list, mock_get_network_display_name
     ):
@@ -371,7 +382,9 @@ class TestList(base.TestCommand):
         verifylist = []
         parsed_args = self.check_parser(self.cmd, arglist, verifylist)
 
-        results = self.cmd.take_action(parsed_args)
+        columns, rows = self.cmd.take_action(parsed_args)
+        self.assertIsInstance(rows, types.GeneratorType)
+        results = (columns, list(rows))
 
         data = [
             [
@@ -416,7 +429,7 @@ class TestList(base.TestCommand):
         )
 
     @mock.patch("esiclient.utils.get_network_display_name")
-    @mock.patch("esi.lib.nodes.network_list")
+    @mock.patch("esiclient.utils.node_network_list")
     def test_take_action_port_forwardings(
         self, mock_network_list, mock_get_network_display_name
     ):
@@ -445,7 +458,9 @@ class TestList(base.TestCommand):
         verifylist = []
         parsed_args = self.check_parser(self.cmd, arglist, verifylist)
 
-        results = self.cmd.take_action(parsed_args)
+        columns, rows = self.cmd.take_action(parsed_args)
+        self.assertIsInstance(rows, types.GeneratorType)
+        results = (columns, list(rows))
 
         data = [
             [
@@ -481,7 +496,7 @@ class TestList(base.TestCommand):
         )
 
     @mock.patch("esiclient.utils.get_network_display_name")
-    @mock.patch("esi.lib.nodes.network_list")
+    @mock.patch("esiclient.utils.node_network_list")
     def test_take_action_trunk(self, mock_network_list, mock_get_network_display_name):
         mock_network_list.return_value = [
             {
@@ -512,7 +527,9 @@ class TestList(base.TestCommand):
         verifylist = []
         parsed_args = self.check_parser(self.cmd, arglist, verifylist)
 
-        results = self.cmd.take_action(parsed_args)
+        columns, rows = self.cmd.take_action(parsed_args)
+        self.assertIsInstance(rows, types.GeneratorType)
+        results = (columns, list(rows))
 
         data = [
             [
@@ -549,7 +566,7 @@ class TestList(base.TestCommand):
         )
 
     @mock.patch("esiclient.utils.get_network_display_name")
-    @mock.patch("esi.lib.nodes.network_list")
+    @mock.patch("esiclient.utils.node_network_list")
     def test_take_action(self, mock_network_list, mock_get_network_display_name):
         mock_network_list.return_value = [
             {
@@ -603,7 +620,9 @@ class TestList(base.TestCommand):
         verifylist = []
         parsed_args = self.check_parser(self.cmd, arglist, verifylist)
 
-        results = self.cmd.take_action(parsed_args)
+        columns, rows = self.cmd.take_action(parsed_args)
+        self.assertIsInstance(rows, types.GeneratorType)
+        results = (columns, list(rows))
 
         data = [
             [
@@ -641,19 +660,20 @@ class TestList(base.TestCommand):
         )
 
         self.assertEqual(expected, results)
+        # display names are computed once per network
         mock_get_network_display_name.assert_has_calls(
             [
                 mock.call(self.network1),
                 mock.call(self.floating_network1),
                 mock.call(self.network3),
-                mock.call(self.network1),
                 mock.call(self.network2),
                 mock.call(self.floating_network2),
             ]
         )
+        self.assertEqual(5, mock_get_network_display_name.call_count)
 
     @mock.patch("esiclient.utils.get_network_display_name")
-    @mock.patch("esi.lib.nodes.network_list")
+    @mock.patch("esiclient.utils.node_network_list")
     def test_take_action_long(self, mock_network_list, mock_get_network_display_name):
         mock_network_list.return_value = [
             {
@@ -707,7 +727,9 @@ class TestList(base.TestCommand):
         verifylist = []
         parsed_args = self.check_parser(self.cmd, arglist, verifylist)
 
-        results = self.cmd.take_action(parsed_args)
+        columns, rows = self.cmd.take_action(parsed_args)
+        self.assertIsInstance(rows, types.GeneratorType)
+        results = (columns, list(rows))
 
         data = [
             [
@@ -781,16 +803,60 @@ class TestList(base.TestCommand):
         )
 
         self.assertEqual(expected, results)
+        # display names are computed once per network
         mock_get_network_display_name.assert_has_calls(
             [
                 mock.call(self.network1),
                 mock.call(self.floating_network1),
                 mock.call(self.network3),
-                mock.call(self.network1),
                 mock.call(self.network2),
                 mock.call(self.floating_network2),
             ]
         )
+        self.assertEqual(5, mock_get_network_display_name.call_count)
+
+    def test_take_action_streaming_memory(self):
+        num_nodes = 1000
+        cloud = fake_cloud.FakeCloud().seed(
+            nodes=num_nodes,
+            ports_per_node=2,
+            networks=4,
+            attached=0.8,
+            trunks=100,
+            floating_ips=250,
+            forwards_per_ip=2,
+        )
+        self.app.client_manager = cloud.client_manager
+        self.cmd = node_network.List(self.app, None)
+        parsed_args = self.check_parser(self.cmd, ["--long"], [])
+
+        def memory_growth(keep):
+            """The most memory allocated since the first row, while rows
+            are being consumed"""
+            tracemalloc.start()
+            try:
+                _, rows = self.cmd.take_action(parsed_args)
+                rows = iter(rows)
+                kept = [next(rows)]
+                first = growth = tracemalloc.get_traced_memory()[0]
+                count = 1
+                for row in rows:
+                    count += 1
+                    if keep:
+                        kept.append(row)
+                    growth = max(growth, tracemalloc.get_traced_memory()[0])
+                self.assertEqual(num_nodes * 2, count)
+                return growth - first
+            finally:
+                tracemalloc.stop()
+
+        streamed = memory_growth(keep=False)
+        materialized = memory_growth(keep=True)
+
+        # rows are built as they are consumed, so streaming them holds no
+        # more than a row at a time; were they built up front, streaming
+        # would hold every row too
+        self.assertLess(streamed * 10, materialized)
 
 
 class TestShow(base.TestCommand):
@@ -888,35 +954,39 @@ class TestShow(base.TestCommand):
 
         self.cmd = node_network.Show(self.app, None)
 
-    @mock.patch("esi.lib.nodes.network_list")
-    def test_take_action(self, mock_network_list):
-        mock_network_list.return_value = [
-            {
-                "node": self.node,
-                "network_info": [
-                    {
-                        "baremetal_port": self.port1,
-                        "network_ports": [],
-                        "networks": {"parent": None, "trunk": [], "floating": None},
-                        "floating_ip": None,
-                    },
-                    {
-                        "baremetal_port": self.port2,
-                        "network_ports": [
-                            self.neutron_port,
-                            self.subport_1,
-                            self.subport_2,
-                        ],
-                        "networks": {
-                            "parent": self.network3,
-                            "trunk": [self.network1, self.network2],
-                            "floating": self.floating_network,
+    @mock.patch("esiclient.utils.join_node_networks")
+    @mock.patch("esiclient.utils.node_network_prefetch")
+    def test_take_action(self, mock_prefetch, mock_network_list):
+        mock_prefetch.return_value = {"nodes": [self.node]}
+        mock_network_list.return_value = iter(
+            [
+                {
+                    "node": self.node,
+                    "network_info": [
+                        {
+                            "baremetal_port": self.port1,
+                            "network_ports": [],
+                            "networks": {"parent": None, "trunk": [], "floating": None},
+                            "floating_ip": None,
                         },
-                        "floating_ip": self.floating_ip,
-                    },
-                ],
-            }
-        ]
+                        {
+                            "baremetal_port": self.port2,
+                            "network_ports": [
+                                self.neutron_port,
+                                self.subport_1,
+                                self.subport_2,
+                            ],
+                            "networks": {
+                                "parent": self.network3,
+                                "trunk": [self.network1, self.network2],
+                                "floating": self.floating_network,
+                            },
+                            "floating_ip": self.floating_ip,
+                        },
+                    ],
+                }
+            ]
+        )
 
         arglist = [self.node.name]
         verifylist = []
@@ -976,9 +1046,114 @@ class TestShow(base.TestCommand):
             ],
         )
 
-        mock_network_list.assert_called_once
+        mock_prefetch.assert_called_once_with(
+            self.app.client_manager.sdk_connection, "node2"
+        )
         self.assertEqual(expected, results)
 
+    @mock.patch("esiclient.utils.join_node_networks")
+    @mock.patch("esiclient.utils.node_network_prefetch")
+    def test_take_action_no_ports(self, mock_prefetch, mock_network_list):
+        mock_prefetch.return_value = {"nodes": [self.node]}
+        mock_network_list.return_value = iter([])
+
+        parsed_args = self.check_parser(self.cmd, ["node2"], [])
+        results = self.cmd.take_action(parsed_args)
+
+        self.assertEqual(
+            (
+                ["Node", "Node UUID", "Node Ports"],
+                ["node2", "11111111-2222-3333-4444-bbbbbbbbbbbb", "[]"],
+            ),
+            results,
+        )
+
+    @mock.patch("esiclient.utils.join_node_networks")
+    @mock.patch("esiclient.utils.node_network_prefetch")
+    def test_take_action_multiple(self, mock_prefetch, mock_network_list):
+        node1 = utils.create_mock_object({"id": "node_uuid_1", "name": "node1"})
+        prefetch = {"nodes": [node1, self.node]}
+        mock_prefetch.return_value = prefetch
+        mock_network_list.return_value = iter(
+            [
+                {
+                    "node": self.node,
+                    "network_info": [
+                        {
+                            "baremetal_port": self.port1,
+                            "network_ports": [],
+                            "networks": {"parent": None, "trunk": [], "floating": None},
+                            "floating_ip": None,
+                        },
+                    ],
+                }
+            ]
+        )
+
+        parsed_args = self.check_parser(
+            self.cmd,
+            ["node2", "node_uuid_1", "--format", "json"],
+            [("node", ["node2", "node_uuid_1"])],
+        )
+        columns, data = self.cmd.take_action(parsed_args)
+        self.app.stdout = io.StringIO()
+        self.cmd.produce_output(parsed_args, columns, data)
+
+        self.assertEqual(
+            [
+                {
+                    "Node": "node2",
+                    "Node UUID": "11111111-2222-3333-4444-bbbbbbbbbbbb",
+                    "Node Ports": [
+                        {
+                            "mac_address": "bb:bb:bb:bb:bb:bb",
+                            "baremetal_port_uuid": "port_uuid_1",
+                        }
+                    ],
+                },
+                {"Node": "node1", "Node UUID": "node_uuid_1", "Node Ports": []},
+            ],
+            [json.loads(line) for line in self.app.stdout.getvalue().splitlines()],
+        )
+        # nodes are listed in bulk rather than looked up one at a time
+        mock_prefetch.assert_called_once_with(self.app.client_manager.sdk_connection)
+        self.assertEqual([self.node, node1], prefetch["nodes"])
+
+    @mock.patch("esiclient.utils.join_node_networks")
+    @mock.patch("esiclient.utils.node_network_prefetch")
+    def test_take_action_node_file(self, mock_prefetch, mock_network_list):
+        mock_prefetch.return_value = {"nodes": [self.node]}
+        mock_network_list.return_value = iter([])
+
+        with tempfile.NamedTemporaryFile("w", suffix=".txt") as f:
+            f.write("# nodes\nnode2\n\n")
+            f.flush()
+            parsed_args = self.check_parser(self.cmd, ["--node-file", f.name], [])
+            columns, data = self.cmd.take_action(parsed_args)
+
+        self.assertEqual(
+            [["node2", "11111111-2222-3333-4444-bbbbbbbbbbbb", []]], list(data)
+        )
+
+    @mock.patch("esiclient.utils.node_network_prefetch")
+    def test_take_action_multiple_unknown_node(self, mock_prefetch):
+        mock_prefetch.return_value = {"nodes": [self.node]}
+
+        parsed_args = self.check_parser(self.cmd, ["node2", "node9"], [])
+        self.assertRaisesRegex(
+            osc_exceptions.CommandError,
+            "Unknown nodes: node9",
+            self.cmd.take_action,
+            parsed_args,
+        )
+
+    def test_take_action_no_nodes(self):
+        parsed_args = self.check_parser(self.cmd, [], [])
+
+        self.assertRaises(
+            osc_exceptions.CommandError, self.cmd.take_action, parsed_args
+        )
+
 
 class TestAttach(base.TestCommand):
     def setUp(self):
@@ -1275,3 +1450,166 @@ class TestDetach(base.TestCommand):
             port_names_or_uuids=[],
             all_ports=True,
         )
+
+
+class TestBatchAttach(base.TestCommand):
+    def setUp(self):
+        super(TestBatchAttach, self).setUp()
+        self.cmd = node_network.BatchAttach(self.app, None)
+
+        self.node = utils.create_mock_object({"id": "node_uuid_1", "name": "node1"})
+        self.port = utils.create_mock_object(
+            {
+                "name": "node1-network1",
+                "mac_address": "aa:aa:aa:aa:aa:aa",
+                "fixed_ips": [{"ip_address": "1.1.1.1"}],
+            }
+        )
+        self.network = utils.create_mock_object({"name": "network1"})
+
+        self.manifest = tempfile.NamedTemporaryFile("w", suffix=".json")
+        self.addCleanup(self.manifest.close)
+
+    def write_manifest(self, manifest):
+        json.dump(manifest, self.manifest)
+        self.manifest.flush()
+
+    @mock.patch("esi.lib.nodes.network_attach")
+    def test_take_action(self, mock_network_attach):
+        def network_attach(connection, node, attach_info):
+            if node == "node2":
+                raise exceptions.ResourceFailure("Node node2 has no free ports")
+            return {"node": self.node, "ports": [self.port], "networks": [self.network]}
+
+        mock_network_attach.side_effect = network_attach
+        self.write_manifest(
+            [
+                {"node": "node1", "network": "network1"},
+                {"node": "node2", "port": "port2", "mac_address": "bb:bb"},
+            ]
+        )
+
+        parsed_args = self.check_parser(
+            self.cmd,
+            [self.manifest.name, "--concurrency", "2"],
+            [("concurrency", 2)],
+        )
+        columns, data = self.cmd.take_action(parsed_args)
+
+        self.assertEqual(
+            [
+                "Node",
+                "MAC Address",
+                "Port",
+                "Network",
+                "Fixed IP",
+                "Error",
+                "Time (s)",
+            ],
+            columns,
+        )
+        self.assertEqual(
+            [
+                [
+                    "node1",
+                    "aa:aa:aa:aa:aa:aa",
+                    "node1-network1",
+                    "network1",
+                    "1.1.1.1",
+                    None,
+                ],
+                ["node2", "bb:bb", None, None, None, "Node node2 has no free ports"],
+            ],
+            [row[:-1] for row in data],
+        )
+        self.assertEqual(1, self.cmd.failed)
+        mock_network_attach.assert_has_calls(
+            [
+                mock.call(
+                    self.app.client_manager.sdk_connection,
+                    "node1",
+                    {"network": "network1"},
+                ),
+                mock.call(
+                    self.app.client_manager.sdk_connection,
+                    "node2",
+                    {"port": "port2", "mac_address": "bb:bb"},
+                ),
+            ],
+            any_order=True,
+        )
+
+    def test_take_action_missing_node(self):
+        self.write_manifest([{"network": "network1"}])
+
+        parsed_args = self.check_parser(self.cmd, [self.manifest.name], [])
+
+        self.assertRaises(
+            osc_exceptions.CommandError, self.cmd.take_action, parsed_args
+        )
+
+    def test_take_action_bad_concurrency(self):
+        self.write_manifest([])
+
+        parsed_args = self.check_parser(
+            self.cmd, [self.manifest.name, "--concurrency", "0"], []
+        )
+
+        self.assertRaises(
+            osc_exceptions.CommandError, self.cmd.take_action, parsed_args
+        )
+
+
+class TestBatchDetach(base.TestCommand):
+    def setUp(self):
+        super(TestBatchDetach, self).setUp()
+        self.cmd = node_network.BatchDetach(self.app, None)
+
+        self.manifest = tempfile.NamedTemporaryFile("w", suffix=".json")
+        self.addCleanup(self.manifest.close)
+
+    @mock.patch("esi.lib.nodes.network_detach")
+    def test_take_action(self, mock_network_detach):
+        mock_network_detach.side_effect = [
+            [("neutron_port_1", True)],
+            [("neutron_port_2", True), ("neutron_port_3", False)],
+        ]
+        json.dump(
+            [
+                {"node": "node1", "port": "neutron_port_1"},
+                {"node": "node2", "all": True},
+            ],
+            self.manifest,
+        )
+        self.manifest.flush()
+
+        parsed_args = self.check_parser(
+            self.cmd, [self.manifest.name, "--concurrency", "1"], []
+        )
+        columns, data = self.cmd.take_action(parsed_args)
+
+        self.assertEqual(["Node", "Port", "Error", "Time (s)"], columns)
+        self.assertEqual(
+            [
+                ["node1", "neutron_port_1", None],
+                ["node2", "", "ERROR: Failed to detach neutron_port_3"],
+            ],
+            [row[:-1] for row in data],
+        )
+        self.assertEqual(1, self.cmd.failed)
+        mock_network_detach.assert_has_calls(
+            [
+                mock.call(
+                    self.app.client_manager.sdk_connection,
+                    "node1",
+                    port_names_or_uuids=["neutron_port_1"],
+                    all_ports=False,
+                ),
+                mock.call(
+                    self.app.client_manager.sdk_connection,
+                    "node2",
+                    port_names_or_uuids=[],
+                    all_ports=True,
+                ),
+            ]
+        )
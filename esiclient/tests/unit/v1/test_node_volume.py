@@ -27,33 +27,33 @@ class TestAttach(base.TestCommand):
 
         self.port1 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_1",
-                "node_uuid": "node_uuid_1",
+                "id": "port_uuid_1",
+                "node_id": "node_uuid_1",
                 "address": "aa:aa:aa:aa:aa:aa",
                 "internal_info": {"tenant_vif_port_id": "neutron_port_uuid_1"},
             }
         )
         self.port2 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_2",
-                "node_uuid": "node_uuid_1",
+                "id": "port_uuid_2",
+                "node_id": "node_uuid_1",
                 "address": "bb:bb:bb:bb:bb:bb",
                 "internal_info": {},
             }
         )
         self.node = utils.create_mock_object(
-            {"uuid": "node_uuid_1", "name": "node1", "provision_state": "available"}
+            {"id": "node_uuid_1", "name": "node1", "provision_state": "available"}
         )
         self.node_active = utils.create_mock_object(
-            {"uuid": "node_uuid_1", "name": "node1", "provision_state": "active"}
+            {"id": "node_uuid_1", "name": "node1", "provision_state": "active"}
         )
         self.volume_connector = utils.create_mock_object(
             {
-                "uuid": "vc_uuid",
+                "id": "vc_uuid",
             }
         )
         self.volume_target = utils.create_mock_object(
-            {"uuid": "vt_uuid", "volume_id": "volume_uuid_1"}
+            {"id": "vt_uuid", "volume_id": "volume_uuid_1"}
         )
         self.volume = utils.create_mock_object(
             {"id": "volume_uuid_1", "name": "volume1", "status": "available"}
@@ -80,22 +80,21 @@ class TestAttach(base.TestCommand):
         self.app.client_manager.network.create_port.return_value = self.neutron_port
         self.app.client_manager.network.find_port.return_value = self.neutron_port
         self.app.client_manager.network.ports.return_value = []
-        self.app.client_manager.baremetal.node.set_provision_state.return_value = (
-            self.node
-        )
-        self.app.client_manager.baremetal.volume.volume_connector.create.return_value = None
-        self.app.client_manager.baremetal.volume.volume_connector.delete.return_value = None
-        self.app.client_manager.baremetal.volume.volume_target.create.return_value = (
-            None
-        )
+        self.baremetal_client.set_node_provision_state.return_value = self.node
+        self.baremetal_client.create_volume_connector.return_value = None
+        self.baremetal_client.delete_volume_connector.return_value = None
+        self.baremetal_client.create_volume_target.return_value = None
+        self.baremetal_client.ports.return_value = []
+        self.baremetal_client.volume_connectors.return_value = []
+        self.baremetal_client.volume_targets.return_value = []
 
     @mock.patch("oslo_utils.uuidutils.is_uuid_like", return_value=False, autospec=True)
     def test_take_action(self, mock_iul):
-        self.app.client_manager.baremetal.node.get.return_value = self.node
-        self.app.client_manager.baremetal.node.update.return_value = self.node
-        self.app.client_manager.baremetal.volume_connector.list.return_value = []
-        self.app.client_manager.baremetal.volume_target.list.return_value = []
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.get_node.return_value = self.node
+        self.baremetal_client.patch_node.return_value = self.node
+        self.baremetal_client.volume_connectors.return_value = []
+        self.baremetal_client.volume_targets.return_value = []
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
@@ -112,42 +111,42 @@ class TestAttach(base.TestCommand):
         self.app.client_manager.network.find_network.assert_called_once_with(
             "test_network"
         )
-        self.app.client_manager.baremetal.node.get.assert_called_once_with("node1")
+        self.baremetal_client.get_node.assert_called_once_with("node1")
         mock_iul.assert_called_once_with("volume_uuid_1")
         self.app.client_manager.volume.volumes.find.assert_called_once_with(
             name="volume_uuid_1"
         )
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(
-            node="node1", detail=True
+        self.baremetal_client.ports.assert_called_once_with(
+            node="node1", fields=["internal_info"]
         )
-        self.app.client_manager.baremetal.node.update.assert_called_once()
-        self.app.client_manager.baremetal.volume_connector.list.assert_called_once_with(
-            node="node1"
+        self.baremetal_client.patch_node.assert_called_once()
+        self.baremetal_client.volume_connectors.assert_called_once_with(
+            node="node1", fields=["uuid"]
         )
-        self.app.client_manager.baremetal.volume_connector.create.assert_called_once()
-        self.app.client_manager.baremetal.volume_target.list.assert_called_once_with(
+        self.baremetal_client.create_volume_connector.assert_called_once()
+        self.baremetal_client.volume_targets.assert_called_once_with(
             node="node1", fields=["volume_id"]
         )
-        self.app.client_manager.baremetal.volume_target.create.assert_called_once()
+        self.baremetal_client.create_volume_target.assert_called_once()
         self.app.client_manager.network.create_port.assert_called_once_with(
             name="esi-node1-test_network-volume",
             network_id=self.network.id,
             device_owner="baremetal:none",
         )
-        self.app.client_manager.baremetal.node.vif_attach.assert_called_once_with(
-            "node1", self.neutron_port.id
+        self.baremetal_client.attach_vif_to_node.assert_called_once_with(
+            "node1", self.neutron_port.id, retry_on_conflict=False
         )
-        self.app.client_manager.baremetal.node.set_provision_state.assert_called_once_with(
+        self.baremetal_client.set_node_provision_state.assert_called_once_with(
             "node1", "active"
         )
 
     @mock.patch("oslo_utils.uuidutils.is_uuid_like", return_value=True, autospec=True)
     def test_take_action_volume_uuid(self, mock_iul):
-        self.app.client_manager.baremetal.node.get.return_value = self.node
-        self.app.client_manager.baremetal.node.update.return_value = self.node
-        self.app.client_manager.baremetal.volume_connector.list.return_value = []
-        self.app.client_manager.baremetal.volume_target.list.return_value = []
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.get_node.return_value = self.node
+        self.baremetal_client.patch_node.return_value = self.node
+        self.baremetal_client.volume_connectors.return_value = []
+        self.baremetal_client.volume_targets.return_value = []
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
@@ -164,32 +163,32 @@ class TestAttach(base.TestCommand):
         self.app.client_manager.network.find_network.assert_called_once_with(
             "test_network"
         )
-        self.app.client_manager.baremetal.node.get.assert_called_once_with("node1")
+        self.baremetal_client.get_node.assert_called_once_with("node1")
         mock_iul.assert_called_once_with("volume_uuid_1")
         self.app.client_manager.volume.volumes.get.assert_called_once_with(
             "volume_uuid_1"
         )
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(
-            node="node1", detail=True
+        self.baremetal_client.ports.assert_called_once_with(
+            node="node1", fields=["internal_info"]
         )
-        self.app.client_manager.baremetal.node.update.assert_called_once()
-        self.app.client_manager.baremetal.volume_connector.list.assert_called_once_with(
-            node="node1"
+        self.baremetal_client.patch_node.assert_called_once()
+        self.baremetal_client.volume_connectors.assert_called_once_with(
+            node="node1", fields=["uuid"]
         )
-        self.app.client_manager.baremetal.volume_connector.create.assert_called_once()
-        self.app.client_manager.baremetal.volume_target.list.assert_called_once_with(
+        self.baremetal_client.create_volume_connector.assert_called_once()
+        self.baremetal_client.volume_targets.assert_called_once_with(
             node="node1", fields=["volume_id"]
         )
-        self.app.client_manager.baremetal.volume_target.create.assert_called_once()
+        self.baremetal_client.create_volume_target.assert_called_once()
         self.app.client_manager.network.create_port.assert_called_once_with(
             name="esi-node1-test_network-volume",
             network_id=self.network.id,
             device_owner="baremetal:none",
         )
-        self.app.client_manager.baremetal.node.vif_attach.assert_called_once_with(
-            "node1", self.neutron_port.id
+        self.baremetal_client.attach_vif_to_node.assert_called_once_with(
+            "node1", self.neutron_port.id, retry_on_conflict=False
         )
-        self.app.client_manager.baremetal.node.set_provision_state.assert_called_once_with(
+        self.baremetal_client.set_node_provision_state.assert_called_once_with(
             "node1", "active"
         )
 
@@ -228,11 +227,11 @@ class TestAttach(base.TestCommand):
 
     @mock.patch("oslo_utils.uuidutils.is_uuid_like", return_value=False, autospec=True)
     def test_take_action_port(self, mock_iul):
-        self.app.client_manager.baremetal.node.get.return_value = self.node
-        self.app.client_manager.baremetal.node.update.return_value = self.node
-        self.app.client_manager.baremetal.volume_connector.list.return_value = []
-        self.app.client_manager.baremetal.volume_target.list.return_value = []
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.get_node.return_value = self.node
+        self.baremetal_client.patch_node.return_value = self.node
+        self.baremetal_client.volume_connectors.return_value = []
+        self.baremetal_client.volume_targets.return_value = []
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
@@ -249,34 +248,34 @@ class TestAttach(base.TestCommand):
         self.app.client_manager.network.find_port.assert_called_once_with(
             "neutron_port_uuid"
         )
-        self.app.client_manager.baremetal.node.get.assert_called_once_with("node1")
+        self.baremetal_client.get_node.assert_called_once_with("node1")
         mock_iul.assert_called_once_with("volume_uuid_1")
         self.app.client_manager.volume.volumes.find.assert_called_once_with(
             name="volume_uuid_1"
         )
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(
-            node="node1", detail=True
+        self.baremetal_client.ports.assert_called_once_with(
+            node="node1", fields=["internal_info"]
         )
-        self.app.client_manager.baremetal.node.update.assert_called_once()
-        self.app.client_manager.baremetal.volume_connector.list.assert_called_once_with(
-            node="node1"
+        self.baremetal_client.patch_node.assert_called_once()
+        self.baremetal_client.volume_connectors.assert_called_once_with(
+            node="node1", fields=["uuid"]
         )
-        self.app.client_manager.baremetal.volume_connector.create.assert_called_once()
-        self.app.client_manager.baremetal.volume_target.list.assert_called_once_with(
+        self.baremetal_client.create_volume_connector.assert_called_once()
+        self.baremetal_client.volume_targets.assert_called_once_with(
             node="node1", fields=["volume_id"]
         )
-        self.app.client_manager.baremetal.volume_target.create.assert_called_once()
+        self.baremetal_client.create_volume_target.assert_called_once()
         self.app.client_manager.network.create_port.assert_not_called()
-        self.app.client_manager.baremetal.node.vif_attach.assert_called_once_with(
-            "node1", self.neutron_port.id
+        self.baremetal_client.attach_vif_to_node.assert_called_once_with(
+            "node1", self.neutron_port.id, retry_on_conflict=False
         )
-        self.app.client_manager.baremetal.node.set_provision_state.assert_called_once_with(
+        self.baremetal_client.set_node_provision_state.assert_called_once_with(
             "node1", "active"
         )
 
     @mock.patch("oslo_utils.uuidutils.is_uuid_like", return_value=False, autospec=True)
     def test_take_action_node_active(self, mock_iul):
-        self.app.client_manager.baremetal.node.get.return_value = self.node_active
+        self.baremetal_client.get_node.return_value = self.node_active
 
         arglist = ["node1", "volume_uuid_1", "--network", "test_network"]
         verifylist = []
@@ -292,7 +291,7 @@ class TestAttach(base.TestCommand):
         self.app.client_manager.network.find_network.assert_called_once_with(
             "test_network"
         )
-        self.app.client_manager.baremetal.node.get.assert_called_once_with("node1")
+        self.baremetal_client.get_node.assert_called_once_with("node1")
         mock_iul.assert_called_once_with("volume_uuid_1")
         self.app.client_manager.volume.volumes.find.assert_called_once_with(
             name="volume_uuid_1"
@@ -300,7 +299,7 @@ class TestAttach(base.TestCommand):
 
     @mock.patch("oslo_utils.uuidutils.is_uuid_like", return_value=False, autospec=True)
     def test_take_action_volume_in_use(self, mock_iul):
-        self.app.client_manager.baremetal.node.get.return_value = self.node
+        self.baremetal_client.get_node.return_value = self.node
         self.app.client_manager.volume.volumes.find.return_value = self.volume_in_use
 
         arglist = ["node1", "volume_uuid_1", "--network", "test_network"]
@@ -317,7 +316,7 @@ class TestAttach(base.TestCommand):
         self.app.client_manager.network.find_network.assert_called_once_with(
             "test_network"
         )
-        self.app.client_manager.baremetal.node.get.assert_called_once_with("node1")
+        self.baremetal_client.get_node.assert_called_once_with("node1")
         mock_iul.assert_called_once_with("volume_uuid_1")
         self.app.client_manager.volume.volumes.find.assert_called_once_with(
             name="volume_uuid_1"
@@ -325,9 +324,9 @@ class TestAttach(base.TestCommand):
 
     @mock.patch("oslo_utils.uuidutils.is_uuid_like", return_value=False, autospec=True)
     def test_take_action_no_baremetal_ports(self, mock_iul):
-        self.app.client_manager.baremetal.node.get.return_value = self.node
+        self.baremetal_client.get_node.return_value = self.node
         self.app.client_manager.volume.volumes.find.return_value = self.volume
-        self.app.client_manager.baremetal.port.list.return_value = [self.port1]
+        self.baremetal_client.ports.return_value = [self.port1]
 
         arglist = ["node1", "volume_uuid_1", "--network", "test_network"]
         verifylist = []
@@ -343,24 +342,22 @@ class TestAttach(base.TestCommand):
         self.app.client_manager.network.find_network.assert_called_once_with(
             "test_network"
         )
-        self.app.client_manager.baremetal.node.get.assert_called_once_with("node1")
+        self.baremetal_client.get_node.assert_called_once_with("node1")
         mock_iul.assert_called_once_with("volume_uuid_1")
         self.app.client_manager.volume.volumes.find.assert_called_once_with(
             name="volume_uuid_1"
         )
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(
-            node="node1", detail=True
+        self.baremetal_client.ports.assert_called_once_with(
+            node="node1", fields=["internal_info"]
         )
 
     @mock.patch("oslo_utils.uuidutils.is_uuid_like", return_value=False, autospec=True)
     def test_take_action_volume_connector_exists(self, mock_iul):
-        self.app.client_manager.baremetal.node.get.return_value = self.node
-        self.app.client_manager.baremetal.node.update.return_value = self.node
-        self.app.client_manager.baremetal.volume_connector.list.return_value = [
-            self.volume_connector
-        ]
-        self.app.client_manager.baremetal.volume_target.list.return_value = []
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.get_node.return_value = self.node
+        self.baremetal_client.patch_node.return_value = self.node
+        self.baremetal_client.volume_connectors.return_value = [self.volume_connector]
+        self.baremetal_client.volume_targets.return_value = []
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
@@ -377,45 +374,43 @@ class TestAttach(base.TestCommand):
         self.app.client_manager.network.find_network.assert_called_once_with(
             "test_network"
         )
-        self.app.client_manager.baremetal.node.get.assert_called_once_with("node1")
+        self.baremetal_client.get_node.assert_called_once_with("node1")
         mock_iul.assert_called_once_with("volume_uuid_1")
         self.app.client_manager.volume.volumes.find.assert_called_once_with(
             name="volume_uuid_1"
         )
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(
-            node="node1", detail=True
+        self.baremetal_client.ports.assert_called_once_with(
+            node="node1", fields=["internal_info"]
         )
-        self.app.client_manager.baremetal.node.update.assert_called_once()
-        self.app.client_manager.baremetal.volume_connector.list.assert_called_once_with(
-            node="node1"
+        self.baremetal_client.patch_node.assert_called_once()
+        self.baremetal_client.volume_connectors.assert_called_once_with(
+            node="node1", fields=["uuid"]
         )
-        self.app.client_manager.baremetal.volume_connector.delete.assert_called_once()
-        self.app.client_manager.baremetal.volume_connector.create.assert_called_once()
-        self.app.client_manager.baremetal.volume_target.list.assert_called_once_with(
+        self.baremetal_client.delete_volume_connector.assert_called_once()
+        self.baremetal_client.create_volume_connector.assert_called_once()
+        self.baremetal_client.volume_targets.assert_called_once_with(
             node="node1", fields=["volume_id"]
         )
-        self.app.client_manager.baremetal.volume_target.create.assert_called_once()
+        self.baremetal_client.create_volume_target.assert_called_once()
         self.app.client_manager.network.create_port.assert_called_once_with(
             name="esi-node1-test_network-volume",
             network_id=self.network.id,
             device_owner="baremetal:none",
         )
-        self.app.client_manager.baremetal.node.vif_attach.assert_called_once_with(
-            "node1", self.neutron_port.id
+        self.baremetal_client.attach_vif_to_node.assert_called_once_with(
+            "node1", self.neutron_port.id, retry_on_conflict=False
         )
-        self.app.client_manager.baremetal.node.set_provision_state.assert_called_once_with(
+        self.baremetal_client.set_node_provision_state.assert_called_once_with(
             "node1", "active"
         )
 
     @mock.patch("oslo_utils.uuidutils.is_uuid_like", return_value=False, autospec=True)
     def test_take_action_volume_target_exists(self, mock_iul):
-        self.app.client_manager.baremetal.node.get.return_value = self.node
-        self.app.client_manager.baremetal.node.update.return_value = self.node
-        self.app.client_manager.baremetal.volume_connector.list.return_value = []
-        self.app.client_manager.baremetal.volume_target.list.return_value = [
-            self.volume_target
-        ]
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.get_node.return_value = self.node
+        self.baremetal_client.patch_node.return_value = self.node
+        self.baremetal_client.volume_connectors.return_value = []
+        self.baremetal_client.volume_targets.return_value = [self.volume_target]
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
@@ -432,31 +427,380 @@ class TestAttach(base.TestCommand):
         self.app.client_manager.network.find_network.assert_called_once_with(
             "test_network"
         )
-        self.app.client_manager.baremetal.node.get.assert_called_once_with("node1")
+        self.baremetal_client.get_node.assert_called_once_with("node1")
         mock_iul.assert_called_once_with("volume_uuid_1")
         self.app.client_manager.volume.volumes.find.assert_called_once_with(
             name="volume_uuid_1"
         )
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(
-            node="node1", detail=True
+        self.baremetal_client.ports.assert_called_once_with(
+            node="node1", fields=["internal_info"]
         )
-        self.app.client_manager.baremetal.node.update.assert_called_once()
-        self.app.client_manager.baremetal.volume_connector.list.assert_called_once_with(
-            node="node1"
+        self.baremetal_client.patch_node.assert_called_once()
+        self.baremetal_client.volume_connectors.assert_called_once_with(
+            node="node1", fields=["uuid"]
         )
-        self.app.client_manager.baremetal.volume_connector.create.assert_called_once()
-        self.app.client_manager.baremetal.volume_target.list.assert_called_once_with(
+        self.baremetal_client.create_volume_connector.assert_called_once()
+        self.baremetal_client.volume_targets.assert_called_once_with(
             node="node1", fields=["volume_id"]
         )
-        self.app.client_manager.baremetal.volume_target.create.assert_not_called()
+        self.baremetal_client.create_volume_target.assert_not_called()
         self.app.client_manager.network.create_port.assert_called_once_with(
             name="esi-node1-test_network-volume",
             network_id=self.network.id,
             device_owner="baremetal:none",
         )
-        self.app.client_manager.baremetal.node.vif_attach.assert_called_once_with(
-            "node1", self.neutron_port.id
+        self.baremetal_client.attach_vif_to_node.assert_called_once_with(
+            "node1", self.neutron_port.id, retry_on_conflict=False
         )
-        self.app.client_manager.baremetal.node.set_provision_state.assert_called_once_with(
+        self.baremetal_client.set_node_provision_state.assert_called_once_with(
             "node1", "active"
         )
+
+    @mock.patch("oslo_utils.uuidutils.is_uuid_like", return_value=False, autospec=True)
+    def test_take_action_multiple_volume_connectors(self, mock_iul):
+        volume_connectors = [
+            utils.create_mock_object({"id": "vc_uuid_%s" % i}) for i in range(5)
+        ]
+        self.baremetal_client.get_node.return_value = self.node
+        self.baremetal_client.volume_connectors.return_value = volume_connectors
+        self.baremetal_client.volume_targets.return_value = []
+        self.baremetal_client.ports.return_value = [self.port2]
+        self.app.client_manager.volume.volumes.find.return_value = self.volume
+
+        arglist = ["node1", "volume_uuid_1", "--network", "test_network"]
+        verifylist = []
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+
+        results = self.cmd.take_action(parsed_args)
+        expected = (["Node", "Volume"], ["node1", "volume1"])
+        self.assertEqual(expected, results)
+        self.baremetal_client.delete_volume_connector.assert_has_calls(
+            [mock.call("vc_uuid_%s" % i, ignore_missing=False) for i in range(5)],
+            any_order=True,
+        )
+        self.assertEqual(
+            5,
+            self.baremetal_client.delete_volume_connector.call_count,
+        )
+        self.baremetal_client.patch_node.assert_called_once_with(
+            "node1",
+            [
+                {
+                    "path": "/instance_info/storage_interface",
+                    "value": "cinder",
+                    "op": "add",
+                },
+                {
+                    "path": "/instance_info/capabilities",
+                    "value": '{"iscsi_boot": "True"}',
+                    "op": "add",
+                },
+            ],
+            retry_on_conflict=False,
+        )
+
+    @mock.patch("oslo_utils.uuidutils.is_uuid_like", return_value=False, autospec=True)
+    def test_take_action_volume_connector_delete_fails(self, mock_iul):
+        self.baremetal_client.get_node.return_value = self.node
+        self.baremetal_client.volume_connectors.return_value = [self.volume_connector]
+        self.baremetal_client.delete_volume_connector.side_effect = Exception(
+            "connector in use"
+        )
+        self.baremetal_client.volume_targets.return_value = []
+        self.baremetal_client.ports.return_value = [self.port2]
+        self.app.client_manager.volume.volumes.find.return_value = self.volume
+
+        arglist = ["node1", "volume_uuid_1", "--network", "test_network"]
+        verifylist = []
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+
+        self.assertRaisesRegex(
+            exceptions.CommandError,
+            "ERROR: 1 of 1 failed while deleting volume connectors: connector in use",
+            self.cmd.take_action,
+            parsed_args,
+        )
+        self.baremetal_client.create_volume_connector.assert_not_called()
+
+
+class TestBatchAttach(base.TestCommand):
+    def setUp(self):
+        super(TestBatchAttach, self).setUp()
+        self.cmd = node_volume.BatchAttach(self.app, None)
+
+        self.nodes = [
+            utils.create_mock_object(
+                {
+                    "id": "node_uuid_%s" % i,
+                    "name": "node%s" % i,
+                    "provision_state": "available",
+                    "resource_class": "diskless",
+                }
+            )
+            for i in range(1, 4)
+        ]
+        self.nodes[2].provision_state = "active"
+        self.volumes = [
+            utils.create_mock_object(
+                {
+                    "id": "volume_uuid_%s" % i,
+                    "name": "boot-%s" % i,
+                    "status": "available",
+                }
+            )
+            for i in range(1, 4)
+        ]
+        self.volumes[2].status = "in-use"
+        self.baremetal_ports = [
+            utils.create_mock_object(
+                {
+                    "id": "port_uuid_%s" % i,
+                    "node_id": "node_uuid_%s" % i,
+                    "internal_info": {},
+                }
+            )
+            for i in range(1, 4)
+        ]
+        self.volume_connector = utils.create_mock_object(
+            {"id": "vc_uuid", "node_id": "node_uuid_1"}
+        )
+        self.volume_target = utils.create_mock_object(
+            {
+                "id": "vt_uuid",
+                "node_id": "node_uuid_2",
+                "volume_id": "volume_uuid_2",
+            }
+        )
+        self.network = utils.create_mock_object(
+            {"id": "network_uuid", "name": "storage"}
+        )
+        self.neutron_port = utils.create_mock_object(
+            {"id": "neutron_port_uuid", "name": "esi-node-storage-volume"}
+        )
+
+        self.baremetal_client.nodes.return_value = self.nodes
+        self.baremetal_client.ports.return_value = self.baremetal_ports
+        self.baremetal_client.volume_connectors.return_value = [self.volume_connector]
+        self.baremetal_client.volume_targets.return_value = [self.volume_target]
+        self.app.client_manager.volume.volumes.list.return_value = self.volumes
+        self.app.client_manager.network.find_network.return_value = self.network
+        self.app.client_manager.network.ports.return_value = [self.neutron_port]
+
+    def test_take_action_pairs(self):
+        arglist = [
+            "node1:boot-1",
+            "node_uuid_2:volume_uuid_2",
+            "node3:boot-3",
+            "--network",
+            "storage",
+        ]
+        verifylist = [
+            (
+                "pairs",
+                [
+                    ("node1", "boot-1"),
+                    ("node_uuid_2", "volume_uuid_2"),
+                    ("node3", "boot-3"),
+                ],
+            )
+        ]
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+        columns, data = self.cmd.take_action(parsed_args)
+
+        self.assertEqual(
+            ["Node", "Volume", "Port", "Provision State", "Error", "Time (s)"],
+            columns,
+        )
+        self.assertEqual(
+            [
+                ["node1", "boot-1", "esi-node-storage-volume", "deploying", None],
+                ["node2", "boot-2", "esi-node-storage-volume", "deploying", None],
+                [
+                    "node3",
+                    "boot-3",
+                    None,
+                    None,
+                    "ERROR: Node node3 must be in the available state",
+                ],
+            ],
+            [row[:5] for row in data],
+        )
+        self.assertEqual(1, self.cmd.failed)
+
+        # everything is validated from bulk listings
+        self.baremetal_client.nodes.assert_called_once()
+        self.baremetal_client.get_node.assert_not_called()
+        self.app.client_manager.volume.volumes.get.assert_not_called()
+        self.app.client_manager.volume.volumes.find.assert_not_called()
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["node_uuid", "internal_info"]
+        )
+
+        self.baremetal_client.delete_volume_connector.assert_called_once_with(
+            "vc_uuid", ignore_missing=False
+        )
+        self.assertEqual(
+            2,
+            self.baremetal_client.create_volume_connector.call_count,
+        )
+        self.baremetal_client.create_volume_target.assert_called_once_with(
+            node_id="node_uuid_1",
+            volume_id="volume_uuid_1",
+            volume_type="iscsi",
+            boot_index=0,
+        )
+        self.baremetal_client.set_node_provision_state.assert_has_calls(
+            [
+                mock.call("node_uuid_1", "active"),
+                mock.call("node_uuid_2", "active"),
+            ],
+            any_order=True,
+        )
+
+    def test_take_action_resource_class(self):
+        self.nodes[2].provision_state = "available"
+        self.nodes.append(
+            utils.create_mock_object(
+                {
+                    "id": "node_uuid_4",
+                    "name": "node4",
+                    "provision_state": "available",
+                    "resource_class": "other",
+                }
+            )
+        )
+        arglist = [
+            "--resource-class",
+            "diskless",
+            "--volume-pattern",
+            "boot-*",
+            "--network",
+            "storage",
+        ]
+
+        parsed_args = self.check_parser(self.cmd, arglist, [])
+        columns, data = self.cmd.take_action(parsed_args)
+
+        self.assertEqual(
+            [["node1", "boot-1"], ["node2", "boot-2"]],
+            [row[:2] for row in data],
+        )
+        self.assertEqual(0, self.cmd.failed)
+
+    def test_take_action_resource_class_not_enough_nodes(self):
+        self.volumes[2].status = "available"
+        arglist = [
+            "--resource-class",
+            "diskless",
+            "--volume-pattern",
+            "boot-*",
+            "--network",
+            "storage",
+        ]
+
+        parsed_args = self.check_parser(self.cmd, arglist, [])
+        self.assertRaisesRegex(
+            exceptions.CommandError,
+            "3 volumes match boot-\\* but only 2 nodes",
+            self.cmd.take_action,
+            parsed_args,
+        )
+        self.baremetal_client.patch_node.assert_not_called()
+
+    def test_take_action_unknown(self):
+        arglist = ["node1:boot-1", "node9:boot-9", "--network", "storage"]
+
+        parsed_args = self.check_parser(self.cmd, arglist, [])
+        self.assertRaisesRegex(
+            exceptions.CommandError,
+            "ERROR: Unknown nodes or volumes: node9, boot-9",
+            self.cmd.take_action,
+            parsed_args,
+        )
+        self.baremetal_client.patch_node.assert_not_called()
+
+    def test_take_action_duplicate(self):
+        arglist = [
+            "node1:boot-1",
+            "node_uuid_1:boot-2",
+            "node2:boot-2",
+            "--network",
+            "storage",
+        ]
+
+        parsed_args = self.check_parser(self.cmd, arglist, [])
+        self.assertRaisesRegex(
+            exceptions.CommandError,
+            "ERROR: Nodes or volumes in more than one pair: node_uuid_1, boot-2",
+            self.cmd.take_action,
+            parsed_args,
+        )
+        self.baremetal_client.patch_node.assert_not_called()
+
+    def test_take_action_pairs_and_resource_class(self):
+        arglist = [
+            "node1:boot-1",
+            "--resource-class",
+            "diskless",
+            "--network",
+            "storage",
+        ]
+
+        parsed_args = self.check_parser(self.cmd, arglist, [])
+        self.assertRaisesRegex(
+            exceptions.CommandError,
+            "ERROR: Specify either node:volume pairs",
+            self.cmd.take_action,
+            parsed_args,
+        )
+
+    @mock.patch("time.sleep")
+    def test_take_action_wait(self, mock_sleep):
+        deploying = [
+            utils.create_mock_object(
+                {"id": "node_uuid_1", "provision_state": "wait call-back"}
+            ),
+            utils.create_mock_object(
+                {"id": "node_uuid_2", "provision_state": "deploying"}
+            ),
+        ]
+        done = [
+            utils.create_mock_object(
+                {"id": "node_uuid_1", "provision_state": "active"}
+            ),
+            utils.create_mock_object(
+                {
+                    "id": "node_uuid_2",
+                    "provision_state": "deploy failed",
+                    "last_error": "iscsi target unreachable",
+                }
+            ),
+        ]
+        self.baremetal_client.nodes.side_effect = [
+            self.nodes,
+            deploying,
+            done,
+        ]
+        arglist = [
+            "node1:boot-1",
+            "node2:boot-2",
+            "--network",
+            "storage",
+            "--wait",
+        ]
+
+        parsed_args = self.check_parser(self.cmd, arglist, [("wait", True)])
+        columns, data = self.cmd.take_action(parsed_args)
+
+        self.assertEqual(
+            [
+                ["node1", "active", None],
+                ["node2", "deploy failed", "iscsi target unreachable"],
+            ],
+            [[row[0], row[3], row[4]] for row in data],
+        )
+        self.assertEqual(1, self.cmd.failed)
+        mock_sleep.assert_called_once_with(node_volume.WAIT_INTERVAL)
@@ -1,8 +1,15 @@
 import argparse
 import testtools
 import ipaddress
+import json
+import tempfile
+import types
 from unittest import mock
 
+from openstack import exceptions as sdk_exceptions
+from osc_lib import exceptions
+
+from esiclient.v1.port_forwarding import PortRange
 from esiclient.v1.port_forwarding import PortSpec
 from esiclient.v1.port_forwarding import Protocol
 from esiclient.v1.port_forwarding import AddressOrPortArg
@@ -11,7 +18,13 @@ from esiclient.v1.port_forwarding import NetworkArg
 from esiclient.v1.port_forwarding import SubnetArg
 from esiclient.v1.port_forwarding import NetworkOpsMixin
 from esiclient.v1.port_forwarding import Create
+from esiclient.v1.port_forwarding import BatchCreate
+from esiclient.v1.port_forwarding import NetworkIndex
+from esiclient.v1.port_forwarding import SubnetTable
+from esiclient.v1.port_forwarding import index_port_forwardings
+from esiclient.v1.port_forwarding import port_forwarding_exists
 from esiclient.v1.port_forwarding import Delete
+from esiclient.v1.port_forwarding import List
 from esiclient.v1.port_forwarding import Purge
 
 
@@ -19,7 +32,7 @@ class PortForwardTestCase(testtools.TestCase):
     def setUp(self):
         super().setUp()
         self.connection = mock.Mock(name="connection")
-        self.cli = mock.Mock(name="cli")
+        self.cli = mock.Mock(name="cli", _resolver=None)
         self.cli.app.client_manager.sdk_connection = self.connection
 
         self.port_1 = mock.Mock(name="port_1", id="port_1")
@@ -317,14 +330,44 @@ class TestDelete(PortForwardTestCase):
             [["port_forwarding_1", 22, 22, "tcp", "10.10.10.10", "111.111.111.111"]],
         )
 
+    def test_delete_multiple_ports(self):
+        forward_2 = mock.Mock(
+            id="port_forwarding_2",
+            internal_port=80,
+            external_port=8080,
+            protocol="tcp",
+            internal_ip_address="10.10.10.10",
+        )
+        self.connection.network.find_ip.return_value = self.floating_ip_1
+        self.connection.network.ports.return_value = [self.port_1]
+        self.connection.network.floating_ip_port_forwardings.return_value = iter(
+            [self.forward_1, forward_2]
+        )
+        parser = self.cmd.get_parser("test")
+        args = parser.parse_args(
+            ["-p", "22", "-p", "8080:80", "-p", "443", "10.10.10.10", "111.111.111.111"]
+        )
+        columns, rows = self.cmd.take_action(args)
+        assert [row[0] for row in rows] == ["port_forwarding_1", "port_forwarding_2"]
+        self.connection.network.floating_ip_port_forwardings.assert_called_once_with(
+            self.floating_ip_1
+        )
+        self.connection.network.delete_floating_ip_port_forwarding.assert_has_calls(
+            [
+                mock.call(self.floating_ip_1, self.forward_1),
+                mock.call(self.floating_ip_1, forward_2),
+            ]
+        )
+
 
 class TestPurge(PortForwardTestCase):
     def setUp(self):
         super().setUp()
         self.cmd = Purge(self.cli.app, None)
+        self.floating_ip_1.configure_mock(port_id=None, port_forwardings=None)
 
     def test_create_take_action(self):
-        self.connection.network.find_ip.return_value = self.floating_ip_1
+        self.connection.network.ips.return_value = [self.floating_ip_1]
         self.connection.network.ports.return_value = [self.port_1]
         self.connection.network.floating_ip_port_forwardings.return_value = [
             self.forward_1
@@ -343,3 +386,679 @@ class TestPurge(PortForwardTestCase):
             ],
             [["port_forwarding_1", 22, 22, "tcp", "10.10.10.10", "111.111.111.111"]],
         )
+
+        self.connection.network.ips.assert_called_once_with(
+            floating_ip_address=["111.111.111.111"]
+        )
+        self.connection.network.delete_floating_ip_port_forwarding.assert_called_once_with(
+            self.floating_ip_1, self.forward_1
+        )
+
+    def test_purge_all(self):
+        floating_ip_2 = mock.Mock(
+            id="floating_ip_2",
+            floating_ip_address="122.122.122.122",
+            port_id="port_2",
+            port_forwardings=None,
+        )
+        self.connection.current_project_id = "project_1"
+        self.connection.network.find_network.return_value = mock.Mock(id="network_1")
+        self.connection.network.ips.return_value = [self.floating_ip_1, floating_ip_2]
+        self.connection.network.floating_ip_port_forwardings.return_value = [
+            self.forward_1
+        ]
+        parser = self.cmd.get_parser("test")
+        args = parser.parse_args(["--all", "--network", "external"])
+        columns, rows = self.cmd.take_action(args)
+
+        assert [row[0] for row in rows] == ["port_forwarding_1"]
+        self.connection.network.ips.assert_called_once_with(
+            project_id="project_1", floating_network_id="network_1"
+        )
+        self.connection.network.floating_ip_port_forwardings.assert_called_once_with(
+            self.floating_ip_1
+        )
+
+    def test_purge_missing_floating_ip(self):
+        floating_ip_2 = mock.Mock(floating_ip_address="122.122.122.122")
+        self.connection.network.ips.return_value = [self.floating_ip_1, floating_ip_2]
+        parser = self.cmd.get_parser("test")
+        args = parser.parse_args(["111.111.111.111", "133.133.133.133"])
+        self.assertRaises(exceptions.CommandError, self.cmd.take_action, args)
+        self.connection.network.delete_floating_ip_port_forwarding.assert_not_called()
+
+    def test_purge_nothing_specified(self):
+        parser = self.cmd.get_parser("test")
+        args = parser.parse_args([])
+        self.assertRaises(exceptions.CommandError, self.cmd.take_action, args)
+        self.connection.network.ips.assert_not_called()
+
+
+class TestNetworkIndex(PortForwardTestCase):
+    def setUp(self):
+        super().setUp()
+        self.port_1.configure_mock(
+            name="myport", fixed_ips=[{"ip_address": "10.10.10.10"}]
+        )
+        self.port_2 = mock.Mock(id="port_2", fixed_ips=[{"ip_address": "10.10.10.11"}])
+        self.port_2.name = "myport"
+        self.network_1 = mock.Mock(id="network_1")
+        self.network_1.name = "external"
+        self.connection.network.ports.return_value = [self.port_1, self.port_2]
+        self.connection.network.ips.return_value = [self.floating_ip_1]
+        self.connection.network.networks.return_value = [self.network_1]
+        self.index = NetworkIndex(self.connection)
+
+    def test_find_port(self):
+        assert self.index.find_port("port_2") == self.port_2
+        assert self.index.find_port(ipaddress.ip_address("10.10.10.11")) == self.port_2
+        self.assertRaises(ValueError, self.index.find_port, "myport")
+        self.assertRaises(KeyError, self.index.find_port, "missing")
+        self.assertRaises(
+            KeyError, self.index.find_port, ipaddress.ip_address("10.10.10.12")
+        )
+
+    def test_find_floating_ip(self):
+        assert (
+            self.index.find_floating_ip(ipaddress.ip_address("111.111.111.111"))
+            == self.floating_ip_1
+        )
+        self.assertRaises(
+            KeyError,
+            self.index.find_floating_ip,
+            ipaddress.ip_address("111.111.111.112"),
+        )
+
+    def test_find_network(self):
+        assert self.index.find_network("external") == self.network_1
+        assert self.index.find_network("network_1") == self.network_1
+        self.assertRaises(KeyError, self.index.find_network, "missing")
+
+
+class TestBatchCreate(PortForwardTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cmd = BatchCreate(self.cli.app, None)
+
+        self.port_1.configure_mock(fixed_ips=[{"ip_address": "10.10.10.10"}])
+        self.port_1.name = "port1"
+        self.port_2 = mock.Mock(id="port_2", fixed_ips=[{"ip_address": "10.10.10.11"}])
+        self.port_2.name = "port2"
+        self.network_1 = mock.Mock(id="network_1")
+        self.network_1.name = "external"
+        self.floating_ip_1.port_forwardings = [
+            {
+                "internal_ip_address": "10.10.10.10",
+                "internal_port": 22,
+                "external_port": 22,
+                "protocol": "tcp",
+            }
+        ]
+        self.floating_ip_2 = mock.Mock(
+            id="floating_ip_2",
+            floating_ip_address="222.222.222.222",
+            port_forwardings=[],
+        )
+        self.connection.network.ports.return_value = [self.port_1, self.port_2]
+        self.connection.network.ips.return_value = [self.floating_ip_1]
+        self.connection.network.networks.return_value = [self.network_1]
+        self.connection.network.create_ip.return_value = self.floating_ip_2
+
+        def create_forward(fip, **attrs):
+            return mock.Mock(id=f"{fip.id}-{attrs['external_port']}", **attrs)
+
+        self.connection.network.create_floating_ip_port_forwarding.side_effect = (
+            create_forward
+        )
+
+        self.manifest = tempfile.NamedTemporaryFile("w", suffix=".json")
+        self.addCleanup(self.manifest.close)
+
+    def write_manifest(self, manifest):
+        json.dump(manifest, self.manifest)
+        self.manifest.flush()
+
+    def test_take_action(self):
+        self.write_manifest(
+            [
+                {
+                    "internal": "10.10.10.10",
+                    "external": "111.111.111.111",
+                    "ports": ["22", "8080:80", 22],
+                },
+                {
+                    "internal": "port2",
+                    "external": "external",
+                    "ports": ["2222:22"],
+                    "description": "ssh",
+                },
+                {"internal": "missing", "external": "111.111.111.111", "ports": [22]},
+            ]
+        )
+        parser = self.cmd.get_parser("test")
+        args = parser.parse_args(["-d", "batch", self.manifest.name])
+        columns, rows = self.cmd.take_action(args)
+
+        assert columns == [
+            "ID",
+            "Internal Port",
+            "External Port",
+            "Protocol",
+            "Internal IP",
+            "External IP",
+            "Error",
+        ]
+        assert sorted(rows, key=str) == sorted(
+            [
+                ["exists", 22, 22, "tcp", "10.10.10.10", "111.111.111.111", None],
+                [
+                    "floating_ip_1-8080",
+                    80,
+                    8080,
+                    Protocol.TCP,
+                    "10.10.10.10",
+                    "111.111.111.111",
+                    None,
+                ],
+                [
+                    "floating_ip_2-2222",
+                    22,
+                    2222,
+                    Protocol.TCP,
+                    "10.10.10.11",
+                    "222.222.222.222",
+                    None,
+                ],
+                [
+                    None,
+                    22,
+                    22,
+                    Protocol.TCP,
+                    "missing",
+                    "111.111.111.111",
+                    "'no port with name or id missing'",
+                ],
+            ],
+            key=str,
+        )
+        assert self.cmd.failed == 1
+
+        self.connection.network.create_ip.assert_called_once_with(
+            floating_network_id="network_1"
+        )
+        self.connection.network.create_floating_ip_port_forwarding.assert_has_calls(
+            [
+                mock.call(
+                    self.floating_ip_1,
+                    internal_ip_address="10.10.10.10",
+                    internal_port=80,
+                    internal_port_id="port_1",
+                    external_port=8080,
+                    protocol=Protocol.TCP,
+                    description="batch",
+                ),
+                mock.call(
+                    self.floating_ip_2,
+                    internal_ip_address="10.10.10.11",
+                    internal_port=22,
+                    internal_port_id="port_2",
+                    external_port=2222,
+                    protocol=Protocol.TCP,
+                    description="ssh",
+                ),
+            ],
+            any_order=True,
+        )
+        assert (
+            self.connection.network.create_floating_ip_port_forwarding.call_count == 2
+        )
+        self.connection.network.find_port.assert_not_called()
+        self.connection.network.find_ip.assert_not_called()
+        self.connection.network.find_network.assert_not_called()
+
+    def test_take_action_conflict(self):
+        self.write_manifest(
+            [
+                {
+                    "internal": "10.10.10.10",
+                    "external": "111.111.111.111",
+                    "ports": ["8080:80"],
+                },
+                {"internal": "port2", "external": "111.111.111.111", "ports": ["8080"]},
+                {
+                    "internal": "port1",
+                    "external": "111.111.111.111",
+                    "ports": ["8080:80"],
+                },
+            ]
+        )
+        parser = self.cmd.get_parser("test")
+        args = parser.parse_args([self.manifest.name])
+        columns, rows = self.cmd.take_action(args)
+
+        assert sorted(rows, key=str) == sorted(
+            [
+                [
+                    "floating_ip_1-8080",
+                    80,
+                    8080,
+                    Protocol.TCP,
+                    "10.10.10.10",
+                    "111.111.111.111",
+                    None,
+                ],
+                [
+                    None,
+                    8080,
+                    8080,
+                    Protocol.TCP,
+                    "10.10.10.11",
+                    "111.111.111.111",
+                    "external port 8080/tcp is already forwarded to 10.10.10.10:80",
+                ],
+            ],
+            key=str,
+        )
+        assert self.cmd.failed == 1
+        self.connection.network.create_floating_ip_port_forwarding.assert_called_once_with(
+            self.floating_ip_1,
+            internal_ip_address="10.10.10.10",
+            internal_port=80,
+            internal_port_id="port_1",
+            external_port=8080,
+            protocol=Protocol.TCP,
+        )
+
+    def test_take_action_create_port_fails(self):
+        self.connection.network.ports.side_effect = lambda **query: (
+            [] if query else [self.port_1, self.port_2]
+        )
+        self.connection.network.find_subnet.return_value = mock.Mock(
+            id="subnet_1", network_id="network_2"
+        )
+        self.connection.network.create_port.side_effect = (
+            sdk_exceptions.BadRequestException("no addresses left", http_status=400)
+        )
+        self.write_manifest(
+            [
+                {
+                    "internal": "10.10.10.20",
+                    "external": "111.111.111.111",
+                    "ports": [22],
+                },
+                {"internal": "port2", "external": "111.111.111.111", "ports": [2222]},
+            ]
+        )
+        parser = self.cmd.get_parser("test")
+        args = parser.parse_args(
+            ["--internal-ip-subnet", "internal", self.manifest.name]
+        )
+        columns, rows = self.cmd.take_action(args)
+
+        assert sorted(rows, key=str) == sorted(
+            [
+                [
+                    None,
+                    22,
+                    22,
+                    Protocol.TCP,
+                    "10.10.10.20",
+                    "111.111.111.111",
+                    "no addresses left",
+                ],
+                [
+                    "floating_ip_1-2222",
+                    2222,
+                    2222,
+                    Protocol.TCP,
+                    "10.10.10.11",
+                    "111.111.111.111",
+                    None,
+                ],
+            ],
+            key=str,
+        )
+        assert self.cmd.failed == 1
+        self.connection.network.create_floating_ip_port_forwarding.assert_called_once_with(
+            self.floating_ip_1,
+            internal_ip_address="10.10.10.11",
+            internal_port=2222,
+            internal_port_id="port_2",
+            external_port=2222,
+            protocol=Protocol.TCP,
+        )
+
+    def test_take_action_invalid_manifest(self):
+        self.write_manifest([{"internal": "10.10.10.10", "ports": ["22"]}])
+        parser = self.cmd.get_parser("test")
+        args = parser.parse_args([self.manifest.name])
+        self.assertRaises(exceptions.CommandError, self.cmd.take_action, args)
+
+
+class TestPortForwardingExists(PortForwardTestCase):
+    def setUp(self):
+        super().setUp()
+        self.floating_ip_1.port_forwardings = [
+            {
+                "internal_ip_address": "10.10.10.10",
+                "internal_port": port,
+                "external_port": port,
+                "protocol": "tcp",
+            }
+            for port in range(1000, 3000)
+        ]
+
+    def test_index_port_forwardings(self):
+        index = index_port_forwardings(
+            [self.forward_1, self.floating_ip_1.port_forwardings[0]]
+        )
+        assert index == {
+            ("10.10.10.10", 22, 22, "tcp"): self.forward_1,
+            (
+                "10.10.10.10",
+                1000,
+                1000,
+                "tcp",
+            ): self.floating_ip_1.port_forwardings[0],
+        }
+
+    @mock.patch("openstack.network.v2.port_forwarding.PortForwarding")
+    def test_port_forwarding_exists(self, mock_port_forwarding):
+        index = index_port_forwardings(self.floating_ip_1.port_forwardings)
+        fwd = port_forwarding_exists(
+            self.floating_ip_1, "10.10.10.10", PortSpec.from_spec("2000"), index
+        )
+        assert fwd == mock_port_forwarding.return_value
+        mock_port_forwarding.assert_called_once_with(
+            id="exists",
+            internal_ip_address="10.10.10.10",
+            internal_port=2000,
+            external_port=2000,
+            protocol="tcp",
+        )
+
+    def test_port_forwarding_exists_missing(self):
+        for spec in ["2000/udp", "2000:22", "3000"]:
+            assert (
+                port_forwarding_exists(
+                    self.floating_ip_1, "10.10.10.10", PortSpec.from_spec(spec)
+                )
+                is None
+            )
+        assert (
+            port_forwarding_exists(
+                self.floating_ip_1, "10.10.10.11", PortSpec.from_spec("2000")
+            )
+            is None
+        )
+
+
+class TestPortRange(testtools.TestCase):
+    def test_port_range(self):
+        port_range = PortRange.from_spec("30000-30002:40000-40002/udp")
+        assert len(port_range) == 3
+        assert str(port_range) == "30000-30002:40000-40002/udp"
+        assert list(port_range) == [
+            PortSpec(internal_port=40000, external_port=30000, protocol=Protocol.UDP),
+            PortSpec(internal_port=40001, external_port=30001, protocol=Protocol.UDP),
+            PortSpec(internal_port=40002, external_port=30002, protocol=Protocol.UDP),
+        ]
+
+    def test_port_range_single_port(self):
+        assert list(PortRange.from_spec("2222:22")) == [
+            PortSpec(internal_port=22, external_port=2222, protocol=Protocol.TCP)
+        ]
+
+    def test_port_range_is_lazy(self):
+        port_range = PortRange.from_spec("0-65535")
+        assert len(port_range) == 65536
+        assert next(iter(port_range)) == PortSpec(internal_port=0, external_port=0)
+
+    def test_port_range_invalid(self):
+        for spec in ["30000-30999:30000-30001", "30001-30000", "0-70000", "1-"]:
+            self.assertRaises(ValueError, PortRange.from_spec, spec)
+
+
+class TestConcurrentForwards(PortForwardTestCase):
+    def test_create_port_range(self):
+        self.connection.network.find_ip.return_value = self.floating_ip_1
+        self.connection.network.ports.return_value = [self.port_1]
+        self.connection.network.create_floating_ip_port_forwarding.side_effect = (
+            lambda fip, **attrs: mock.Mock(id=f"fwd-{attrs['external_port']}", **attrs)
+        )
+        cmd = Create(self.cli.app, None)
+        parser = cmd.get_parser("test")
+        args = parser.parse_args(
+            [
+                "-p",
+                "30000-30002/udp",
+                "--concurrency",
+                "2",
+                "10.10.10.10",
+                "111.111.111.111",
+            ]
+        )
+        columns, rows = cmd.take_action(args)
+
+        assert [row[0] for row in rows] == ["fwd-30000", "fwd-30001", "fwd-30002"]
+        assert (
+            self.connection.network.create_floating_ip_port_forwarding.call_count == 3
+        )
+
+    def test_delete_partial_failure(self):
+        forwards = [
+            mock.Mock(
+                id=f"fwd-{port}",
+                internal_port=port,
+                external_port=port,
+                protocol="tcp",
+                internal_ip_address="10.10.10.10",
+            )
+            for port in range(1000, 1005)
+        ]
+
+        def delete(fip, fwd):
+            if fwd.id == "fwd-1002":
+                raise Exception("conflict")
+
+        self.connection.network.find_ip.return_value = self.floating_ip_1
+        self.connection.network.ports.return_value = [self.port_1]
+        self.connection.network.floating_ip_port_forwardings.return_value = forwards
+        self.connection.network.delete_floating_ip_port_forwarding.side_effect = delete
+        cmd = Delete(self.cli.app, None)
+        parser = cmd.get_parser("test")
+        args = parser.parse_args(["-p", "1000-1004", "10.10.10.10", "111.111.111.111"])
+        columns, rows = cmd.take_action(args)
+
+        assert [row[0] for row in rows] == [
+            "fwd-1000",
+            "fwd-1001",
+            "fwd-1003",
+            "fwd-1004",
+        ]
+        assert cmd.failed == 1
+        assert (
+            self.connection.network.delete_floating_ip_port_forwarding.call_count == 5
+        )
+
+    def test_invalid_concurrency(self):
+        cmd = Purge(self.cli.app, None)
+        parser = cmd.get_parser("test")
+        args = parser.parse_args(["--concurrency", "0", "111.111.111.111"])
+        self.assertRaises(exceptions.CommandError, cmd.run, args)
+
+
+class TestList(PortForwardTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cmd = List(self.cli.app, None)
+
+        self.floating_ip_1.configure_mock(port_id=None, port_forwardings=None)
+        self.floating_ip_2 = mock.Mock(
+            id="floating_ip_2",
+            floating_ip_address="222.222.222.222",
+            port_id=None,
+            port_forwardings=[],
+        )
+        self.floating_ip_3 = mock.Mock(
+            id="floating_ip_3",
+            floating_ip_address="133.133.133.133",
+            port_id="port_3",
+            port_forwardings=None,
+        )
+        self.floating_ip_4 = mock.Mock(
+            id="floating_ip_4",
+            floating_ip_address="144.144.144.144",
+            port_id=None,
+            port_forwardings=[{}],
+        )
+        self.forward_2 = mock.Mock(
+            id="port_forwarding_2",
+            internal_port=30001,
+            external_port=30001,
+            protocol="udp",
+            internal_ip_address="10.10.10.11",
+        )
+        self.connection.network.ips.return_value = [
+            self.floating_ip_1,
+            self.floating_ip_2,
+            self.floating_ip_3,
+            self.floating_ip_4,
+        ]
+        self.connection.network.floating_ip_port_forwardings.side_effect = (
+            lambda fip, **query: {
+                "floating_ip_1": [self.forward_1],
+                "floating_ip_4": [self.forward_2],
+            }[fip.id]
+        )
+
+    def test_list(self):
+        parser = self.cmd.get_parser("test")
+        args = parser.parse_args([])
+        columns, rows = self.cmd.take_action(args)
+
+        assert isinstance(rows, types.GeneratorType)
+        assert list(rows) == [
+            ["port_forwarding_1", 22, 22, "tcp", "10.10.10.10", "111.111.111.111"],
+            [
+                "port_forwarding_2",
+                30001,
+                30001,
+                "udp",
+                "10.10.10.11",
+                "144.144.144.144",
+            ],
+        ]
+        self.connection.network.ips.assert_called_once_with(
+            project_id=self.connection.current_project_id
+        )
+        self.connection.network.floating_ip_port_forwardings.assert_has_calls(
+            [mock.call(self.floating_ip_1), mock.call(self.floating_ip_4)],
+            any_order=True,
+        )
+        assert self.connection.network.floating_ip_port_forwardings.call_count == 2
+
+    def test_list_filters(self):
+        network = mock.Mock(id="network_1")
+        self.connection.network.find_network.return_value = network
+        parser = self.cmd.get_parser("test")
+        args = parser.parse_args(
+            [
+                "--network",
+                "external",
+                "--floating-ip",
+                "144.144.144.144",
+                "--internal-ip",
+                "10.10.10.11",
+                "-p",
+                "30000-30010/udp",
+            ]
+        )
+        columns, rows = self.cmd.take_action(args)
+
+        assert [row[0] for row in rows] == ["port_forwarding_2"]
+        self.connection.network.ips.assert_called_once_with(
+            project_id=self.connection.current_project_id,
+            floating_network_id="network_1",
+            floating_ip_address="144.144.144.144",
+        )
+
+    def test_list_server_side_filters(self):
+        self.connection.network.find_port.return_value = self.port_1
+        parser = self.cmd.get_parser("test")
+        args = parser.parse_args(["--internal-ip", "myport", "-p", "22"])
+        columns, rows = self.cmd.take_action(args)
+
+        assert [row[0] for row in rows] == ["port_forwarding_1"]
+        self.connection.network.floating_ip_port_forwardings.assert_any_call(
+            self.floating_ip_1,
+            internal_port_id="port_1",
+            external_port=22,
+            protocol="tcp",
+        )
+
+
+class TestSubnetTable(testtools.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.subnets = [
+            mock.Mock(id=f"subnet_{i}", cidr=f"10.{i // 256}.{i % 256}.0/24")
+            for i in range(500)
+        ]
+        self.subnets.append(mock.Mock(id="subnet_v6", cidr="fd00::/64"))
+        self.subnets.append(mock.Mock(id="subnet_wide", cidr="192.168.0.0/16"))
+        self.table = SubnetTable(reversed(self.subnets))
+
+    def test_find(self):
+        assert self.table.find(ipaddress.ip_address("10.1.3.7")).id == "subnet_259"
+        assert self.table.find(ipaddress.ip_address("10.0.0.0")).id == "subnet_0"
+        assert self.table.find(ipaddress.ip_address("10.1.243.255")).id == "subnet_499"
+        assert self.table.find(ipaddress.ip_address("fd00::5")).id == "subnet_v6"
+        assert self.table.find(ipaddress.ip_address("192.168.7.7")).id == "subnet_wide"
+
+    def test_find_missing(self):
+        for address in ["10.1.244.1", "9.255.255.255", "172.16.0.1", "fd01::1"]:
+            assert self.table.find(ipaddress.ip_address(address)) is None
+
+
+class TestResolver(PortForwardTestCase):
+    def test_arguments_share_lookups(self):
+        self.connection.network.find_network.return_value = "mynetwork"
+        assert NetworkArg(self.cli)("mynetwork") == "mynetwork"
+        assert AddressOrNetworkArg(self.cli)("mynetwork") == "mynetwork"
+        assert NetworkArg(self.cli)("mynetwork") == "mynetwork"
+        self.connection.network.find_network.assert_called_once_with("mynetwork")
+
+    def test_find_or_create_port_memoized(self):
+        netops = NetworkOpsMixin()
+        netops.app = mock.Mock()
+        netops.app.client_manager.sdk_connection = self.connection
+        network = mock.Mock(id="network_1")
+        self.connection.network.ports.return_value = []
+        self.connection.network.subnets.return_value = [
+            mock.Mock(id=f"subnet_{i}", cidr=f"10.10.{i}.0/24") for i in range(100)
+        ]
+        self.connection.network.create_port.return_value = self.port_1
+
+        for address in ["10.10.10.10", "10.10.10.10", "10.10.20.10"]:
+            netops.find_or_create_port(
+                ipaddress.ip_address(address), internal_ip_network=network
+            )
+
+        assert self.connection.network.ports.call_count == 2
+        self.connection.network.subnets.assert_called_once_with(network_id="network_1")
+        self.connection.network.create_port.assert_has_calls(
+            [
+                mock.call(
+                    name="esi-autocreated-10.10.10.10",
+                    network_id="network_1",
+                    fixed_ips=[{"subnet_id": "subnet_10", "ip_address": "10.10.10.10"}],
+                ),
+                mock.call(
+                    name="esi-autocreated-10.10.20.10",
+                    network_id="network_1",
+                    fixed_ips=[{"subnet_id": "subnet_20", "ip_address": "10.10.20.10"}],
+                ),
+            ]
+        )
+        assert self.connection.network.create_port.call_count == 2
@@ -12,6 +12,7 @@
 #
 
 import mock
+import types
 
 from osc_lib import exceptions
 
@@ -27,8 +28,8 @@ class TestListVLAN(base.TestCommand):
 
         self.port1 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_1",
-                "node_uuid": "11111111-2222-3333-4444-aaaaaaaaaaaa",
+                "id": "port_uuid_1",
+                "node_id": "11111111-2222-3333-4444-aaaaaaaaaaaa",
                 "local_link_connection": {
                     "switch_info": "switch1",
                     "port_id": "Ethernet1/1",
@@ -38,8 +39,8 @@ class TestListVLAN(base.TestCommand):
         )
         self.port2 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_2",
-                "node_uuid": "11111111-2222-3333-4444-bbbbbbbbbbbb",
+                "id": "port_uuid_2",
+                "node_id": "11111111-2222-3333-4444-bbbbbbbbbbbb",
                 "local_link_connection": {
                     "switch_info": "switch1",
                     "port_id": "Ethernet1/2",
@@ -49,8 +50,8 @@ class TestListVLAN(base.TestCommand):
         )
         self.port3 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_3",
-                "node_uuid": "11111111-2222-3333-4444-bbbbbbbbbbbb",
+                "id": "port_uuid_3",
+                "node_id": "11111111-2222-3333-4444-bbbbbbbbbbbb",
                 "local_link_connection": {
                     "switch_info": "switch1",
                     "port_id": "Ethernet1/3",
@@ -60,8 +61,8 @@ class TestListVLAN(base.TestCommand):
         )
         self.port4 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_4",
-                "node_uuid": "11111111-2222-3333-4444-bbbbbbbbbbbb",
+                "id": "port_uuid_4",
+                "node_id": "11111111-2222-3333-4444-bbbbbbbbbbbb",
                 "local_link_connection": {
                     "switch_info": "switch1",
                     "port_id": "Ethernet1/4",
@@ -71,8 +72,8 @@ class TestListVLAN(base.TestCommand):
         )
         self.port5 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_5",
-                "node_uuid": "11111111-2222-3333-4444-bbbbbbbbbbbb",
+                "id": "port_uuid_5",
+                "node_id": "11111111-2222-3333-4444-bbbbbbbbbbbb",
                 "local_link_connection": {
                     "switch_info": "switch2",
                     "port_id": "Ethernet1/5",
@@ -170,7 +171,7 @@ class TestListVLAN(base.TestCommand):
             self.neutron_port4,
             self.neutron_subport1,
         ]
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
             self.port3,
@@ -184,7 +185,9 @@ class TestListVLAN(base.TestCommand):
 
         parsed_args = self.check_parser(self.cmd, arglist, verifylist)
 
-        results = self.cmd.take_action(parsed_args)
+        columns, rows = self.cmd.take_action(parsed_args)
+        self.assertIsInstance(rows, types.GeneratorType)
+        results = (columns, list(rows))
         expected = (
             ["VLAN", "Ports"],
             [
@@ -195,7 +198,7 @@ class TestListVLAN(base.TestCommand):
             ],
         )
         self.assertEqual(expected, results)
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
+        self.baremetal_client.ports.assert_called_once_with(fields=switch.PORT_FIELDS)
         self.app.client_manager.network.networks.assert_called_once_with(
             provider_network_type="vlan"
         )
@@ -209,8 +212,8 @@ class TestListSwitchPort(base.TestCommand):
 
         self.port1 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_1",
-                "node_uuid": "11111111-2222-3333-4444-aaaaaaaaaaaa",
+                "id": "port_uuid_1",
+                "node_id": "11111111-2222-3333-4444-aaaaaaaaaaaa",
                 "local_link_connection": {
                     "switch_info": "switch1",
                     "port_id": "Ethernet1/1",
@@ -220,8 +223,8 @@ class TestListSwitchPort(base.TestCommand):
         )
         self.port2 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_2",
-                "node_uuid": "11111111-2222-3333-4444-bbbbbbbbbbbb",
+                "id": "port_uuid_2",
+                "node_id": "11111111-2222-3333-4444-bbbbbbbbbbbb",
                 "local_link_connection": {
                     "switch_info": "switch1",
                     "port_id": "Ethernet1/2",
@@ -231,8 +234,8 @@ class TestListSwitchPort(base.TestCommand):
         )
         self.port3 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_3",
-                "node_uuid": "11111111-2222-3333-4444-bbbbbbbbbbbb",
+                "id": "port_uuid_3",
+                "node_id": "11111111-2222-3333-4444-bbbbbbbbbbbb",
                 "local_link_connection": {
                     "switch_info": "switch1",
                     "port_id": "Ethernet1/3",
@@ -242,8 +245,8 @@ class TestListSwitchPort(base.TestCommand):
         )
         self.port4 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_3",
-                "node_uuid": "11111111-2222-3333-4444-bbbbbbbbbbbb",
+                "id": "port_uuid_3",
+                "node_id": "11111111-2222-3333-4444-bbbbbbbbbbbb",
                 "local_link_connection": {
                     "switch_info": "switch2",
                     "port_id": "Ethernet1/4",
@@ -253,8 +256,8 @@ class TestListSwitchPort(base.TestCommand):
         )
         self.port5 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_3",
-                "node_uuid": "11111111-2222-3333-4444-bbbbbbbbbbbb",
+                "id": "port_uuid_3",
+                "node_id": "11111111-2222-3333-4444-bbbbbbbbbbbb",
                 "local_link_connection": {
                     "switch_info": "switch1",
                     "port_id": "Ethernet1/5",
@@ -292,7 +295,7 @@ class TestListSwitchPort(base.TestCommand):
             self.neutron_port2,
             self.neutron_port3,
         ]
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
             self.port3,
@@ -303,7 +306,7 @@ class TestListSwitchPort(base.TestCommand):
 
     @mock.patch("esiclient.utils.get_full_network_info_from_port", autospec=True)
     def test_take_action(self, mock_gfnifp):
-        def mock_gfnifp_call(np, n_dict, client):
+        def mock_gfnifp_call(np, client, networks_dict, ports_dict):
             if np.id == "neutron_port_uuid_1":
                 return ["net1 (100)", "net2 (200)"], [], []
             elif np.id == "neutron_port_uuid_2":
@@ -317,7 +320,9 @@ class TestListSwitchPort(base.TestCommand):
 
         parsed_args = self.check_parser(self.cmd, arglist, verifylist)
 
-        results = self.cmd.take_action(parsed_args)
+        columns, rows = self.cmd.take_action(parsed_args)
+        self.assertIsInstance(rows, types.GeneratorType)
+        results = (columns, list(rows))
         expected = (
             ["Port", "VLANs"],
             [
@@ -328,10 +333,81 @@ class TestListSwitchPort(base.TestCommand):
             ],
         )
         self.assertEqual(expected, results)
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
+        self.baremetal_client.ports.assert_called_once_with(fields=switch.PORT_FIELDS)
         self.app.client_manager.network.ports.assert_called_once
         self.assertEqual(mock_gfnifp.call_count, 2)
 
+    def test_take_action_long(self):
+        for np, name in (
+            (self.neutron_port1, "trunk_port"),
+            (self.neutron_port2, "port2"),
+        ):
+            np.name = name
+            np.fixed_ips = [{"subnet_id": "subnet_uuid1", "ip_address": "10.0.0.1"}]
+        subport = utils.create_mock_object(
+            {
+                "id": "neutron_subport_uuid_1",
+                "name": "subport",
+                "network_id": "network_uuid2",
+                "fixed_ips": [{"subnet_id": "subnet_uuid2", "ip_address": "10.0.1.1"}],
+                "trunk_details": {},
+            }
+        )
+        self.app.client_manager.network.ports.return_value.append(subport)
+        self.app.client_manager.network.networks.return_value = [
+            utils.create_mock_object(
+                {
+                    "id": "network_uuid1",
+                    "name": "net1",
+                    "provider_segmentation_id": 100,
+                }
+            ),
+            utils.create_mock_object(
+                {
+                    "id": "network_uuid2",
+                    "name": "net2",
+                    "provider_segmentation_id": 200,
+                }
+            ),
+        ]
+        self.baremetal_client.nodes.return_value = [
+            utils.create_mock_object(
+                {"id": "11111111-2222-3333-4444-aaaaaaaaaaaa", "name": "node1"}
+            ),
+        ]
+
+        parsed_args = self.check_parser(
+            self.cmd, ["switch1", "--long"], [("long", True)]
+        )
+        columns, rows = self.cmd.take_action(parsed_args)
+
+        self.assertEqual(["Port", "VLANs", "Node", "Network Ports"], columns)
+        self.assertEqual(
+            [
+                [
+                    "Ethernet1/1",
+                    "net1 (100)\nnet2 (200)",
+                    "node1",
+                    "trunk_port\nsubport",
+                ],
+                ["Ethernet1/2", "", "11111111-2222-3333-4444-bbbbbbbbbbbb", ""],
+                [
+                    "Ethernet1/3",
+                    "net1 (100)",
+                    "11111111-2222-3333-4444-bbbbbbbbbbbb",
+                    "port2",
+                ],
+                ["Ethernet1/5", "", "11111111-2222-3333-4444-bbbbbbbbbbbb", ""],
+            ],
+            list(rows),
+        )
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=switch.PORT_FIELDS + ["node_uuid"]
+        )
+        self.baremetal_client.nodes.assert_called_once_with(fields=["uuid", "name"])
+        self.app.client_manager.network.get_port.assert_not_called()
+        self.app.client_manager.network.get_network.assert_not_called()
+
 
 class TestList(base.TestCommand):
     def setUp(self):
@@ -340,8 +416,8 @@ class TestList(base.TestCommand):
 
         self.port1 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_1",
-                "node_uuid": "11111111-2222-3333-4444-aaaaaaaaaaaa",
+                "id": "port_uuid_1",
+                "node_id": "11111111-2222-3333-4444-aaaaaaaaaaaa",
                 "local_link_connection": {
                     "switch_info": "switch1",
                     "switch_id": "e4:c7:22:c0:0b:69",
@@ -351,8 +427,8 @@ class TestList(base.TestCommand):
         )
         self.port2 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_2",
-                "node_uuid": "11111111-2222-3333-4444-bbbbbbbbbbbb",
+                "id": "port_uuid_2",
+                "node_id": "11111111-2222-3333-4444-bbbbbbbbbbbb",
                 "local_link_connection": {
                     "switch_info": "switch1",
                     "switch_id": "e4:c7:22:c0:0b:69",
@@ -362,8 +438,8 @@ class TestList(base.TestCommand):
         )
         self.port3 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_3",
-                "node_uuid": "11111111-2222-3333-4444-bbbbbbbbbbbb",
+                "id": "port_uuid_3",
+                "node_id": "11111111-2222-3333-4444-bbbbbbbbbbbb",
                 "local_link_connection": {
                     "switch_info": "switch2",
                     "switch_id": "aa:aa:aa:aa:aa:aa",
@@ -373,8 +449,8 @@ class TestList(base.TestCommand):
         )
         self.port4 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_3",
-                "node_uuid": "11111111-2222-3333-4444-bbbbbbbbbbbb",
+                "id": "port_uuid_3",
+                "node_id": "11111111-2222-3333-4444-bbbbbbbbbbbb",
                 "local_link_connection": {
                     "switch_info": "switch3",
                     "switch_id": "bb:bb:bb:bb:bb:bb",
@@ -383,7 +459,7 @@ class TestList(base.TestCommand):
             }
         )
 
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
             self.port3,
@@ -406,7 +482,9 @@ class TestList(base.TestCommand):
             ],
         )
         self.assertEqual(expected, results)
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["local_link_connection"]
+        )
 
 
 class TestEnableAccessPort(base.TestCommand):
@@ -416,14 +494,14 @@ class TestEnableAccessPort(base.TestCommand):
 
         self.node = utils.create_mock_object(
             {
-                "uuid": "11111111-2222-3333-4444-aaaaaaaaaaaa",
+                "id": "11111111-2222-3333-4444-aaaaaaaaaaaa",
                 "name": "node1",
             }
         )
         self.port1 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_1",
-                "node_uuid": "11111111-2222-3333-4444-aaaaaaaaaaaa",
+                "id": "port_uuid_1",
+                "node_id": "11111111-2222-3333-4444-aaaaaaaaaaaa",
                 "local_link_connection": {
                     "switch_info": "switch1",
                     "port_id": "Ethernet1/1",
@@ -432,8 +510,8 @@ class TestEnableAccessPort(base.TestCommand):
         )
         self.port2 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_2",
-                "node_uuid": "11111111-2222-3333-4444-bbbbbbbbbbbb",
+                "id": "port_uuid_2",
+                "node_id": "11111111-2222-3333-4444-bbbbbbbbbbbb",
                 "local_link_connection": {
                     "switch_info": "switch1",
                     "port_id": "Ethernet1/2",
@@ -463,11 +541,11 @@ class TestEnableAccessPort(base.TestCommand):
     @mock.patch("esiclient.utils.get_or_create_port", autospec=True)
     @mock.patch("esiclient.utils.get_port_name", autospec=True)
     def test_take_action(self, mock_gpn, mock_gocp):
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
-        self.app.client_manager.baremetal.node.get.return_value = self.node
+        self.baremetal_client.get_node.return_value = self.node
         self.app.client_manager.network.networks.return_value = [self.network]
         mock_gpn.return_value = "node1-port"
         mock_gocp.return_value = self.neutron_port
@@ -479,9 +557,11 @@ class TestEnableAccessPort(base.TestCommand):
 
         self.cmd.take_action(parsed_args)
 
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
-        self.app.client_manager.baremetal.node.get.assert_called_once_with(
-            "11111111-2222-3333-4444-aaaaaaaaaaaa"
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+        )
+        self.baremetal_client.get_node.assert_called_once_with(
+            "11111111-2222-3333-4444-aaaaaaaaaaaa", fields=["uuid", "name"]
         )
         self.app.client_manager.network.networks.assert_called_once_with(
             provider_network_type="vlan", provider_segmentation_id="100"
@@ -490,14 +570,16 @@ class TestEnableAccessPort(base.TestCommand):
         mock_gocp.assert_called_once_with(
             "node1-port", self.network, self.app.client_manager.network
         )
-        self.app.client_manager.baremetal.node.vif_attach.assert_called_once_with(
-            "11111111-2222-3333-4444-aaaaaaaaaaaa", "neutron_port_uuid"
+        self.baremetal_client.attach_vif_to_node.assert_called_once_with(
+            "11111111-2222-3333-4444-aaaaaaaaaaaa",
+            "neutron_port_uuid",
+            retry_on_conflict=False,
         )
 
     @mock.patch("esiclient.utils.get_or_create_port", autospec=True)
     @mock.patch("esiclient.utils.get_port_name", autospec=True)
     def test_take_action_unknown_vlan(self, mock_gpn, mock_gocp):
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
@@ -515,7 +597,9 @@ class TestEnableAccessPort(base.TestCommand):
             parsed_args,
         )
 
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+        )
         self.app.client_manager.network.networks.assert_called_once_with(
             provider_network_type="vlan", provider_segmentation_id="200"
         )
@@ -525,7 +609,7 @@ class TestEnableAccessPort(base.TestCommand):
     @mock.patch("esiclient.utils.get_or_create_port", autospec=True)
     @mock.patch("esiclient.utils.get_port_name", autospec=True)
     def test_take_action_unknown_switchport(self, mock_gpn, mock_gocp):
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
@@ -543,7 +627,9 @@ class TestEnableAccessPort(base.TestCommand):
             parsed_args,
         )
 
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+        )
         self.app.client_manager.network.networks.assert_not_called
         mock_gpn.assert_not_called
         mock_gocp.assert_not_called
@@ -551,7 +637,7 @@ class TestEnableAccessPort(base.TestCommand):
     @mock.patch("esiclient.utils.get_or_create_port", autospec=True)
     @mock.patch("esiclient.utils.get_port_name", autospec=True)
     def test_take_action_unknown_switch(self, mock_gpn, mock_gocp):
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
@@ -569,7 +655,9 @@ class TestEnableAccessPort(base.TestCommand):
             parsed_args,
         )
 
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+        )
         self.app.client_manager.network.networks.assert_not_called
         mock_gpn.assert_not_called
         mock_gocp.assert_not_called
@@ -582,8 +670,8 @@ class TestDisableAccessPort(base.TestCommand):
 
         self.port1 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_1",
-                "node_uuid": "11111111-2222-3333-4444-aaaaaaaaaaaa",
+                "id": "port_uuid_1",
+                "node_id": "11111111-2222-3333-4444-aaaaaaaaaaaa",
                 "local_link_connection": {
                     "switch_info": "switch1",
                     "port_id": "Ethernet1/1",
@@ -593,8 +681,8 @@ class TestDisableAccessPort(base.TestCommand):
         )
         self.port2 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_2",
-                "node_uuid": "11111111-2222-3333-4444-bbbbbbbbbbbb",
+                "id": "port_uuid_2",
+                "node_id": "11111111-2222-3333-4444-bbbbbbbbbbbb",
                 "local_link_connection": {
                     "switch_info": "switch1",
                     "port_id": "Ethernet1/2",
@@ -604,7 +692,7 @@ class TestDisableAccessPort(base.TestCommand):
         )
 
     def test_take_action(self):
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
@@ -616,13 +704,17 @@ class TestDisableAccessPort(base.TestCommand):
 
         self.cmd.take_action(parsed_args)
 
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
-        self.app.client_manager.baremetal.node.vif_detach.assert_called_once_with(
-            "11111111-2222-3333-4444-aaaaaaaaaaaa", "neutron_port_uuid_1"
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+        )
+        self.baremetal_client.detach_vif_from_node.assert_called_once_with(
+            "11111111-2222-3333-4444-aaaaaaaaaaaa",
+            "neutron_port_uuid_1",
+            ignore_missing=False,
         )
 
     def test_take_action_unknown_switchport(self):
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
@@ -639,11 +731,13 @@ class TestDisableAccessPort(base.TestCommand):
             parsed_args,
         )
 
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
-        self.app.client_manager.baremetal.node.vif_detach.assert_not_called
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+        )
+        self.baremetal_client.detach_vif_from_node.assert_not_called
 
     def test_take_action_unknown_switch(self):
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
@@ -660,11 +754,13 @@ class TestDisableAccessPort(base.TestCommand):
             parsed_args,
         )
 
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
-        self.app.client_manager.baremetal.node.vif_detach.assert_not_called
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+        )
+        self.baremetal_client.detach_vif_from_node.assert_not_called
 
     def test_take_action_no_neutron_port(self):
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
@@ -681,8 +777,10 @@ class TestDisableAccessPort(base.TestCommand):
             parsed_args,
         )
 
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
-        self.app.client_manager.baremetal.node.vif_detach.assert_not_called
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+        )
+        self.baremetal_client.detach_vif_from_node.assert_not_called
 
 
 class TestEnableTrunkPort(base.TestCommand):
@@ -692,14 +790,14 @@ class TestEnableTrunkPort(base.TestCommand):
 
         self.node = utils.create_mock_object(
             {
-                "uuid": "11111111-2222-3333-4444-aaaaaaaaaaaa",
+                "id": "11111111-2222-3333-4444-aaaaaaaaaaaa",
                 "name": "node1",
             }
         )
         self.port1 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_1",
-                "node_uuid": "11111111-2222-3333-4444-aaaaaaaaaaaa",
+                "id": "port_uuid_1",
+                "node_id": "11111111-2222-3333-4444-aaaaaaaaaaaa",
                 "local_link_connection": {
                     "switch_info": "switch1",
                     "port_id": "Ethernet1/1",
@@ -708,8 +806,8 @@ class TestEnableTrunkPort(base.TestCommand):
         )
         self.port2 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_2",
-                "node_uuid": "11111111-2222-3333-4444-bbbbbbbbbbbb",
+                "id": "port_uuid_2",
+                "node_id": "11111111-2222-3333-4444-bbbbbbbbbbbb",
                 "local_link_connection": {
                     "switch_info": "switch1",
                     "port_id": "Ethernet1/2",
@@ -746,11 +844,11 @@ class TestEnableTrunkPort(base.TestCommand):
     @mock.patch("esiclient.utils.get_or_create_port", autospec=True)
     @mock.patch("esiclient.utils.get_port_name", autospec=True)
     def test_take_action(self, mock_gpn, mock_gocp):
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
-        self.app.client_manager.baremetal.node.get.return_value = self.node
+        self.baremetal_client.get_node.return_value = self.node
         self.app.client_manager.network.networks.return_value = [self.network]
         self.app.client_manager.network.create_trunk.return_value = self.trunk
         mock_gpn.return_value = "node1-port-trunk-port"
@@ -763,9 +861,11 @@ class TestEnableTrunkPort(base.TestCommand):
 
         self.cmd.take_action(parsed_args)
 
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
-        self.app.client_manager.baremetal.node.get.assert_called_once_with(
-            "11111111-2222-3333-4444-aaaaaaaaaaaa"
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+        )
+        self.baremetal_client.get_node.assert_called_once_with(
+            "11111111-2222-3333-4444-aaaaaaaaaaaa", fields=["uuid", "name"]
         )
         self.app.client_manager.network.networks.assert_called_once_with(
             provider_network_type="vlan", provider_segmentation_id="100"
@@ -779,14 +879,16 @@ class TestEnableTrunkPort(base.TestCommand):
         self.app.client_manager.network.create_trunk.assert_called_once_with(
             name="switch1-Ethernet1/1", port_id="neutron_port_uuid"
         )
-        self.app.client_manager.baremetal.node.vif_attach.assert_called_once_with(
-            "11111111-2222-3333-4444-aaaaaaaaaaaa", "neutron_port_uuid"
+        self.baremetal_client.attach_vif_to_node.assert_called_once_with(
+            "11111111-2222-3333-4444-aaaaaaaaaaaa",
+            "neutron_port_uuid",
+            retry_on_conflict=False,
         )
 
     @mock.patch("esiclient.utils.get_or_create_port", autospec=True)
     @mock.patch("esiclient.utils.get_port_name", autospec=True)
     def test_take_action_unknown_vlan(self, mock_gpn, mock_gocp):
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
@@ -804,7 +906,9 @@ class TestEnableTrunkPort(base.TestCommand):
             parsed_args,
         )
 
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+        )
         self.app.client_manager.network.networks.assert_called_once_with(
             provider_network_type="vlan", provider_segmentation_id="200"
         )
@@ -815,7 +919,7 @@ class TestEnableTrunkPort(base.TestCommand):
     @mock.patch("esiclient.utils.get_or_create_port", autospec=True)
     @mock.patch("esiclient.utils.get_port_name", autospec=True)
     def test_take_action_unknown_switchport(self, mock_gpn, mock_gocp):
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
@@ -833,7 +937,9 @@ class TestEnableTrunkPort(base.TestCommand):
             parsed_args,
         )
 
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+        )
         self.app.client_manager.network.networks.assert_not_called
         mock_gpn.assert_not_called
         mock_gocp.assert_not_called
@@ -842,7 +948,7 @@ class TestEnableTrunkPort(base.TestCommand):
     @mock.patch("esiclient.utils.get_or_create_port", autospec=True)
     @mock.patch("esiclient.utils.get_port_name", autospec=True)
     def test_take_action_unknown_switch(self, mock_gpn, mock_gocp):
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
@@ -860,7 +966,9 @@ class TestEnableTrunkPort(base.TestCommand):
             parsed_args,
         )
 
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+        )
         self.app.client_manager.network.networks.assert_not_called
         mock_gpn.assert_not_called
         mock_gocp.assert_not_called
@@ -874,8 +982,8 @@ class TestDisableTrunkPort(base.TestCommand):
 
         self.port1 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_1",
-                "node_uuid": "11111111-2222-3333-4444-aaaaaaaaaaaa",
+                "id": "port_uuid_1",
+                "node_id": "11111111-2222-3333-4444-aaaaaaaaaaaa",
                 "local_link_connection": {
                     "switch_info": "switch1",
                     "port_id": "Ethernet1/1",
@@ -885,8 +993,8 @@ class TestDisableTrunkPort(base.TestCommand):
         )
         self.port2 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_2",
-                "node_uuid": "11111111-2222-3333-4444-bbbbbbbbbbbb",
+                "id": "port_uuid_2",
+                "node_id": "11111111-2222-3333-4444-bbbbbbbbbbbb",
                 "local_link_connection": {
                     "switch_info": "switch1",
                     "port_id": "Ethernet1/2",
@@ -915,7 +1023,7 @@ class TestDisableTrunkPort(base.TestCommand):
         )
 
     def test_take_action(self):
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
@@ -928,12 +1036,16 @@ class TestDisableTrunkPort(base.TestCommand):
 
         self.cmd.take_action(parsed_args)
 
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+        )
         self.app.client_manager.network.find_trunk.assert_called_once_with(
             "switch1-Ethernet1/1"
         )
-        self.app.client_manager.baremetal.node.vif_detach.assert_called_once_with(
-            "11111111-2222-3333-4444-aaaaaaaaaaaa", "neutron_port_uuid_1"
+        self.baremetal_client.detach_vif_from_node.assert_called_once_with(
+            "11111111-2222-3333-4444-aaaaaaaaaaaa",
+            "neutron_port_uuid_1",
+            ignore_missing=False,
         )
         self.app.client_manager.network.delete_trunk.assert_called_once_with(
             "trunk_uuid"
@@ -941,7 +1053,7 @@ class TestDisableTrunkPort(base.TestCommand):
         self.assertEqual(self.app.client_manager.network.delete_port.call_count, 3)
 
     def test_take_action_unknown_switchport(self):
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
@@ -958,14 +1070,16 @@ class TestDisableTrunkPort(base.TestCommand):
             parsed_args,
         )
 
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+        )
         self.app.client_manager.network.find_trunk.assert_not_called
-        self.app.client_manager.baremetal.node.vif_detach.assert_not_called
+        self.baremetal_client.detach_vif_from_node.assert_not_called
         self.app.client_manager.network.delete_trunk.assert_not_called
         self.app.client_manager.network.delete_port.assert_not_called
 
     def test_take_action_unknown_switch(self):
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
@@ -982,14 +1096,16 @@ class TestDisableTrunkPort(base.TestCommand):
             parsed_args,
         )
 
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+        )
         self.app.client_manager.network.find_trunk.assert_not_called
-        self.app.client_manager.baremetal.node.vif_detach.assert_not_called
+        self.baremetal_client.detach_vif_from_node.assert_not_called
         self.app.client_manager.network.delete_trunk.assert_not_called
         self.app.client_manager.network.delete_port.assert_not_called
 
     def test_take_action_no_trunk(self):
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
@@ -1007,11 +1123,13 @@ class TestDisableTrunkPort(base.TestCommand):
             parsed_args,
         )
 
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+        )
         self.app.client_manager.network.find_trunk.assert_called_once_with(
             "switch1-Ethernet1/1"
         )
-        self.app.client_manager.baremetal.node.vif_detach.assert_not_called
+        self.baremetal_client.detach_vif_from_node.assert_not_called
         self.app.client_manager.network.delete_trunk.assert_not_called
         self.app.client_manager.network.delete_port.assert_not_called
 
@@ -1023,14 +1141,14 @@ class TestAddTrunkVLAN(base.TestCommand):
 
         self.node = utils.create_mock_object(
             {
-                "uuid": "11111111-2222-3333-4444-aaaaaaaaaaaa",
+                "id": "11111111-2222-3333-4444-aaaaaaaaaaaa",
                 "name": "node1",
             }
         )
         self.port1 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_1",
-                "node_uuid": "11111111-2222-3333-4444-aaaaaaaaaaaa",
+                "id": "port_uuid_1",
+                "node_id": "11111111-2222-3333-4444-aaaaaaaaaaaa",
                 "local_link_connection": {
                     "switch_info": "switch1",
                     "port_id": "Ethernet1/1",
@@ -1039,8 +1157,8 @@ class TestAddTrunkVLAN(base.TestCommand):
         )
         self.port2 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_2",
-                "node_uuid": "11111111-2222-3333-4444-bbbbbbbbbbbb",
+                "id": "port_uuid_2",
+                "node_id": "11111111-2222-3333-4444-bbbbbbbbbbbb",
                 "local_link_connection": {
                     "switch_info": "switch1",
                     "port_id": "Ethernet1/2",
@@ -1087,11 +1205,11 @@ class TestAddTrunkVLAN(base.TestCommand):
     @mock.patch("esiclient.utils.get_or_create_port", autospec=True)
     @mock.patch("esiclient.utils.get_port_name", autospec=True)
     def test_take_action(self, mock_gpn, mock_gocp):
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
-        self.app.client_manager.baremetal.node.get.return_value = self.node
+        self.baremetal_client.get_node.return_value = self.node
         self.app.client_manager.network.networks.return_value = [self.network]
         self.app.client_manager.network.find_trunk.return_value = self.trunk
         mock_gpn.return_value = "node1-port-trunk-port-sub-port"
@@ -1104,9 +1222,11 @@ class TestAddTrunkVLAN(base.TestCommand):
 
         self.cmd.take_action(parsed_args)
 
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
-        self.app.client_manager.baremetal.node.get.assert_called_once_with(
-            "11111111-2222-3333-4444-aaaaaaaaaaaa"
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+        )
+        self.baremetal_client.get_node.assert_called_once_with(
+            "11111111-2222-3333-4444-aaaaaaaaaaaa", fields=["uuid", "name"]
         )
         self.app.client_manager.network.networks.assert_called_once_with(
             provider_network_type="vlan", provider_segmentation_id="100"
@@ -1136,7 +1256,7 @@ class TestAddTrunkVLAN(base.TestCommand):
     @mock.patch("esiclient.utils.get_or_create_port", autospec=True)
     @mock.patch("esiclient.utils.get_port_name", autospec=True)
     def test_take_action_unknown_vlan(self, mock_gpn, mock_gocp):
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
@@ -1154,7 +1274,9 @@ class TestAddTrunkVLAN(base.TestCommand):
             parsed_args,
         )
 
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+        )
         self.app.client_manager.network.networks.assert_called_once_with(
             provider_network_type="vlan", provider_segmentation_id="200"
         )
@@ -1166,7 +1288,7 @@ class TestAddTrunkVLAN(base.TestCommand):
     @mock.patch("esiclient.utils.get_or_create_port", autospec=True)
     @mock.patch("esiclient.utils.get_port_name", autospec=True)
     def test_take_action_unknown_switchport(self, mock_gpn, mock_gocp):
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
@@ -1184,7 +1306,9 @@ class TestAddTrunkVLAN(base.TestCommand):
             parsed_args,
         )
 
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+        )
         self.app.client_manager.network.networks.assert_not_called
         self.app.client_manager.network.find_trunk.assert_not_called
         mock_gpn.assert_not_called
@@ -1194,7 +1318,7 @@ class TestAddTrunkVLAN(base.TestCommand):
     @mock.patch("esiclient.utils.get_or_create_port", autospec=True)
     @mock.patch("esiclient.utils.get_port_name", autospec=True)
     def test_take_action_unknown_switch(self, mock_gpn, mock_gocp):
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
@@ -1212,7 +1336,9 @@ class TestAddTrunkVLAN(base.TestCommand):
             parsed_args,
         )
 
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+        )
         self.app.client_manager.network.networks.assert_not_called
         self.app.client_manager.network.find_trunk.assert_not_called
         mock_gpn.assert_not_called
@@ -1222,11 +1348,11 @@ class TestAddTrunkVLAN(base.TestCommand):
     @mock.patch("esiclient.utils.get_or_create_port", autospec=True)
     @mock.patch("esiclient.utils.get_port_name", autospec=True)
     def test_take_action_no_trunk(self, mock_gpn, mock_gocp):
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
-        self.app.client_manager.baremetal.node.get.return_value = self.node
+        self.baremetal_client.get_node.return_value = self.node
         self.app.client_manager.network.networks.return_value = [self.network]
         self.app.client_manager.network.find_trunk.return_value = None
 
@@ -1242,7 +1368,9 @@ class TestAddTrunkVLAN(base.TestCommand):
             parsed_args,
         )
 
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+        )
         self.app.client_manager.network.networks.assert_called_once_with(
             provider_network_type="vlan", provider_segmentation_id="200"
         )
@@ -1261,14 +1389,14 @@ class TestRemoveTrunkVLAN(base.TestCommand):
 
         self.node = utils.create_mock_object(
             {
-                "uuid": "11111111-2222-3333-4444-aaaaaaaaaaaa",
+                "id": "11111111-2222-3333-4444-aaaaaaaaaaaa",
                 "name": "node1",
             }
         )
         self.port1 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_1",
-                "node_uuid": "11111111-2222-3333-4444-aaaaaaaaaaaa",
+                "id": "port_uuid_1",
+                "node_id": "11111111-2222-3333-4444-aaaaaaaaaaaa",
                 "local_link_connection": {
                     "switch_info": "switch1",
                     "port_id": "Ethernet1/1",
@@ -1277,8 +1405,8 @@ class TestRemoveTrunkVLAN(base.TestCommand):
         )
         self.port2 = utils.create_mock_object(
             {
-                "uuid": "port_uuid_2",
-                "node_uuid": "11111111-2222-3333-4444-bbbbbbbbbbbb",
+                "id": "port_uuid_2",
+                "node_id": "11111111-2222-3333-4444-bbbbbbbbbbbb",
                 "local_link_connection": {
                     "switch_info": "switch1",
                     "port_id": "Ethernet1/2",
@@ -1324,11 +1452,11 @@ class TestRemoveTrunkVLAN(base.TestCommand):
 
     @mock.patch("esiclient.utils.get_port_name", autospec=True)
     def test_take_action(self, mock_gpn):
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
-        self.app.client_manager.baremetal.node.get.return_value = self.node
+        self.baremetal_client.get_node.return_value = self.node
         self.app.client_manager.network.networks.return_value = [self.network]
         self.app.client_manager.network.find_trunk.return_value = self.trunk
         self.app.client_manager.network.find_port.return_value = self.neutron_subport
@@ -1341,9 +1469,11 @@ class TestRemoveTrunkVLAN(base.TestCommand):
 
         self.cmd.take_action(parsed_args)
 
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
-        self.app.client_manager.baremetal.node.get.assert_called_once_with(
-            "11111111-2222-3333-4444-aaaaaaaaaaaa"
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+        )
+        self.baremetal_client.get_node.assert_called_once_with(
+            "11111111-2222-3333-4444-aaaaaaaaaaaa", fields=["uuid", "name"]
         )
         self.app.client_manager.network.networks.assert_called_once_with(
             provider_network_type="vlan", provider_segmentation_id="100"
@@ -1368,7 +1498,7 @@ class TestRemoveTrunkVLAN(base.TestCommand):
 
     @mock.patch("esiclient.utils.get_port_name", autospec=True)
     def test_take_action_unknown_vlan(self, mock_gpn):
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
@@ -1386,7 +1516,9 @@ class TestRemoveTrunkVLAN(base.TestCommand):
             parsed_args,
         )
 
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+        )
         self.app.client_manager.network.networks.assert_called_once_with(
             provider_network_type="vlan", provider_segmentation_id="200"
         )
@@ -1397,7 +1529,7 @@ class TestRemoveTrunkVLAN(base.TestCommand):
 
     @mock.patch("esiclient.utils.get_port_name", autospec=True)
     def test_take_action_unknown_switchport(self, mock_gpn):
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
@@ -1415,7 +1547,9 @@ class TestRemoveTrunkVLAN(base.TestCommand):
             parsed_args,
         )
 
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+        )
         self.app.client_manager.network.networks.assert_not_called
         self.app.client_manager.network.find_trunk.assert_not_called
         mock_gpn.assert_not_called
@@ -1424,7 +1558,7 @@ class TestRemoveTrunkVLAN(base.TestCommand):
 
     @mock.patch("esiclient.utils.get_port_name", autospec=True)
     def test_take_action_unknown_switch(self, mock_gpn):
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
@@ -1442,7 +1576,9 @@ class TestRemoveTrunkVLAN(base.TestCommand):
             parsed_args,
         )
 
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+        )
         self.app.client_manager.network.networks.assert_not_called
         self.app.client_manager.network.find_trunk.assert_not_called
         mock_gpn.assert_not_called
@@ -1451,11 +1587,11 @@ class TestRemoveTrunkVLAN(base.TestCommand):
 
     @mock.patch("esiclient.utils.get_port_name", autospec=True)
     def test_take_action_no_trunk(self, mock_gpn):
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
-        self.app.client_manager.baremetal.node.get.return_value = self.node
+        self.baremetal_client.get_node.return_value = self.node
         self.app.client_manager.network.networks.return_value = [self.network]
         self.app.client_manager.network.find_trunk.return_value = None
 
@@ -1471,7 +1607,9 @@ class TestRemoveTrunkVLAN(base.TestCommand):
             parsed_args,
         )
 
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+        )
         self.app.client_manager.network.networks.assert_called_once_with(
             provider_network_type="vlan", provider_segmentation_id="100"
         )
@@ -1484,11 +1622,11 @@ class TestRemoveTrunkVLAN(base.TestCommand):
 
     @mock.patch("esiclient.utils.get_port_name", autospec=True)
     def test_take_action_no_trunk_port(self, mock_gpn):
-        self.app.client_manager.baremetal.port.list.return_value = [
+        self.baremetal_client.ports.return_value = [
             self.port1,
             self.port2,
         ]
-        self.app.client_manager.baremetal.node.get.return_value = self.node
+        self.baremetal_client.get_node.return_value = self.node
         self.app.client_manager.network.networks.return_value = [self.network]
         self.app.client_manager.network.find_trunk.return_value = self.trunk
         self.app.client_manager.network.find_port.return_value = None
@@ -1506,7 +1644,9 @@ class TestRemoveTrunkVLAN(base.TestCommand):
             parsed_args,
         )
 
-        self.app.client_manager.baremetal.port.list.assert_called_once_with(detail=True)
+        self.baremetal_client.ports.assert_called_once_with(
+            fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+        )
         self.app.client_manager.network.networks.assert_called_once_with(
             provider_network_type="vlan", provider_segmentation_id="100"
         )
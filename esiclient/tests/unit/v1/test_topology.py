@@ -0,0 +1,132 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+import io
+import json
+
+from esiclient.tests import fake_cloud
+from esiclient.tests.unit import base
+from esiclient.v1 import topology
+
+
+class TestDump(base.TestCommand):
+    def setUp(self):
+        super(TestDump, self).setUp()
+        self.cloud = fake_cloud.FakeCloud().seed(
+            nodes=4,
+            ports_per_node=2,
+            networks=2,
+            attached=0.5,
+            trunks=1,
+            floating_ips=2,
+            forwards_per_ip=0,
+            switches=2,
+        )
+        self.app.client_manager = self.cloud.client_manager
+        self.app.stdout = io.StringIO()
+        self.app.stderr = io.StringIO()
+        self.cmd = topology.Dump(self.app, None)
+
+    def dump(self, *argv):
+        parsed_args = self.check_parser(self.cmd, list(argv), [])
+        self.cloud.reset_calls()
+        self.cmd.take_action(parsed_args)
+        return self.app.stdout.getvalue()
+
+    def test_jsonl(self):
+        output = self.dump()
+
+        records = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual(8, len(records))
+        self.assertEqual(
+            sorted((r["switch"], r["switchport"]) for r in records),
+            [(r["switch"], r["switchport"]) for r in records],
+        )
+        attached = [r for r in records if r["network_port"]]
+        self.assertEqual(2, len(attached))
+        self.assertEqual(1, len(attached[0]["network_port"]["floating_ips"]))
+        self.assertEqual("network-0", attached[0]["network_port"]["network"]["name"])
+        [trunked] = [r for r in records if r["trunk"]]
+        [sub_port] = trunked["trunk"]["sub_ports"]
+        self.assertEqual(sub_port["network"]["vlan"], sub_port["vlan"])
+        self.assertTrue(all(r["node"]["name"] for r in records))
+
+        # one listing of each resource type, whatever the inventory
+        self.assertEqual(6, sum(self.cloud.calls.values()))
+        self.assertEqual(6, len(self.cloud.calls))
+
+    def test_port_forwardings(self):
+        external = next(
+            network
+            for network in self.cloud.networks.values()
+            if network.name == "external"
+        )
+        fip = self.cloud.add_floating_ip(external.id)
+        port = next(port for port in self.cloud.ports.values() if port.device_id)
+        self.cloud.add_port_forwarding(
+            fip.id,
+            internal_ip_address=port.fixed_ips[0]["ip_address"],
+            internal_port_id=port.id,
+            internal_port=22,
+            external_port=2222,
+            protocol="tcp",
+        )
+
+        output = self.dump()
+
+        records = [json.loads(line) for line in output.splitlines()]
+        [record] = [
+            r
+            for r in records
+            if r["network_port"] and r["network_port"]["id"] == port.id
+        ]
+        self.assertEqual(
+            [
+                {
+                    "floating_ip": fip.floating_ip_address,
+                    "internal_ip": port.fixed_ips[0]["ip_address"],
+                    "internal_port": 22,
+                    "external_port": 2222,
+                    "protocol": "tcp",
+                }
+            ],
+            record["network_port"]["port_forwardings"],
+        )
+        # the forwards come from the floating ip listing
+        self.assertEqual(6, sum(self.cloud.calls.values()))
+
+    def test_switch(self):
+        output = self.dump("--switch", "switch-1")
+
+        records = [json.loads(line) for line in output.splitlines()]
+        self.assertTrue(records)
+        self.assertEqual({"switch-1"}, {r["switch"] for r in records})
+
+    def test_dot(self):
+        output = self.dump("--format", "dot")
+
+        lines = output.splitlines()
+        self.assertEqual("digraph topology {", lines[0])
+        self.assertEqual("}", lines[-1])
+        self.assertIn('  "switch:switch-0" [label="switch-0", shape=box3d];', lines)
+        self.assertIn("vlan 101", output)
+        declarations = [
+            line for line in lines if "[label=" in line and "->" not in line
+        ]
+        self.assertEqual(len(declarations), len(set(declarations)))
+
+    def test_timings(self):
+        self.dump("--timings")
+
+        timings = self.app.stderr.getvalue().splitlines()
+        self.assertEqual(7, len(timings))
+        self.assertTrue(timings[0].startswith("fetched 8 baremetal ports in "))
@@ -12,6 +12,7 @@
 #
 
 import mock
+import types
 
 from osc_lib import exceptions
 
@@ -57,7 +58,7 @@ class TestList(base.TestCommand):
                 "mac_address": "dd:dd:dd:dd:dd:dd",
             }
         )
-        self.subport3 = utils.create_mock_object(
+        self.subport5 = utils.create_mock_object(
             {
                 "id": "port_uuid_5",
                 "network_id": "network_uuid_5",
@@ -101,19 +102,18 @@ class TestList(base.TestCommand):
 
         self.app.client_manager.network.trunks.return_value = [self.trunk1, self.trunk2]
         self.app.client_manager.network.networks.return_value = []
-
-        def mock_get_port(port_id):
-            if port_id == "port_uuid_1":
-                return self.port1
-            if port_id == "port_uuid_4":
-                return self.port2
-            return None
-
-        self.app.client_manager.network.get_port.side_effect = mock_get_port
+        self.ports = [
+            self.port1,
+            self.subport2,
+            self.subport3,
+            self.port2,
+            self.subport5,
+        ]
+        self.app.client_manager.network.ports.return_value = self.ports
 
     @mock.patch("esiclient.utils.get_full_network_info_from_port", autospec=True)
     def test_take_action(self, mock_gfnifp):
-        def mock_get_fnifp(port, n_dict, client):
+        def mock_get_fnifp(port, client, n_dict, p_dict):
             if port.id == "port_uuid_1":
                 return (
                     ["network1", "network2", "network3"],
@@ -139,7 +139,9 @@ class TestList(base.TestCommand):
 
         parsed_args = self.check_parser(self.cmd, arglist, verifylist)
 
-        results = self.cmd.take_action(parsed_args)
+        columns, rows = self.cmd.take_action(parsed_args)
+        self.assertIsInstance(rows, types.GeneratorType)
+        results = (columns, list(rows))
         expected = (
             ["Trunk", "Port", "Network"],
             [
@@ -159,13 +161,13 @@ class TestList(base.TestCommand):
         )
 
         self.assertEqual(expected, results)
-        self.app.client_manager.network.get_port.assert_has_calls(
-            [mock.call("port_uuid_1"), mock.call("port_uuid_4")]
-        )
+        self.app.client_manager.network.ports.assert_called_once_with()
+        self.app.client_manager.network.get_port.assert_not_called()
+        ports_dict = {port.id: port for port in self.ports}
         mock_gfnifp.assert_has_calls(
             [
-                mock.call(self.port1, self.app.client_manager.network, {}),
-                mock.call(self.port2, self.app.client_manager.network, {}),
+                mock.call(self.port1, self.app.client_manager.network, {}, ports_dict),
+                mock.call(self.port2, self.app.client_manager.network, {}, ports_dict),
             ]
         )
 
@@ -10,7 +10,47 @@
 #   License for the specific language governing permissions and limitations
 #   under the License.
 
+import collections
+import concurrent.futures
+import functools
+import logging
+import os
+import re
 import subprocess
+import threading
+import time
+import types
+
+from esiclient import governor
+from esiclient import metrics
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 10
+
+# raises the size of the HTTP connection pool beyond the number of workers
+HTTP_POOL_SIZE_ENV = "ESI_HTTP_POOL_SIZE"
+
+# the node fields node network listings use
+NODE_FIELDS = ["uuid", "name"]
+
+# attempts at a change refused because its resource is busy
+CONFLICT_ATTEMPTS = 6
+
+# the messages of 409 Conflict errors that clear by themselves, such as
+# ironic's NodeLocked: "Node <uuid> is locked by host <host>, please retry
+# after the current operation is completed."
+TRANSIENT_CONFLICT = re.compile(r"NodeLocked|is locked by host", re.IGNORECASE)
+
+_MISSING = object()
+
+# the state a node ends up in for each provision state change requested
+PROVISION_TARGETS = {
+    "active": "active",
+    "deleted": "available",
+    "manage": "manageable",
+    "provide": "available",
+}
 
 
 def get_network_display_name(network):
@@ -44,14 +84,16 @@ def get_network_info_from_port(port, client, networks_dict={}):
     return get_network_display_name(network), fixed_ip
 
 
-def get_full_network_info_from_port(port, client, networks_dict={}):
+def get_full_network_info_from_port(port, client, networks_dict={}, ports_dict={}):
     """Return full Neutron network name and ips from port
 
-    This code iterates through subports if appropriate
+    This code iterates through subports if appropriate. Networks and
+    subports missing from the dicts are fetched one at a time.
 
     :param port: a Neutron port
     :param client: neutron client
     :param networks_dict: networks dict {id:network}
+    :param ports_dict: ports dict {id:port}, used to look up subports
     """
     network_names = []
     port_names = []
@@ -65,7 +107,9 @@ def get_full_network_info_from_port(port, client, networks_dict={}):
     if port.trunk_details:
         subports = port.trunk_details["sub_ports"]
         for subport_info in subports:
-            subport = client.get_port(subport_info["port_id"])
+            subport = ports_dict.get(subport_info["port_id"]) or client.get_port(
+                subport_info["port_id"]
+            )
             network_name, fixed_ip = get_network_info_from_port(
                 subport, client, networks_dict
             )
@@ -116,8 +160,10 @@ def get_switch_trunk_name(switch, switchport):
     return switch + "-" + switchport
 
 
-def get_baremetal_port_from_switchport(switch, switchport, ironic_client):
-    ports = ironic_client.port.list(detail=True)
+def get_baremetal_port_from_switchport(switch, switchport, baremetal_client):
+    ports = baremetal_client.ports(
+        fields=["uuid", "node_uuid", "local_link_connection", "internal_info"]
+    )
     return next(
         (
             port
@@ -210,14 +256,14 @@ def provision_node_with_image(
     return
 
 
-def boot_node_from_url(node_uuid, url, port_uuid, ironic_client):
+def boot_node_from_url(node_uuid, url, port_uuid, baremetal_client):
     node_update = [
         {"path": "/instance_info/deploy_interface", "value": "ramdisk", "op": "add"},
         {"path": "/instance_info/boot_iso", "value": url, "op": "add"},
     ]
-    ironic_client.node.update(node_uuid, node_update)
-    ironic_client.node.vif_attach(node_uuid, port_uuid)
-    ironic_client.node.set_provision_state(node_uuid, "active")
+    update_node(baremetal_client, node_uuid, node_update)
+    attach_vif(baremetal_client, node_uuid, port_uuid)
+    set_provision_state(baremetal_client, node_uuid, "active")
     return
 
 
@@ -248,8 +294,13 @@ def create_trunk(neutron_client, trunk_name, network, tagged_networks=[]):
             }
         )
 
-    trunk = neutron_client.create_trunk(
-        name=trunk_name, port_id=trunk_port.id, sub_ports=sub_ports
+    trunk = retry_conflicts(
+        "create trunk",
+        neutron_client.create_trunk,
+        name=trunk_name,
+        port_id=trunk_port.id,
+        sub_ports=sub_ports,
+        done=lambda: neutron_client.find_trunk(trunk_name),
     )
 
     return trunk, trunk_port
@@ -259,6 +310,700 @@ def delete_trunk(neutron_client, trunk):
     port_ids_to_delete = [sub_port["port_id"] for sub_port in trunk.sub_ports]
     port_ids_to_delete.append(trunk.port_id)
 
-    neutron_client.delete_trunk(trunk.id)
+    retry_conflicts("delete trunk", neutron_client.delete_trunk, trunk.id)
     for port_id in port_ids_to_delete:
-        neutron_client.delete_port(port_id)
+        delete_port(neutron_client, port_id)
+
+
+def timed_list(stage, func, *args, **kwargs):
+    """Call a listing function and materialize its results
+
+    The time spent fetching is logged at debug level.
+
+    :param stage: description of the fetch stage, used for logging
+    :param func: a callable returning an iterable of resources
+    """
+    start = time.monotonic()
+    results = list(func(*args, **kwargs))
+    LOG.debug("fetched %s %s in %.3fs", len(results), stage, time.monotonic() - start)
+    return results
+
+
+def timed_call(stage, func, *args, **kwargs):
+    """Call a function, logging the time it took at debug level
+
+    :param stage: description of the call, used for logging
+    :param func: the callable to call
+    """
+    start = time.monotonic()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        LOG.debug("%s took %.3fs", stage, time.monotonic() - start)
+
+
+def is_retryable(error):
+    """Return whether a failed API call may succeed if made again
+
+    Ironic refuses changes to a node that another operation holds locked
+    with a 409 Conflict, which clears once the other operation is done.
+    Other conflicts, such as a port already bound or a trunk port in use,
+    last until someone intervenes, so they are not retried. A call whose
+    connection failed may not have been made at all.
+
+    :param error: the exception raised by the call
+    """
+    from keystoneauth1 import exceptions as ksa_exceptions
+
+    if isinstance(error, ksa_exceptions.ConnectionError):
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "http_status", None)
+    return status == 409 and TRANSIENT_CONFLICT.search(str(error)) is not None
+
+
+def retry_conflicts(stage, func, *args, done=None, **kwargs):
+    """Make a change, retrying it with backoff while its resource is busy
+
+    A failed change may have been made anyway, either by the call itself
+    before its response was lost, or by another operation racing this
+    one. So before each retry, done is called to check whether the change
+    has already been made, in which case it is not made again.
+
+    :param stage: description of the change, used for logging
+    :param func: the callable making the change
+    :param done: a callable taking no arguments, returning None if the
+        change has not been made yet, otherwise the result to return
+    :returns: the result of func, or of done if the change was found made
+    :raises: the exception raised by func if it is not retryable, or it
+        still fails after CONFLICT_ATTEMPTS attempts
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt >= CONFLICT_ATTEMPTS or not is_retryable(e):
+                raise
+            delay = governor.backoff_delay(attempt)
+            LOG.debug(
+                "%s failed, retrying in %.2fs (attempt %d of %d): %s",
+                stage,
+                delay,
+                attempt,
+                CONFLICT_ATTEMPTS,
+                e,
+            )
+            metrics.count_retry(metrics.CONFLICT, stage=stage)
+            time.sleep(delay)
+        if done is not None:
+            result = done()
+            if result is not None:
+                LOG.debug("%s had already been made", stage)
+                return result
+
+
+def patch_applied(node, patch):
+    """Return whether a JSON patch of add, replace and remove operations
+    has already been applied to a node
+
+    :param node: the node, with at least the fields the patch changes
+    :param patch: the JSON patch
+    """
+    for change in patch:
+        path = [
+            key.replace("~1", "/").replace("~0", "~")
+            for key in change["path"].strip("/").split("/")
+        ]
+        value = getattr(node, path[0], None)
+        for key in path[1:]:
+            value = value.get(key, _MISSING) if isinstance(value, dict) else _MISSING
+        if change["op"] == "remove":
+            if value is not _MISSING and value is not None:
+                return False
+        elif value != change.get("value"):
+            return False
+    return True
+
+
+def update_node(baremetal_client, node, patch):
+    """Patch a node, retrying while it is locked
+
+    Before each retry the node is checked, so a patch that was applied
+    although its response was lost, such as one removing a field, is not
+    applied again.
+
+    :param node: the name or UUID of the node
+    :param patch: the JSON patch to apply
+    """
+    fields = sorted({change["path"].strip("/").split("/")[0] for change in patch})
+
+    def updated():
+        current = baremetal_client.get_node(node, fields=fields)
+        return current if patch_applied(current, patch) else None
+
+    return retry_conflicts(
+        "update node",
+        baremetal_client.patch_node,
+        node,
+        patch,
+        retry_on_conflict=False,
+        done=updated,
+    )
+
+
+def attach_vif(baremetal_client, node, port_id):
+    """Attach a port to a node, retrying while the node is locked
+
+    :param node: the name or UUID of the node
+    :param port_id: the UUID of the neutron port
+    """
+
+    def attached():
+        return True if port_id in baremetal_client.list_node_vifs(node) else None
+
+    return retry_conflicts(
+        "attach vif",
+        baremetal_client.attach_vif_to_node,
+        node,
+        port_id,
+        retry_on_conflict=False,
+        done=attached,
+    )
+
+
+def set_provision_state(baremetal_client, node, target):
+    """Change a node's provision state, retrying while it is locked
+
+    :param node: the name or UUID of the node
+    :param target: the provision state change, e.g. "active" or "deleted"
+    """
+
+    def changed():
+        current = baremetal_client.get_node(
+            node, fields=["provision_state", "target_provision_state"]
+        )
+        if PROVISION_TARGETS.get(target) in (
+            current.provision_state,
+            current.target_provision_state,
+        ):
+            return current
+        return None
+
+    return retry_conflicts(
+        "set provision state",
+        baremetal_client.set_node_provision_state,
+        node,
+        target,
+        done=changed,
+    )
+
+
+def delete_port(neutron_client, port_id):
+    """Delete a port, retrying while it is in use
+
+    A port already deleted by an earlier attempt is ignored.
+
+    :param port_id: the UUID of the port
+    """
+    return retry_conflicts("delete port", neutron_client.delete_port, port_id)
+
+
+def fetch_concurrently(calls, max_workers=DEFAULT_CONCURRENCY):
+    """Make independent calls concurrently, logging the time each takes
+
+    All calls are allowed to finish before any exception is raised, so no
+    call is left running in the background.
+
+    :param calls: a dictionary mapping a description of each call to a
+        callable taking no arguments
+    :param max_workers: the maximum number of concurrent calls
+
+    :returns: a dictionary mapping each description to the call's result
+    :raises: the exception raised by the first failing call, in the order
+        of calls
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            stage: executor.submit(timed_call, stage, call)
+            for stage, call in calls.items()
+        }
+    return {stage: future.result() for stage, future in futures.items()}
+
+
+def _get_or_fetch(cache, key, fetch):
+    if key not in cache:
+        cache[key] = fetch(key)
+    return cache[key]
+
+
+def _index_port_forwardings(
+    connection, floating_ips, network_ports_dict, filter_network=None
+):
+    """Map neutron port ids to floating ips and port forwardings
+
+    Port forwardings embedded in the floating ip list response are matched
+    to ports through their internal ip address. Floating ips whose forwards
+    are not embedded, or whose internal addresses are ambiguous, fall back
+    to listing their port forwardings from the API.
+
+    :param connection: An OpenStack connection
+    :param floating_ips: a list of floating ips
+    :param network_ports_dict: neutron ports dict {id:port}
+    :param filter_network: the network the ports were limited to, if any;
+        forwards to addresses matching none of them are then to ports on
+        other networks, and are skipped
+    """
+    fixed_ip_ports = collections.defaultdict(list)
+    for port in network_ports_dict.values():
+        for ip in port.fixed_ips or []:
+            fixed_ip_ports[ip["ip_address"]].append(port.id)
+
+    floating_ips_dict = {}
+    port_forwardings_dict = collections.defaultdict(list)
+    unresolved = []
+
+    for fip in floating_ips:
+        if fip.port_id:
+            floating_ips_dict[fip.port_id] = fip
+            continue
+
+        embedded = getattr(fip, "port_forwardings", None)
+        if embedded is not None and filter_network:
+            embedded = [
+                pfwd
+                for pfwd in embedded
+                if pfwd["internal_ip_address"] in fixed_ip_ports
+            ]
+        if embedded is None or any(
+            len(fixed_ip_ports.get(pfwd["internal_ip_address"], [])) != 1
+            for pfwd in embedded
+        ):
+            unresolved.append(fip)
+            continue
+
+        for pfwd in embedded:
+            port_id = fixed_ip_ports[pfwd["internal_ip_address"]][0]
+            floating_ips_dict[port_id] = fip
+            port_forwardings_dict[port_id].append(types.SimpleNamespace(**pfwd))
+
+    if unresolved:
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=DEFAULT_CONCURRENCY
+        ) as executor:
+            results = executor.map(
+                lambda fip: (
+                    fip,
+                    list(connection.network.port_forwardings(floating_ip=fip)),
+                ),
+                unresolved,
+            )
+            for fip, pfwds in results:
+                for pfwd in pfwds:
+                    floating_ips_dict[pfwd.internal_port_id] = fip
+                    port_forwardings_dict[pfwd.internal_port_id].append(pfwd)
+        LOG.debug("listed port forwardings for %s floating ips", len(unresolved))
+
+    return floating_ips_dict, dict(port_forwardings_dict)
+
+
+def node_network_prefetch(connection, filter_node=None, filter_network=None):
+    """Fetch and index the resources describing node network attachments
+
+    Each resource type is listed once, concurrently, so the number of API
+    calls does not depend on the number of nodes.
+
+    :param connection: An OpenStack connection
+    :param filter_node: the name or ID of a node
+    :param filter_network: the name or ID of a network
+
+    :returns: a dict with the keys 'nodes', 'baremetal_ports'
+        {node_id: [port]}, 'network_ports' {id: port}, 'networks'
+        {id: network}, 'floating_ips' {port_id: floating_ip},
+        'port_forwardings' {port_id: [port_forwarding]} and 'filter_network'
+    """
+    start = time.monotonic()
+    # resolve the network first, so that only its ports are listed
+    if filter_network:
+        filter_network = connection.network.find_network(
+            filter_network, ignore_missing=False
+        )
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        f_network_ports = executor.submit(
+            timed_list,
+            "neutron ports",
+            connection.network.ports,
+            **({"network_id": filter_network.id} if filter_network else {}),
+        )
+        f_networks = executor.submit(
+            timed_list, "networks", connection.network.networks
+        )
+        f_floating_ips = executor.submit(
+            timed_list, "floating ips", connection.network.ips
+        )
+        if filter_node:
+            nodes = [connection.baremetal.find_node(filter_node, ignore_missing=False)]
+            f_baremetal_ports = executor.submit(
+                timed_list,
+                "baremetal ports",
+                connection.baremetal.ports,
+                details=True,
+                node_id=nodes[0].id,
+            )
+        else:
+            f_nodes = executor.submit(
+                timed_list, "nodes", connection.baremetal.nodes, fields=NODE_FIELDS
+            )
+            f_baremetal_ports = executor.submit(
+                timed_list, "baremetal ports", connection.baremetal.ports, details=True
+            )
+            nodes = f_nodes.result()
+
+        baremetal_ports = collections.defaultdict(list)
+        for baremetal_port in f_baremetal_ports.result():
+            baremetal_ports[baremetal_port.node_id].append(baremetal_port)
+        network_ports_dict = {port.id: port for port in f_network_ports.result()}
+        networks_dict = {network.id: network for network in f_networks.result()}
+        floating_ips = f_floating_ips.result()
+
+    if filter_network:
+        # the sub ports of trunks on the network may be on other networks,
+        # so fetch the ones the filtered listing left out
+        sub_port_ids = [
+            sub_port["port_id"]
+            for port in network_ports_dict.values()
+            if port.trunk_details
+            for sub_port in port.trunk_details["sub_ports"]
+            if sub_port["port_id"] not in network_ports_dict
+        ]
+        if sub_port_ids:
+            network_ports_dict.update(
+                (port.id, port)
+                for port in timed_list(
+                    "trunk sub ports", connection.network.ports, id=sub_port_ids
+                )
+            )
+
+    floating_ips_dict, port_forwardings_dict = _index_port_forwardings(
+        connection, floating_ips, network_ports_dict, filter_network
+    )
+    LOG.debug("prefetched node network resources in %.3fs", time.monotonic() - start)
+
+    return {
+        "nodes": nodes,
+        "baremetal_ports": baremetal_ports,
+        "network_ports": network_ports_dict,
+        "networks": networks_dict,
+        "floating_ips": floating_ips_dict,
+        "port_forwardings": port_forwardings_dict,
+        "filter_network": filter_network,
+    }
+
+
+def node_network_list(connection, filter_node=None, filter_network=None):
+    """List nodes and their network attributes
+
+    This returns the same information as ``esi.lib.nodes.network_list``, but
+    all resources are prefetched with bulk calls and joined in memory, and
+    nodes are yielded one at a time. The bulk fetches happen before this
+    function returns; only the join is deferred.
+
+    :param connection: An OpenStack connection
+    :param filter_node: the name or ID of a node
+    :param filter_network: the name or ID of a network
+
+    :returns: a generator of dicts of the form:
+    {
+        'node': openstack.baremetal.v1.node.Node,
+        'network_info': [
+            {
+                'baremetal_port': openstack.baremetal.v1.port.Port,
+                'network_ports': [openstack.network.v2.port.Port] or [],
+                'networks': {
+                    'parent': openstack.network.v2.network.Network or None,
+                    'trunk': [openstack.network.v2.network.Network] or [],
+                    'floating': openstack.network.v2.network.Network or None,
+                },
+                'floating_ip': openstack.network.v2.floating_ip.FloatingIP or None,
+                'port_forwardings': [port forwarding] or []
+            },
+            ...
+        ]
+    }
+    """
+    prefetch = node_network_prefetch(connection, filter_node, filter_network)
+    return join_node_networks(connection, prefetch)
+
+
+def join_node_networks(connection, prefetch):
+    """Join prefetched resources into per-node network information
+
+    :param connection: An OpenStack connection
+    :param prefetch: the result of :func:`node_network_prefetch`; only nodes
+        in prefetch['nodes'] are joined
+
+    :returns: a generator of dicts in the format returned by
+        :func:`node_network_list`
+    """
+    filter_network = prefetch["filter_network"]
+    network_ports_dict = prefetch["network_ports"]
+    networks_dict = prefetch["networks"]
+    floating_ips_dict = prefetch["floating_ips"]
+
+    def get_network(network_id):
+        return _get_or_fetch(networks_dict, network_id, connection.network.get_network)
+
+    for node in prefetch["nodes"]:
+        network_info = []
+        for baremetal_port in prefetch["baremetal_ports"].get(node.id, []):
+            # a VIF missing from the listing, e.g. a stale one, is shown
+            # as unattached
+            network_port = network_ports_dict.get(
+                baremetal_port.internal_info.get("tenant_vif_port_id")
+            )
+
+            if network_port is None or (
+                filter_network and filter_network.id != network_port.network_id
+            ):
+                if not filter_network:
+                    network_info.append(
+                        {
+                            "baremetal_port": baremetal_port,
+                            "network_ports": [],
+                            "networks": {"parent": None, "trunk": [], "floating": None},
+                            "floating_ip": None,
+                            "port_forwardings": [],
+                        }
+                    )
+                continue
+
+            trunk_ports = []
+            if network_port.trunk_details:
+                trunk_ports = [
+                    network_ports_dict[subport_info["port_id"]]
+                    for subport_info in network_port.trunk_details["sub_ports"]
+                    if subport_info["port_id"] in network_ports_dict
+                ]
+
+            floating_ip = floating_ips_dict.get(network_port.id)
+            network_info.append(
+                {
+                    "baremetal_port": baremetal_port,
+                    "network_ports": [network_port] + trunk_ports,
+                    "networks": {
+                        "parent": get_network(network_port.network_id),
+                        "trunk": [get_network(port.network_id) for port in trunk_ports],
+                        "floating": get_network(floating_ip.floating_network_id)
+                        if floating_ip
+                        else None,
+                    },
+                    "floating_ip": floating_ip,
+                    "port_forwardings": prefetch["port_forwardings"].get(
+                        network_port.id, []
+                    ),
+                }
+            )
+
+        if network_info:
+            yield {"node": node, "network_info": network_info}
+
+
+BatchResult = collections.namedtuple(
+    "BatchResult", ["item", "result", "error", "elapsed"]
+)
+
+
+def run_concurrently(func, items, max_workers=DEFAULT_CONCURRENCY, progress=None):
+    """Call a function on every item using a bounded pool of threads
+
+    Exceptions raised by the function are captured rather than propagated,
+    so one failing item does not abort the others.
+
+    :param func: a callable taking a single item
+    :param items: an iterable of items
+    :param max_workers: the maximum number of concurrent calls
+    :param progress: an optional callable, called with the number of
+        completed and failed items each time an item completes
+
+    :returns: a list of BatchResult(item, result, error, elapsed), in the
+        order of the items
+    """
+
+    lock = threading.Lock()
+    counts = {"done": 0, "failed": 0}
+
+    def timed_call(item):
+        start = time.monotonic()
+        try:
+            result, error = func(item), None
+        except Exception as e:
+            LOG.debug("%s failed for %s: %s", func.__name__, item, e)
+            result, error = None, e
+        if progress:
+            with lock:
+                counts["done"] += 1
+                counts["failed"] += 1 if error else 0
+                progress(counts["done"], counts["failed"])
+        return BatchResult(item, result, error, time.monotonic() - start)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(timed_call, items))
+
+
+class ProgressReporter(object):
+    """Periodically write the progress of a batch operation to a stream
+
+    Nothing is written for operations that finish within the first interval.
+
+    :param stream: the stream to write to, usually the app's stderr
+    :param description: what is being done, e.g. "deleting port forwards"
+    :param total: the number of items in the operation
+    :param interval: the minimum number of seconds between reports
+    """
+
+    def __init__(self, stream, description, total, interval=5.0):
+        self.stream = stream
+        self.description = description
+        self.total = total
+        self.interval = interval
+        self.last = time.monotonic()
+        self.reported = False
+
+    def __call__(self, done, failed):
+        now = time.monotonic()
+        finished = done == self.total
+        if now - self.last < self.interval and not (finished and self.reported):
+            return
+        self.last = now
+        self.reported = True
+        self.stream.write(
+            "%s: %d/%d done, %d failed\n" % (self.description, done, self.total, failed)
+        )
+
+
+def summarize_failures(results, description):
+    """Summarize the errors in a list of BatchResults
+
+    Identical errors are counted rather than repeated, so that a summary of
+    a large operation stays readable.
+
+    :param results: a list of BatchResult
+    :param description: what was being done, e.g. "deleting port forwards"
+
+    :returns: a one-line summary, or None if nothing failed
+    """
+
+    errors = collections.Counter(str(r.error) for r in results if r.error)
+    if not errors:
+        return None
+    return "%d of %d failed while %s: %s" % (
+        sum(errors.values()),
+        len(results),
+        description,
+        "; ".join(
+            "%s (x%d)" % (error, count) if count > 1 else error
+            for error, count in errors.most_common()
+        ),
+    )
+
+
+class RateLimiter(object):
+    """Space out calls so that no more than rate are started per second
+
+    The limit is shared by every thread calling through the limiter.
+
+    :param rate: the maximum number of calls per second
+    """
+
+    def __init__(self, rate):
+        self.bucket = governor.TokenBucket(rate, burst=1)
+
+    def wait(self):
+        self.bucket.acquire()
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def limited(*args, **kwargs):
+            self.wait()
+            return func(*args, **kwargs)
+
+        return limited
+
+
+def govern_api_calls(client_manager):
+    """Pace the API calls made through a command's clients
+
+    Calls are limited by rate and concurrency and backed off when a service
+    refuses them as overloaded, as configured by ESI_RATE_LIMITS and
+    ESI_MAX_IN_FLIGHT; see esiclient.governor.
+
+    :param client_manager: the command's client manager
+    :returns: the governor, or None for sessions other than keystoneauth's
+    :raises: CommandError if ESI_RATE_LIMITS or ESI_MAX_IN_FLIGHT is malformed
+    """
+    from osc_lib import exceptions
+
+    try:
+        return governor.govern(getattr(client_manager, "session", None))
+    except ValueError as e:
+        raise exceptions.CommandError("ERROR: %s" % e)
+
+
+def size_http_pool(client_manager, workers):
+    """Keep an HTTP connection alive for each thread making API calls
+
+    Every client a command uses sends its requests through the keystoneauth
+    session of its client manager. That session keeps at most 10 idle
+    connections per host, so calls made from more threads than that close
+    their connections when done, and the next calls open new ones, each
+    with a TCP and TLS handshake. This grows the pool to the number of
+    workers, or to ESI_HTTP_POOL_SIZE if that is larger; it never shrinks.
+
+    :param client_manager: the command's client manager
+    :param workers: the number of threads that will make calls at once
+    :returns: the pool size
+    :raises: CommandError if ESI_HTTP_POOL_SIZE is malformed
+    """
+    import requests
+    from osc_lib import exceptions
+
+    value = os.environ.get(HTTP_POOL_SIZE_ENV) or "0"
+    try:
+        pool_size = int(value)
+    except ValueError:
+        pool_size = -1
+    if pool_size < 0:
+        raise exceptions.CommandError(
+            "ERROR: %s must be a non-negative integer, not %r"
+            % (HTTP_POOL_SIZE_ENV, value)
+        )
+
+    size = max(workers, pool_size)
+    adapters = getattr(
+        getattr(client_manager.session, "session", None), "adapters", None
+    )
+    # leave alone sessions other than keystoneauth's, e.g. test doubles
+    if not isinstance(adapters, dict):
+        return size
+
+    from keystoneauth1 import session as ksa_session
+
+    for prefix, adapter in list(adapters.items()):
+        if type(adapter) not in (
+            requests.adapters.HTTPAdapter,
+            ksa_session.TCPKeepAliveAdapter,
+        ):
+            continue
+        if adapter._pool_maxsize >= size:
+            continue
+        tls = {
+            option: getattr(adapter, option)
+            for option in ("tls_ciphers", "tls_min_version")
+            if getattr(adapter, option, None)
+        }
+        client_manager.session.session.mount(
+            prefix, ksa_session.TCPKeepAliveAdapter(pool_maxsize=size, **tls)
+        )
+        adapter.close()
+        LOG.debug("HTTP connection pool for %s sized to %d", prefix, size)
+    return size
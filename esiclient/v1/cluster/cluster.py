@@ -13,12 +13,12 @@
 import concurrent.futures
 import json
 import logging
+import os
 
 from osc_lib.command import command
 from osc_lib.i18n import _
 
-from oslo_utils import uuidutils
-
+from esiclient import metrics as esi_metrics
 from esiclient import utils as esi_utils
 from esiclient.v1.cluster import utils
 
@@ -35,9 +35,9 @@ class List(command.Lister):
     def take_action(self, parsed_args):
         self.log.debug("take_action(%s)", parsed_args)
 
-        ironic_client = self.app.client_manager.baremetal
+        baremetal_client = self.app.client_manager.sdk_connection.baremetal
 
-        nodes = ironic_client.node.list(fields=["uuid", "name", "extra"])
+        nodes = baremetal_client.nodes(fields=["uuid", "name", "extra"])
 
         cluster_dict = {}
         for node in nodes:
@@ -54,18 +54,16 @@ class List(command.Lister):
                     cluster_dict[cluster_uuid] = {}
                 cluster_dict[cluster_uuid][node.name] = esi_extra
 
-        cluster_info = []
-        for cluster_uuid in cluster_dict:
-            node_info = []
-            extra_info = []
-            for node in cluster_dict[cluster_uuid]:
-                node_info.append(node)
-                extra_info.append(str(cluster_dict[cluster_uuid][node]))
-            cluster_info.append(
-                [cluster_uuid, "\n".join(node_info), "\n".join(extra_info)]
-            )
+        def rows():
+            for cluster_uuid in cluster_dict:
+                node_info = []
+                extra_info = []
+                for node in cluster_dict[cluster_uuid]:
+                    node_info.append(node)
+                    extra_info.append(str(cluster_dict[cluster_uuid][node]))
+                yield [cluster_uuid, "\n".join(node_info), "\n".join(extra_info)]
 
-        return ["Cluster", "Node", "Associated"], cluster_info
+        return ["Cluster", "Node", "Associated"], rows()
 
 
 class Orchestrate(command.Lister):
@@ -76,6 +74,9 @@ class Orchestrate(command.Lister):
     PROVISIONING_METHODS = ["image", "image_url"]
     AVAILABLE_STATE = "available"
 
+    # replaced in take_action when --metrics is given
+    metrics = esi_metrics.Metrics()
+
     def get_parser(self, prog_name):
         parser = super(Orchestrate, self).get_parser(prog_name)
         parser.add_argument(
@@ -83,16 +84,28 @@ class Orchestrate(command.Lister):
             metavar="<cluster_config_file>",
             help=_("File describing the cluster configuration"),
         )
+        parser.add_argument(
+            "--metrics",
+            metavar="<url>",
+            default=os.environ.get("ESI_METRICS"),
+            help=_(
+                "Export orchestration metrics to a file path, "
+                "statsd://host:port or otlp://host:port "
+                "(Env: ESI_METRICS)"
+            ),
+        )
 
         return parser
 
     def assign_nodes(self, cluster_config):
         print("ASSIGNING NODES")
-        ironic_client = self.app.client_manager.baremetal
+        baremetal_client = self.app.client_manager.sdk_connection.baremetal
 
-        available_nodes = ironic_client.node.list(
-            fields=["uuid", "name", "resource_class"],
-            provision_state=self.AVAILABLE_STATE,
+        available_nodes = list(
+            baremetal_client.nodes(
+                fields=["uuid", "name", "resource_class"],
+                provision_state=self.AVAILABLE_STATE,
+            )
         )
         node_configs = cluster_config["node_configs"]
 
@@ -123,7 +136,7 @@ class Orchestrate(command.Lister):
                     (
                         node
                         for node in available_nodes
-                        if node.uuid == node_uuid or node.name == node_uuid
+                        if node.id == node_uuid or node.name == node_uuid
                     ),
                     None,
                 )
@@ -191,7 +204,7 @@ class Orchestrate(command.Lister):
 
     def provision_node(self, node, provisioning_type, node_config, cluster_uuid):
         glance_client = self.app.client_manager.image
-        ironic_client = self.app.client_manager.baremetal
+        baremetal_client = self.app.client_manager.sdk_connection.baremetal
         neutron_client = self.app.client_manager.network
 
         cluster_dict = {utils.ESI_CLUSTER_UUID: cluster_uuid}
@@ -215,7 +228,7 @@ class Orchestrate(command.Lister):
                 )
             print("* Provisioning node %s with image %s" % (node.name, image.name))
             esi_utils.provision_node_with_image(
-                node.uuid, node.resource_class, port.id, image.id, ssh_key
+                node.id, node.resource_class, port.id, image.id, ssh_key
             )
         elif provisioning_type == "image_url":
             url = node_config["provisioning"].get("url", None)
@@ -224,7 +237,7 @@ class Orchestrate(command.Lister):
                     "url must be specified for image URL provisioning"
                 )
             print("* Provisioning node %s from url %s" % (node.name, url))
-            esi_utils.boot_node_from_url(node.uuid, url, port.id, ironic_client)
+            esi_utils.boot_node_from_url(node.id, url, port.id, baremetal_client)
 
         if "fip_network_uuid" in network_config:
             print(
@@ -238,10 +251,16 @@ class Orchestrate(command.Lister):
             )
             cluster_dict[utils.ESI_FIP_UUID] = fip.id
 
-        utils.set_node_cluster_info(ironic_client, node.uuid, cluster_dict)
+        utils.set_node_cluster_info(baremetal_client, node.id, cluster_dict)
 
         return node, port
 
+    def timed_provision_node(self, node, provisioning_type, *args):
+        with self.metrics.timer(
+            "orchestrate.node", node=node.name, provisioning_type=provisioning_type
+        ):
+            return self.provision_node(node, provisioning_type, *args)
+
     def take_action(self, parsed_args):
         self.log.debug("take_action(%s)", parsed_args)
 
@@ -249,15 +268,33 @@ class Orchestrate(command.Lister):
         with open(cluster_config_file) as f:
             cluster_config = json.load(f)
 
-        self.assign_nodes(cluster_config)
+        self.metrics = esi_metrics.Metrics.from_url(
+            parsed_args.metrics, tags={"orchestration": "cluster"}
+        )
+        try:
+            with self.metrics.timer("orchestrate"):
+                return self.orchestrate(cluster_config)
+        finally:
+            self.metrics.close()
+
+    def orchestrate(self, cluster_config):
+        with self.metrics.timer("orchestrate.phase", phase="assign_nodes"):
+            self.assign_nodes(cluster_config)
 
         print("")
 
         print("PROVISIONING NODES")
+        from oslo_utils import uuidutils
+
         cluster_uuid = uuidutils.generate_uuid()
         node_configs = cluster_config["node_configs"]
         futures = []
-        with concurrent.futures.ThreadPoolExecutor() as executor:
+        # nodes are provisioned concurrently, up to one thread per node
+        num_nodes = sum(len(nc["nodes"]["ironic_nodes"]) for nc in node_configs)
+        esi_utils.size_http_pool(self.app.client_manager, num_nodes)
+        esi_utils.govern_api_calls(self.app.client_manager)
+        provisioning = self.metrics.timer("orchestrate.phase", phase="provision_nodes")
+        with provisioning, concurrent.futures.ThreadPoolExecutor() as executor:
             for node_config in node_configs:
                 provisioning_type = node_config["provisioning"]["provisioning_type"]
                 if provisioning_type not in self.PROVISIONING_METHODS:
@@ -267,13 +304,14 @@ class Orchestrate(command.Lister):
                 nodes = node_config["nodes"]["ironic_nodes"]
                 for node in nodes:
                     future = executor.submit(
-                        self.provision_node,
+                        self.timed_provision_node,
                         node,
                         provisioning_type,
                         node_config,
                         cluster_uuid,
                     )
                     futures.append(future)
+        self.metrics.gauge("orchestrate.nodes", len(futures))
         print("NODE PROVISIONING COMPLETE")
 
         data = []
@@ -333,17 +371,18 @@ class Undeploy(command.Command):
 
         print("STARTING UNDEPLOY for CLUSTER %s" % cluster_uuid)
 
-        ironic_client = self.app.client_manager.baremetal
+        esi_utils.govern_api_calls(self.app.client_manager)
+        baremetal_client = self.app.client_manager.sdk_connection.baremetal
         neutron_client = self.app.client_manager.network
 
-        nodes = ironic_client.node.list(fields=["uuid", "name", "extra"])
+        nodes = baremetal_client.nodes(fields=["uuid", "name", "extra"])
         cluster_found = False
         for node in nodes:
             extra = node.extra
             if extra.get(utils.ESI_CLUSTER_UUID, None) == cluster_uuid:
                 cluster_found = True
                 print("* Node %s" % node.name)
-                utils.clean_cluster_node(ironic_client, neutron_client, node)
+                utils.clean_cluster_node(baremetal_client, neutron_client, node)
 
         if cluster_found:
             print("UNDEPLOY COMPLETE")
@@ -13,12 +13,12 @@
 import json
 import logging
 import os
-import requests
 import time
 
 from osc_lib.command import command
 from osc_lib.i18n import _
 
+from esiclient import metrics as esi_metrics
 from esiclient import utils as esi_utils
 from esiclient.v1.cluster import utils
 
@@ -27,6 +27,8 @@ BASE_ASSISTED_INSTALLER_URL = "https://api.openshift.com/api/assisted-install/v2
 
 
 def call_assisted_installer_api(url, method, headers={}, data=None):
+    import requests
+
     full_url = BASE_ASSISTED_INSTALLER_URL + url
     if method == "post":
         response = requests.post(full_url, headers=headers, json=data)
@@ -45,9 +47,15 @@ def call_assisted_installer_api(url, method, headers={}, data=None):
 
 
 def wait_for_nodes(infra_env_id, headers, num_nodes, target_status):
+    """Poll the Assisted Installer until num_nodes hosts reach target_status
+
+    :returns: The number of times the hosts were polled
+    """
     waiting = True
+    polls = 0
     print("waiting for hosts to reach %s..." % target_status)
     while waiting:
+        polls += 1
         response = call_assisted_installer_api(
             "infra-envs/%s/hosts" % infra_env_id, "get", headers
         )
@@ -63,7 +71,7 @@ def wait_for_nodes(infra_env_id, headers, num_nodes, target_status):
         else:
             time.sleep(30)
     print("... hosts ready")
-    return
+    return polls
 
 
 class OSAIException(Exception):
@@ -129,15 +137,22 @@ class Orchestrate(command.Lister):
             metavar="<infra_env_id>",
             help=_("OpenShift infrastruction environment ID"),
         )
+        parser.add_argument(
+            "--metrics",
+            metavar="<url>",
+            default=os.environ.get("ESI_METRICS"),
+            help=_(
+                "Export orchestration metrics to a file path, "
+                "statsd://host:port or otlp://host:port "
+                "(Env: ESI_METRICS)"
+            ),
+        )
 
         return parser
 
     def take_action(self, parsed_args):
         self.log.debug("take_action(%s)", parsed_args)
 
-        cluster_id = parsed_args.cluster_id
-        infra_env_id = parsed_args.infra_env_id
-
         with open(parsed_args.cluster_config_file) as f:
             cluster_config = json.load(f)
 
@@ -150,6 +165,32 @@ class Orchestrate(command.Lister):
                 % missing_fields
             )
 
+        if "PULL_SECRET" not in os.environ:
+            raise utils.ESIOrchestrationException(
+                "Please export PULL_SECRET in your environment"
+            )
+        pull_secret = json.loads(os.environ["PULL_SECRET"])
+
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": "Bearer " + os.getenv("API_TOKEN", ""),
+        }
+
+        metrics = esi_metrics.Metrics.from_url(
+            parsed_args.metrics, tags={"orchestration": "openshift"}
+        )
+        try:
+            with metrics.timer("orchestrate"):
+                return self.orchestrate(
+                    parsed_args, cluster_config, pull_secret, headers, metrics
+                )
+        finally:
+            metrics.close()
+
+    def orchestrate(self, parsed_args, cluster_config, pull_secret, headers, metrics):
+        cluster_id = parsed_args.cluster_id
+        infra_env_id = parsed_args.infra_env_id
+
         nodes = cluster_config.get("nodes")
         cluster_name = cluster_config.get("cluster_name")
         provisioning_network_name = cluster_config.get(
@@ -165,25 +206,18 @@ class Orchestrate(command.Lister):
         base_dns_domain = cluster_config.get("base_dns_domain")
         ssh_public_key = cluster_config.get("ssh_public_key")
 
-        if "PULL_SECRET" not in os.environ:
-            raise utils.ESIOrchestrationException(
-                "Please export PULL_SECRET in your environment"
-            )
-        pull_secret = json.loads(os.environ["PULL_SECRET"])
-
-        ironic_client = self.app.client_manager.baremetal
+        baremetal_client = self.app.client_manager.sdk_connection.baremetal
         neutron_client = self.app.client_manager.network
 
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": "Bearer " + os.getenv("API_TOKEN", ""),
-        }
+        phases = metrics.phases("orchestrate.phase")
+        metrics.gauge("orchestrate.nodes", len(nodes))
 
         print("STARTING OPENSHIFT CLUSTER INSTALL")
 
         # get cluster id
         if not cluster_id:
             try:
+                phases.begin("create_cluster")
                 cluster_data = {
                     "name": cluster_name,
                     "openshift_version": openshift_version,
@@ -197,6 +231,7 @@ class Orchestrate(command.Lister):
                 )
                 cluster_id = response.json().get("id")
             except Exception as e:
+                phases.end(e)
                 self._print_failure_message(
                     e,
                     parsed_args.cluster_config_file,
@@ -208,6 +243,7 @@ class Orchestrate(command.Lister):
         # get infra env id
         if not infra_env_id:
             try:
+                phases.begin("create_infra_env")
                 infra_env_data = {
                     "name": "%s-infra-env" % cluster_name,
                     "image_type": "minimal-iso",
@@ -221,6 +257,7 @@ class Orchestrate(command.Lister):
                 )
                 infra_env_id = response.json().get("id")
             except Exception as e:
+                phases.end(e)
                 self._print_failure_message(
                     e,
                     parsed_args.cluster_config_file,
@@ -232,6 +269,7 @@ class Orchestrate(command.Lister):
 
         # register nodes
         try:
+            phases.begin("register_nodes")
             response = call_assisted_installer_api(
                 "infra-envs/%s/hosts" % infra_env_id, "get", headers
             )
@@ -246,24 +284,27 @@ class Orchestrate(command.Lister):
                 )
                 print("provisioning nodes")
                 for node_name in nodes:
-                    node = ironic_client.node.get(node_name)
+                    node = baremetal_client.get_node(node_name)
                     if node.provision_state == "available":
                         print("* deploying %s" % node_name)
-                        port_name = esi_utils.get_port_name(
-                            provisioning_network.name, prefix=node_name
-                        )
-                        port = esi_utils.get_or_create_port(
-                            port_name, provisioning_network, neutron_client
-                        )
-                        esi_utils.boot_node_from_url(
-                            node_name, image_url, port["id"], ironic_client
-                        )
+                        with metrics.timer("orchestrate.node", node=node_name):
+                            port_name = esi_utils.get_port_name(
+                                provisioning_network.name, prefix=node_name
+                            )
+                            port = esi_utils.get_or_create_port(
+                                port_name, provisioning_network, neutron_client
+                            )
+                            esi_utils.boot_node_from_url(
+                                node_name, image_url, port["id"], baremetal_client
+                            )
                     else:
                         print("* %s is in %s state" % (node_name, node.provision_state))
-                wait_for_nodes(infra_env_id, headers, 3, "pending-for-input")
+                polls = wait_for_nodes(infra_env_id, headers, 3, "pending-for-input")
+                metrics.increment("orchestrate.polls", polls, phase="register_nodes")
             else:
                 print("nodes already registered to cluster")
         except Exception as e:
+            phases.end(e)
             self._print_failure_message(
                 e,
                 parsed_args.cluster_config_file,
@@ -275,11 +316,12 @@ class Orchestrate(command.Lister):
 
         # move nodes to private network
         try:
+            phases.begin("private_network")
             print("ensuring nodes are on private network %s" % private_network_name)
             private_network = neutron_client.find_network(private_network_name)
             for node in nodes:
                 already_attached = False
-                bm_ports = ironic_client.port.list(node=node, detail=True)
+                bm_ports = baremetal_client.ports(node=node, fields=["internal_info"])
                 for bm_port in bm_ports:
                     port_uuid = bm_port.internal_info.get("tenant_vif_port_id", None)
                     if port_uuid:
@@ -287,8 +329,10 @@ class Orchestrate(command.Lister):
                         if port.network_id == private_network.id:
                             already_attached = True
                         else:
-                            ironic_client.node.vif_detach(node, port_uuid)
-                            neutron_client.delete_port(port_uuid)
+                            baremetal_client.detach_vif_from_node(
+                                node, port_uuid, ignore_missing=False
+                            )
+                            esi_utils.delete_port(neutron_client, port_uuid)
                 if already_attached:
                     print("* %s already on private network" % node)
                 else:
@@ -299,15 +343,16 @@ class Orchestrate(command.Lister):
                     port = esi_utils.get_or_create_port(
                         port_name, private_network, neutron_client
                     )
-                    ironic_client.node.vif_attach(node, port["id"])
-                    ironic_client.node.set_boot_device(node, "disk", True)
+                    esi_utils.attach_vif(baremetal_client, node, port["id"])
+                    baremetal_client.set_node_boot_device(node, "disk", persistent=True)
                     cluster_dict = {
                         utils.ESI_CLUSTER_UUID: cluster_id,
                         utils.ESI_PORT_UUID: port["id"],
                     }
                     # this is already node name
-                    utils.set_node_cluster_info(ironic_client, node, cluster_dict)
+                    utils.set_node_cluster_info(baremetal_client, node, cluster_dict)
         except Exception as e:
+            phases.end(e)
             self._print_failure_message(
                 e,
                 parsed_args.cluster_config_file,
@@ -320,6 +365,7 @@ class Orchestrate(command.Lister):
 
         # install cluster
         try:
+            phases.begin("install")
             response = call_assisted_installer_api(
                 "clusters/%s/" % cluster_id, "get", headers
             )
@@ -339,13 +385,15 @@ class Orchestrate(command.Lister):
                             ],
                         },
                     )
-                    wait_for_nodes(infra_env_id, headers, 3, "known")
+                    polls = wait_for_nodes(infra_env_id, headers, 3, "known")
+                    metrics.increment("orchestrate.polls", polls, phase="install")
                     print("starting install...")
                     response = call_assisted_installer_api(
                         "clusters/%s/actions/install" % cluster_id, "post", headers
                     )
                 waiting = True
                 while waiting:
+                    metrics.increment("orchestrate.polls", phase="install")
                     response = call_assisted_installer_api(
                         "clusters/%s/" % cluster_id, "get", headers
                     )
@@ -361,6 +409,7 @@ class Orchestrate(command.Lister):
             else:
                 print("install already completed")
         except Exception as e:
+            phases.end(e)
             self._print_failure_message(
                 e,
                 parsed_args.cluster_config_file,
@@ -372,6 +421,7 @@ class Orchestrate(command.Lister):
 
         # assign floating IPs to apps and api endpoints
         try:
+            phases.begin("floating_ips")
             print("checking for external floating IPs for API and apps endpoints")
             external_network = neutron_client.find_network(external_network_name)
             private_network = neutron_client.find_network(private_network_name)
@@ -398,6 +448,7 @@ class Orchestrate(command.Lister):
                 apps_port, external_network, neutron_client
             )
         except Exception as e:
+            phases.end(e)
             self._print_failure_message(
                 e,
                 parsed_args.cluster_config_file,
@@ -407,6 +458,7 @@ class Orchestrate(command.Lister):
             )
             raise utils.ESIOrchestrationException()
 
+        phases.end()
         print("OPENSHIFT CLUSTER INSTALL COMPLETE")
 
         return ["Endpoint", "IP"], [
@@ -451,9 +503,10 @@ class Undeploy(command.Command):
         api_vip = cluster_config.get("api_vip")
         ingress_vip = cluster_config.get("ingress_vip")
 
-        ironic_client = self.app.client_manager.baremetal
+        baremetal_client = self.app.client_manager.sdk_connection.baremetal
         neutron_client = self.app.client_manager.network
 
+        esi_utils.govern_api_calls(self.app.client_manager)
         print("STARTING UNDEPLOY")
 
         # delete apps and API floating and fixed IPs
@@ -469,14 +522,14 @@ class Undeploy(command.Command):
                     fip = fips[0]
                     print("   * %s" % fip.floating_ip_address)
                     neutron_client.delete_ip(fip.id)
-                neutron_client.delete_port(port.id)
+                esi_utils.delete_port(neutron_client, port.id)
 
         # undeploy nodes
         print("* undeploying nodes")
         for node_name in nodes:
             print("   * %s" % node_name)
-            node = ironic_client.node.get(node_name)
-            utils.clean_cluster_node(ironic_client, neutron_client, node)
+            node = baremetal_client.get_node(node_name)
+            utils.clean_cluster_node(baremetal_client, neutron_client, node)
 
         print("UNDEPLOY COMPLETE")
         print("-----------------")
@@ -23,14 +23,14 @@ class ESIOrchestrationException(Exception):
     pass
 
 
-def set_node_cluster_info(ironic_client, node_uuid, cluster_dict):
+def set_node_cluster_info(baremetal_client, node_uuid, cluster_dict):
     node_update = []
     for key, value in cluster_dict.items():
         node_update.append({"path": "/extra/%s" % key, "value": value, "op": "add"})
-    ironic_client.node.update(node_uuid, node_update)
+    utils.update_node(baremetal_client, node_uuid, node_update)
 
 
-def clean_cluster_node(ironic_client, neutron_client, node):
+def clean_cluster_node(baremetal_client, neutron_client, node):
     extra = node.extra
 
     node_extra_update = []
@@ -39,7 +39,7 @@ def clean_cluster_node(ironic_client, neutron_client, node):
     if ESI_PORT_UUID in extra:
         port_uuid = extra[ESI_PORT_UUID]
         print("   * deleting port %s" % port_uuid)
-        neutron_client.delete_port(port_uuid)
+        utils.delete_port(neutron_client, port_uuid)
         node_extra_update.append({"path": "/extra/esi_port_uuid", "op": "remove"})
     if ESI_TRUNK_UUID in extra:
         trunk_uuid = extra[ESI_TRUNK_UUID]
@@ -54,5 +54,5 @@ def clean_cluster_node(ironic_client, neutron_client, node):
         neutron_client.delete_ip(fip_uuid)
         node_extra_update.append({"path": "/extra/esi_fip_uuid", "op": "remove"})
 
-    ironic_client.node.update(node.uuid, node_extra_update)
-    ironic_client.node.set_provision_state(node.uuid, "deleted")
+    utils.update_node(baremetal_client, node.id, node_extra_update)
+    utils.set_provision_state(baremetal_client, node.id, "deleted")
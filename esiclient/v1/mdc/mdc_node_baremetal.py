@@ -16,6 +16,8 @@ import openstack
 from osc_lib.command import command
 from osc_lib.i18n import _
 
+from esiclient import governor
+
 
 class MDCBaremetalNodeList(command.Lister):
     """List baremetal nodes from multiple OpenStack instances"""
@@ -30,8 +32,10 @@ class MDCBaremetalNodeList(command.Lister):
             "clouds",
             metavar="<clouds>",
             nargs="*",
-            help=_("Specify the cloud to use from clouds.yaml."),
-            default=openstack.config.OpenStackConfig().get_cloud_names(),
+            help=_(
+                "Specify the cloud to use from clouds.yaml. "
+                "Defaults to all configured clouds."
+            ),
         )
 
         return parser
@@ -48,8 +52,17 @@ class MDCBaremetalNodeList(command.Lister):
         ]
         data = []
 
-        for cloud in parsed_args.clouds:
+        # reading clouds.yaml is deferred until it is needed, so that building
+        # the parser for other commands does not pay for it
+        clouds = (
+            parsed_args.clouds or openstack.config.OpenStackConfig().get_cloud_names()
+        )
+
+        for cloud in clouds:
             try:
+                connection = openstack.connect(cloud=cloud)
+                # each cloud is paced separately, as they share no services
+                governor.govern(connection.session)
                 data.extend(
                     [
                         cloud,
@@ -60,7 +73,7 @@ class MDCBaremetalNodeList(command.Lister):
                         node.provision_state,
                         node.is_maintenance,
                     ]
-                    for node in openstack.connect(cloud=cloud).list_machines()
+                    for node in connection.list_machines()
                 )
             except Exception as err:
                 if parsed_args.ignore_invalid:
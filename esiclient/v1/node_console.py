@@ -10,47 +10,542 @@
 #   License for the specific language governing permissions and limitations
 #   under the License.
 
-import json
+import contextlib
+import functools
 import logging
+import logging.handlers
 import os
+import re
+import sys
+import time
+import urllib.parse
 
 from osc_lib.command import command
 from osc_lib import exceptions
 from osc_lib.i18n import _
 
+from esiclient import utils
+
+BUFFER_SIZE = 65536
+CONNECT_TIMEOUT = 10
+CONSOLE_ENABLE_TIMEOUT = 60
+CONSOLE_POLL_INTERVAL = 2
+DEFAULT_CAPTURE_TIMEOUT = 300
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 3
+
+# ctrl-], as in telnet; raw mode passes ctrl-c through to the console
+ESCAPE = b"\x1d"
+
+
+def parse_console_url(url):
+    """Return the (host, port) address of a socat console url"""
+    parsed = urllib.parse.urlsplit(url)
+    try:
+        port = parsed.port
+    except ValueError:
+        port = None
+    if parsed.scheme != "tcp" or not parsed.hostname or not port:
+        raise exceptions.CommandError("ERROR: Unsupported console url %s" % url)
+    return parsed.hostname, port
+
+
+def get_console_address(baremetal_client, node):
+    """Return the (host, port) address of a node's console"""
+    console_info = baremetal_client.get_node_console(node)["console_info"]
+
+    if console_info is None:
+        raise exceptions.CommandError(
+            "ERROR: No console info for %s. "
+            "Run openstack baremetal node console "
+            "enable for given node" % node
+        )
+
+    return parse_console_url(console_info["url"])
+
+
+def connect(address):
+    """Open a non-blocking socket to a console address"""
+    import socket
+
+    sock = socket.create_connection(address, timeout=CONNECT_TIMEOUT)
+    sock.setblocking(False)
+    return sock
+
+
+def write_all(fd, data):
+    """Write all of data to a file descriptor, retrying short writes"""
+    data = memoryview(data)
+    while data:
+        data = data[os.write(fd, data) :]
+
+
+@contextlib.contextmanager
+def raw_mode(fd):
+    """Put a terminal into raw mode, restoring its settings on exit
+
+    Does nothing if fd is not a terminal, e.g. when input is piped in.
+    """
+    if not os.isatty(fd):
+        yield
+        return
+
+    import termios
+    import tty
+
+    saved = termios.tcgetattr(fd)
+    try:
+        tty.setraw(fd)
+        yield
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, saved)
+
+
+async def relay_output(sock, output, log_file=None):
+    """Relay everything read from a console socket until it closes
+
+    Data is received into a single reusable buffer and handed on as
+    memoryview slices of it, so nothing is copied on the way through.
+
+    :param sock: Non-blocking console socket
+    :param output: Callable taking each chunk of console output
+    :param log_file: Optional binary file to append console output to
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    buf = bytearray(BUFFER_SIZE)
+    view = memoryview(buf)
+
+    while True:
+        received = await loop.sock_recv_into(sock, buf)
+        if not received:
+            return
+        output(view[:received])
+        if log_file is not None:
+            log_file.write(view[:received])
+
+
+async def interactive_session(sock, input_fd, output_fd, log_file=None):
+    """Connect file descriptors to a console socket
+
+    Runs until the console closes, input reaches end of file, or the
+    escape character is read from input.
+
+    :param sock: Non-blocking console socket
+    :param input_fd: File descriptor to send to the console
+    :param output_fd: File descriptor to write console output to
+    :param log_file: Optional binary file to append console output to
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    keystrokes = asyncio.Queue()
+
+    def read_input():
+        data = os.read(input_fd, BUFFER_SIZE)
+        if ESCAPE in data:
+            data = data[: data.index(ESCAPE)]
+            keystrokes.put_nowait(data)
+            data = b""
+        if not data:
+            loop.remove_reader(input_fd)
+            keystrokes.put_nowait(None)
+            return
+        keystrokes.put_nowait(data)
+
+    async def relay_input():
+        while True:
+            data = await keystrokes.get()
+            if data is None:
+                return
+            await loop.sock_sendall(sock, data)
+
+    loop.add_reader(input_fd, read_input)
+    tasks = [
+        asyncio.ensure_future(relay_input()),
+        asyncio.ensure_future(
+            relay_output(sock, functools.partial(write_all, output_fd), log_file)
+        ),
+    ]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
+    finally:
+        loop.remove_reader(input_fd)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class LineSplitter(object):
+    """Split console output into lines of text
+
+    A line that grows past BUFFER_SIZE without ending is split there, so a
+    console that never prints a newline cannot use unbounded memory.
+
+    :param write_line: Callable taking each line, without its line ending
+    """
+
+    def __init__(self, write_line):
+        self.write_line = write_line
+        self.partial = b""
+
+    def __call__(self, data):
+        lines = (self.partial + data).split(b"\n")
+        self.partial = lines.pop()
+        while len(self.partial) > BUFFER_SIZE:
+            lines.append(self.partial[:BUFFER_SIZE])
+            self.partial = self.partial[BUFFER_SIZE:]
+        for line in lines:
+            self.emit(line)
+
+    def flush(self):
+        if self.partial:
+            self.emit(self.partial)
+            self.partial = b""
+
+    def emit(self, line):
+        self.write_line(line.rstrip(b"\r").decode("utf-8", errors="replace"))
+
+
+async def tail_consoles(sockets, write, log_file=None):
+    """Print the output of several consoles until they all close
+
+    :param sockets: Dict mapping node names to non-blocking console sockets
+    :param write: Callable taking each prefixed line of console output
+    :param log_file: Optional text file to append prefixed lines to
+    """
+    import asyncio
+
+    def output(node, line):
+        line = "[%s] %s\n" % (node, line)
+        write(line)
+        if log_file is not None:
+            log_file.write(line)
+
+    async def tail(node, sock):
+        splitter = LineSplitter(functools.partial(output, node))
+        try:
+            await relay_output(sock, splitter)
+        finally:
+            splitter.flush()
+
+    await asyncio.gather(*(tail(node, sock) for node, sock in sockets.items()))
+
+
+def enable_console(baremetal_client, node, timeout=CONSOLE_ENABLE_TIMEOUT):
+    """Enable a node's console if needed, and return its address
+
+    :param baremetal_client: Baremetal client
+    :param node: Node name or UUID
+    :param timeout: Maximum time to wait for the console to be enabled
+    :returns: The (host, port) address of the console
+    """
+    console = baremetal_client.get_node_console(node)
+    if not console["console_enabled"]:
+        baremetal_client.enable_node_console(node)
+
+    deadline = time.monotonic() + timeout
+    while console["console_info"] is None:
+        if time.monotonic() > deadline:
+            raise exceptions.CommandError(
+                "ERROR: Timed out enabling console for %s" % node
+            )
+        time.sleep(CONSOLE_POLL_INTERVAL)
+        console = baremetal_client.get_node_console(node)
+
+    return parse_console_url(console["console_info"]["url"])
+
+
+class ConsoleCapture(object):
+    """Write a node's console output to a rotating log, watching for a pattern
+
+    :param node: Node name or UUID
+    :param handler: Logging handler to write each line to
+    :param pattern: Optional compiled regular expression to search lines for
+    """
+
+    def __init__(self, node, handler, pattern=None):
+        self.node = node
+        self.handler = handler
+        self.pattern = pattern
+        self.lines = 0
+        self.match = None
+        # set by capture_consoles, which creates it inside the event loop
+        self.matched = None
+        self.splitter = LineSplitter(self.write_line)
+
+    def write_line(self, line):
+        self.lines += 1
+        self.handler.handle(logging.makeLogRecord({"msg": line}))
+        if self.pattern and self.match is None and self.pattern.search(line):
+            self.match = line
+            if self.matched is not None:
+                self.matched.set()
+
+
+async def capture_consoles(sockets, captures, timeout):
+    """Capture consoles until they close or timeout expires
+
+    If every capture has a pattern, capturing also stops as soon as each
+    of them has matched.
+
+    :param sockets: Dict mapping node names to non-blocking console sockets
+    :param captures: Dict mapping node names to ConsoleCapture
+    :param timeout: Maximum time to capture for
+    :returns: A dict mapping node names to the error that ended their
+        capture early, for consoles that failed
+    """
+    import asyncio
+
+    for capture in captures.values():
+        capture.matched = asyncio.Event()
+
+    relays = {
+        node: asyncio.ensure_future(relay_output(sock, captures[node].splitter))
+        for node, sock in sockets.items()
+    }
+    # one console failing must not end the capture of the others
+    waits = [
+        asyncio.ensure_future(asyncio.gather(*relays.values(), return_exceptions=True))
+    ]
+    if all(capture.pattern for capture in captures.values()):
+        waits.append(
+            asyncio.ensure_future(
+                asyncio.gather(*(c.matched.wait() for c in captures.values()))
+            )
+        )
+
+    try:
+        await asyncio.wait(waits, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in waits + list(relays.values()):
+            task.cancel()
+        await asyncio.gather(*waits, *relays.values(), return_exceptions=True)
+        for capture in captures.values():
+            capture.splitter.flush()
+
+    return {
+        node: relay.exception()
+        for node, relay in relays.items()
+        if not relay.cancelled() and relay.exception()
+    }
+
 
 class NodeConsoleConnect(command.Command):
-    """Connect the node console"""
+    """Connect the node console
+
+    With a single node, the terminal is attached to the console; press
+    ctrl-] to disconnect. With several nodes, their consoles are followed
+    read-only, with each line prefixed by its node.
+    """
 
     log = logging.getLogger(__name__ + ".NodeConsoleConnect")
 
     def get_parser(self, prog_name):
         parser = super(NodeConsoleConnect, self).get_parser(prog_name)
-        parser.add_argument("node", metavar="<node>", help=_("node"))
+        parser.add_argument("node", metavar="<node>", nargs="+", help=_("node"))
+        parser.add_argument(
+            "--log-file",
+            metavar="<log_file>",
+            help=_("Append console output to this file"),
+        )
 
         return parser
 
     def take_action(self, parsed_args):
         self.log.debug("take_action(%s)", parsed_args)
 
-        node = parsed_args.node
+        import asyncio
 
-        ironic_client = self.app.client_manager.baremetal
+        nodes = list(dict.fromkeys(parsed_args.node))
 
-        output = ironic_client.node.get_console(node)
+        baremetal_client = self.app.client_manager.sdk_connection.baremetal
 
-        console_show_output = json.loads(json.dumps(output))
+        addresses = utils.fetch_concurrently(
+            {
+                node: functools.partial(get_console_address, baremetal_client, node)
+                for node in nodes
+            }
+        )
 
-        console_info = console_show_output["console_info"]
+        sockets = {}
+        log_file = None
+        try:
+            for node in nodes:
+                sockets[node] = connect(addresses[node])
 
-        if console_info is None:
-            raise exceptions.CommandError(
-                "ERROR: No console info for %s. "
-                "Run openstack baremetal node console "
-                "enable for given node" % node
+            if len(nodes) == 1:
+                if parsed_args.log_file:
+                    log_file = open(parsed_args.log_file, "ab")
+                input_fd = sys.stdin.fileno()
+                sys.stderr.write(
+                    "Connected to %s; press ctrl-] to disconnect\n" % nodes[0]
+                )
+                with raw_mode(input_fd):
+                    asyncio.run(
+                        interactive_session(
+                            sockets[nodes[0]], input_fd, sys.stdout.fileno(), log_file
+                        )
+                    )
+            else:
+                if parsed_args.log_file:
+                    log_file = open(parsed_args.log_file, "a")
+                asyncio.run(tail_consoles(sockets, self._write_line, log_file))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for sock in sockets.values():
+                sock.close()
+            if log_file is not None:
+                log_file.close()
+
+        return 0
+
+    def _write_line(self, line):
+        self.app.stdout.write(line)
+        self.app.stdout.flush()
+
+
+class NodeConsoleCapture(command.Lister):
+    """Capture the consoles of many nodes to log files
+
+    Consoles are enabled first if needed, and each node's output is written
+    to <directory>/<node>.log, rotating at --max-bytes.
+    """
+
+    log = logging.getLogger(__name__ + ".NodeConsoleCapture")
+    failed = 0
+
+    def get_parser(self, prog_name):
+        parser = super(NodeConsoleCapture, self).get_parser(prog_name)
+        parser.add_argument(
+            "node", metavar="<node>", nargs="+", help=_("Nodes (names or UUIDs)")
+        )
+        parser.add_argument(
+            "--log-dir",
+            metavar="<directory>",
+            required=True,
+            help=_("Directory to write console logs to"),
+        )
+        parser.add_argument(
+            "--pattern",
+            metavar="<regex>",
+            type=re.compile,
+            help=_(
+                "Report the first line of each console matching this regular "
+                "expression, and stop once every console has matched"
+            ),
+        )
+        parser.add_argument(
+            "--timeout",
+            type=int,
+            default=DEFAULT_CAPTURE_TIMEOUT,
+            metavar="<seconds>",
+            help=_(
+                "Maximum time to capture for (default: %d)" % DEFAULT_CAPTURE_TIMEOUT
+            ),
+        )
+        parser.add_argument(
+            "--max-bytes",
+            type=int,
+            default=DEFAULT_MAX_BYTES,
+            metavar="<bytes>",
+            help=_(
+                "Rotate each log file when it reaches this size (default: %d)"
+                % DEFAULT_MAX_BYTES
+            ),
+        )
+        parser.add_argument(
+            "--backup-count",
+            type=int,
+            default=DEFAULT_BACKUP_COUNT,
+            metavar="<count>",
+            help=_(
+                "Number of rotated log files to keep per node (default: %d)"
+                % DEFAULT_BACKUP_COUNT
+            ),
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=utils.DEFAULT_CONCURRENCY,
+            metavar="<concurrency>",
+            help=_(
+                "Maximum number of consoles to enable at once (default: %d)"
+                % utils.DEFAULT_CONCURRENCY
+            ),
+        )
+
+        return parser
+
+    def run(self, parsed_args):
+        self.failed = 0
+        result = super(NodeConsoleCapture, self).run(parsed_args)
+        if self.failed:
+            self.log.error("%s console(s) could not be captured", self.failed)
+            return 1
+        return result
+
+    def take_action(self, parsed_args):
+        self.log.debug("take_action(%s)", parsed_args)
+
+        import asyncio
+
+        nodes = list(dict.fromkeys(parsed_args.node))
+
+        baremetal_client = self.app.client_manager.sdk_connection.baremetal
+
+        def open_console(node):
+            return connect(enable_console(baremetal_client, node))
+
+        utils.size_http_pool(self.app.client_manager, parsed_args.concurrency)
+        utils.govern_api_calls(self.app.client_manager)
+
+        opened = utils.run_concurrently(open_console, nodes, parsed_args.concurrency)
+        sockets = {result.item: result.result for result in opened if not result.error}
+        errors = {result.item: result.error for result in opened if result.error}
+
+        os.makedirs(parsed_args.log_dir, exist_ok=True)
+        paths = {
+            node: os.path.join(parsed_args.log_dir, "%s.log" % node) for node in nodes
+        }
+        captures = {}
+        try:
+            for node in sockets:
+                handler = logging.handlers.RotatingFileHandler(
+                    paths[node],
+                    maxBytes=parsed_args.max_bytes,
+                    backupCount=parsed_args.backup_count,
+                    encoding="utf-8",
+                )
+                captures[node] = ConsoleCapture(node, handler, parsed_args.pattern)
+
+            errors.update(
+                asyncio.run(capture_consoles(sockets, captures, parsed_args.timeout))
+            )
+        finally:
+            for sock in sockets.values():
+                sock.close()
+            for capture in captures.values():
+                capture.handler.close()
+
+        data = []
+        for node in nodes:
+            capture = captures.get(node)
+            error = errors.get(node)
+            if error:
+                self.failed += 1
+            data.append(
+                [
+                    node,
+                    paths[node] if capture else None,
+                    capture.lines if capture else None,
+                    capture.match if capture else None,
+                    str(error) if error else None,
+                ]
             )
 
-        else:
-            connect_url = console_show_output["console_info"]["url"]
-            connect_url = connect_url.replace("//", "")
-            return os.system("socat " + connect_url + " -")
+        return ["Node", "Log File", "Lines", "Match", "Error"], data
@@ -14,10 +14,9 @@ import json
 import logging
 
 from osc_lib.command import command
+from osc_lib import exceptions
 from osc_lib.i18n import _
 
-from esi.lib import nodes
-
 from esiclient import utils
 
 
@@ -50,114 +49,12 @@ class List(command.Lister):
 
     def take_action(self, parsed_args):
         self.log.debug("take_action(%s)", parsed_args)
-        node_networks = nodes.network_list(
+        node_networks = utils.node_network_list(
             self.app.client_manager.sdk_connection,
             parsed_args.node,
             parsed_args.network,
         )
 
-        data = []
-        for node_network in node_networks:
-            for node_port in node_network["network_info"]:
-                node_name = node_network["node"].name
-                node_uuid = node_network["node"].id
-                mac_address = node_port["baremetal_port"].address
-                baremetal_port_uuid = node_port["baremetal_port"].id
-
-                network_port_name = None
-                network_port_uuid = None
-                trunk_uuid = None
-                network_names = None
-                network_uuids = None
-                fixed_ips = None
-                floating_network = None
-                floating_network_uuid = None
-                floating_ip = None
-                floating_ip_uuid = None
-
-                if node_port["networks"]:
-                    if len(node_port["network_ports"]):
-                        primary_port = node_port["network_ports"][0]
-                        network_port_name = getattr(primary_port, "name")
-                        network_port_uuid = getattr(primary_port, "id")
-                        if getattr(primary_port, "trunk_details"):
-                            trunk_uuid = getattr(primary_port, "trunk_details")[
-                                "trunk_id"
-                            ]
-
-                    parent_network = node_port["networks"]["parent"]
-                    trunk_networks = node_port["networks"]["trunk"] or []
-
-                    network_names = (
-                        "\n".join(
-                            [
-                                utils.get_network_display_name(network)
-                                for network in [parent_network] + trunk_networks
-                                if network is not None
-                            ]
-                        )
-                        or None
-                    )
-                    network_uuids = (
-                        "\n".join(
-                            [
-                                network.id
-                                for network in [parent_network] + trunk_networks
-                                if network is not None
-                            ]
-                        )
-                        or None
-                    )
-
-                    fixed_ips = (
-                        "\n".join(
-                            [
-                                ",".join([ip["ip_address"] for ip in port.fixed_ips])
-                                for port in node_port["network_ports"]
-                            ]
-                        )
-                        or None
-                    )
-
-                    if node_port["networks"]["floating"]:
-                        floating_network = utils.get_network_display_name(
-                            node_port["networks"]["floating"]
-                        )
-                        floating_network_uuid = node_port["networks"]["floating"].id
-
-                        pfwd_ports = [
-                            "%s:%s" % (pfwd.internal_port, pfwd.external_port)
-                            for pfwd in node_port["port_forwardings"]
-                        ]
-
-                        floating_ip = node_port["floating_ip"].floating_ip_address
-                        if len(pfwd_ports):
-                            floating_ip += " (%s)" % ",".join(pfwd_ports)
-                        floating_ip_uuid = node_port["floating_ip"].id
-
-                row = [
-                    node_name,
-                    mac_address,
-                    network_port_name,
-                    network_names,
-                    fixed_ips,
-                    floating_network,
-                    floating_ip,
-                ]
-                if parsed_args.long:
-                    row.extend(
-                        [
-                            node_uuid,
-                            baremetal_port_uuid,
-                            network_port_uuid,
-                            trunk_uuid,
-                            network_uuids,
-                            floating_network_uuid,
-                            floating_ip_uuid,
-                        ]
-                    )
-                data.append(row)
-
         headers = [
             "Node",
             "MAC Address",
@@ -180,28 +77,167 @@ class List(command.Lister):
                 ]
             )
 
-        return headers, data
+        def rows():
+            """Yield one row per node port, so that cliff can stream output"""
+            display_names = {}
+
+            def display_name(network):
+                if network.id not in display_names:
+                    display_names[network.id] = utils.get_network_display_name(network)
+                return display_names[network.id]
+
+            for node_network in node_networks:
+                for node_port in node_network["network_info"]:
+                    node_name = node_network["node"].name
+                    node_uuid = node_network["node"].id
+                    mac_address = node_port["baremetal_port"].address
+                    baremetal_port_uuid = node_port["baremetal_port"].id
+
+                    network_port_name = None
+                    network_port_uuid = None
+                    trunk_uuid = None
+                    network_names = None
+                    network_uuids = None
+                    fixed_ips = None
+                    floating_network = None
+                    floating_network_uuid = None
+                    floating_ip = None
+                    floating_ip_uuid = None
+
+                    if node_port["networks"]:
+                        if len(node_port["network_ports"]):
+                            primary_port = node_port["network_ports"][0]
+                            network_port_name = getattr(primary_port, "name")
+                            network_port_uuid = getattr(primary_port, "id")
+                            if getattr(primary_port, "trunk_details"):
+                                trunk_uuid = getattr(primary_port, "trunk_details")[
+                                    "trunk_id"
+                                ]
+
+                        parent_network = node_port["networks"]["parent"]
+                        trunk_networks = node_port["networks"]["trunk"] or []
+
+                        network_names = (
+                            "\n".join(
+                                [
+                                    display_name(network)
+                                    for network in [parent_network] + trunk_networks
+                                    if network is not None
+                                ]
+                            )
+                            or None
+                        )
+                        network_uuids = (
+                            "\n".join(
+                                [
+                                    network.id
+                                    for network in [parent_network] + trunk_networks
+                                    if network is not None
+                                ]
+                            )
+                            or None
+                        )
+
+                        fixed_ips = (
+                            "\n".join(
+                                [
+                                    ",".join(
+                                        [ip["ip_address"] for ip in port.fixed_ips]
+                                    )
+                                    for port in node_port["network_ports"]
+                                ]
+                            )
+                            or None
+                        )
+
+                        if node_port["networks"]["floating"]:
+                            floating_network = display_name(
+                                node_port["networks"]["floating"]
+                            )
+                            floating_network_uuid = node_port["networks"]["floating"].id
+
+                            pfwd_ports = [
+                                "%s:%s" % (pfwd.internal_port, pfwd.external_port)
+                                for pfwd in node_port["port_forwardings"]
+                            ]
+
+                            floating_ip = node_port["floating_ip"].floating_ip_address
+                            if len(pfwd_ports):
+                                floating_ip += " (%s)" % ",".join(pfwd_ports)
+                            floating_ip_uuid = node_port["floating_ip"].id
+
+                    row = [
+                        node_name,
+                        mac_address,
+                        network_port_name,
+                        network_names,
+                        fixed_ips,
+                        floating_network,
+                        floating_ip,
+                    ]
+                    if parsed_args.long:
+                        row.extend(
+                            [
+                                node_uuid,
+                                baremetal_port_uuid,
+                                network_port_uuid,
+                                trunk_uuid,
+                                network_uuids,
+                                floating_network_uuid,
+                                floating_ip_uuid,
+                            ]
+                        )
+                    yield row
+
+        return headers, rows()
 
 
 class Show(command.ShowOne):
-    """Show network details for one node"""
+    """Show network details for one or more nodes"""
 
     log = logging.getLogger(__name__ + ".Show")
 
+    COLUMNS = ["Node", "Node UUID", "Node Ports"]
+
     def get_parser(self, prog_name):
         parser = super(Show, self).get_parser(prog_name)
         parser.add_argument(
-            "node", metavar="<node>", help=_("Name or UUID of the node")
+            "node",
+            metavar="<node>",
+            nargs="*",
+            help=_(
+                "Name or UUID of the node. If more than one node is given, "
+                "one JSON document is written per node."
+            ),
         )
-        return parser
-
-    def take_action(self, parsed_args):
-        self.log.debug("take_action(%s)", parsed_args)
-        node_networks = nodes.network_list(
-            self.app.client_manager.sdk_connection, parsed_args.node
+        parser.add_argument(
+            "--node-file",
+            dest="node_file",
+            metavar="<node_file>",
+            help=_(
+                "File containing node names or UUIDs, one per line. "
+                "One JSON document is written per node."
+            ),
         )
+        return parser
 
-        node_network = node_networks[0]
+    def _get_node_names(self, parsed_args):
+        node_names = list(parsed_args.node)
+        if parsed_args.node_file:
+            with open(parsed_args.node_file) as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        node_names.append(line)
+        if not node_names:
+            raise exceptions.CommandError("ERROR: You must specify at least one node")
+        return node_names
+
+    def _multiple(self, parsed_args):
+        return parsed_args.node_file is not None or len(parsed_args.node) > 1
+
+    @staticmethod
+    def _node_ports(node_network):
         node_ports = []
         for node_port in node_network["network_info"]:
             node_port_info = {
@@ -246,8 +282,57 @@ class Show(command.ShowOne):
                 node_port_info["trunk_networks"] = trunk_network_list
 
             node_ports.append(node_port_info)
+        return node_ports
+
+    def _show_multiple(self, connection, node_names):
+        # list every node once and resolve the requested names against the
+        # shared indexes, rather than querying the API per node
+        prefetch = utils.node_network_prefetch(connection)
+        nodes_by_key = {}
+        for node in prefetch["nodes"]:
+            nodes_by_key.setdefault(node.name, node)
+            nodes_by_key[node.id] = node
+
+        unknown = [name for name in node_names if name not in nodes_by_key]
+        if unknown:
+            raise exceptions.CommandError(
+                "ERROR: Unknown nodes: {0}".format(", ".join(unknown))
+            )
+
+        selected = [nodes_by_key[name] for name in node_names]
+        prefetch["nodes"] = list({node.id: node for node in selected}.values())
+        network_info = {
+            node_network["node"].id: node_network
+            for node_network in utils.join_node_networks(connection, prefetch)
+        }
+
+        return (
+            [
+                node.name,
+                node.id,
+                self._node_ports(
+                    network_info.get(node.id, {"node": node, "network_info": []})
+                ),
+            ]
+            for node in selected
+        )
+
+    def take_action(self, parsed_args):
+        self.log.debug("take_action(%s)", parsed_args)
+        connection = self.app.client_manager.sdk_connection
+        node_names = self._get_node_names(parsed_args)
+
+        if self._multiple(parsed_args):
+            return self.COLUMNS, self._show_multiple(connection, node_names)
+
+        prefetch = utils.node_network_prefetch(connection, node_names[0])
+        node_network = next(
+            utils.join_node_networks(connection, prefetch),
+            {"node": prefetch["nodes"][0], "network_info": []},
+        )
+        node_ports = self._node_ports(node_network)
 
-        return ["Node", "Node UUID", "Node Ports"], [
+        return self.COLUMNS, [
             node_network["node"].name,
             node_network["node"].id,
             node_ports
@@ -255,6 +340,15 @@ class Show(command.ShowOne):
             else json.dumps(node_ports, indent=2),
         ]
 
+    def produce_output(self, parsed_args, column_names, data):
+        if not self._multiple(parsed_args):
+            return super(Show, self).produce_output(parsed_args, column_names, data)
+
+        for node_data in data:
+            self.app.stdout.write(json.dumps(dict(zip(column_names, node_data))))
+            self.app.stdout.write("\n")
+        return 0
+
 
 class Attach(command.ShowOne):
     """Attach network to node"""
@@ -293,6 +387,8 @@ class Attach(command.ShowOne):
     def take_action(self, parsed_args):
         self.log.debug("take_action(%s)", parsed_args)
 
+        from esi.lib import nodes
+
         attach_info = {}
 
         if parsed_args.network:
@@ -344,6 +440,7 @@ class Detach(command.Command):
 
     def take_action(self, parsed_args):
         self.log.debug("take_action(%s)", parsed_args)
+        from esi.lib import nodes
 
         nodes.network_detach(
             self.app.client_manager.sdk_connection,
@@ -351,3 +448,162 @@ class Detach(command.Command):
             port_names_or_uuids=parsed_args.port,
             all_ports=parsed_args.all,
         )
+
+
+def load_manifest(manifest_file):
+    """Load a JSON list of node network operations
+
+    :param manifest_file: path to the manifest file
+    """
+    with open(manifest_file) as f:
+        manifest = json.load(f)
+
+    if not isinstance(manifest, list):
+        raise exceptions.CommandError("ERROR: Manifest must be a list of entries")
+    for entry in manifest:
+        if not isinstance(entry, dict) or not entry.get("node"):
+            raise exceptions.CommandError(
+                "ERROR: Every manifest entry must specify a node: {0}".format(entry)
+            )
+    return manifest
+
+
+class BatchCommand(command.Lister):
+    """Base class for commands that apply a manifest of node operations"""
+
+    def get_parser(self, prog_name):
+        parser = super(BatchCommand, self).get_parser(prog_name)
+        parser.add_argument(
+            "manifest",
+            metavar="<manifest>",
+            help=_("JSON file containing a list of operations"),
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=utils.DEFAULT_CONCURRENCY,
+            metavar="<concurrency>",
+            help=_(
+                "Maximum number of operations to run at once (default: %d)"
+                % utils.DEFAULT_CONCURRENCY
+            ),
+        )
+        return parser
+
+    def run(self, parsed_args):
+        self.failed = 0
+        result = super(BatchCommand, self).run(parsed_args)
+        if self.failed:
+            self.log.error("%s operation(s) failed", self.failed)
+            return 1
+        return result
+
+    def run_manifest(self, parsed_args, func):
+        if parsed_args.concurrency < 1:
+            raise exceptions.CommandError("ERROR: --concurrency must be at least 1")
+        manifest = load_manifest(parsed_args.manifest)
+        utils.size_http_pool(self.app.client_manager, parsed_args.concurrency)
+        utils.govern_api_calls(self.app.client_manager)
+        results = utils.run_concurrently(func, manifest, parsed_args.concurrency)
+        self.failed = sum(1 for result in results if result.error)
+        return results
+
+
+class BatchAttach(BatchCommand):
+    """Attach networks to nodes from a manifest"""
+
+    log = logging.getLogger(__name__ + ".BatchAttach")
+
+    def take_action(self, parsed_args):
+        self.log.debug("take_action(%s)", parsed_args)
+        from esi.lib import nodes
+
+        connection = self.app.client_manager.sdk_connection
+
+        def attach(entry):
+            attach_info = {
+                key: entry[key]
+                for key in ["network", "port", "trunk", "mac_address"]
+                if entry.get(key)
+            }
+            return nodes.network_attach(connection, entry["node"], attach_info)
+
+        data = []
+        for batch_result in self.run_manifest(parsed_args, attach):
+            entry, result = batch_result.item, batch_result.result
+            if batch_result.error:
+                row = [entry["node"], entry.get("mac_address"), None, None, None]
+            else:
+                row = [
+                    result["node"].name,
+                    result["ports"][0].mac_address,
+                    "\n".join([port.name for port in result["ports"]]),
+                    "\n".join([network.name for network in result["networks"]]),
+                    "\n".join(
+                        [
+                            ip["ip_address"]
+                            for port in result["ports"]
+                            for ip in port.fixed_ips
+                        ]
+                    ),
+                ]
+            row.extend(
+                [
+                    str(batch_result.error) if batch_result.error else None,
+                    "%.2f" % batch_result.elapsed,
+                ]
+            )
+            data.append(row)
+
+        return [
+            "Node",
+            "MAC Address",
+            "Port",
+            "Network",
+            "Fixed IP",
+            "Error",
+            "Time (s)",
+        ], data
+
+
+class BatchDetach(BatchCommand):
+    """Detach networks from nodes from a manifest"""
+
+    log = logging.getLogger(__name__ + ".BatchDetach")
+
+    def take_action(self, parsed_args):
+        self.log.debug("take_action(%s)", parsed_args)
+        from esi.lib import nodes
+
+        connection = self.app.client_manager.sdk_connection
+
+        def detach(entry):
+            ports = entry.get("ports", [])
+            if entry.get("port"):
+                ports = ports + [entry["port"]]
+            detached = nodes.network_detach(
+                connection,
+                entry["node"],
+                port_names_or_uuids=ports,
+                all_ports=entry.get("all", False),
+            )
+            failed = [port_id for port_id, success in detached if not success]
+            if failed:
+                raise exceptions.CommandError(
+                    "ERROR: Failed to detach {0}".format(", ".join(failed))
+                )
+            return detached
+
+        data = []
+        for batch_result in self.run_manifest(parsed_args, detach):
+            detached = batch_result.result or []
+            data.append(
+                [
+                    batch_result.item["node"],
+                    "\n".join([port_id for port_id, _ in detached]),
+                    str(batch_result.error) if batch_result.error else None,
+                    "%.2f" % batch_result.elapsed,
+                ]
+            )
+
+        return ["Node", "Port", "Error", "Time (s)"], data
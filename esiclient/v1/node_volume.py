@@ -10,19 +10,26 @@
 #   License for the specific language governing permissions and limitations
 #   under the License.
 
+import argparse
+import collections
 from datetime import datetime
+import fnmatch
 import logging
+import time
 
 from osc_lib.command import command
 from osc_lib import exceptions
 from osc_lib.i18n import _
-from oslo_utils import uuidutils
 
 from esiclient import utils
 
 
 AVAILABLE = "available"
 ACTIVE = "active"
+DEPLOY_FAILED = "deploy failed"
+
+DEFAULT_WAIT_TIMEOUT = 1800
+WAIT_INTERVAL = 10
 
 
 class Attach(command.ShowOne):
@@ -49,6 +56,7 @@ class Attach(command.ShowOne):
 
     def take_action(self, parsed_args):
         self.log.debug("take_action(%s)", parsed_args)
+        from oslo_utils import uuidutils
 
         node_uuid = parsed_args.node
         volume_uuid = parsed_args.volume
@@ -60,104 +68,508 @@ class Attach(command.ShowOne):
                 "ERROR: You must specify either network or port"
             )
 
-        ironic_client = self.app.client_manager.baremetal
+        baremetal_client = self.app.client_manager.sdk_connection.baremetal
         neutron_client = self.app.client_manager.network
         cinder_client = self.app.client_manager.volume
 
+        def get_volume():
+            if uuidutils.is_uuid_like(volume_uuid):
+                return cinder_client.volumes.get(volume_uuid)
+            return cinder_client.volumes.find(name=volume_uuid)
+
+        # all reads are independent of each other, so make them at once
+        reads = {
+            "get node": lambda: baremetal_client.get_node(node_uuid),
+            "get volume": get_volume,
+            "list baremetal ports": lambda: list(
+                baremetal_client.ports(node=node_uuid, fields=["internal_info"])
+            ),
+            "list volume connectors": lambda: list(
+                baremetal_client.volume_connectors(node=node_uuid, fields=["uuid"])
+            ),
+            "list volume targets": lambda: list(
+                baremetal_client.volume_targets(node=node_uuid, fields=["volume_id"])
+            ),
+        }
         if parsed_args.network:
-            network = neutron_client.find_network(parsed_args.network)
-            port = None
-        elif parsed_args.port:
-            port = neutron_client.find_port(parsed_args.port)
-
-        node = ironic_client.node.get(node_uuid)
-        if uuidutils.is_uuid_like(volume_uuid):
-            volume = cinder_client.volumes.get(volume_uuid)
+            reads["find network"] = lambda: neutron_client.find_network(
+                parsed_args.network
+            )
         else:
-            volume = cinder_client.volumes.find(name=volume_uuid)
+            reads["find port"] = lambda: neutron_client.find_port(parsed_args.port)
+        results = utils.fetch_concurrently(reads)
 
-        # check node state
-        if node.provision_state != AVAILABLE:
-            raise exceptions.CommandError(
-                "ERROR: Node {0} must be in the available state".format(node.name)
-            )
+        node = results["get node"]
+        volume = results["get volume"]
+
+        check_attachable(node, volume, results["list baremetal ports"])
+        attach_volume(
+            baremetal_client,
+            neutron_client,
+            node_uuid,
+            node,
+            volume,
+            results["list volume connectors"],
+            [vt.volume_id for vt in results["list volume targets"]],
+            network=results.get("find network"),
+            port=results.get("find port"),
+        )
+
+        return ["Node", "Volume"], [node.name, volume.name]
+
+
+def check_attachable(node, volume, baremetal_ports):
+    """Check that a volume can be attached to a node
+
+    :param node: the baremetal node
+    :param volume: the volume
+    :param baremetal_ports: the node's baremetal ports
+    :raises: CommandError if the node or volume is not available, or the
+        node has no free ports
+    """
+
+    # check node state
+    if node.provision_state != AVAILABLE:
+        raise exceptions.CommandError(
+            "ERROR: Node {0} must be in the available state".format(node.name)
+        )
+
+    # check volume state
+    if volume.status != AVAILABLE:
+        raise exceptions.CommandError(
+            "ERROR: Volume {0} must be in the available state".format(volume.name)
+        )
+
+    # check node ports
+    has_free_port = False
+    for bp in baremetal_ports:
+        if "tenant_vif_port_id" not in bp.internal_info:
+            has_free_port = True
+            break
+
+    if not has_free_port:
+        raise exceptions.CommandError(
+            "ERROR: Node {0} has no free ports".format(node.name)
+        )
+
+
+def attach_volume(
+    baremetal_client,
+    neutron_client,
+    node_ident,
+    node,
+    volume,
+    volume_connectors,
+    volume_target_ids,
+    network=None,
+    port=None,
+):
+    """Configure a node to boot from a volume and deploy it
+
+    :param node_ident: the name or UUID used to address the node
+    :param node: the baremetal node, already checked with check_attachable
+    :param volume: the volume, already checked with check_attachable
+    :param volume_connectors: the node's volume connectors, which are replaced
+    :param volume_target_ids: ids of the volumes already targeted by the node
+    :param network: the storage network to create a port on, if no port
+        is given
+    :param port: the neutron port to attach to the node
+    :returns: the neutron port attached to the node
+    """
+    from oslo_utils import uuidutils
+
+    # set baremetal node storage interface and capabilities in one update
+    node_update = [
+        {
+            "path": "/instance_info/storage_interface",
+            "value": "cinder",
+            "op": "add",
+        },
+        {
+            "path": "/instance_info/capabilities",
+            "value": '{"iscsi_boot": "True"}',
+            "op": "add",
+        },
+    ]
+    utils.timed_call(
+        "update node", utils.update_node, baremetal_client, node_ident, node_update
+    )
+
+    # delete old volume connectors; create new one
+    deleted = utils.run_concurrently(
+        lambda vc: baremetal_client.delete_volume_connector(
+            vc.id, ignore_missing=False
+        ),
+        volume_connectors,
+    )
+    failures = utils.summarize_failures(deleted, "deleting volume connectors")
+    if failures:
+        raise exceptions.CommandError("ERROR: {0}".format(failures))
+    connector_id = "iqn.%s.org.openstack.%s" % (
+        datetime.now().strftime("%Y-%m"),
+        uuidutils.generate_uuid(),
+    )
+    utils.timed_call(
+        "create volume connector",
+        baremetal_client.create_volume_connector,
+        node_id=node.id,
+        type="iqn",
+        connector_id=connector_id,
+    )
+
+    # create volume target if needed
+    if volume.id not in volume_target_ids:
+        utils.timed_call(
+            "create volume target",
+            baremetal_client.create_volume_target,
+            node_id=node.id,
+            volume_id=volume.id,
+            volume_type="iscsi",
+            boot_index=0,
+        )
+
+    # attach node to storage network
+    if not port:
+        # create port if needed
+        port_name = utils.get_port_name(network.name, prefix=node.name, suffix="volume")
+        port = utils.timed_call(
+            "get or create port",
+            utils.get_or_create_port,
+            port_name,
+            network,
+            neutron_client,
+        )
+
+    utils.timed_call(
+        "attach vif", utils.attach_vif, baremetal_client, node_ident, port.id
+    )
+
+    # deploy
+    utils.timed_call(
+        "set provision state",
+        utils.set_provision_state,
+        baremetal_client,
+        node_ident,
+        ACTIVE,
+    )
+
+    return port
+
+
+def parse_pair(value):
+    """Parse a <node>:<volume> pair"""
+
+    node, sep, volume = value.partition(":")
+    if not sep or not node or not volume:
+        raise argparse.ArgumentTypeError(
+            "{0} is not of the form <node>:<volume>".format(value)
+        )
+    return node, volume
+
+
+class BatchAttach(command.Lister):
+    """Attach volumes to many nodes and deploy them"""
+
+    log = logging.getLogger(__name__ + ".BatchAttach")
+    failed = 0
+
+    def get_parser(self, prog_name):
+        parser = super(BatchAttach, self).get_parser(prog_name)
+        parser.add_argument(
+            "pairs",
+            metavar="<node:volume>",
+            nargs="*",
+            type=parse_pair,
+            help=_("Node and volume (names or UUIDs) to attach"),
+        )
+        parser.add_argument(
+            "--resource-class",
+            metavar="<resource class>",
+            help=_(
+                "Attach volumes to available nodes of this resource class, "
+                "instead of listing pairs"
+            ),
+        )
+        parser.add_argument(
+            "--volume-pattern",
+            metavar="<pattern>",
+            help=_(
+                "Shell-style pattern matching the names of available volumes to "
+                "attach to nodes of --resource-class, e.g. 'boot-*'"
+            ),
+        )
+        parser.add_argument(
+            "--network",
+            metavar="<network>",
+            required=True,
+            help=_("Name or UUID of the storage network"),
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=utils.DEFAULT_CONCURRENCY,
+            metavar="<concurrency>",
+            help=_(
+                "Maximum number of nodes to attach at once (default: %d)"
+                % utils.DEFAULT_CONCURRENCY
+            ),
+        )
+        parser.add_argument(
+            "--wait",
+            action="store_true",
+            help=_("Wait for the nodes to become active"),
+        )
+        parser.add_argument(
+            "--timeout",
+            type=int,
+            default=DEFAULT_WAIT_TIMEOUT,
+            metavar="<seconds>",
+            help=_(
+                "Maximum time to wait for nodes to become active (default: %d)"
+                % DEFAULT_WAIT_TIMEOUT
+            ),
+        )
+
+        return parser
+
+    def run(self, parsed_args):
+        self.failed = 0
+        result = super(BatchAttach, self).run(parsed_args)
+        if self.failed:
+            self.log.error("%s attachment(s) failed", self.failed)
+            return 1
+        return result
+
+    def select_pairs(self, parsed_args, nodes, volumes):
+        """Return the (node, volume) pairs to attach
 
-        # check volume state
-        if volume.status != AVAILABLE:
+        :param nodes: all baremetal nodes
+        :param volumes: all volumes in the project
+        """
+
+        if parsed_args.pairs:
+            node_index = {}
+            for node in nodes:
+                node_index[node.id] = node
+                if node.name:
+                    node_index.setdefault(node.name, node)
+            volume_index = {}
+            for volume in volumes:
+                volume_index[volume.id] = volume
+                if volume.name:
+                    volume_index.setdefault(volume.name, volume)
+
+            unknown = [
+                name
+                for pair in parsed_args.pairs
+                for name, index in zip(pair, (node_index, volume_index))
+                if name not in index
+            ]
+            if unknown:
+                raise exceptions.CommandError(
+                    "ERROR: Unknown nodes or volumes: {0}".format(", ".join(unknown))
+                )
+            pairs = [
+                (node_index[node], volume_index[volume])
+                for node, volume in parsed_args.pairs
+            ]
+            # each node is provisioned once, with a single boot volume, and
+            # a volume can only be attached to one node
+            seen = set()
+            duplicates = []
+            for pair, resolved in zip(parsed_args.pairs, pairs):
+                for name, resource, kind in zip(pair, resolved, ("node", "volume")):
+                    if (kind, resource.id) in seen:
+                        duplicates.append(name)
+                    seen.add((kind, resource.id))
+            if duplicates:
+                raise exceptions.CommandError(
+                    "ERROR: Nodes or volumes in more than one pair: {0}".format(
+                        ", ".join(duplicates)
+                    )
+                )
+            return pairs
+
+        free_nodes = sorted(
+            (
+                node
+                for node in nodes
+                if node.resource_class == parsed_args.resource_class
+                and node.provision_state == AVAILABLE
+            ),
+            key=lambda node: node.name or node.id,
+        )
+        free_volumes = sorted(
+            (
+                volume
+                for volume in volumes
+                if volume.status == AVAILABLE
+                and fnmatch.fnmatchcase(volume.name or "", parsed_args.volume_pattern)
+            ),
+            key=lambda volume: volume.name,
+        )
+        if len(free_nodes) < len(free_volumes):
             raise exceptions.CommandError(
-                "ERROR: Volume {0} must be in the available state".format(volume.name)
+                "ERROR: {0} volumes match {1} but only {2} nodes of resource "
+                "class {3} are available".format(
+                    len(free_volumes),
+                    parsed_args.volume_pattern,
+                    len(free_nodes),
+                    parsed_args.resource_class,
+                )
             )
+        return list(zip(free_nodes, free_volumes))
 
-        # check node ports
-        baremetal_ports = ironic_client.port.list(node=node_uuid, detail=True)
-        has_free_port = False
-        for bp in baremetal_ports:
-            if "tenant_vif_port_id" not in bp.internal_info:
-                has_free_port = True
-                break
+    def wait_for_active(self, baremetal_client, node_uuids, timeout):
+        """Poll until nodes are active, have failed, or timeout expires
 
-        if not has_free_port:
+        :returns: a dict mapping node UUIDs to their last seen node
+        """
+
+        deadline = time.monotonic() + timeout
+        pending = set(node_uuids)
+        last_seen = {}
+        while True:
+            for node in baremetal_client.nodes(
+                fields=["uuid", "provision_state", "last_error"]
+            ):
+                if node.id in pending:
+                    last_seen[node.id] = node
+                    if node.provision_state in (ACTIVE, DEPLOY_FAILED):
+                        pending.discard(node.id)
+            if not pending or time.monotonic() >= deadline:
+                return last_seen
+            time.sleep(WAIT_INTERVAL)
+
+    def take_action(self, parsed_args):
+        self.log.debug("take_action(%s)", parsed_args)
+
+        if parsed_args.pairs and (
+            parsed_args.resource_class or parsed_args.volume_pattern
+        ):
             raise exceptions.CommandError(
-                "ERROR: Node {0} has no free ports".format(node.name)
+                "ERROR: Specify either node:volume pairs or --resource-class "
+                "and --volume-pattern"
             )
+        if not parsed_args.pairs and not (
+            parsed_args.resource_class and parsed_args.volume_pattern
+        ):
+            raise exceptions.CommandError(
+                "ERROR: You must specify node:volume pairs or --resource-class "
+                "and --volume-pattern"
+            )
+        if parsed_args.concurrency < 1:
+            raise exceptions.CommandError("ERROR: --concurrency must be at least 1")
 
-        # set baremetal node storage interface and capabilities
-        node_update = [
-            {
-                "path": "/instance_info/storage_interface",
-                "value": "cinder",
-                "op": "add",
-            },
+        utils.size_http_pool(self.app.client_manager, parsed_args.concurrency)
+        utils.govern_api_calls(self.app.client_manager)
+        baremetal_client = self.app.client_manager.sdk_connection.baremetal
+        neutron_client = self.app.client_manager.network
+        cinder_client = self.app.client_manager.volume
+
+        # validate every pair from a handful of bulk listings
+        results = utils.fetch_concurrently(
             {
-                "path": "/instance_info/capabilities",
-                "value": '{"iscsi_boot": "True"}',
-                "op": "add",
-            },
-        ]
-        ironic_client.node.update(node_uuid, node_update)
-
-        # delete old volume connectors; create new one
-        vcs = ironic_client.volume_connector.list(
-            node=node_uuid,
-        )
-        for vc in vcs:
-            ironic_client.volume_connector.delete(vc.uuid)
-        connector_id = "iqn.%s.org.openstack.%s" % (
-            datetime.now().strftime("%Y-%m"),
-            uuidutils.generate_uuid(),
-        )
-        ironic_client.volume_connector.create(
-            node_uuid=node.uuid,
-            type="iqn",
-            connector_id=connector_id,
-        )
-
-        # create volume target if needed
-        vts = [
-            vt.volume_id
-            for vt in ironic_client.volume_target.list(
-                node=node_uuid, fields=["volume_id"]
-            )
-        ]
-        if volume.id not in vts:
-            ironic_client.volume_target.create(
-                node_uuid=node.uuid,
-                volume_id=volume.id,
-                volume_type="iscsi",
-                boot_index=0,
+                "list nodes": lambda: list(
+                    baremetal_client.nodes(
+                        fields=[
+                            "uuid",
+                            "name",
+                            "provision_state",
+                            "resource_class",
+                        ],
+                    )
+                ),
+                "list volumes": lambda: cinder_client.volumes.list(),
+                "list baremetal ports": lambda: list(
+                    baremetal_client.ports(fields=["node_uuid", "internal_info"])
+                ),
+                "list volume connectors": lambda: list(
+                    baremetal_client.volume_connectors(fields=["uuid", "node_uuid"])
+                ),
+                "list volume targets": lambda: list(
+                    baremetal_client.volume_targets(fields=["node_uuid", "volume_id"])
+                ),
+                "find network": lambda: neutron_client.find_network(
+                    parsed_args.network
+                ),
+            }
+        )
+        network = results["find network"]
+        if network is None:
+            raise exceptions.CommandError(
+                "ERROR: Unknown network {0}".format(parsed_args.network)
             )
 
-        # attach node to storage network
-        if not port:
-            # create port if needed
-            port_name = utils.get_port_name(
-                network.name, prefix=node.name, suffix="volume"
+        by_node = collections.defaultdict(lambda: collections.defaultdict(list))
+        for kind in [
+            "list baremetal ports",
+            "list volume connectors",
+            "list volume targets",
+        ]:
+            for resource in results[kind]:
+                by_node[resource.node_id][kind].append(resource)
+
+        pairs = self.select_pairs(
+            parsed_args, results["list nodes"], results["list volumes"]
+        )
+
+        def attach(pair):
+            node, volume = pair
+            resources = by_node[node.id]
+            check_attachable(node, volume, resources["list baremetal ports"])
+            return attach_volume(
+                baremetal_client,
+                neutron_client,
+                node.id,
+                node,
+                volume,
+                resources["list volume connectors"],
+                [vt.volume_id for vt in resources["list volume targets"]],
+                network=network,
             )
-            port = utils.get_or_create_port(port_name, network, neutron_client)
 
-        ironic_client.node.vif_attach(node_uuid, port.id)
+        attached = utils.run_concurrently(attach, pairs, parsed_args.concurrency)
 
-        # deploy
-        ironic_client.node.set_provision_state(node_uuid, ACTIVE)
+        states = {}
+        if parsed_args.wait:
+            states = self.wait_for_active(
+                baremetal_client,
+                [result.item[0].id for result in attached if not result.error],
+                parsed_args.timeout,
+            )
 
-        return ["Node", "Volume"], [node.name, volume.name]
+        data = []
+        for result in attached:
+            node, volume = result.item
+            error = str(result.error) if result.error else None
+            state = states.get(node.id)
+            if state is None:
+                provision_state = None if error else "deploying"
+            else:
+                provision_state = state.provision_state
+                if provision_state == DEPLOY_FAILED:
+                    error = state.last_error or "deploy failed"
+                elif provision_state != ACTIVE:
+                    error = "timed out waiting for node to become active"
+            if error:
+                self.failed += 1
+            data.append(
+                [
+                    node.name or node.id,
+                    volume.name or volume.id,
+                    result.result.name if result.result else None,
+                    provision_state,
+                    error,
+                    "%.2f" % result.elapsed,
+                ]
+            )
+
+        return [
+            "Node",
+            "Volume",
+            "Port",
+            "Provision State",
+            "Error",
+            "Time (s)",
+        ], data
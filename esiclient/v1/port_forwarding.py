@@ -13,6 +13,12 @@
 #   under the License.
 
 import argparse
+import bisect
+import collections
+import concurrent.futures
+import functools
+import itertools
+import json
 import logging
 import ipaddress
 import re
@@ -20,17 +26,21 @@ import re
 from dataclasses import dataclass
 from enum import Enum
 
-import openstack.network
-
 from osc_lib.command import command
 from osc_lib import exceptions
 from osc_lib.i18n import _  # noqa
 
+from esiclient import utils
+
 LOG = logging.getLogger(__name__)
 
 re_port_spec = re.compile(
     r"(?:(?P<external_port>\d+):)?(?P<internal_port>\d+)(?:/(?P<protocol>\w+))?"
 )
+re_port_range_spec = re.compile(
+    r"(?:(?P<external_ports>\d+(?:-\d+)?):)?(?P<internal_ports>\d+(?:-\d+)?)"
+    r"(?:/(?P<protocol>\w+))?"
+)
 
 
 class Protocol(str, Enum):
@@ -67,7 +77,8 @@ class PortSpec:
 
     @classmethod
     def from_spec(cls, spec: str):
-        """Parse a port specifiction of the form [<external_port>:]<internal_port>[/<protocol>]"""
+        """Parse a port specification of the form
+        [<external_port>:]<internal_port>[/<protocol>]"""
 
         match = re_port_spec.match(spec)
         if not match:
@@ -76,9 +87,111 @@ class PortSpec:
         return cls(**match.groupdict())
 
 
+@dataclass
+class PortRange:
+    """Represent port forwardings from a range of external ports to a range of
+    internal ports of the same length
+
+    Iterating over a range yields a PortSpec for each port, so that large
+    ranges are only expanded as they are used.
+    """
+
+    internal_start: int
+    internal_end: int
+    external_start: int
+    external_end: int
+    protocol: Protocol = Protocol.TCP
+
+    def __post_init__(self):
+        """Validate attributes"""
+
+        for start, end in [
+            (self.internal_start, self.internal_end),
+            (self.external_start, self.external_end),
+        ]:
+            for port in [start, end]:
+                if port not in range(0, 65536):
+                    raise ValueError(f"port {port} out of range")
+            if start > end:
+                raise ValueError(f"invalid port range {start}-{end}")
+
+        if (self.internal_end - self.internal_start) != (
+            self.external_end - self.external_start
+        ):
+            raise ValueError("external and internal port ranges differ in length")
+
+    def __len__(self):
+        return self.internal_end - self.internal_start + 1
+
+    def __iter__(self):
+        for offset in range(len(self)):
+            yield PortSpec(
+                internal_port=self.internal_start + offset,
+                external_port=self.external_start + offset,
+                protocol=self.protocol,
+            )
+
+    @staticmethod
+    def _format(start, end):
+        return start if start == end else f"{start}-{end}"
+
+    @property
+    def internal_port(self):
+        return self._format(self.internal_start, self.internal_end)
+
+    @property
+    def external_port(self):
+        return self._format(self.external_start, self.external_end)
+
+    def __str__(self):
+        return f"{self.external_port}:{self.internal_port}/{self.protocol.value}"
+
+    def includes(self, internal_port, external_port, protocol):
+        """Return whether a forward of external_port to internal_port is in the range"""
+
+        offset = int(external_port) - self.external_start
+        return (
+            0 <= offset < len(self)
+            and int(internal_port) == self.internal_start + offset
+            and str(getattr(protocol, "value", protocol)) == self.protocol.value
+        )
+
+    @classmethod
+    def from_spec(cls, spec: str):
+        """Parse a port specification of the form
+        [<external_ports>:]<internal_ports>[/<protocol>], where ports are
+        either a single port or a range of the form <start>-<end>"""
+
+        match = re_port_range_spec.fullmatch(spec)
+        if not match:
+            raise ValueError("invalid port forward specification")
+
+        def bounds(ports):
+            start, _, end = ports.partition("-")
+            return int(start), int(end or start)
+
+        internal_start, internal_end = bounds(match["internal_ports"])
+        external_start, external_end = bounds(
+            match["external_ports"] or match["internal_ports"]
+        )
+        return cls(
+            internal_start=internal_start,
+            internal_end=internal_end,
+            external_start=external_start,
+            external_end=external_end,
+            protocol=Protocol(match["protocol"] or Protocol.TCP),
+        )
+
+
+def expand_port_ranges(port_ranges):
+    """Lazily yield a PortSpec for every port in a list of PortRanges"""
+
+    return itertools.chain.from_iterable(port_ranges)
+
+
 def PortSpecArg(v):
     try:
-        return PortSpec.from_spec(v)
+        return PortRange.from_spec(v)
     except ValueError as err:
         # argparse hides the ValueError message, and the generic message it provides
         # isn't terribly helpful. We need to convert the ValueError into something
@@ -86,17 +199,122 @@ def PortSpecArg(v):
         raise argparse.ArgumentTypeError(err)
 
 
+class SubnetTable:
+    """Find the subnet containing an address with a binary search
+
+    Subnets are kept in a table sorted by the first address of their cidr.
+    Neutron does not allow the subnets of a network to overlap, so the only
+    candidate for an address is the last subnet starting at or before it.
+    """
+
+    def __init__(self, subnets):
+        tables = collections.defaultdict(list)
+        for subnet in subnets:
+            cidr = ipaddress.ip_network(subnet.cidr)
+            tables[cidr.version].append(
+                (int(cidr.network_address), int(cidr.broadcast_address), subnet)
+            )
+
+        self.tables = {}
+        for version, table in tables.items():
+            table.sort(key=lambda entry: entry[0])
+            self.tables[version] = ([entry[0] for entry in table], table)
+
+    def find(self, address):
+        """Return the subnet containing address, or None"""
+
+        starts, table = self.tables.get(address.version, ([], []))
+        i = bisect.bisect_right(starts, int(address)) - 1
+        if i >= 0 and int(address) <= table[i][1]:
+            return table[i][2]
+        return None
+
+
+class Resolver:
+    """Memoize the network lookups made by a command and its argument types
+
+    Repeated descriptors are only looked up once per command, and subnets
+    are fetched once per network and indexed in a SubnetTable.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.cache = {}
+
+    def _lookup(self, kind, key, fetch):
+        if (kind, key) not in self.cache:
+            self.cache[kind, key] = fetch()
+        return self.cache[kind, key]
+
+    def find_network(self, value):
+        return self._lookup(
+            "network", value, lambda: self.connection.network.find_network(value)
+        )
+
+    def find_subnet(self, value):
+        return self._lookup(
+            "subnet", value, lambda: self.connection.network.find_subnet(value)
+        )
+
+    def find_port(self, value):
+        return self._lookup(
+            "port", value, lambda: self.connection.network.find_port(value)
+        )
+
+    def find_ip(self, address):
+        return self._lookup(
+            "ip", str(address), lambda: self.connection.network.find_ip(str(address))
+        )
+
+    def ports_with_address(self, address):
+        """Return the ports that have address as a fixed ip"""
+
+        return self._lookup(
+            "address",
+            str(address),
+            lambda: list(
+                self.connection.network.ports(fixed_ips=f"ip_address={address}")
+            ),
+        )
+
+    def add_port(self, address, port):
+        """Record a port created by the command for an address"""
+
+        self.cache["address", str(address)] = [port]
+
+    def find_subnet_for_address(self, network_id, address):
+        """Return the subnet of a network that contains address, or None"""
+
+        table = self._lookup(
+            "subnets",
+            network_id,
+            lambda: SubnetTable(self.connection.network.subnets(network_id=network_id)),
+        )
+        return table.find(address)
+
+
+def get_resolver(cmd):
+    """Return the Resolver shared by a command and its argument types"""
+
+    resolver = getattr(cmd, "_resolver", None)
+    if resolver is None:
+        resolver = Resolver(cmd.app.client_manager.sdk_connection)
+        cmd._resolver = resolver
+    return resolver
+
+
 class AddressOrPortArg:
-    """Handle a command line argument that can be either an ip address or a port name/id"""
+    """Handle a command line argument that can be either an ip address or a
+    port name/id"""
 
     def __init__(self, cli):
-        self.app = cli.app
+        self.cli = cli
 
     def __call__(self, value):
         try:
             return ipaddress.ip_address(value)
         except ValueError:
-            port = self.app.client_manager.sdk_connection.network.find_port(value)
+            port = get_resolver(self.cli).find_port(value)
             if port is None:
                 raise argparse.ArgumentTypeError(f"no port with name or id {value}")
             return port
@@ -106,16 +324,17 @@ class AddressOrPortArg:
 
 
 class AddressOrNetworkArg:
-    """Handle a command line argument that can be either an ip address or a network name/id"""
+    """Handle a command line argument that can be either an ip address or a
+    network name/id"""
 
     def __init__(self, cli):
-        self.app = cli.app
+        self.cli = cli
 
     def __call__(self, value):
         try:
             return ipaddress.ip_address(value)
         except ValueError:
-            network = self.app.client_manager.sdk_connection.network.find_network(value)
+            network = get_resolver(self.cli).find_network(value)
             if network is None:
                 raise argparse.ArgumentTypeError(f"no network with name or id {value}")
             return network
@@ -128,10 +347,10 @@ class NetworkArg:
     """Handle a command line arguments that specifies a network name or id"""
 
     def __init__(self, cli):
-        self.app = cli.app
+        self.cli = cli
 
     def __call__(self, value):
-        network = self.app.client_manager.sdk_connection.network.find_network(value)
+        network = get_resolver(self.cli).find_network(value)
         if network is None:
             raise argparse.ArgumentTypeError(f"no network with name or id {value}")
         return network
@@ -144,10 +363,10 @@ class SubnetArg:
     """Handle a command line argumenta that specifies a subnet name or id"""
 
     def __init__(self, cli):
-        self.app = cli.app
+        self.cli = cli
 
     def __call__(self, value):
-        subnet = self.app.client_manager.sdk_connection.network.find_subnet(value)
+        subnet = get_resolver(self.cli).find_subnet(value)
         if subnet is None:
             raise argparse.ArgumentTypeError(f"no subnet with name or id {value}")
         return subnet
@@ -158,10 +377,9 @@ class SubnetArg:
 
 class NetworkOpsMixin:
     def find_floating_ip(self, address):
-        connection = self.app.client_manager.sdk_connection
         if isinstance(address, (ipaddress.IPv4Address, ipaddress.IPv6Address)):
             # we were given an ip address, so find the matching floating ip
-            fip = connection.network.find_ip(str(address))
+            fip = get_resolver(self).find_ip(address)
             if fip is None:
                 raise KeyError(f"unable to find floating ip {address}")
             return fip
@@ -179,10 +397,9 @@ class NetworkOpsMixin:
         return fip
 
     def find_port(self, address):
-        connection = self.app.client_manager.sdk_connection
         if isinstance(address, (ipaddress.IPv4Address, ipaddress.IPv6Address)):
             # see if there exists a port with the given internal ip
-            ports = list(connection.network.ports(fixed_ips=f"ip_address={address}"))
+            ports = get_resolver(self).ports_with_address(address)
 
             # error out if we find multiple matches
             if len(ports) > 1:
@@ -204,7 +421,8 @@ class NetworkOpsMixin:
         try:
             return self.find_port(address)
         except KeyError:
-            # we need to create a port, which means we need to know the appropriate internal network
+            # we need to create a port, which means we need to know the
+            # appropriate internal network
             if internal_ip_network is None:
                 if internal_ip_subnet is None:
                     raise ValueError(
@@ -214,55 +432,210 @@ class NetworkOpsMixin:
             else:
                 internal_network_id = internal_ip_network.id
 
-            # if we were given a subnet name, use it, otherwise search through subnets for an appropriate match
+            # if we were given a subnet name, use it, otherwise look up the
+            # subnet containing the address
             if internal_ip_subnet:
                 subnet = internal_ip_subnet
             else:
-                for subnet in connection.network.subnets(
-                    network_id=internal_network_id,
-                ):
-                    if subnet.ip_version != address.version:
-                        continue
-                    cidr = ipaddress.ip_network(subnet.cidr)
-                    if address in cidr:
-                        break
-                else:
+                subnet = get_resolver(self).find_subnet_for_address(
+                    internal_network_id, address
+                )
+                if subnet is None:
                     raise KeyError(f"unable to find a subnet for address {address}")
 
-            return connection.network.create_port(
+            port = connection.network.create_port(
                 name=f"esi-autocreated-{address}",
                 network_id=internal_network_id,
                 fixed_ips=[{"subnet_id": subnet.id, "ip_address": str(address)}],
             )
+            get_resolver(self).add_port(address, port)
+            return port
+
 
+class NetworkIndex:
+    """Resolve ports, floating ips, and networks from a few bulk listings
 
-def port_forwarding_exists(fip, internal_ip_address, port):
-    for check in fip.port_forwardings:
-        fwd = openstack.network.v2.port_forwarding.PortForwarding(id="exists", **check)
-        if (
-            port.internal_port == fwd.internal_port
-            and port.external_port == fwd.external_port
-            and internal_ip_address == fwd.internal_ip_address
-            and port.protocol == fwd.protocol
+    This lets commands that handle many port forwards look up each descriptor
+    in memory rather than making one or more API calls per descriptor.
+    """
+
+    def __init__(self, connection, networks=True):
+        with concurrent.futures.ThreadPoolExecutor() as executor:
+            f_ports = executor.submit(
+                utils.timed_list, "ports", connection.network.ports
+            )
+            f_fips = executor.submit(
+                utils.timed_list, "floating ips", connection.network.ips
+            )
+            f_networks = (
+                executor.submit(
+                    utils.timed_list, "networks", connection.network.networks
+                )
+                if networks
+                else None
+            )
+
+        self.ports = {}
+        self.ports_by_name = collections.defaultdict(list)
+        self.ports_by_address = collections.defaultdict(list)
+        for port in f_ports.result():
+            self.ports[port.id] = port
+            if port.name:
+                self.ports_by_name[port.name].append(port)
+            for fixed_ip in port.fixed_ips or []:
+                self.ports_by_address[fixed_ip["ip_address"]].append(port)
+
+        self.floating_ips = {fip.floating_ip_address: fip for fip in f_fips.result()}
+
+        self.networks = {}
+        self.networks_by_name = collections.defaultdict(list)
+        for network in f_networks.result() if f_networks else []:
+            self.networks[network.id] = network
+            self.networks_by_name[network.name].append(network)
+
+    @staticmethod
+    def _unique(matches, kind, value):
+        if len(matches) > 1:
+            raise ValueError(f"found multiple {kind}s matching {value}")
+        if not matches:
+            raise KeyError(f"no {kind} with name or id {value}")
+        return matches[0]
+
+    def find_port(self, value):
+        """Find a port by name, id, or fixed ip address"""
+
+        if isinstance(value, (ipaddress.IPv4Address, ipaddress.IPv6Address)):
+            matches = self.ports_by_address.get(str(value), [])
+            if not matches:
+                raise KeyError(f"unable to find port with address {value}")
+            return self._unique(matches, "port", value)
+        if value in self.ports:
+            return self.ports[value]
+        return self._unique(self.ports_by_name.get(value, []), "port", value)
+
+    def find_floating_ip(self, address):
+        """Find a floating ip by address"""
+
+        fip = self.floating_ips.get(str(address))
+        if fip is None:
+            raise KeyError(f"unable to find floating ip {address}")
+        return fip
+
+    def find_network(self, value):
+        """Find a network by name or id"""
+
+        if value in self.networks:
+            return self.networks[value]
+        return self._unique(self.networks_by_name.get(value, []), "network", value)
+
+
+def ip_address_or_name(value):
+    try:
+        return ipaddress.ip_address(value)
+    except ValueError:
+        return value
+
+
+def is_ip_address(value):
+    return isinstance(value, (ipaddress.IPv4Address, ipaddress.IPv6Address))
+
+
+def load_forwarding_manifest(manifest_file):
+    """Load a JSON list of port forwarding requests
+
+    Each entry is a dictionary with an "internal" ip address, port name, or
+    port id, an "external" floating ip address or network name, a list of
+    "ports" in the form accepted by --port, and an optional "description".
+    """
+
+    with open(manifest_file) as f:
+        manifest = json.load(f)
+
+    if not isinstance(manifest, list):
+        raise exceptions.CommandError("manifest must be a list of entries")
+
+    entries = []
+    for entry in manifest:
+        if not isinstance(entry, dict) or not all(
+            entry.get(key) for key in ("internal", "external", "ports")
         ):
-            return fwd
+            raise exceptions.CommandError(
+                f"manifest entry must specify internal, external, and ports: {entry}"
+            )
+        try:
+            ports = [PortRange.from_spec(str(spec)) for spec in entry["ports"]]
+        except ValueError as err:
+            raise exceptions.CommandError(f"invalid manifest entry {entry}: {err}")
+        entries.append(dict(entry, ports=ports))
+
+    return entries
+
+
+def forward_key(internal_ip_address, internal_port, external_port, protocol):
+    """Return the key identifying a port forward in a forwarding index"""
+
+    return (
+        str(internal_ip_address),
+        int(internal_port),
+        int(external_port),
+        str(getattr(protocol, "value", protocol)),
+    )
+
+
+def index_port_forwardings(forwards):
+    """Index port forwards by (internal ip, internal port, external port, protocol)
+
+    :param forwards: port forwarding resources, or the port forwarding
+        dictionaries embedded in a floating ip
+    """
+
+    index = {}
+    for fwd in forwards:
+        get = fwd.get if isinstance(fwd, dict) else functools.partial(getattr, fwd)
+        key = forward_key(
+            get("internal_ip_address"),
+            get("internal_port"),
+            get("external_port"),
+            get("protocol"),
+        )
+        index.setdefault(key, fwd)
+    return index
+
+
+def port_forwarding_exists(fip, internal_ip_address, port, index=None):
+    """Return the forward on fip matching a port spec, if there is one
+
+    :param index: an index of the forwards on fip, from
+        index_port_forwardings; built from fip.port_forwardings if not given
+    """
+
+    if index is None:
+        index = index_port_forwardings(fip.port_forwardings)
+
+    fwd = index.get(
+        forward_key(
+            internal_ip_address, port.internal_port, port.external_port, port.protocol
+        )
+    )
+    if isinstance(fwd, dict):
+        from openstack.network.v2.port_forwarding import PortForwarding
+
+        # forwards embedded in a floating ip carry no id
+        fwd = PortForwarding(id="exists", **fwd)
+    return fwd
 
 
 def format_forwards(func):
     """A decorator that transforms a list of (floating_ip, port_forwarding) tuples
-    into a list suitable for a cliff command.Lister"""
+    into a list suitable for a cliff command.Lister
+
+    If the decorated function returns an iterator rather than a list, rows are
+    streamed from it as they are produced."""
 
     def wrapper(self, parsed_args):
         forwards = func(self, parsed_args)
 
-        return [
-            "ID",
-            "Internal Port",
-            "External Port",
-            "Protocol",
-            "Internal IP",
-            "External IP",
-        ], [
+        rows = (
             [
                 fwd[1].id,
                 fwd[1].internal_port,
@@ -272,12 +645,161 @@ def format_forwards(func):
                 fwd[0].floating_ip_address,
             ]
             for fwd in forwards
-        ]
+        )
+
+        return [
+            "ID",
+            "Internal Port",
+            "External Port",
+            "Protocol",
+            "Internal IP",
+            "External IP",
+        ], list(rows) if isinstance(forwards, list) else rows
 
     return wrapper
 
 
-class Create(command.Lister, NetworkOpsMixin):
+class ForwardingCommand(command.Lister, NetworkOpsMixin):
+    """Base class for commands that create or delete many port forwards"""
+
+    failed = 0
+
+    def get_parser(self, prog_name: str):
+        parser = super().get_parser(prog_name)
+
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=utils.DEFAULT_CONCURRENCY,
+            help=_(
+                "Maximum number of port forwards to change at once "
+                f"(default: {utils.DEFAULT_CONCURRENCY})"
+            ),
+        )
+        parser.add_argument(
+            "--max-rate",
+            type=float,
+            help=_("Maximum number of API requests per second (default: unlimited)"),
+        )
+
+        return parser
+
+    def run(self, parsed_args):
+        if parsed_args.concurrency < 1:
+            raise exceptions.CommandError("--concurrency must be at least 1")
+        if parsed_args.max_rate is not None and parsed_args.max_rate <= 0:
+            raise exceptions.CommandError("--max-rate must be greater than 0")
+
+        utils.size_http_pool(self.app.client_manager, parsed_args.concurrency)
+        utils.govern_api_calls(self.app.client_manager)
+        result = super().run(parsed_args)
+        if self.failed:
+            return 1
+        return result
+
+    def run_concurrently(self, description, func, items, parsed_args):
+        """Apply func to items with bounded concurrency
+
+        Progress is written to stderr for long running operations, and a
+        summary of any failures is logged once all items are done.
+
+        :returns: a list of utils.BatchResult, in the order of the items
+        """
+
+        items = list(items)
+        if parsed_args.max_rate:
+            func = utils.RateLimiter(parsed_args.max_rate)(func)
+        results = utils.run_concurrently(
+            func,
+            items,
+            parsed_args.concurrency,
+            progress=utils.ProgressReporter(self.app.stderr, description, len(items)),
+        )
+
+        summary = utils.summarize_failures(results, description)
+        if summary:
+            self.failed += sum(1 for result in results if result.error)
+            self.log.error(summary)
+
+        return results
+
+    def create_forwards(self, pending, parsed_args):
+        """Concurrently create port forwards
+
+        :param pending: a list of (floating_ip, attributes) tuples
+        :returns: a list of utils.BatchResult
+        """
+
+        connection = self.app.client_manager.sdk_connection
+        return self.run_concurrently(
+            "creating port forwards",
+            lambda item: connection.network.create_floating_ip_port_forwarding(
+                item[0], **item[1]
+            ),
+            pending,
+            parsed_args,
+        )
+
+    def delete_forwards(self, forwards, parsed_args):
+        """Concurrently delete port forwards
+
+        :param forwards: a list of (floating_ip, port_forwarding) tuples
+        :returns: the forwards that were deleted
+        """
+
+        connection = self.app.client_manager.sdk_connection
+        results = self.run_concurrently(
+            "deleting port forwards",
+            lambda item: connection.network.delete_floating_ip_port_forwarding(*item),
+            forwards,
+            parsed_args,
+        )
+        return [result.item for result in results if not result.error]
+
+    def list_forwards(self, fips, parsed_args, **query):
+        """Concurrently list the port forwards on floating ips
+
+        Floating ips associated with a port cannot have port forwards, and
+        those that embed an empty list of forwards need not be asked, so
+        both are skipped.
+
+        :param query: filters to apply to each port forward listing
+        :returns: an iterator of (floating_ip, port_forwarding) tuples
+        """
+
+        connection = self.app.client_manager.sdk_connection
+        fips = [fip for fip in fips if not fip.port_id and fip.port_forwardings != []]
+
+        def forwards(fip):
+            return fip, list(
+                connection.network.floating_ip_port_forwardings(fip, **query)
+            )
+
+        if parsed_args.max_rate:
+            forwards = utils.RateLimiter(parsed_args.max_rate)(forwards)
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=parsed_args.concurrency
+        ) as executor:
+            for fip, fwds in executor.map(forwards, fips):
+                for fwd in fwds:
+                    yield fip, fwd
+
+
+def forward_attributes(internal_port, internal_ip_address, port, description=None):
+    """Return the attributes of a new port forward for a PortSpec"""
+
+    return dict(
+        internal_ip_address=internal_ip_address,
+        internal_port=port.internal_port,
+        internal_port_id=internal_port.id,
+        external_port=port.external_port,
+        protocol=port.protocol,
+        **({"description": description} if description else {}),
+    )
+
+
+class Create(ForwardingCommand):
     """Create a port forward from a floating ip to an internal address."""
 
     def get_parser(self, prog_name: str):
@@ -303,7 +825,13 @@ class Create(command.Lister, NetworkOpsMixin):
             type=PortSpecArg,
             action="append",
             default=[],
-            help="A port mapping in the form [<external_port>:]<internal_port>[/<protocol>]. Can be specified multiple times. For example, '--port 22', '--port 80:8080', '--port 67/udp'",
+            help=(
+                "A port mapping in the form "
+                "[<external_port>:]<internal_port>[/<protocol>], where ports "
+                "may be a range of the form <start>-<end>. Can be specified "
+                "multiple times. For example, '--port 22', '--port 80:8080', "
+                "'--port 67/udp', '--port 30000-30999/udp'"
+            ),
         )
         parser.add_argument(
             "internal_ip_descriptor",
@@ -344,35 +872,265 @@ class Create(command.Lister, NetworkOpsMixin):
             # rather than the port.
             internal_ip_address = internal_port.fixed_ips[0]["ip_address"]
 
-        for port in parsed_args.port:
-            if fwd := port_forwarding_exists(fip, internal_ip_address, port):
+        pending = []
+        existing = index_port_forwardings(fip.port_forwardings)
+        for port in expand_port_ranges(parsed_args.port):
+            if fwd := port_forwarding_exists(fip, internal_ip_address, port, existing):
                 forwards.append((fip, fwd))
             else:
-                fwd = self.app.client_manager.sdk_connection.network.create_floating_ip_port_forwarding(
-                    fip,
-                    internal_ip_address=internal_ip_address,
-                    internal_port=port.internal_port,
-                    internal_port_id=internal_port.id,
-                    external_port=port.external_port,
-                    protocol=port.protocol,
-                    **(
-                        {"description": parsed_args.description}
-                        if parsed_args.description
-                        else {}
-                    ),
+                pending.append(
+                    (
+                        fip,
+                        forward_attributes(
+                            internal_port,
+                            internal_ip_address,
+                            port,
+                            parsed_args.description,
+                        ),
+                    )
                 )
-                forwards.append((fip, fwd))
+
+        forwards.extend(
+            (fip, result.result)
+            for result in self.create_forwards(pending, parsed_args)
+            if not result.error
+        )
 
         return forwards
 
 
-class Delete(command.Lister, NetworkOpsMixin):
+class BatchCreate(ForwardingCommand):
+    """Create port forwards from a manifest."""
+
+    def get_parser(self, prog_name: str):
+        parser = super().get_parser(prog_name)
+
+        parser.add_argument(
+            "--description", "-d", help="Default description to apply to port forwards"
+        )
+        parser.add_argument(
+            "--internal-ip-network",
+            type=NetworkArg(self),
+            help=_("Network from which to allocate ports for internal ips"),
+        )
+        parser.add_argument(
+            "--internal-ip-subnet",
+            type=SubnetArg(self),
+            help=_("Subnet from which to allocate ports for internal ips"),
+        )
+        parser.add_argument(
+            "manifest",
+            help=_(
+                "JSON file containing a list of port forwards, each of the form "
+                '{"internal": <ip address or port>, "external": <ip address or '
+                'network>, "ports": [<port spec>, ...]}'
+            ),
+        )
+
+        return parser
+
+    def resolve_internal(self, index, descriptor, parsed_args):
+        """Return the port and internal ip address for an internal descriptor"""
+
+        try:
+            port = index.find_port(descriptor)
+        except KeyError:
+            if not is_ip_address(descriptor):
+                raise
+            port = self.find_or_create_port(
+                descriptor,
+                internal_ip_network=parsed_args.internal_ip_network,
+                internal_ip_subnet=parsed_args.internal_ip_subnet,
+            )
+
+        if is_ip_address(descriptor):
+            return port, str(descriptor)
+        # as with create, a port name always forwards to the first fixed ip
+        return port, port.fixed_ips[0]["ip_address"]
+
+    def take_action(self, parsed_args: argparse.Namespace):
+        from openstack import exceptions as sdk_exceptions
+
+        self.failed = 0
+        connection = self.app.client_manager.sdk_connection
+        manifest = load_forwarding_manifest(parsed_args.manifest)
+        for entry in manifest:
+            entry["internal"] = ip_address_or_name(entry["internal"])
+            entry["external"] = ip_address_or_name(entry["external"])
+
+        index = NetworkIndex(
+            connection,
+            networks=not all(is_ip_address(entry["external"]) for entry in manifest),
+        )
+
+        rows = []
+
+        def failed(entry, error):
+            for port in entry["ports"]:
+                rows.append(
+                    [
+                        None,
+                        port.internal_port,
+                        port.external_port,
+                        port.protocol,
+                        str(entry["internal"]),
+                        str(entry["external"]),
+                        str(error),
+                    ]
+                )
+
+        # resolve internal ports in order, so that a port created for an
+        # address is reused by later entries for the same address
+        internal = {}
+        resolved = []
+        for entry in manifest:
+            try:
+                if entry["internal"] not in internal:
+                    internal[entry["internal"]] = self.resolve_internal(
+                        index, entry["internal"], parsed_args
+                    )
+                if is_ip_address(entry["external"]):
+                    fip = index.find_floating_ip(entry["external"])
+                else:
+                    # entries naming a network get a new floating ip each, as
+                    # with create; these are allocated below
+                    index.find_network(entry["external"])
+                    fip = None
+            except (KeyError, ValueError, sdk_exceptions.SDKException) as err:
+                # an unknown name or a port that could not be created fails
+                # this entry only; the rest of the manifest is still applied
+                self.failed += 1
+                failed(entry, err)
+                continue
+            resolved.append((entry, internal[entry["internal"]], fip))
+
+        allocations = {
+            id(result.item): result
+            for result in self.run_concurrently(
+                "allocating floating ips",
+                lambda entry: connection.network.create_ip(
+                    floating_network_id=index.find_network(entry["external"]).id
+                ),
+                [entry for entry, _internal, fip in resolved if fip is None],
+                parsed_args,
+            )
+        }
+
+        pending = []
+        # the internal address and port each external port is forwarded to,
+        # so that entries repeating a forward send it once and entries
+        # forwarding an external port elsewhere are reported
+        claimed = {}
+        existing = {}
+        for entry, (internal_port, internal_ip_address), fip in resolved:
+            if fip is None:
+                allocation = allocations[id(entry)]
+                if allocation.error:
+                    failed(entry, allocation.error)
+                    continue
+                fip = allocation.result
+
+            description = entry.get("description") or parsed_args.description
+            if fip.id not in existing:
+                existing[fip.id] = index_port_forwardings(fip.port_forwardings)
+
+            for port in expand_port_ranges(entry["ports"]):
+                key = (fip.id, port.external_port, port.protocol)
+                target = (internal_ip_address, port.internal_port)
+                if key in claimed:
+                    if claimed[key] != target:
+                        self.failed += 1
+                        rows.append(
+                            [
+                                None,
+                                port.internal_port,
+                                port.external_port,
+                                port.protocol,
+                                internal_ip_address,
+                                fip.floating_ip_address,
+                                "external port %s/%s is already forwarded to %s:%s"
+                                % (
+                                    port.external_port,
+                                    port.protocol.value,
+                                    *claimed[key],
+                                ),
+                            ]
+                        )
+                    continue
+                claimed[key] = target
+                if fwd := port_forwarding_exists(
+                    fip, internal_ip_address, port, existing[fip.id]
+                ):
+                    rows.append(self.format_row(fip, fwd))
+                else:
+                    pending.append(
+                        (
+                            fip,
+                            forward_attributes(
+                                internal_port, internal_ip_address, port, description
+                            ),
+                        )
+                    )
+
+        for result in self.create_forwards(pending, parsed_args):
+            fip, attrs = result.item
+            if result.error:
+                rows.append(
+                    [
+                        None,
+                        attrs["internal_port"],
+                        attrs["external_port"],
+                        attrs["protocol"],
+                        attrs["internal_ip_address"],
+                        fip.floating_ip_address,
+                        str(result.error),
+                    ]
+                )
+            else:
+                rows.append(self.format_row(fip, result.result))
+
+        return [
+            "ID",
+            "Internal Port",
+            "External Port",
+            "Protocol",
+            "Internal IP",
+            "External IP",
+            "Error",
+        ], rows
+
+    @staticmethod
+    def format_row(fip, fwd):
+        return [
+            fwd.id,
+            fwd.internal_port,
+            fwd.external_port,
+            fwd.protocol,
+            fwd.internal_ip_address,
+            fip.floating_ip_address,
+            None,
+        ]
+
+
+class Delete(ForwardingCommand):
     """Delete a port forward from a floating ip to an internal address."""
 
     def get_parser(self, prog_name: str):
         parser = super().get_parser(prog_name)
 
-        parser.add_argument("--port", "-p", type=PortSpec.from_spec, action="append")
+        parser.add_argument(
+            "--port",
+            "-p",
+            type=PortSpecArg,
+            action="append",
+            default=[],
+            help=(
+                "A port mapping in the form "
+                "[<external_port>:]<internal_port>[/<protocol>], where ports "
+                "may be a range of the form <start>-<end>. Can be specified "
+                "multiple times."
+            ),
+        )
         parser.add_argument(
             "internal_ip_descriptor",
             type=AddressOrPortArg(self),
@@ -404,30 +1162,27 @@ class Delete(command.Lister, NetworkOpsMixin):
             # rather than the port.
             internal_ip_address = internal_port.fixed_ips[0]["ip_address"]
 
-        for port in parsed_args.port:
-            for fwd in self.app.client_manager.sdk_connection.network.floating_ip_port_forwardings(
+        existing = index_port_forwardings(
+            self.app.client_manager.sdk_connection.network.floating_ip_port_forwardings(
                 fip
-            ):
-                if (
-                    fwd.external_port == port.external_port
-                    and fwd.internal_ip_address == internal_ip_address
-                    and fwd.internal_port == port.internal_port
-                ):
-                    forwards.append((fip, fwd))
-                    break
-            else:
-                LOG.warning(f"port forwarding matching {port} does not exist")
-
-        for fip, fwd in forwards:
-            self.app.client_manager.sdk_connection.network.delete_floating_ip_port_forwarding(
-                fip, fwd
             )
+        )
+        missing = 0
+        for port in expand_port_ranges(parsed_args.port):
+            if fwd := port_forwarding_exists(fip, internal_ip_address, port, existing):
+                forwards.append((fip, fwd))
+            else:
+                missing += 1
+                if missing <= 10:
+                    LOG.warning(f"port forwarding matching {port} does not exist")
+        if missing > 10:
+            LOG.warning(f"{missing - 10} more requested port forwardings do not exist")
 
-        return forwards
+        return self.delete_forwards(forwards, parsed_args)
 
 
-class Purge(command.Lister, NetworkOpsMixin):
-    """Purge all port forwards associated with a floating ip address."""
+class Purge(ForwardingCommand):
+    """Purge all port forwards associated with floating ip addresses."""
 
     def get_parser(self, prog_name: str):
         parser = super().get_parser(prog_name)
@@ -435,27 +1190,140 @@ class Purge(command.Lister, NetworkOpsMixin):
         parser.add_argument(
             "floating_ips",
             type=ipaddress.ip_address,
-            nargs="+",
+            nargs="*",
             help=_("List of floating ips from which to remove port forwardings"),
         )
+        parser.add_argument(
+            "--network",
+            type=NetworkArg(self),
+            help=_("Purge floating ips in the project from this network"),
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help=_("Purge all floating ips in the project"),
+        )
 
         return parser
 
     @format_forwards
     def take_action(self, parsed_args: argparse.Namespace):
-        forwards = []
-        for ipaddr in parsed_args.floating_ips:
-            fip = self.app.client_manager.sdk_connection.network.find_ip(str(ipaddr))
-            forwards.extend(
-                (fip, fwd)
-                for fwd in self.app.client_manager.sdk_connection.network.floating_ip_port_forwardings(
-                    fip
-                )
+        if not (parsed_args.floating_ips or parsed_args.network or parsed_args.all):
+            raise exceptions.CommandError(
+                "You must specify floating ips, --network, or --all"
             )
 
-        for fip, fwd in forwards:
-            self.app.client_manager.sdk_connection.network.delete_floating_ip_port_forwarding(
-                fip, fwd
-            )
+        connection = self.app.client_manager.sdk_connection
+        query = {}
+        if parsed_args.floating_ips:
+            query["floating_ip_address"] = [str(ip) for ip in parsed_args.floating_ips]
+        else:
+            # never reach beyond the current project, even as an admin
+            query["project_id"] = connection.current_project_id
+        if parsed_args.network:
+            query["floating_network_id"] = parsed_args.network.id
+
+        fips = utils.timed_list("floating ips", connection.network.ips, **query)
+
+        if parsed_args.floating_ips:
+            # check the addresses here too, so that a filter neutron ignores
+            # cannot widen the purge
+            wanted = set(query["floating_ip_address"])
+            fips = [fip for fip in fips if fip.floating_ip_address in wanted]
+            missing = wanted - {fip.floating_ip_address for fip in fips}
+            if missing:
+                raise exceptions.CommandError(
+                    f"unable to find floating ips {', '.join(sorted(missing))}"
+                )
 
-        return forwards
+        return self.delete_forwards(
+            list(self.list_forwards(fips, parsed_args)), parsed_args
+        )
+
+
+class List(ForwardingCommand):
+    """List port forwards across all floating ips in the project."""
+
+    def get_parser(self, prog_name: str):
+        parser = super().get_parser(prog_name)
+
+        parser.add_argument(
+            "--internal-ip",
+            type=AddressOrPortArg(self),
+            help=_("Only list forwards to this ip address, port name, or port uuid"),
+        )
+        parser.add_argument(
+            "--port",
+            "-p",
+            type=PortSpecArg,
+            action="append",
+            default=[],
+            help=_(
+                "Only list forwards matching a port mapping in the form "
+                "[<external_port>:]<internal_port>[/<protocol>], where ports may "
+                "be a range of the form <start>-<end>. Can be specified multiple "
+                "times."
+            ),
+        )
+        parser.add_argument(
+            "--network",
+            type=NetworkArg(self),
+            help=_("Only list forwards on floating ips from this network"),
+        )
+        parser.add_argument(
+            "--floating-ip",
+            type=ipaddress.ip_address,
+            help=_("Only list forwards on this floating ip"),
+        )
+
+        return parser
+
+    @staticmethod
+    def forward_query(parsed_args):
+        """Return the filters that neutron can apply to port forward listings"""
+
+        query = {}
+        if parsed_args.internal_ip is not None and not is_ip_address(
+            parsed_args.internal_ip
+        ):
+            query["internal_port_id"] = parsed_args.internal_ip.id
+        if len(parsed_args.port) == 1 and len(parsed_args.port[0]) == 1:
+            port = next(iter(parsed_args.port[0]))
+            query["external_port"] = port.external_port
+            query["protocol"] = port.protocol.value
+        return query
+
+    @staticmethod
+    def matches(parsed_args, fwd):
+        """Apply the filters that neutron cannot"""
+
+        if is_ip_address(parsed_args.internal_ip) and fwd.internal_ip_address != str(
+            parsed_args.internal_ip
+        ):
+            return False
+        if parsed_args.port and not any(
+            port_range.includes(fwd.internal_port, fwd.external_port, fwd.protocol)
+            for port_range in parsed_args.port
+        ):
+            return False
+        return True
+
+    @format_forwards
+    def take_action(self, parsed_args: argparse.Namespace):
+        connection = self.app.client_manager.sdk_connection
+
+        # never reach beyond the current project, even as an admin
+        fip_query = {"project_id": connection.current_project_id}
+        if parsed_args.network:
+            fip_query["floating_network_id"] = parsed_args.network.id
+        if parsed_args.floating_ip:
+            fip_query["floating_ip_address"] = str(parsed_args.floating_ip)
+        fips = utils.timed_list("floating ips", connection.network.ips, **fip_query)
+
+        return (
+            (fip, fwd)
+            for fip, fwd in self.list_forwards(
+                fips, parsed_args, **self.forward_query(parsed_args)
+            )
+            if self.matches(parsed_args, fwd)
+        )
@@ -18,6 +18,9 @@ from osc_lib.i18n import _
 
 from esiclient import utils
 
+# the baremetal port fields switch listings use
+PORT_FIELDS = ["local_link_connection", "internal_info"]
+
 
 class ListVLAN(command.Lister):
     """List VLANs"""
@@ -34,16 +37,14 @@ class ListVLAN(command.Lister):
 
         switch = parsed_args.switch
 
-        ironic_client = self.app.client_manager.baremetal
+        baremetal_client = self.app.client_manager.sdk_connection.baremetal
         neutron_client = self.app.client_manager.network
 
-        ports = list(
-            (
-                port
-                for port in ironic_client.port.list(detail=True)
-                if port.local_link_connection.get("switch_info") == switch
-            )
-        )
+        ports = [
+            port
+            for port in baremetal_client.ports(fields=PORT_FIELDS)
+            if port.local_link_connection.get("switch_info") == switch
+        ]
         networks = list(neutron_client.networks(provider_network_type="vlan"))
         neutron_ports = list(neutron_client.ports())
 
@@ -55,35 +56,37 @@ class ListVLAN(command.Lister):
                 for sub_np in sub_nps:
                     subnp_np_map[sub_np["port_id"]] = np.id
 
-        data = []
-        for network in networks:
-            switch_ports = []
-            subnet_id = next(iter(network.subnet_ids), None)
-            if subnet_id:
-                nps = (
-                    np
-                    for np in neutron_ports
-                    if next(iter(np.fixed_ips), None).get("subnet_id", None)
-                    == subnet_id
-                )
-                for np in nps:
-                    # if this is a subport, get the parent port
-                    # as that has the mapping to the switchport
-                    search_np_id = subnp_np_map.get(np.id, np.id)
-                    port = next(
-                        (
-                            port
-                            for port in ports
-                            if port.internal_info.get("tenant_vif_port_id", None)
-                            == search_np_id
-                        ),
-                        None,
+        def rows():
+            for network in networks:
+                switch_ports = []
+                subnet_id = next(iter(network.subnet_ids), None)
+                if subnet_id:
+                    nps = (
+                        np
+                        for np in neutron_ports
+                        if next(iter(np.fixed_ips), None).get("subnet_id", None)
+                        == subnet_id
                     )
-                    if port:
-                        switch_ports.append(port.local_link_connection.get("port_id"))
-            data.append([network.provider_segmentation_id, switch_ports])
-
-        return ["VLAN", "Ports"], data
+                    for np in nps:
+                        # if this is a subport, get the parent port
+                        # as that has the mapping to the switchport
+                        search_np_id = subnp_np_map.get(np.id, np.id)
+                        port = next(
+                            (
+                                port
+                                for port in ports
+                                if port.internal_info.get("tenant_vif_port_id", None)
+                                == search_np_id
+                            ),
+                            None,
+                        )
+                        if port:
+                            switch_ports.append(
+                                port.local_link_connection.get("port_id")
+                            )
+                yield [network.provider_segmentation_id, switch_ports]
+
+        return ["VLAN", "Ports"], rows()
 
 
 class ListSwitchPort(command.Lister):
@@ -94,6 +97,12 @@ class ListSwitchPort(command.Lister):
     def get_parser(self, prog_name):
         parser = super(ListSwitchPort, self).get_parser(prog_name)
         parser.add_argument("switch", metavar="<switch>", help=_("Switch"))
+        parser.add_argument(
+            "--long",
+            default=False,
+            action="store_true",
+            help=_("Show the node and network ports of each switch port"),
+        )
         return parser
 
     def take_action(self, parsed_args):
@@ -101,34 +110,58 @@ class ListSwitchPort(command.Lister):
 
         switch = parsed_args.switch
 
-        ironic_client = self.app.client_manager.baremetal
+        baremetal_client = self.app.client_manager.sdk_connection.baremetal
         neutron_client = self.app.client_manager.network
 
-        ports = list(
-            (
-                port
-                for port in ironic_client.port.list(detail=True)
-                if port.local_link_connection.get("switch_info") == switch
+        # every resource is fetched once up front and joined by id, so that
+        # listing makes no calls per switch port
+        port_fields = PORT_FIELDS + ["node_uuid"] if parsed_args.long else PORT_FIELDS
+        calls = {
+            "baremetal ports": lambda: list(baremetal_client.ports(fields=port_fields)),
+            "network ports": lambda: list(neutron_client.ports()),
+            "networks": lambda: list(neutron_client.networks()),
+        }
+        if parsed_args.long:
+            calls["nodes"] = lambda: list(
+                baremetal_client.nodes(fields=["uuid", "name"])
             )
-        )
-        neutron_ports = list(neutron_client.ports())
-        networks = list(neutron_client.networks())
-        networks_dict = {n.id: n for n in networks}
+        results = utils.fetch_concurrently(calls)
 
-        data = []
-        for port in ports:
-            switchport = port.local_link_connection.get("port_id")
-            network_names = []
-            np = None
-            np_id = port.internal_info.get("tenant_vif_port_id", None)
-            if np_id:
-                np = next((np for np in neutron_ports if np.id == np_id), None)
-            if np:
-                network_names, _, _ = utils.get_full_network_info_from_port(
-                    np, neutron_client, networks_dict
-                )
-            data.append([switchport, "\n".join(network_names)])
-        return ["Port", "VLANs"], data
+        ports = [
+            port
+            for port in results["baremetal ports"]
+            if port.local_link_connection.get("switch_info") == switch
+        ]
+        neutron_ports_dict = {np.id: np for np in results["network ports"]}
+        networks_dict = {n.id: n for n in results["networks"]}
+        nodes_dict = {node.id: node for node in results.get("nodes", [])}
+
+        def rows():
+            for port in ports:
+                switchport = port.local_link_connection.get("port_id")
+                network_names = []
+                port_names = []
+                np_id = port.internal_info.get("tenant_vif_port_id", None)
+                np = neutron_ports_dict.get(np_id)
+                if np:
+                    network_names, port_names, _ = (
+                        utils.get_full_network_info_from_port(
+                            np, neutron_client, networks_dict, neutron_ports_dict
+                        )
+                    )
+                row = [switchport, "\n".join(network_names)]
+                if parsed_args.long:
+                    node = nodes_dict.get(port.node_id)
+                    row += [
+                        node.name if node else port.node_id,
+                        "\n".join(port_names),
+                    ]
+                yield row
+
+        columns = ["Port", "VLANs"]
+        if parsed_args.long:
+            columns += ["Node", "Network Ports"]
+        return columns, rows()
 
 
 class List(command.Lister):
@@ -143,9 +176,9 @@ class List(command.Lister):
     def take_action(self, parsed_args):
         self.log.debug("take_action(%s)", parsed_args)
 
-        ironic_client = self.app.client_manager.baremetal
+        baremetal_client = self.app.client_manager.sdk_connection.baremetal
 
-        ports = ironic_client.port.list(detail=True)
+        ports = baremetal_client.ports(fields=["local_link_connection"])
 
         data = []
         for port in ports:
@@ -178,13 +211,13 @@ class EnableAccessPort(command.ShowOne):
         vlan_id = parsed_args.vlan_id
 
         # get associated port and node
-        ironic_client = self.app.client_manager.baremetal
+        baremetal_client = self.app.client_manager.sdk_connection.baremetal
         port = utils.get_baremetal_port_from_switchport(
-            switch, switchport, ironic_client
+            switch, switchport, baremetal_client
         )
         if not port:
             raise exceptions.CommandError("ERROR: Switchport unknown")
-        node = ironic_client.node.get(port.node_uuid)
+        node = baremetal_client.get_node(port.node_id, fields=["uuid", "name"])
 
         # get associated network
         neutron_client = self.app.client_manager.network
@@ -195,7 +228,7 @@ class EnableAccessPort(command.ShowOne):
         # attach node to network
         np_name = utils.get_port_name(network.name, prefix=node.name)
         np = utils.get_or_create_port(np_name, network, neutron_client)
-        ironic_client.node.vif_attach(node.uuid, np.id)
+        utils.attach_vif(baremetal_client, node.id, np.id)
 
         return ["Switchport", "VLAN", "Node", "Network"], [
             switchport,
@@ -223,9 +256,9 @@ class DisableAccessPort(command.Command):
         switch = parsed_args.switch
         switchport = parsed_args.switchport
 
-        ironic_client = self.app.client_manager.baremetal
+        baremetal_client = self.app.client_manager.sdk_connection.baremetal
         port = utils.get_baremetal_port_from_switchport(
-            switch, switchport, ironic_client
+            switch, switchport, baremetal_client
         )
         if not port:
             raise exceptions.CommandError("ERROR: Switchport unknown")
@@ -236,7 +269,9 @@ class DisableAccessPort(command.Command):
 
         print("Disabling access to {0}".format(switchport))
 
-        ironic_client.node.vif_detach(port.node_uuid, np_uuid)
+        baremetal_client.detach_vif_from_node(
+            port.node_id, np_uuid, ignore_missing=False
+        )
 
 
 class EnableTrunkPort(command.ShowOne):
@@ -260,13 +295,13 @@ class EnableTrunkPort(command.ShowOne):
         vlan_id = parsed_args.vlan_id
 
         # get associated port and node
-        ironic_client = self.app.client_manager.baremetal
+        baremetal_client = self.app.client_manager.sdk_connection.baremetal
         port = utils.get_baremetal_port_from_switchport(
-            switch, switchport, ironic_client
+            switch, switchport, baremetal_client
         )
         if not port:
             raise exceptions.CommandError("ERROR: Switchport unknown")
-        node = ironic_client.node.get(port.node_uuid)
+        node = baremetal_client.get_node(port.node_id, fields=["uuid", "name"])
 
         # get associated network
         neutron_client = self.app.client_manager.network
@@ -280,13 +315,16 @@ class EnableTrunkPort(command.ShowOne):
             network.name, prefix=trunk_name, suffix="trunk-port"
         )
         trunk_port = utils.get_or_create_port(trunk_port_name, network, neutron_client)
-        neutron_client.create_trunk(
+        utils.retry_conflicts(
+            "create trunk",
+            neutron_client.create_trunk,
             name=trunk_name,
             port_id=trunk_port.id,
+            done=lambda: neutron_client.find_trunk(trunk_name),
         )
 
         # attach node to network
-        ironic_client.node.vif_attach(node.uuid, trunk_port.id)
+        utils.attach_vif(baremetal_client, node.id, trunk_port.id)
 
         return ["Switchport", "VLAN", "Node", "Network", "Trunk"], [
             switchport,
@@ -318,13 +356,13 @@ class AddTrunkVLAN(command.ShowOne):
         vlan_id = parsed_args.vlan_id
 
         # get associated port and node
-        ironic_client = self.app.client_manager.baremetal
+        baremetal_client = self.app.client_manager.sdk_connection.baremetal
         port = utils.get_baremetal_port_from_switchport(
-            switch, switchport, ironic_client
+            switch, switchport, baremetal_client
         )
         if not port:
             raise exceptions.CommandError("ERROR: Switchport unknown")
-        node = ironic_client.node.get(port.node_uuid)
+        node = baremetal_client.get_node(port.node_id, fields=["uuid", "name"])
 
         # get associated network
         neutron_client = self.app.client_manager.network
@@ -386,13 +424,13 @@ class RemoveTrunkVLAN(command.ShowOne):
         vlan_id = parsed_args.vlan_id
 
         # get associated port and node
-        ironic_client = self.app.client_manager.baremetal
+        baremetal_client = self.app.client_manager.sdk_connection.baremetal
         port = utils.get_baremetal_port_from_switchport(
-            switch, switchport, ironic_client
+            switch, switchport, baremetal_client
         )
         if not port:
             raise exceptions.CommandError("ERROR: Switchport unknown")
-        node = ironic_client.node.get(port.node_uuid)
+        node = baremetal_client.get_node(port.node_id, fields=["uuid", "name"])
 
         # get associated network
         neutron_client = self.app.client_manager.network
@@ -453,9 +491,9 @@ class DisableTrunkPort(command.Command):
         switch = parsed_args.switch
         switchport = parsed_args.switchport
 
-        ironic_client = self.app.client_manager.baremetal
+        baremetal_client = self.app.client_manager.sdk_connection.baremetal
         port = utils.get_baremetal_port_from_switchport(
-            switch, switchport, ironic_client
+            switch, switchport, baremetal_client
         )
         if not port:
             raise exceptions.CommandError("ERROR: Switchport unknown")
@@ -470,11 +508,8 @@ class DisableTrunkPort(command.Command):
             )
 
         print("Disabling trunk for {0}".format(switchport))
-        ironic_client.node.vif_detach(port.node_uuid, trunk.port_id)
-
-        port_ids_to_delete = [sub_port["port_id"] for sub_port in trunk.sub_ports]
-        port_ids_to_delete.append(trunk.port_id)
+        baremetal_client.detach_vif_from_node(
+            port.node_id, trunk.port_id, ignore_missing=False
+        )
 
-        neutron_client.delete_trunk(trunk.id)
-        for port_id in port_ids_to_delete:
-            neutron_client.delete_port(port_id)
+        utils.delete_trunk(neutron_client, trunk)
@@ -0,0 +1,343 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+import collections
+import json
+import logging
+import time
+
+from osc_lib.command import command
+from osc_lib.i18n import _
+
+from esiclient import utils
+
+JSONL = "jsonl"
+DOT = "dot"
+
+# the baremetal fields the topology uses
+NODE_FIELDS = ["uuid", "name", "provision_state"]
+BAREMETAL_PORT_FIELDS = [
+    "uuid",
+    "address",
+    "node_uuid",
+    "local_link_connection",
+    "internal_info",
+]
+
+
+def fetch_inventory(baremetal_client, neutron_client):
+    """Fetch every resource the topology is built from
+
+    Each resource type is listed once, and the listings are made
+    concurrently.
+
+    :returns: a dict mapping each resource type to a list of its resources,
+        and a dict mapping each resource type to the number fetched and the
+        seconds the fetch took
+    """
+    timings = {}
+
+    def timed(stage, func, **kwargs):
+        def fetch():
+            start = time.monotonic()
+            resources = list(func(**kwargs))
+            timings[stage] = (len(resources), time.monotonic() - start)
+            return resources
+
+        return fetch
+
+    inventory = utils.fetch_concurrently(
+        {
+            "nodes": timed("nodes", baremetal_client.nodes, fields=NODE_FIELDS),
+            "baremetal ports": timed(
+                "baremetal ports",
+                baremetal_client.ports,
+                fields=BAREMETAL_PORT_FIELDS,
+            ),
+            "network ports": timed("network ports", neutron_client.ports),
+            "networks": timed("networks", neutron_client.networks),
+            "trunks": timed("trunks", neutron_client.trunks),
+            "floating ips": timed("floating ips", neutron_client.ips),
+        }
+    )
+    return inventory, timings
+
+
+def switch_ports(inventory, switch=None):
+    """Join an inventory into the topology of each switch port
+
+    Resources are joined through dicts indexed by id, so memory use is
+    linear in the inventory, and records are generated one at a time.
+    Resources missing from the inventory are identified by id only.
+
+    :param inventory: the inventory returned by fetch_inventory
+    :param switch: only generate records for the ports of this switch
+    :returns: a generator of dicts, one per switch port, ordered by switch
+        and switch port, of the form:
+    {
+        'switch': 'switch1',
+        'switch_id': '...',
+        'switchport': 'Ethernet1/1',
+        'mac_address': '...',
+        'node': {'id': '...', 'name': '...', 'provision_state': '...'},
+        'network_port': {
+            'id': '...',
+            'name': '...',
+            'network': {'id': '...', 'name': '...', 'vlan': 100},
+            'fixed_ips': ['10.0.0.5'],
+            'floating_ips': ['203.0.113.7'],
+            'port_forwardings': [{
+                'floating_ip': '203.0.113.8',
+                'internal_ip': '10.0.0.5',
+                'internal_port': 22,
+                'external_port': 2222,
+                'protocol': 'tcp',
+            }],
+        } or None,
+        'trunk': {
+            'id': '...',
+            'name': '...',
+            'sub_ports': [network_port dicts, each with a 'vlan'],
+        } or None,
+    }
+    """
+    nodes = {node.id: node for node in inventory["nodes"]}
+    network_ports = {port.id: port for port in inventory["network ports"]}
+    networks = {network.id: network for network in inventory["networks"]}
+    trunks = {trunk.id: trunk for trunk in inventory["trunks"]}
+    floating_ips = collections.defaultdict(list)
+    port_forwardings = collections.defaultdict(list)
+    for fip in inventory["floating ips"]:
+        if fip.port_id:
+            floating_ips[fip.port_id].append(fip.floating_ip_address)
+        # forwards are embedded in the floating ip list response, so these
+        # are joined without listing the forwards of each floating ip
+        for pfwd in getattr(fip, "port_forwardings", None) or []:
+            if pfwd.get("internal_port_id"):
+                port_forwardings[pfwd["internal_port_id"]].append(
+                    {
+                        "floating_ip": fip.floating_ip_address,
+                        "internal_ip": pfwd["internal_ip_address"],
+                        "internal_port": pfwd["internal_port"],
+                        "external_port": pfwd["external_port"],
+                        "protocol": pfwd["protocol"],
+                    }
+                )
+
+    def network_info(network_id):
+        network = networks.get(network_id)
+        if network is None:
+            return {"id": network_id}
+        return {
+            "id": network.id,
+            "name": network.name,
+            "vlan": getattr(network, "provider_segmentation_id", None),
+        }
+
+    def port_info(port_id):
+        port = network_ports.get(port_id)
+        if port is None:
+            return {"id": port_id}
+        return {
+            "id": port.id,
+            "name": port.name,
+            "network": network_info(port.network_id),
+            "fixed_ips": [ip["ip_address"] for ip in port.fixed_ips or []],
+            "floating_ips": floating_ips.get(port.id, []),
+            "port_forwardings": port_forwardings.get(port.id, []),
+        }
+
+    def trunk_info(port_id):
+        port = network_ports.get(port_id)
+        if not port or not port.trunk_details:
+            return None
+        trunk_id = port.trunk_details["trunk_id"]
+        trunk = trunks.get(trunk_id)
+        return {
+            "id": trunk_id,
+            "name": trunk.name if trunk else None,
+            "sub_ports": [
+                dict(port_info(sub_port["port_id"]), vlan=sub_port["segmentation_id"])
+                for sub_port in port.trunk_details["sub_ports"]
+            ],
+        }
+
+    baremetal_ports = sorted(
+        (
+            port
+            for port in inventory["baremetal ports"]
+            if port.local_link_connection.get("switch_info")
+            and switch in (None, port.local_link_connection["switch_info"])
+        ),
+        key=lambda port: (
+            port.local_link_connection["switch_info"],
+            port.local_link_connection.get("port_id") or "",
+        ),
+    )
+    for port in baremetal_ports:
+        node = nodes.get(port.node_id)
+        vif = port.internal_info.get("tenant_vif_port_id")
+        yield {
+            "switch": port.local_link_connection["switch_info"],
+            "switch_id": port.local_link_connection.get("switch_id"),
+            "switchport": port.local_link_connection.get("port_id"),
+            "mac_address": port.address,
+            "node": {
+                "id": port.node_id,
+                "name": node.name if node else None,
+                "provision_state": node.provision_state if node else None,
+            },
+            "network_port": port_info(vif) if vif else None,
+            "trunk": trunk_info(vif) if vif else None,
+        }
+
+
+def write_jsonl(records, stream):
+    """Write one JSON object per line"""
+    for record in records:
+        stream.write(json.dumps(record, sort_keys=True))
+        stream.write("\n")
+
+
+def write_dot(records, stream):
+    """Write a Graphviz digraph of switches, switch ports, nodes, network
+    ports, trunks and networks
+
+    Each vertex is declared once, so memory use is linear in the number of
+    vertices.
+    """
+    declared = set()
+
+    def quote(value):
+        return json.dumps(str(value))
+
+    def vertex(vertex_id, label, shape):
+        if vertex_id not in declared:
+            declared.add(vertex_id)
+            stream.write(
+                "  %s [label=%s, shape=%s];\n" % (quote(vertex_id), quote(label), shape)
+            )
+        return vertex_id
+
+    def edge(tail, head, label=None):
+        stream.write(
+            "  %s -> %s%s;\n"
+            % (quote(tail), quote(head), " [label=%s]" % quote(label) if label else "")
+        )
+
+    def network_vertex(network):
+        name = network.get("name") or network["id"]
+        if network.get("vlan") is not None:
+            name = "%s (%s)" % (name, network["vlan"])
+        return vertex("network:%s" % network["id"], name, "ellipse")
+
+    def port_vertex(port):
+        label = "\n".join(
+            [port.get("name") or port["id"]]
+            + port.get("fixed_ips", [])
+            + port.get("floating_ips", [])
+            + [
+                "%(floating_ip)s:%(external_port)s/%(protocol)s" % pfwd
+                for pfwd in port.get("port_forwardings", [])
+            ]
+        )
+        port_id = vertex("port:%s" % port["id"], label, "box")
+        if "network" in port:
+            edge(port_id, network_vertex(port["network"]))
+        return port_id
+
+    stream.write("digraph topology {\n  rankdir=LR;\n")
+    for record in records:
+        switch = vertex("switch:%s" % record["switch"], record["switch"], "box3d")
+        switchport = vertex(
+            "switchport:%s:%s" % (record["switch"], record["switchport"]),
+            record["switchport"],
+            "cds",
+        )
+        node = vertex(
+            "node:%s" % record["node"]["id"],
+            record["node"]["name"] or record["node"]["id"],
+            "component",
+        )
+        edge(switch, switchport)
+        edge(switchport, node)
+        if record["network_port"]:
+            port = port_vertex(record["network_port"])
+            edge(node, port)
+            if record["trunk"]:
+                trunk = vertex(
+                    "trunk:%s" % record["trunk"]["id"],
+                    record["trunk"]["name"] or record["trunk"]["id"],
+                    "trapezium",
+                )
+                edge(port, trunk)
+                for sub_port in record["trunk"]["sub_ports"]:
+                    edge(trunk, port_vertex(sub_port), "vlan %s" % sub_port["vlan"])
+    stream.write("}\n")
+
+
+WRITERS = {JSONL: write_jsonl, DOT: write_dot}
+
+
+class Dump(command.Command):
+    """Dump the topology from switches to VLANs and IPs"""
+
+    log = logging.getLogger(__name__ + ".Dump")
+
+    def get_parser(self, prog_name):
+        parser = super(Dump, self).get_parser(prog_name)
+        parser.add_argument(
+            "--format",
+            dest="output_format",
+            choices=sorted(WRITERS),
+            default=JSONL,
+            help=_(
+                "Write one JSON object per switch port (jsonl), or a "
+                "Graphviz digraph (dot). Default: jsonl"
+            ),
+        )
+        parser.add_argument(
+            "--switch",
+            metavar="<switch>",
+            help=_("Only dump the ports of this switch"),
+        )
+        parser.add_argument(
+            "--timings",
+            default=False,
+            action="store_true",
+            help=_("Report the time taken by each fetch on stderr"),
+        )
+        return parser
+
+    def take_action(self, parsed_args):
+        self.log.debug("take_action(%s)", parsed_args)
+
+        utils.govern_api_calls(self.app.client_manager)
+        inventory, timings = fetch_inventory(
+            self.app.client_manager.sdk_connection.baremetal,
+            self.app.client_manager.network,
+        )
+        for stage, (count, elapsed) in sorted(timings.items()):
+            self.log.debug("fetched %d %s in %.3fs", count, stage, elapsed)
+            if parsed_args.timings:
+                self.app.stderr.write(
+                    "fetched %d %s in %.3fs\n" % (count, stage, elapsed)
+                )
+
+        start = time.monotonic()
+        WRITERS[parsed_args.output_format](
+            switch_ports(inventory, parsed_args.switch), self.app.stdout
+        )
+        if parsed_args.timings:
+            self.app.stderr.write(
+                "joined and wrote the topology in %.3fs\n" % (time.monotonic() - start)
+            )
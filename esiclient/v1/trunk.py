@@ -32,19 +32,22 @@ class List(command.Lister):
         self.log.debug("take_action(%s)", parsed_args)
 
         neutron_client = self.app.client_manager.network
-        trunks = neutron_client.trunks()
-        networks = list(neutron_client.networks())
-        networks_dict = {n.id: n for n in networks}
-
-        data = []
-        for trunk in trunks:
-            trunk_port = neutron_client.get_port(trunk.port_id)
-            network_names, port_names, _ = utils.get_full_network_info_from_port(
-                trunk_port, neutron_client, networks_dict
-            )
-            data.append([trunk.name, "\n".join(port_names), "\n".join(network_names)])
+        trunks = list(neutron_client.trunks())
+        networks_dict = {n.id: n for n in neutron_client.networks()}
+        ports_dict = {p.id: p for p in neutron_client.ports()}
+
+        def rows():
+            for trunk in trunks:
+                # a trunk created since the ports were listed is fetched
+                trunk_port = ports_dict.get(trunk.port_id) or neutron_client.get_port(
+                    trunk.port_id
+                )
+                network_names, port_names, _ = utils.get_full_network_info_from_port(
+                    trunk_port, neutron_client, networks_dict, ports_dict
+                )
+                yield [trunk.name, "\n".join(port_names), "\n".join(network_names)]
 
-        return ["Trunk", "Port", "Network"], data
+        return ["Trunk", "Port", "Network"], rows()
 
 
 class Create(command.ShowOne):
@@ -210,7 +213,7 @@ class RemoveNetwork(command.ShowOne):
 
         trunk = neutron_client.delete_trunk_subports(trunk.id, sub_ports)
         for sub_port in sub_ports:
-            neutron_client.delete_port(sub_port["port_id"])
+            utils.delete_port(neutron_client, sub_port["port_id"])
 
         return ["Trunk", "Sub Ports"], [trunk.name, trunk.sub_ports]
 
@@ -237,4 +240,5 @@ class Delete(command.Command):
                 "ERROR: no trunk named {0}".format(parsed_args.name)
             )
 
+        utils.govern_api_calls(self.app.client_manager)
         utils.delete_trunk(neutron_client, trunk)